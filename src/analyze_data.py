@@ -1,35 +1,71 @@
 import os
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 from datetime import datetime
+from armazenamento import caminho_temporario, carregar_manifesto, ler_dataframe, salvar_dataframe
+from armazem_colunar import ArmazemColunar
+from catalogo import resolver_dataset
+from esquemas import aplicar_esquema, tipo_declarado
+from contexto_analise import ContextoAnalise
+from cubo import cubo_do_contexto
+from escolas import escolas_do_contexto
+from estatisticas import EstatisticasAgregaveis
+from transform_data import carregar_dados_particionados
+from graficos import renderizar_graficos
+from instrumentacao import instrumentar, instrumentar_main
 
 # Configurar o estilo das visualizações
-plt.style.use('seaborn-v0_8-whitegrid')
+matplotlib.style.use('seaborn-v0_8-whitegrid')
 sns.set_palette('Blues_r')
 
-def carregar_dados_processados(diretorio, prefixo_arquivo):
+# Colunas da tabela fato utilizadas pelas análises (projeção na leitura)
+COLUNAS_FATO_ANALISE = [
+    'id_tempo', 'id_geografia', 'id_dim_escola', 'id_perfil_familiar', 'id_perfil_pretensao', 'proficiencia_media'
+]
+# Resolução das imagens dos gráficos
+DPI_GRAFICOS = 300
+# Subdiretório dos dados processados com as estatísticas parciais de cada partição
+DIRETORIO_PARCIAIS = '_parciais'
+
+@instrumentar
+def carregar_dados_processados(diretorio, prefixo_arquivo, colunas=None, versao=None, filtro_particoes=None):
     """
     Carrega os dados processados mais recentes de um determinado tipo.
     
+    O dataset é localizado pelo catálogo dos dados processados, que também
+    verifica as colunas pedidas antes da leitura. Datasets mantidos de forma
+    particionados (com manifesto de partições), como a tabela fato, são lidos
+    partição a partição, e apenas as partições do filtro são lidas.
+    
     Args:
         diretorio (str): Diretório onde os dados estão armazenados
-        prefixo_arquivo (str): Prefixo do nome do arquivo
+        prefixo_arquivo (str): Nome do dataset (prefixo do nome do arquivo)
+        colunas (list, opcional): Colunas a serem carregadas (todas, se não informado)
+        versao (str, opcional): Versão registrada no catálogo (a atual, se não informada)
+        filtro_particoes (dict, opcional): Valores aceitos por coluna de partição
+            (ex.: {'ano': [2021]}); ignorado para datasets em arquivo único
     
     Returns:
         pandas.DataFrame: DataFrame com os dados carregados
     """
-    # Encontra o arquivo mais recente com o prefixo especificado
-    arquivos = [f for f in os.listdir(diretorio) if f.startswith(prefixo_arquivo)]
-    if not arquivos:
-        raise FileNotFoundError(f"Nenhum arquivo encontrado com o prefixo {prefixo_arquivo}")
-    
-    arquivo_mais_recente = max(arquivos)
-    caminho_arquivo = os.path.join(diretorio, arquivo_mais_recente)
-    
-    print(f"Carregando dados de: {caminho_arquivo}")
-    return pd.read_csv(caminho_arquivo)
+    dataset = resolver_dataset(diretorio, prefixo_arquivo, versao=versao, colunas=colunas)
+    if dataset['tipo'] == 'particionado':
+        df = carregar_dados_particionados(
+            dataset['caminho'], colunas=colunas, filtro_particoes=filtro_particoes
+        )
+        return aplicar_esquema(df, prefixo_arquivo)
+    
+    caminho_arquivo = dataset['caminho']
+    linhas = f" ({dataset['linhas']} linhas)" if 'linhas' in dataset else ''
+    print(f"Carregando dados de: {caminho_arquivo}{linhas}")
+    return aplicar_esquema(ler_dataframe(caminho_arquivo, colunas=colunas), prefixo_arquivo)
 
 def criar_diretorio(nome_diretorio):
     """
@@ -45,12 +81,13 @@ def criar_diretorio(nome_diretorio):
         os.makedirs(nome_diretorio)
     return nome_diretorio
 
-def analisar_desempenho_por_regiao(fato, dim_geografia, dim_tempo):
+@instrumentar
+def analisar_desempenho_por_regiao(fato_desempenho, dim_geografia, dim_tempo):
     """
     Analisa o desempenho por região.
     
     Args:
-        fato (pandas.DataFrame): DataFrame com a tabela fato
+        fato_desempenho (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto compartilhado
         dim_geografia (pandas.DataFrame): DataFrame com a dimensão geografia
         dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
     
@@ -59,22 +96,14 @@ def analisar_desempenho_por_regiao(fato, dim_geografia, dim_tempo):
     """
     print("Analisando desempenho por região...")
     
-    # Mesclar fato com dimensões
-    df_analise = fato.merge(
-        dim_geografia[['id_geografia', 'id_regiao']],
-        on='id_geografia',
-        how='left'
-    ).merge(
-        dim_tempo[['id_tempo', 'ano']],
-        on='id_tempo',
-        how='left'
-    )
+    # Roll-up do cubo de agregados para região e ano, sem voltar às linhas dos alunos
+    contexto = ContextoAnalise.obter(fato_desempenho, dim_geografia=dim_geografia, dim_tempo=dim_tempo)
+    resumo = cubo_do_contexto(contexto).resumir(['id_regiao', 'ano'])
     
     # Calcular métricas por região e ano
-    desempenho_regiao = df_analise.groupby(['id_regiao', 'ano'])['proficiencia_media'].agg(
-        proficiencia_media=('mean'),
-        quantidade_alunos=('count')
-    ).reset_index()
+    desempenho_regiao = resumo[['id_regiao', 'ano', 'media', 'quantidade']].rename(
+        columns={'media': 'proficiencia_media', 'quantidade': 'quantidade_alunos'}
+    )
     
     # Adicionar nome da região se disponível
     if 'regiao_desc' in dim_geografia.columns:
@@ -84,12 +113,13 @@ def analisar_desempenho_por_regiao(fato, dim_geografia, dim_tempo):
     print("Análise de desempenho por região concluída!")
     return desempenho_regiao
 
-def analisar_desempenho_por_tipo_escola(fato, dim_escola, dim_tempo):
+@instrumentar
+def analisar_desempenho_por_tipo_escola(fato_desempenho, dim_escola, dim_tempo):
     """
     Analisa o desempenho por tipo de escola (pública vs privada).
     
     Args:
-        fato (pandas.DataFrame): DataFrame com a tabela fato
+        fato_desempenho (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto compartilhado
         dim_escola (pandas.DataFrame): DataFrame com a dimensão escola
         dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
     
@@ -103,37 +133,104 @@ def analisar_desempenho_por_tipo_escola(fato, dim_escola, dim_tempo):
     if 'id_dependencia_adm_desc' in dim_escola.columns:
         cols_escola.append('id_dependencia_adm_desc')
     
-    # Mesclar fato com dimensões
-    df_analise = fato.merge(
-        dim_escola[cols_escola],
-        on='id_dim_escola',
-        how='left'
-    ).merge(
-        dim_tempo[['id_tempo', 'ano']],
-        on='id_tempo',
-        how='left'
-    )
-    
-    # Calcular métricas por tipo de escola e ano
+    # Calcular métricas por tipo de escola e ano com o roll-up do cubo de agregados
     grupo_by = ['id_dependencia_adm', 'ano']
     if 'id_dependencia_adm_desc' in cols_escola:
         grupo_by = ['id_dependencia_adm', 'id_dependencia_adm_desc', 'ano']
     
-    desempenho_escola = df_analise.groupby(grupo_by)['proficiencia_media'].agg(
-        proficiencia_media=('mean'),
-        quantidade_alunos=('count')
-    ).reset_index()
+    contexto = ContextoAnalise.obter(fato_desempenho, dim_escola=dim_escola, dim_tempo=dim_tempo)
+    resumo = cubo_do_contexto(contexto).resumir(grupo_by)
+    desempenho_escola = resumo[grupo_by + ['media', 'quantidade']].rename(
+        columns={'media': 'proficiencia_media', 'quantidade': 'quantidade_alunos'}
+    )
     
     print("Análise de desempenho por tipo de escola concluída!")
     return desempenho_escola
 
-def analisar_desempenho_apoio_familiar(fato, dim_aluno, dim_tempo):
+def _agregar_por_perfil(contexto, nome_dimensao):
+    """
+    Soma e quantidade das proficiências por perfil de questionário e ano.
+    
+    A tabela fato é reduzida uma única vez a uma linha por perfil e ano; as
+    análises por resposta agregam essas linhas ponderando pela quantidade de
+    alunos de cada perfil, em vez de juntar as respostas a todos os alunos.
+    As chaves da fato são resolvidas em posições das dimensões pelo contexto
+    e as somas são feitas com np.bincount, sem merges nem groupby na fato.
+    
+    Args:
+        contexto (ContextoAnalise): Contexto com a tabela fato e as dimensões
+            perfil e tempo (dim_tempo)
+        nome_dimensao (str): Nome da dimensão perfil (ex.: 'dim_perfil_familiar')
+    
+    Returns:
+        tuple: DataFrame com a posição do perfil na dimensão ('posicao_perfil'), o
+            código do ano ('codigo_ano'), a soma das proficiências ('soma_proficiencia')
+            e a quantidade de alunos com nota ('quantidade_alunos') de cada perfil e
+            ano, e os anos em ordem crescente (numpy.ndarray, indexado pelo código)
+    """
+    dim_perfil = contexto.dimensoes[nome_dimensao]
+    codigos_ano, anos = pd.factorize(contexto.dimensoes['dim_tempo']['ano'], sort=True)
+    posicao_perfil = contexto.posicoes(nome_dimensao)
+    posicao_tempo = contexto.posicoes('dim_tempo')
+    notas = contexto.atributo('proficiencia_media').to_numpy(dtype=np.float64, na_value=np.nan)
+    validas = (posicao_perfil >= 0) & (posicao_tempo >= 0) & ~np.isnan(notas)
+    
+    # Grupo (perfil, ano) de cada aluno com nota, endereçado diretamente; soma em
+    # float64 para não acumular erro de arredondamento das notas em float32
+    grupo = posicao_perfil[validas] * len(anos) + codigos_ano[posicao_tempo[validas]]
+    tamanho = len(dim_perfil) * len(anos)
+    soma = np.bincount(grupo, weights=notas[validas], minlength=tamanho)
+    quantidade = np.bincount(grupo, minlength=tamanho)
+    presentes = np.flatnonzero(quantidade)
+    
+    por_perfil = pd.DataFrame({
+        'posicao_perfil': presentes // len(anos),
+        'codigo_ano': presentes % len(anos),
+        'soma_proficiencia': soma[presentes],
+        'quantidade_alunos': quantidade[presentes]
+    })
+    return por_perfil, np.asarray(anos)
+
+def _media_ponderada(por_perfil, anos, respostas):
+    """
+    Proficiência média e quantidade de alunos por resposta e ano, a partir das
+    somas por perfil ponderadas pela quantidade de alunos de cada perfil.
+    
+    Args:
+        por_perfil (pandas.DataFrame): Somas por perfil e ano (_agregar_por_perfil)
+        anos (numpy.ndarray): Anos indexados pelo código do ano
+        respostas (pandas.Series): Coluna de respostas da dimensão perfil
+    
+    Returns:
+        pandas.DataFrame: Resposta, ano, proficiencia_media e quantidade_alunos das
+            combinações observadas, ordenadas por resposta e ano
+    """
+    respostas = respostas.astype('category')
+    codigos = respostas.cat.codes.to_numpy().astype(np.int64)[por_perfil['posicao_perfil'].to_numpy()]
+    validos = codigos >= 0
+    
+    grupo = codigos[validos] * len(anos) + por_perfil['codigo_ano'].to_numpy()[validos]
+    tamanho = len(respostas.cat.categories) * len(anos)
+    soma = np.bincount(grupo, weights=por_perfil['soma_proficiencia'].to_numpy()[validos], minlength=tamanho)
+    quantidade = np.bincount(grupo, weights=por_perfil['quantidade_alunos'].to_numpy()[validos], minlength=tamanho)
+    presentes = np.flatnonzero(quantidade)
+    
+    return pd.DataFrame({
+        respostas.name: pd.Categorical.from_codes(presentes // len(anos), dtype=respostas.dtype),
+        'ano': anos[presentes % len(anos)],
+        'proficiencia_media': soma[presentes] / quantidade[presentes],
+        'quantidade_alunos': quantidade[presentes].astype(np.int64)
+    })
+
+@instrumentar
+def analisar_desempenho_apoio_familiar(fato_desempenho, dim_perfil_familiar, dim_tempo):
     """
     Analisa a relação entre desempenho e apoio familiar.
     
     Args:
-        fato (pandas.DataFrame): DataFrame com a tabela fato
-        dim_aluno (pandas.DataFrame): DataFrame com a dimensão aluno
+        fato_desempenho (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto compartilhado
+        dim_perfil_familiar (pandas.DataFrame): DataFrame com a dimensão perfil
+            familiar (itens COLUNAS_QUESTIONARIO_SAEB do questionário)
         dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
     
     Returns:
@@ -143,31 +240,25 @@ def analisar_desempenho_apoio_familiar(fato, dim_aluno, dim_tempo):
     
     # Identificar colunas que podem representar apoio familiar
     # Ajustar conforme os dados disponíveis no seu caso
-    colunas_apoio = [col for col in dim_aluno.columns if col.startswith('tx_resp_q') and col.endswith('_desc')]
+    colunas_apoio = [
+        col for col in dim_perfil_familiar.columns if col.startswith('tx_resp_q') and col.endswith('_desc')
+    ]
     
     if not colunas_apoio:
         print("Não foram encontradas colunas que representam apoio familiar!")
         return None
     
-    # Mesclar fato com dimensões
-    df_analise = fato.merge(
-        dim_aluno[['id_dim_aluno'] + colunas_apoio],
-        on='id_dim_aluno',
-        how='left'
-    ).merge(
-        dim_tempo[['id_tempo', 'ano']],
-        on='id_tempo',
-        how='left'
+    # Somas por perfil e ano, calculadas uma única vez para todas as colunas
+    contexto = ContextoAnalise.obter(fato_desempenho, dim_perfil_familiar=dim_perfil_familiar, dim_tempo=dim_tempo)
+    por_perfil, anos = contexto.reutilizar(
+        ('por_perfil', 'dim_perfil_familiar'), lambda: _agregar_por_perfil(contexto, 'dim_perfil_familiar')
     )
     
     # Para cada coluna de apoio, analisar a relação com o desempenho
     resultados = []
     for coluna in colunas_apoio:
-        # Calcular média por categoria de apoio
-        desempenho_por_apoio = df_analise.groupby([coluna, 'ano'])['proficiencia_media'].agg(
-            proficiencia_media=('mean'),
-            quantidade_alunos=('count')
-        ).reset_index()
+        # Calcular média por categoria de apoio, ponderada pela quantidade de alunos de cada perfil
+        desempenho_por_apoio = _media_ponderada(por_perfil, anos, dim_perfil_familiar[coluna])
         
         # Adicionar identificador da coluna
         desempenho_por_apoio['tipo_apoio'] = coluna
@@ -181,12 +272,13 @@ def analisar_desempenho_apoio_familiar(fato, dim_aluno, dim_tempo):
     
     return None
 
-def analisar_evolucao_desempenho(fato, dim_tempo):
+@instrumentar
+def analisar_evolucao_desempenho(fato_desempenho, dim_tempo):
     """
     Analisa a evolução do desempenho ao longo dos anos.
     
     Args:
-        fato (pandas.DataFrame): DataFrame com a tabela fato
+        fato_desempenho (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto compartilhado
         dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
     
     Returns:
@@ -194,35 +286,144 @@ def analisar_evolucao_desempenho(fato, dim_tempo):
     """
     print("Analisando evolução do desempenho ao longo dos anos...")
     
-    # Mesclar fato com dimensão tempo
-    df_analise = fato.merge(
-        dim_tempo[['id_tempo', 'ano']],
-        on='id_tempo',
-        how='left'
-    )
+    # Calcular métricas por ano com o roll-up do cubo de agregados
+    contexto = ContextoAnalise.obter(fato_desempenho, dim_tempo=dim_tempo)
+    evolucao = _evolucao_do_resumo(cubo_do_contexto(contexto).resumir(['ano']))
     
-    # Calcular métricas por ano
-    evolucao = df_analise.groupby('ano')['proficiencia_media'].agg(
-        proficiencia_media=('mean'),
-        desvio_padrao=('std'),
-        quantidade_alunos=('count'),
-        minimo=('min'),
-        maximo=('max')
-    ).reset_index()
+    print("Análise de evolução do desempenho concluída!")
+    return evolucao
+
+def _evolucao_do_resumo(resumo):
+    """
+    Monta a tabela de evolução a partir do resumo das notas por ano.
+    """
+    evolucao = resumo.rename(columns={'media': 'proficiencia_media', 'quantidade': 'quantidade_alunos'})
     
     # Calcular variação percentual em relação ao ano anterior
     evolucao['variacao_percentual'] = evolucao['proficiencia_media'].pct_change() * 100
+    return evolucao
+
+def _assinatura_parcial(caminho_particao, dim_tempo):
+    """
+    Identificador das estatísticas parciais de uma partição: muda quando o
+    arquivo da partição ou o mapeamento id_tempo -> ano mudam.
+    """
+    informacoes = os.stat(caminho_particao)
+    tempo = pd.util.hash_pandas_object(dim_tempo[['id_tempo', 'ano']], index=False)
+    conteudo = [os.path.abspath(caminho_particao), informacoes.st_size, informacoes.st_mtime_ns,
+                int(tempo.sum()), len(tempo)]
+    return hashlib.sha1(json.dumps(conteudo).encode('utf-8')).hexdigest()
+
+def _estatisticas_particao(diretorio_dados, linhas, dim_tempo, caminho_parcial):
+    """
+    Calcula e grava as estatísticas parciais das notas por ano de uma partição
+    da tabela fato (executada em um processo do pool), a partir das suas
+    linhas no armazém colunar.
+    
+    Returns:
+        pandas.DataFrame: Tabela das estatísticas parciais
+    """
+    fato = ArmazemColunar(diretorio_dados).abrir(
+        'fato_desempenho', colunas=['id_tempo', 'proficiencia_media'], linhas=linhas
+    )
+    contexto = ContextoAnalise(fato, dim_tempo=dim_tempo)
+    tabela = EstatisticasAgregaveis.calcular(
+        contexto.atributo('proficiencia_media'), contexto.visao(['ano'])
+    ).tabela
+    
+    # Gravação atômica: uma parcial interrompida não é reaproveitada
+    temporario = caminho_temporario(caminho_parcial)
+    salvar_dataframe(tabela, temporario)
+    os.replace(temporario, caminho_parcial)
+    return tabela
+
+@instrumentar
+def evolucao_desempenho_particionada(diretorio_dados, dim_tempo, processos=None):
+    """
+    Calcula a evolução do desempenho a partir das partições da tabela fato.
+    
+    As estatísticas de cada partição (EstatisticasAgregaveis por ano) são
+    calculadas em um pool de processos e gravadas em DIRETORIO_PARCIAIS; em
+    execuções seguintes, apenas as partições novas ou regravadas são lidas, e
+    as demais reaproveitam as parciais guardadas. Cada processo lê as linhas
+    da sua partição no armazém colunar (gravado antes, se desatualizado), sem
+    converter os arquivos da partição. As parciais são então combinadas, com o
+    mesmo resultado de analisar_evolucao_desempenho.
+    
+    Args:
+        diretorio_dados (str): Diretório dos dados processados
+        dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
+        processos (int, opcional): Quantidade de processos (padrão: número de CPUs)
+    
+    Returns:
+        pandas.DataFrame: DataFrame com a evolução do desempenho
+    
+    Raises:
+        ValueError: Se a tabela fato não estiver gravada de forma particionada
+    """
+    print("Analisando evolução do desempenho a partir das partições...")
+    
+    dataset = resolver_dataset(diretorio_dados, 'fato_desempenho', colunas=['id_tempo', 'proficiencia_media'])
+    if dataset['tipo'] != 'particionado':
+        raise ValueError(f"A tabela fato em {dataset['caminho']} não está particionada")
+    manifesto = carregar_manifesto(dataset['caminho'])
+    armazem = ArmazemColunar(diretorio_dados)
+    if not armazem.atualizado('fato_desempenho'):
+        armazem.materializar('fato_desempenho')
+    intervalos = armazem.intervalos('fato_desempenho')
+    diretorio_parciais = criar_diretorio(os.path.join(diretorio_dados, DIRETORIO_PARCIAIS, 'evolucao_desempenho'))
+    
+    parciais = {}
+    pendentes = {}
+    arquivos_parciais = set()
+    for chave in sorted(manifesto['particoes']):
+        caminho_particao = os.path.join(dataset['caminho'], manifesto['particoes'][chave]['arquivo'])
+        caminho_parcial = os.path.join(
+            diretorio_parciais, f"{_assinatura_parcial(caminho_particao, dim_tempo)}.parquet"
+        )
+        arquivos_parciais.add(os.path.basename(caminho_parcial))
+        if os.path.exists(caminho_parcial):
+            parciais[chave] = ler_dataframe(caminho_parcial)
+        else:
+            pendentes[chave] = (intervalos[os.path.abspath(caminho_particao)], caminho_parcial)
+    
+    print(f"{len(parciais)} partições com estatísticas guardadas, {len(pendentes)} a calcular")
+    if pendentes:
+        processos = min(processos or os.cpu_count(), len(pendentes))
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = {
+                chave: executor.submit(_estatisticas_particao, diretorio_dados, linhas, dim_tempo, caminho_parcial)
+                for chave, (linhas, caminho_parcial) in pendentes.items()
+            }
+            for chave, futuro in futuros.items():
+                parciais[chave] = futuro.result()
+    
+    # Parciais de partições que não existem mais são descartadas
+    for arquivo in os.listdir(diretorio_parciais):
+        if arquivo not in arquivos_parciais:
+            os.remove(os.path.join(diretorio_parciais, arquivo))
+    
+    combinadas = EstatisticasAgregaveis.combinar(
+        [EstatisticasAgregaveis(parciais[chave], ['ano']) for chave in sorted(parciais)], dropna=True
+    )
+    resumo = combinadas.resumo()
+    tipo = tipo_declarado('fato_desempenho', 'proficiencia_media')
+    for coluna in ['media', 'desvio_padrao', 'minimo', 'maximo']:
+        resumo[coluna] = resumo[coluna].astype(tipo)
+    evolucao = _evolucao_do_resumo(resumo)
     
     print("Análise de evolução do desempenho concluída!")
     return evolucao
 
-def analisar_desempenho_e_pretensao_futura(fato, dim_aluno, dim_tempo):
+@instrumentar
+def analisar_desempenho_e_pretensao_futura(fato_desempenho, dim_perfil_pretensao, dim_tempo):
     """
     Analisa a relação entre desempenho e pretensão futura dos alunos.
     
     Args:
-        fato (pandas.DataFrame): DataFrame com a tabela fato
-        dim_aluno (pandas.DataFrame): DataFrame com a dimensão aluno
+        fato_desempenho (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto compartilhado
+        dim_perfil_pretensao (pandas.DataFrame): DataFrame com a dimensão perfil de
+            pretensão futura (itens COLUNAS_PRETENSAO_FUTURA do questionário)
         dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
     
     Returns:
@@ -232,12 +433,14 @@ def analisar_desempenho_e_pretensao_futura(fato, dim_aluno, dim_tempo):
     
     # Identificar coluna que representa pretensão futura
     # Esta coluna pode variar dependendo dos dados disponíveis
-    colunas_pretensao = [col for col in dim_aluno.columns if col.endswith('_desc') and 'futur' in col.lower()]
+    colunas_pretensao = [
+        col for col in dim_perfil_pretensao.columns if col.endswith('_desc') and 'futur' in col.lower()
+    ]
     
     # Se não encontrar automaticamente, tentar algumas colunas específicas
     if not colunas_pretensao:
         possiveis_colunas = ['tx_resp_q024_desc', 'tx_resp_q025_desc', 'tx_resp_q026_desc']
-        colunas_pretensao = [col for col in possiveis_colunas if col in dim_aluno.columns]
+        colunas_pretensao = [col for col in possiveis_colunas if col in dim_perfil_pretensao.columns]
     
     if not colunas_pretensao:
         print("Não foram encontradas colunas que representam pretensão futura!")
@@ -247,82 +450,78 @@ def analisar_desempenho_e_pretensao_futura(fato, dim_aluno, dim_tempo):
     coluna_pretensao = colunas_pretensao[0]
     print(f"Usando a coluna {coluna_pretensao} para análise de pretensão futura.")
     
-    # Mesclar fato com dimensões
-    df_analise = fato.merge(
-        dim_aluno[['id_dim_aluno', coluna_pretensao]],
-        on='id_dim_aluno',
-        how='left'
-    ).merge(
-        dim_tempo[['id_tempo', 'ano']],
-        on='id_tempo',
-        how='left'
+    # Calcular desempenho por pretensão futura, ponderando os perfis pela quantidade de alunos
+    contexto = ContextoAnalise.obter(fato_desempenho, dim_perfil_pretensao=dim_perfil_pretensao, dim_tempo=dim_tempo)
+    por_perfil, anos = contexto.reutilizar(
+        ('por_perfil', 'dim_perfil_pretensao'), lambda: _agregar_por_perfil(contexto, 'dim_perfil_pretensao')
     )
-    
-    # Calcular desempenho por pretensão futura
-    desempenho_pretensao = df_analise.groupby([coluna_pretensao, 'ano'])['proficiencia_media'].agg(
-        proficiencia_media=('mean'),
-        quantidade_alunos=('count')
-    ).reset_index()
+    desempenho_pretensao = _media_ponderada(por_perfil, anos, dim_perfil_pretensao[coluna_pretensao])
     
     print("Análise de relação entre desempenho e pretensão futura concluída!")
     return desempenho_pretensao
 
-def analisar_desempenho_estados_abaixo_media(fato, dim_geografia, dim_tempo):
+@instrumentar
+def analisar_desempenho_estados_abaixo_media(fato_desempenho, dim_geografia, dim_tempo):
     """
-    Analisa os estados/municípios com maior número de escolas abaixo da média.
+    Analisa os estados com maior percentual de escolas abaixo da média nacional.
+    
+    Uma escola está abaixo da média quando a média dos seus alunos no ano é
+    menor que a média nacional do ano; as quantidades são de escolas, e não de
+    alunos.
     
     Args:
-        fato (pandas.DataFrame): DataFrame com a tabela fato
+        fato_desempenho (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto compartilhado
         dim_geografia (pandas.DataFrame): DataFrame com a dimensão geografia
         dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
     
     Returns:
-        pandas.DataFrame: DataFrame com os estados/municípios com mais escolas abaixo da média
-    """
-    print("Analisando estados/municípios com escolas abaixo da média...")
-    
-    # Mesclar fato com dimensões
-    df_analise = fato.merge(
-        dim_geografia[['id_geografia', 'id_regiao', 'sigla_uf', 'id_municipio']],
-        on='id_geografia',
-        how='left'
-    ).merge(
-        dim_tempo[['id_tempo', 'ano']],
-        on='id_tempo',
-        how='left'
-    )
+        pandas.DataFrame: DataFrame com os estados com mais escolas abaixo da média
+    """
+    print("Analisando estados com escolas abaixo da média...")
     
-    # Calcular média nacional por ano
-    media_nacional = df_analise.groupby('ano')['proficiencia_media'].mean().reset_index()
-    media_nacional.rename(columns={'proficiencia_media': 'media_nacional'}, inplace=True)
+    # Médias das escolas calculadas no grão da escola, compartilhadas com a análise por município
+    contexto = ContextoAnalise.obter(fato_desempenho, dim_geografia=dim_geografia, dim_tempo=dim_tempo)
+    estados_abaixo_media = escolas_do_contexto(contexto).abaixo_media(['sigla_uf'])
     
-    # Mesclar com média nacional
-    df_analise = df_analise.merge(media_nacional, on='ano', how='left')
+    # Ordenar por percentual abaixo da média (decrescente)
+    estados_abaixo_media = estados_abaixo_media.sort_values(['ano', 'percentual_abaixo_media'], ascending=[True, False])
     
-    # Identificar registros abaixo da média
-    df_analise['abaixo_media'] = df_analise['proficiencia_media'] < df_analise['media_nacional']
+    print("Análise de estados com escolas abaixo da média concluída!")
+    return estados_abaixo_media
+
+@instrumentar
+def analisar_municipios_abaixo_media(fato_desempenho, dim_geografia, dim_tempo):
+    """
+    Analisa os municípios com maior percentual de escolas abaixo da média nacional.
+    
+    Args:
+        fato_desempenho (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto compartilhado
+        dim_geografia (pandas.DataFrame): DataFrame com a dimensão geografia
+        dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
     
-    # Análise por estado
-    estados_abaixo_media = df_analise.groupby(['sigla_uf', 'ano']).agg(
-        qtd_total=('id_dim_escola', 'nunique'),
-        qtd_abaixo_media=(pd.Series(df_analise['abaixo_media'] & (df_analise['id_dim_escola'] >= 0)), 'sum'),
-    ).reset_index()
+    Returns:
+        pandas.DataFrame: DataFrame com os municípios com mais escolas abaixo da média
+    """
+    print("Analisando municípios com escolas abaixo da média...")
     
-    # Calcular percentual abaixo da média
-    estados_abaixo_media['percentual_abaixo_media'] = (estados_abaixo_media['qtd_abaixo_media'] / estados_abaixo_media['qtd_total'] * 100).round(2)
+    contexto = ContextoAnalise.obter(fato_desempenho, dim_geografia=dim_geografia, dim_tempo=dim_tempo)
+    municipios_abaixo_media = escolas_do_contexto(contexto).abaixo_media(['sigla_uf', 'id_municipio'])
     
     # Ordenar por percentual abaixo da média (decrescente)
-    estados_abaixo_media = estados_abaixo_media.sort_values(['ano', 'percentual_abaixo_media'], ascending=[True, False])
+    municipios_abaixo_media = municipios_abaixo_media.sort_values(
+        ['ano', 'percentual_abaixo_media'], ascending=[True, False]
+    )
     
-    print("Análise de estados/municípios com escolas abaixo da média concluída!")
-    return estados_abaixo_media
+    print("Análise de municípios com escolas abaixo da média concluída!")
+    return municipios_abaixo_media
 
-def analisar_desempenho_pos_pandemia(fato, dim_tempo):
+@instrumentar
+def analisar_desempenho_pos_pandemia(fato_desempenho, dim_tempo):
     """
     Analisa o desempenho pós-pandemia comparado com anos anteriores.
     
     Args:
-        fato (pandas.DataFrame): DataFrame com a tabela fato
+        fato_desempenho (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto compartilhado
         dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
     
     Returns:
@@ -330,35 +529,51 @@ def analisar_desempenho_pos_pandemia(fato, dim_tempo):
     """
     print("Analisando desempenho pós-pandemia...")
     
-    # Mesclar fato com dimensão tempo
-    df_analise = fato.merge(
-        dim_tempo[['id_tempo', 'ano', 'pre_pandemia', 'durante_pandemia', 'pos_pandemia']],
-        on='id_tempo',
-        how='left'
-    )
+    contexto = ContextoAnalise.obter(fato_desempenho, dim_tempo=dim_tempo)
+    cubo = cubo_do_contexto(contexto)
     
-    # Criar categoria de período
-    df_analise['periodo'] = 'Outro'
-    df_analise.loc[df_analise['pre_pandemia'] == 1, 'periodo'] = 'Pré-Pandemia'
-    df_analise.loc[df_analise['durante_pandemia'] == 1, 'periodo'] = 'Durante Pandemia'
-    df_analise.loc[df_analise['pos_pandemia'] == 1, 'periodo'] = 'Pós-Pandemia'
+    # Criar categoria de período para cada célula do cubo (células sem ano conhecido ficam em 'Outro')
+    periodo = np.full(len(cubo), 'Outro', dtype=object)
+    for indicador, nome_periodo in [('pre_pandemia', 'Pré-Pandemia'), ('durante_pandemia', 'Durante Pandemia'),
+                                    ('pos_pandemia', 'Pós-Pandemia')]:
+        periodo[cubo.celulas[indicador].to_numpy(dtype=np.int64, na_value=0) == 1] = nome_periodo
     
-    # Calcular desempenho por período e ano
-    desempenho_pandemia = df_analise.groupby(['periodo', 'ano'])['proficiencia_media'].agg(
-        proficiencia_media=('mean'),
-        quantidade_alunos=('count')
-    ).reset_index()
+    # Calcular desempenho por período e ano com o roll-up do cubo
+    resumo = cubo.resumir(['periodo', 'ano'], atributos={'periodo': periodo})
+    desempenho_pandemia = resumo[['periodo', 'ano', 'media', 'quantidade']].rename(
+        columns={'media': 'proficiencia_media', 'quantidade': 'quantidade_alunos'}
+    )
     
     print("Análise de desempenho pós-pandemia concluída!")
     return desempenho_pandemia
 
-def visualizar_desempenho_por_regiao(dados, dir_saida):
+def _nova_figura(figsize):
+    """
+    Cria uma figura com o canvas Agg, independente do estado global do pyplot.
+    """
+    figura = Figure(figsize=figsize)
+    FigureCanvasAgg(figura)
+    return figura, figura.add_subplot()
+
+def _salvar_figura(figura, dir_saida, nome_arquivo, dpi):
+    caminho_arquivo = os.path.join(dir_saida, nome_arquivo)
+    figura.tight_layout()
+    figura.savefig(caminho_arquivo, dpi=dpi)
+    print(f"Visualização salva em: {caminho_arquivo}")
+    return caminho_arquivo
+
+@instrumentar
+def visualizar_desempenho_por_regiao(dados, dir_saida, dpi=DPI_GRAFICOS):
     """
     Cria visualização do desempenho por região.
     
     Args:
         dados (pandas.DataFrame): DataFrame com os dados de desempenho por região
         dir_saida (str): Diretório para salvar a visualização
+        dpi (int): Resolução da imagem
+    
+    Returns:
+        str: Caminho da imagem gravada
     """
     print("Criando visualização do desempenho por região...")
     
@@ -369,20 +584,20 @@ def visualizar_desempenho_por_regiao(dados, dir_saida):
         coluna_x = 'id_regiao'
     
     # Configurar a figura
-    plt.figure(figsize=(12, 7))
+    figura, ax = _nova_figura((12, 7))
     
     # Preparar dados para o gráfico
     ultimo_ano = dados['ano'].max()
     dados_ultimo_ano = dados[dados['ano'] == ultimo_ano]
     
     # Criar gráfico de barras
-    ax = sns.barplot(x=coluna_x, y='proficiencia_media', data=dados_ultimo_ano)
+    sns.barplot(x=coluna_x, y='proficiencia_media', data=dados_ultimo_ano, ax=ax)
     
     # Adicionar rótulos e título
-    plt.title(f'Desempenho Médio por Região no Ano {ultimo_ano}', fontsize=16)
-    plt.xlabel('Região', fontsize=12)
-    plt.ylabel('Proficiência Média', fontsize=12)
-    plt.xticks(rotation=45)
+    ax.set_title(f'Desempenho Médio por Região no Ano {ultimo_ano}', fontsize=16)
+    ax.set_xlabel('Região', fontsize=12)
+    ax.set_ylabel('Proficiência Média', fontsize=12)
+    ax.tick_params(axis='x', labelrotation=45)
     
     # Adicionar rótulos de valores
     for p in ax.patches:
@@ -391,20 +606,20 @@ def visualizar_desempenho_por_regiao(dados, dir_saida):
                     ha='center', va='bottom', fontsize=10)
     
     # Salvar gráfico
-    caminho_arquivo = os.path.join(dir_saida, 'desempenho_por_regiao.png')
-    plt.tight_layout()
-    plt.savefig(caminho_arquivo, dpi=300)
-    plt.close()
-    
-    print(f"Visualização salva em: {caminho_arquivo}")
+    return _salvar_figura(figura, dir_saida, 'desempenho_por_regiao.png', dpi)
 
-def visualizar_desempenho_por_tipo_escola(dados, dir_saida):
+@instrumentar
+def visualizar_desempenho_por_tipo_escola(dados, dir_saida, dpi=DPI_GRAFICOS):
     """
     Cria visualização do desempenho por tipo de escola.
     
     Args:
         dados (pandas.DataFrame): DataFrame com os dados de desempenho por tipo de escola
         dir_saida (str): Diretório para salvar a visualização
+        dpi (int): Resolução da imagem
+    
+    Returns:
+        str: Caminho da imagem gravada
     """
     print("Criando visualização do desempenho por tipo de escola...")
     
@@ -415,46 +630,46 @@ def visualizar_desempenho_por_tipo_escola(dados, dir_saida):
         coluna_x = 'id_dependencia_adm'
     
     # Configurar a figura
-    plt.figure(figsize=(12, 7))
+    figura, ax = _nova_figura((12, 7))
     
     # Preparar dados para o gráfico
     pivot_data = dados.pivot(index=coluna_x, columns='ano', values='proficiencia_media')
     
     # Criar gráfico de barras agrupadas
-    ax = pivot_data.plot(kind='bar', figsize=(12, 7))
+    pivot_data.plot(kind='bar', ax=ax)
     
     # Adicionar rótulos e título
-    plt.title('Desempenho Médio por Tipo de Escola ao Longo dos Anos', fontsize=16)
-    plt.xlabel('Tipo de Escola', fontsize=12)
-    plt.ylabel('Proficiência Média', fontsize=12)
-    plt.legend(title='Ano')
+    ax.set_title('Desempenho Médio por Tipo de Escola ao Longo dos Anos', fontsize=16)
+    ax.set_xlabel('Tipo de Escola', fontsize=12)
+    ax.set_ylabel('Proficiência Média', fontsize=12)
+    ax.legend(title='Ano')
     
     # Salvar gráfico
-    caminho_arquivo = os.path.join(dir_saida, 'desempenho_por_tipo_escola.png')
-    plt.tight_layout()
-    plt.savefig(caminho_arquivo, dpi=300)
-    plt.close()
-    
-    print(f"Visualização salva em: {caminho_arquivo}")
+    return _salvar_figura(figura, dir_saida, 'desempenho_por_tipo_escola.png', dpi)
 
-def visualizar_evolucao_desempenho(dados, dir_saida):
+@instrumentar
+def visualizar_evolucao_desempenho(dados, dir_saida, dpi=DPI_GRAFICOS):
     """
     Cria visualização da evolução do desempenho ao longo dos anos.
     
     Args:
         dados (pandas.DataFrame): DataFrame com os dados de evolução do desempenho
         dir_saida (str): Diretório para salvar a visualização
+        dpi (int): Resolução da imagem
+    
+    Returns:
+        str: Caminho da imagem gravada
     """
     print("Criando visualização da evolução do desempenho...")
     
     # Configurar a figura
-    plt.figure(figsize=(12, 7))
+    figura, ax = _nova_figura((12, 7))
     
     # Criar gráfico de linha
-    plt.plot(dados['ano'], dados['proficiencia_media'], marker='o', linestyle='-', linewidth=2, markersize=8)
+    ax.plot(dados['ano'], dados['proficiencia_media'], marker='o', linestyle='-', linewidth=2, markersize=8)
     
     # Adicionar área de desvio padrão
-    plt.fill_between(
+    ax.fill_between(
         dados['ano'],
         dados['proficiencia_media'] - dados['desvio_padrao'],
         dados['proficiencia_media'] + dados['desvio_padrao'],
@@ -462,47 +677,47 @@ def visualizar_evolucao_desempenho(dados, dir_saida):
     )
     
     # Adicionar rótulos e título
-    plt.title('Evolução do Desempenho no SAEB ao Longo dos Anos', fontsize=16)
-    plt.xlabel('Ano', fontsize=12)
-    plt.ylabel('Proficiência Média', fontsize=12)
-    plt.grid(True, alpha=0.3)
+    ax.set_title('Evolução do Desempenho no SAEB ao Longo dos Anos', fontsize=16)
+    ax.set_xlabel('Ano', fontsize=12)
+    ax.set_ylabel('Proficiência Média', fontsize=12)
+    ax.grid(True, alpha=0.3)
     
     # Adicionar rótulos de valores
     for i, row in dados.iterrows():
-        plt.text(row['ano'], row['proficiencia_media'] + 5, f"{row['proficiencia_media']:.1f}", ha='center')
+        ax.text(row['ano'], row['proficiencia_media'] + 5, f"{row['proficiencia_media']:.1f}", ha='center')
     
     # Salvar gráfico
-    caminho_arquivo = os.path.join(dir_saida, 'evolucao_desempenho.png')
-    plt.tight_layout()
-    plt.savefig(caminho_arquivo, dpi=300)
-    plt.close()
-    
-    print(f"Visualização salva em: {caminho_arquivo}")
+    return _salvar_figura(figura, dir_saida, 'evolucao_desempenho.png', dpi)
 
-def visualizar_estados_abaixo_media(dados, dir_saida):
+@instrumentar
+def visualizar_estados_abaixo_media(dados, dir_saida, dpi=DPI_GRAFICOS):
     """
     Cria visualização dos estados com mais escolas abaixo da média.
     
     Args:
         dados (pandas.DataFrame): DataFrame com os dados de estados abaixo da média
         dir_saida (str): Diretório para salvar a visualização
+        dpi (int): Resolução da imagem
+    
+    Returns:
+        str: Caminho da imagem gravada
     """
     print("Criando visualização dos estados com escolas abaixo da média...")
     
     # Configurar a figura
-    plt.figure(figsize=(14, 8))
+    figura, ax = _nova_figura((14, 8))
     
     # Preparar dados para o gráfico
     ultimo_ano = dados['ano'].max()
     dados_ultimo_ano = dados[dados['ano'] == ultimo_ano].sort_values('percentual_abaixo_media', ascending=True).tail(10)
     
     # Criar gráfico de barras horizontais
-    ax = sns.barplot(x='percentual_abaixo_media', y='sigla_uf', data=dados_ultimo_ano)
+    sns.barplot(x='percentual_abaixo_media', y='sigla_uf', data=dados_ultimo_ano, ax=ax)
     
     # Adicionar rótulos e título
-    plt.title(f'Top 10 Estados com Maior Percentual de Escolas Abaixo da Média ({ultimo_ano})', fontsize=16)
-    plt.xlabel('Percentual de Escolas Abaixo da Média (%)', fontsize=12)
-    plt.ylabel('Estado', fontsize=12)
+    ax.set_title(f'Top 10 Estados com Maior Percentual de Escolas Abaixo da Média ({ultimo_ano})', fontsize=16)
+    ax.set_xlabel('Percentual de Escolas Abaixo da Média (%)', fontsize=12)
+    ax.set_ylabel('Estado', fontsize=12)
     
     # Adicionar rótulos de valores
     for p in ax.patches:
@@ -511,25 +726,25 @@ def visualizar_estados_abaixo_media(dados, dir_saida):
                     va='center', fontsize=10)
     
     # Salvar gráfico
-    caminho_arquivo = os.path.join(dir_saida, 'estados_abaixo_media.png')
-    plt.tight_layout()
-    plt.savefig(caminho_arquivo, dpi=300)
-    plt.close()
-    
-    print(f"Visualização salva em: {caminho_arquivo}")
+    return _salvar_figura(figura, dir_saida, 'estados_abaixo_media.png', dpi)
 
-def visualizar_desempenho_pandemia(dados, dir_saida):
+@instrumentar
+def visualizar_desempenho_pandemia(dados, dir_saida, dpi=DPI_GRAFICOS):
     """
     Cria visualização do desempenho comparativo pré/durante/pós pandemia.
     
     Args:
         dados (pandas.DataFrame): DataFrame com os dados de desempenho e pandemia
         dir_saida (str): Diretório para salvar a visualização
+        dpi (int): Resolução da imagem
+    
+    Returns:
+        str: Caminho da imagem gravada
     """
     print("Criando visualização do desempenho pré/durante/pós pandemia...")
     
     # Configurar a figura
-    plt.figure(figsize=(12, 7))
+    figura, ax = _nova_figura((12, 7))
     
     # Criar gráfico de linha por período
     periodos = ['Pré-Pandemia', 'Durante Pandemia', 'Pós-Pandemia']
@@ -538,25 +753,30 @@ def visualizar_desempenho_pandemia(dados, dir_saida):
     for periodo, cor in zip(periodos, cores):
         dados_periodo = dados[dados['periodo'] == periodo]
         if not dados_periodo.empty:
-            plt.plot(dados_periodo['ano'], dados_periodo['proficiencia_media'], 
+            ax.plot(dados_periodo['ano'], dados_periodo['proficiencia_media'], 
                     marker='o', linestyle='-', linewidth=2, 
                     label=periodo, color=cor)
     
     # Adicionar rótulos e título
-    plt.title('Impacto da Pandemia no Desempenho dos Estudantes', fontsize=16)
-    plt.xlabel('Ano', fontsize=12)
-    plt.ylabel('Proficiência Média', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    plt.legend()
+    ax.set_title('Impacto da Pandemia no Desempenho dos Estudantes', fontsize=16)
+    ax.set_xlabel('Ano', fontsize=12)
+    ax.set_ylabel('Proficiência Média', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    ax.legend()
     
     # Salvar gráfico
-    caminho_arquivo = os.path.join(dir_saida, 'desempenho_pandemia.png')
-    plt.tight_layout()
-    plt.savefig(caminho_arquivo, dpi=300)
-    plt.close()
-    
-    print(f"Visualização salva em: {caminho_arquivo}")
+    return _salvar_figura(figura, dir_saida, 'desempenho_pandemia.png', dpi)
+
+# Gráfico de cada resultado de análise
+GRAFICOS = {
+    'desempenho_regiao': visualizar_desempenho_por_regiao,
+    'desempenho_escola': visualizar_desempenho_por_tipo_escola,
+    'evolucao_desempenho': visualizar_evolucao_desempenho,
+    'estados_abaixo_media': visualizar_estados_abaixo_media,
+    'desempenho_pandemia': visualizar_desempenho_pandemia
+}
 
+@instrumentar
 def salvar_dados_para_powerbi(dados_analise, dir_saida):
     """
     Salva os dados processados para uso no Power BI.
@@ -579,9 +799,16 @@ def salvar_dados_para_powerbi(dados_analise, dir_saida):
     
     print("Todos os dados foram salvos para uso no Power BI!")
 
+@instrumentar_main('analise')
 def main():
     """
     Função principal para realizar análises e criar visualizações.
+    
+    Args:
+        instrumentar (bool): Se True, mede cada etapa e grava o relatório de
+            desempenho em JSON no diretório 'relatorios_execucao'
+        perfilar (list, opcional): Etapas (nome da função) com perfil cProfile gravado
+        medir_alocacoes (bool): Se True, mede também o pico de memória com tracemalloc
     """
     # Diretórios para dados
     diretorio_dados = 'dados_processados'
@@ -592,62 +819,71 @@ def main():
         dim_tempo = carregar_dados_processados(diretorio_dados, 'dim_tempo')
         dim_geografia = carregar_dados_processados(diretorio_dados, 'dim_geografia')
         dim_escola = carregar_dados_processados(diretorio_dados, 'dim_escola')
-        dim_aluno = carregar_dados_processados(diretorio_dados, 'dim_aluno')
-        fato_desempenho = carregar_dados_processados(diretorio_dados, 'fato_desempenho')
+        dim_perfil_familiar = carregar_dados_processados(diretorio_dados, 'dim_perfil_familiar')
+        dim_perfil_pretensao = carregar_dados_processados(diretorio_dados, 'dim_perfil_pretensao')
+        # A tabela fato é aberta do armazém colunar (arquivos mapeados em memória),
+        # sem ser lida e convertida a cada execução
+        fato_desempenho = ArmazemColunar(diretorio_dados).carregar(
+            'fato_desempenho', colunas=COLUNAS_FATO_ANALISE
+        )
     except FileNotFoundError as e:
         print(f"Erro ao carregar dados: {e}")
         return
     
+    # Visão desnormalizada compartilhada: cada dimensão é resolvida uma única vez
+    # para todas as análises
+    contexto = ContextoAnalise(
+        fato_desempenho, dim_tempo=dim_tempo, dim_geografia=dim_geografia, dim_escola=dim_escola,
+        dim_perfil_familiar=dim_perfil_familiar, dim_perfil_pretensao=dim_perfil_pretensao
+    )
+    
     # Realizar análises
     resultados_analise = {}
     
     resultados_analise['desempenho_regiao'] = analisar_desempenho_por_regiao(
-        fato_desempenho, dim_geografia, dim_tempo
+        contexto, dim_geografia, dim_tempo
     )
     
     resultados_analise['desempenho_escola'] = analisar_desempenho_por_tipo_escola(
-        fato_desempenho, dim_escola, dim_tempo
+        contexto, dim_escola, dim_tempo
     )
     
     resultados_analise['desempenho_apoio'] = analisar_desempenho_apoio_familiar(
-        fato_desempenho, dim_aluno, dim_tempo
+        contexto, dim_perfil_familiar, dim_tempo
     )
     
-    resultados_analise['evolucao_desempenho'] = analisar_evolucao_desempenho(
-        fato_desempenho, dim_tempo
-    )
+    # Com a tabela fato particionada, a evolução é combinada a partir das
+    # estatísticas de cada partição, reaproveitando as das partições inalteradas
+    # e calculando as demais a partir do mesmo armazém colunar
+    if resolver_dataset(diretorio_dados, 'fato_desempenho')['tipo'] == 'particionado':
+        resultados_analise['evolucao_desempenho'] = evolucao_desempenho_particionada(
+            diretorio_dados, dim_tempo
+        )
+    else:
+        resultados_analise['evolucao_desempenho'] = analisar_evolucao_desempenho(
+            contexto, dim_tempo
+        )
     
     resultados_analise['desempenho_pretensao'] = analisar_desempenho_e_pretensao_futura(
-        fato_desempenho, dim_aluno, dim_tempo
+        contexto, dim_perfil_pretensao, dim_tempo
     )
     
     resultados_analise['estados_abaixo_media'] = analisar_desempenho_estados_abaixo_media(
-        fato_desempenho, dim_geografia, dim_tempo
+        contexto, dim_geografia, dim_tempo
     )
     
-    resultados_analise['desempenho_pandemia'] = analisar_desempenho_pos_pandemia(
-        fato_desempenho, dim_tempo
+    resultados_analise['municipios_abaixo_media'] = analisar_municipios_abaixo_media(
+        contexto, dim_geografia, dim_tempo
     )
     
-    # Criar visualizações
-    visualizar_desempenho_por_regiao(
-        resultados_analise['desempenho_regiao'], diretorio_resultados
-    )
-    
-    visualizar_desempenho_por_tipo_escola(
-        resultados_analise['desempenho_escola'], diretorio_resultados
-    )
-    
-    visualizar_evolucao_desempenho(
-        resultados_analise['evolucao_desempenho'], diretorio_resultados
-    )
-    
-    visualizar_estados_abaixo_media(
-        resultados_analise['estados_abaixo_media'], diretorio_resultados
+    resultados_analise['desempenho_pandemia'] = analisar_desempenho_pos_pandemia(
+        contexto, dim_tempo
     )
     
-    visualizar_desempenho_pandemia(
-        resultados_analise['desempenho_pandemia'], diretorio_resultados
+    # Criar visualizações em paralelo, apenas as que mudaram desde a última execução
+    renderizar_graficos(
+        {nome: (visualizar, resultados_analise[nome]) for nome, visualizar in GRAFICOS.items()},
+        diretorio_resultados, parametros={'dpi': DPI_GRAFICOS}
     )
     
     # Salvar dados para Power BI
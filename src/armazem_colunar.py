@@ -0,0 +1,333 @@
+import os
+import json
+import shutil
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from armazenamento import carregar_manifesto, ler_dataframe_em_lotes
+from catalogo import resolver_dataset
+from esquemas import aplicar_esquema
+from instrumentacao import instrumentar, registrar_bytes
+
+DIRETORIO_COLUNAR = '_colunar'
+NOME_METADADOS = '_colunas.json'
+# Tipo dos códigos das colunas categóricas gravadas
+TIPO_CODIGOS = 'int32'
+
+def _arquivos_origem(dataset):
+    """
+    Arquivos de dados de um dataset resolvido pelo catálogo, em ordem de leitura.
+    """
+    if dataset['tipo'] == 'particionado':
+        manifesto = carregar_manifesto(dataset['caminho'])
+        return [os.path.join(dataset['caminho'], manifesto['particoes'][chave]['arquivo'])
+                for chave in sorted(manifesto['particoes'])]
+    return [dataset['caminho']]
+
+def _assinatura_origem(arquivos):
+    """
+    Assinatura (caminho, tamanho e data de modificação) dos arquivos de origem,
+    usada para saber se o armazém colunar ainda corresponde aos dados.
+    """
+    assinatura = []
+    for caminho in arquivos:
+        informacoes = os.stat(caminho)
+        assinatura.append([os.path.abspath(caminho), informacoes.st_size, informacoes.st_mtime_ns])
+    return assinatura
+
+class _ColunaBinaria:
+    """
+    Acumula uma coluna em um arquivo binário de largura fixa.
+    
+    Colunas categóricas são gravadas como códigos, com as categorias reunidas
+    de todos os lotes. Colunas inteiras anuláveis têm, além dos valores, um
+    arquivo de máscara (1 byte por linha), criado no primeiro valor ausente.
+    """
+    
+    def __init__(self, diretorio, coluna, serie):
+        self.diretorio = diretorio
+        self.coluna = coluna
+        self.linhas = 0
+        self.categorias = None
+        self.ordenada = False
+        self._mascara = None
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            self.tipo = 'categoria'
+            self.dtype = np.dtype(TIPO_CODIGOS)
+            self.categorias = []
+            self.ordenada = bool(serie.dtype.ordered)
+            self._posicoes_categorias = {}
+        elif pd.api.types.is_extension_array_dtype(serie.dtype):
+            self.tipo = 'anulavel'
+            self.dtype = np.dtype(serie.dtype.numpy_dtype)
+        elif pd.api.types.is_numeric_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+            self.tipo = 'numerico'
+            self.dtype = np.dtype(serie.dtype)
+        else:
+            raise ValueError(f"Coluna {coluna} ({serie.dtype}) não tem largura fixa")
+        self._arquivo = open(os.path.join(diretorio, f"{coluna}.bin"), 'wb')
+    
+    def _codigos(self, serie):
+        """
+        Converte os códigos do lote para as posições das categorias reunidas.
+        """
+        serie = serie.astype('category')
+        for categoria in serie.cat.categories:
+            if categoria not in self._posicoes_categorias:
+                self._posicoes_categorias[categoria] = len(self.categorias)
+                self.categorias.append(categoria)
+        # Posição -1 (valor ausente) continua -1
+        mapa = np.array([self._posicoes_categorias[c] for c in serie.cat.categories] + [-1], dtype=self.dtype)
+        return mapa[serie.cat.codes.to_numpy()]
+    
+    def escrever(self, serie):
+        ausentes = None
+        if self.tipo == 'categoria':
+            valores = self._codigos(serie)
+        elif self.tipo == 'anulavel' or serie.hasnans and pd.api.types.is_integer_dtype(self.dtype):
+            ausentes = serie.isna().to_numpy()
+            valores = serie.to_numpy(dtype=self.dtype, na_value=0)
+        else:
+            valores = serie.to_numpy(dtype=self.dtype)
+        
+        if ausentes is not None and ausentes.any() and self._mascara is None:
+            self.tipo = 'anulavel'
+            self._mascara = open(os.path.join(self.diretorio, f"{self.coluna}.mascara.bin"), 'wb')
+            self._mascara.write(np.zeros(self.linhas, dtype=bool).tobytes())
+        if self._mascara is not None:
+            self._mascara.write((ausentes if ausentes is not None else np.zeros(len(valores), dtype=bool)).tobytes())
+        
+        self._arquivo.write(np.ascontiguousarray(valores).tobytes())
+        self.linhas += len(valores)
+    
+    def fechar(self):
+        self._arquivo.close()
+        if self._mascara is not None:
+            self._mascara.close()
+        return {
+            'tipo': self.tipo,
+            'dtype': self.dtype.str,
+            'mascara': self._mascara is not None,
+            'categorias': self.categorias,
+            'ordenada': self.ordenada
+        }
+
+class ArmazemColunar:
+    """
+    Cópia binária de datasets processados para leitura sem cópia pela análise.
+    
+    Cada coluna de chave ou medida é gravada como um arquivo de largura fixa
+    ('_colunar/<dataset>/<coluna>.bin'), aberto com numpy.memmap e entregue
+    como coluna de um DataFrame que apenas aponta para o arquivo mapeado. Abrir
+    o armazém não lê nem converte os dados: as páginas são carregadas sob
+    demanda e compartilhadas, pelo cache do sistema, entre todos os processos
+    que o abrem. Os arrays são somente leitura; alterações em uma coluna geram
+    uma cópia em memória, sem afetar o arquivo.
+    
+    O armazém é derivado da versão atual do dataset no catálogo e é regravado
+    quando os arquivos de origem mudam.
+    """
+    
+    def __init__(self, diretorio):
+        """
+        Args:
+            diretorio (str): Diretório dos dados processados
+        """
+        self.diretorio = diretorio
+        self.diretorio_colunar = os.path.join(diretorio, DIRETORIO_COLUNAR)
+    
+    def _metadados(self, nome_dataset):
+        """
+        Metadados gravados do dataset, ou None se ainda não houver armazém.
+        """
+        caminho_metadados = os.path.join(self.diretorio_colunar, nome_dataset, NOME_METADADOS)
+        if not os.path.exists(caminho_metadados):
+            return None
+        with open(caminho_metadados, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    
+    def atualizado(self, nome_dataset):
+        """
+        Indica se o armazém do dataset corresponde à versão atual do catálogo.
+        
+        Returns:
+            bool: True se o armazém existir e os arquivos de origem não tiverem mudado
+        """
+        metadados = self._metadados(nome_dataset)
+        if metadados is None:
+            return False
+        try:
+            arquivos = _arquivos_origem(resolver_dataset(self.diretorio, nome_dataset))
+            return metadados['origem'] == _assinatura_origem(arquivos)
+        except FileNotFoundError:
+            return False
+    
+    @instrumentar
+    def materializar(self, nome_dataset, colunas=None, tamanho_lote=1000000):
+        """
+        Grava o armazém colunar de um dataset a partir da sua versão atual.
+        
+        O dataset é lido em lotes, de modo que a memória usada não depende do
+        seu tamanho. O armazém é publicado com uma renomeação; processos que
+        já o tenham aberto continuam lendo a versão anterior.
+        
+        Args:
+            nome_dataset (str): Nome do dataset (ex.: 'fato_desempenho')
+            colunas (list, opcional): Colunas gravadas (todas, se não informado)
+            tamanho_lote (int): Quantidade máxima de linhas lidas por vez
+        
+        Returns:
+            dict: Metadados do armazém gravado
+        
+        Raises:
+            ValueError: Se alguma coluna não tiver largura fixa (ex.: texto)
+        """
+        dataset = resolver_dataset(self.diretorio, nome_dataset, colunas=colunas)
+        arquivos = _arquivos_origem(dataset)
+        
+        diretorio_final = os.path.join(self.diretorio_colunar, nome_dataset)
+        diretorio_temporario = os.path.join(self.diretorio_colunar, f".{nome_dataset}.{os.getpid()}.tmp")
+        diretorio_antigo = os.path.join(self.diretorio_colunar, f".{nome_dataset}.{os.getpid()}.antigo")
+        shutil.rmtree(diretorio_temporario, ignore_errors=True)
+        os.makedirs(diretorio_temporario)
+        
+        gravadas = {}
+        # Linhas do armazém correspondentes a cada arquivo de origem
+        intervalos = []
+        total = 0
+        try:
+            for caminho_arquivo in arquivos:
+                inicio = total
+                for lote in ler_dataframe_em_lotes(caminho_arquivo, tamanho_lote, colunas=colunas):
+                    lote = aplicar_esquema(lote, nome_dataset)
+                    for coluna in lote.columns:
+                        if coluna not in gravadas:
+                            gravadas[coluna] = _ColunaBinaria(diretorio_temporario, coluna, lote[coluna])
+                        gravadas[coluna].escrever(lote[coluna])
+                    total += len(lote)
+                intervalos.append([inicio, total])
+            descricoes = {coluna: gravada.fechar() for coluna, gravada in gravadas.items()}
+        except Exception:
+            for gravada in gravadas.values():
+                gravada.fechar()
+            shutil.rmtree(diretorio_temporario, ignore_errors=True)
+            raise
+        
+        linhas = {gravada.linhas for gravada in gravadas.values()}
+        metadados = {
+            'dataset': nome_dataset,
+            'versao': dataset.get('versao'),
+            'linhas': linhas.pop() if linhas else 0,
+            'colunas': descricoes,
+            'origem': _assinatura_origem(arquivos),
+            'intervalos': intervalos,
+            'gravado_em': datetime.now().isoformat(timespec='seconds')
+        }
+        with open(os.path.join(diretorio_temporario, NOME_METADADOS), 'w', encoding='utf-8') as arquivo:
+            json.dump(metadados, arquivo, indent=2, ensure_ascii=False, default=str)
+        
+        # Os arquivos mapeados por outros processos continuam válidos após a remoção
+        if os.path.exists(diretorio_final):
+            os.rename(diretorio_final, diretorio_antigo)
+        os.rename(diretorio_temporario, diretorio_final)
+        shutil.rmtree(diretorio_antigo, ignore_errors=True)
+        
+        tamanho = sum(entrada.stat().st_size for entrada in os.scandir(diretorio_final))
+        registrar_bytes(gravados=tamanho)
+        print(f"Armazém colunar de {nome_dataset}: {metadados['linhas']} linhas, "
+              f"{len(descricoes)} colunas, {tamanho / 1024 ** 2:.1f} MB")
+        return metadados
+    
+    def intervalos(self, nome_dataset):
+        """
+        Linhas do armazém correspondentes a cada arquivo de origem do dataset
+        (para um dataset particionado, a cada partição).
+        
+        Args:
+            nome_dataset (str): Nome do dataset
+        
+        Returns:
+            dict: Intervalo (início, fim) de linhas por caminho absoluto do arquivo de origem
+        
+        Raises:
+            FileNotFoundError: Se o armazém não existir
+        """
+        metadados = self._metadados(nome_dataset)
+        if metadados is None:
+            raise FileNotFoundError(f"Armazém colunar de {nome_dataset} não encontrado em {self.diretorio_colunar}")
+        return {origem[0]: tuple(intervalo) for origem, intervalo in zip(metadados['origem'], metadados['intervalos'])}
+    
+    def abrir(self, nome_dataset, colunas=None, linhas=None):
+        """
+        Abre o armazém colunar de um dataset como um DataFrame de arquivos mapeados.
+        
+        Args:
+            nome_dataset (str): Nome do dataset
+            colunas (list, opcional): Colunas abertas (todas, se não informado)
+            linhas (tuple, opcional): Intervalo (início, fim) de linhas abertas,
+                como os de intervalos (todas, se não informado)
+        
+        Returns:
+            pandas.DataFrame: DataFrame cujas colunas são visões dos arquivos mapeados
+        
+        Raises:
+            FileNotFoundError: Se o armazém não existir
+            KeyError: Se alguma coluna pedida não estiver no armazém
+        """
+        metadados = self._metadados(nome_dataset)
+        if metadados is None:
+            raise FileNotFoundError(f"Armazém colunar de {nome_dataset} não encontrado em {self.diretorio_colunar}")
+        colunas = list(metadados['colunas']) if colunas is None else list(colunas)
+        ausentes = [coluna for coluna in colunas if coluna not in metadados['colunas']]
+        if ausentes:
+            raise KeyError(f"Colunas ausentes no armazém colunar de {nome_dataset}: {ausentes}")
+        
+        diretorio_dataset = os.path.join(self.diretorio_colunar, nome_dataset)
+        inicio, fim = linhas if linhas is not None else (0, metadados['linhas'])
+        linhas = metadados['linhas']
+        
+        def mapear(nome_arquivo, dtype):
+            if linhas == 0:
+                return np.empty(0, dtype=dtype)
+            mapa = np.memmap(os.path.join(diretorio_dataset, nome_arquivo), dtype=dtype, mode='r', shape=(linhas,))
+            # Visão ndarray do mapa (o pandas espera arrays comuns); o mapa continua referenciado
+            return mapa.view(np.ndarray)[inicio:fim]
+        
+        dados = {}
+        for coluna in colunas:
+            descricao = metadados['colunas'][coluna]
+            valores = mapear(f"{coluna}.bin", np.dtype(descricao['dtype']))
+            if descricao['tipo'] == 'categoria':
+                dados[coluna] = pd.Categorical.from_codes(
+                    valores, categories=descricao['categorias'], ordered=descricao['ordenada']
+                )
+            elif descricao['mascara']:
+                mascara = mapear(f"{coluna}.mascara.bin", np.dtype(bool))
+                if np.issubdtype(valores.dtype, np.floating):
+                    dados[coluna] = pd.arrays.FloatingArray(valores, mascara, copy=False)
+                else:
+                    dados[coluna] = pd.arrays.IntegerArray(valores, mascara, copy=False)
+            else:
+                dados[coluna] = valores
+        # Um bloco por coluna: o DataFrame não consolida (nem copia) os arrays mapeados
+        return pd.DataFrame({coluna: pd.Series(valores, copy=False) for coluna, valores in dados.items()},
+                            copy=False)
+    
+    @instrumentar
+    def carregar(self, nome_dataset, colunas=None):
+        """
+        Abre o armazém colunar de um dataset, gravando-o antes se não existir ou
+        se estiver desatualizado.
+        
+        Args:
+            nome_dataset (str): Nome do dataset
+            colunas (list, opcional): Colunas abertas (todas, se não informado)
+        
+        Returns:
+            pandas.DataFrame: DataFrame cujas colunas são visões dos arquivos mapeados
+        """
+        if not self.atualizado(nome_dataset):
+            self.materializar(nome_dataset)
+        df = self.abrir(nome_dataset, colunas=colunas)
+        print(f"Armazém colunar de {nome_dataset} aberto: {len(df)} linhas, {len(df.columns)} colunas")
+        return df
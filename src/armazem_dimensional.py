@@ -0,0 +1,206 @@
+import os
+import shutil
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from armazenamento import (
+    FORMATO_PADRAO, EXTENSOES, EscritorParticionado, caminho_temporario, carregar_manifesto, ler_dataframe,
+    salvar_dataframe, salvar_manifesto
+)
+from catalogo import CatalogoDatasets
+from chaves import IndiceChaves
+from esquemas import aplicar_esquema
+
+class ArmazemDimensional:
+    """
+    Armazena as dimensões e a tabela fato de forma incremental entre execuções.
+    
+    Cada dimensão é um dataset particionado em partes ('<dimensao>/parte=00001/dados.parquet'),
+    às quais apenas os membros novos são acrescentados: as chaves substitutas já
+    atribuídas nunca mudam e os novos membros recebem as chaves seguintes à maior
+    existente (dimensões identificadas pela própria chave natural, como o perfil
+    de questionário, mantêm essa chave). A tabela fato é particionada por ano e
+    publicada em versões, como nos demais modos da transformação
+    ('fato_desempenho_<timestamp>.<versão>/ano=2021/...'): incluir um ano grava
+    apenas a partição desse ano e reaproveita as demais (ver gravar_fato). Os
+    datasets usam o mesmo manifesto ('_manifesto.json') da extração incremental,
+    são registrados no catálogo do diretório e podem ser lidos com carregar_dados.
+    """
+    
+    def __init__(self, diretorio, formato=FORMATO_PADRAO):
+        """
+        Args:
+            diretorio (str): Diretório dos dados processados
+            formato (str): Formato dos arquivos gravados ('parquet' ou 'csv')
+        """
+        self.diretorio = diretorio
+        self.formato = formato
+    
+    def _gravar_particao(self, nome_dataset, colunas_particao, valores, df):
+        """
+        Grava uma partição de forma atômica e a registra no manifesto do dataset
+        e no catálogo do diretório.
+        """
+        diretorio_dataset = os.path.join(self.diretorio, nome_dataset)
+        chave = '/'.join(f"{col}={valores[col]}" for col in colunas_particao)
+        arquivo_relativo = os.path.join(chave, f"dados{EXTENSOES[self.formato]}")
+        caminho_arquivo = os.path.join(diretorio_dataset, arquivo_relativo)
+        os.makedirs(os.path.dirname(caminho_arquivo), exist_ok=True)
+        
+        tamanho = salvar_dataframe(df, caminho_temporario(caminho_arquivo))
+        os.replace(caminho_temporario(caminho_arquivo), caminho_arquivo)
+        
+        manifesto = carregar_manifesto(diretorio_dataset)
+        manifesto['colunas_particao'] = list(colunas_particao)
+        manifesto['particoes'][chave] = {
+            'valores': valores,
+            'arquivo': arquivo_relativo,
+            'linhas': len(df),
+            'bytes': tamanho,
+            'gravado_em': datetime.now().isoformat(timespec='seconds')
+        }
+        salvar_manifesto(manifesto, diretorio_dataset)
+        CatalogoDatasets(self.diretorio).registrar_particionado(nome_dataset, df=df)
+    
+    def carregar(self, nome_dataset, colunas=None):
+        """
+        Carrega um dataset do armazém.
+        
+        Args:
+            nome_dataset (str): Nome do dataset (ex.: 'dim_escola')
+            colunas (list, opcional): Colunas a serem carregadas
+        
+        Returns:
+            pandas.DataFrame: Dados do dataset, ou None se ainda não existir
+        """
+        diretorio_dataset = os.path.join(self.diretorio, nome_dataset)
+        manifesto = carregar_manifesto(diretorio_dataset)
+        if not manifesto['particoes']:
+            return None
+        
+        partes = [
+            ler_dataframe(os.path.join(diretorio_dataset, manifesto['particoes'][chave]['arquivo']),
+                          colunas=colunas)
+            for chave in sorted(manifesto['particoes'])
+        ]
+        return aplicar_esquema(pd.concat(partes, ignore_index=True), nome_dataset)
+    
+    def integrar_dimensao(self, nome_dimensao, dim_lote, colunas_chave, coluna_id):
+        """
+        Acrescenta à dimensão os membros de um lote que ainda não existem.
+        
+        Args:
+            nome_dimensao (str): Nome da dimensão (ex.: 'dim_escola')
+            dim_lote (pandas.DataFrame): Dimensão construída apenas com os dados do
+                lote, com chaves substitutas provisórias
+            colunas_chave (list): Colunas que formam a chave natural
+            coluna_id (str): Coluna com a chave substituta. Se fizer parte da chave
+                natural (ex.: um hash), os membros novos mantêm o valor do lote
+        
+        Returns:
+            tuple: Chaves naturais e substitutas de todos os membros da dimensão
+                (pandas.DataFrame) e quantidade de membros novos (int)
+        """
+        colunas_mapa = list(dict.fromkeys(list(colunas_chave) + [coluna_id]))
+        existentes = self.carregar(nome_dimensao, colunas=colunas_mapa)
+        
+        if existentes is None:
+            novos = dim_lote.copy()
+            proximo_id = 1
+        else:
+            posicoes = IndiceChaves(existentes, colunas_chave, coluna_id, nome_dimensao).posicoes(dim_lote)
+            novos = dim_lote[posicoes < 0].copy()
+            proximo_id = int(existentes[coluna_id].max()) + 1
+        
+        if coluna_id not in colunas_chave:
+            novos[coluna_id] = range(proximo_id, proximo_id + len(novos))
+        if len(novos):
+            numero_parte = len(carregar_manifesto(os.path.join(self.diretorio, nome_dimensao))['particoes']) + 1
+            self._gravar_particao(
+                nome_dimensao, ['parte'], {'parte': f"{numero_parte:05d}"},
+                aplicar_esquema(novos, nome_dimensao)
+            )
+        print(f"{nome_dimensao}: {len(novos)} membros novos")
+        
+        mapa_novos = novos[colunas_mapa]
+        if existentes is None:
+            return mapa_novos, len(novos)
+        return pd.concat([existentes, mapa_novos], ignore_index=True), len(novos)
+    
+    def diretorio_fato(self, nome_fato='fato_desempenho'):
+        """
+        Localiza pelo catálogo o diretório da versão atual da tabela fato.
+        
+        Returns:
+            str: Diretório da versão atual, ou None se a tabela fato ainda não existir
+        """
+        try:
+            return CatalogoDatasets(self.diretorio).resolver(nome_fato)['caminho']
+        except FileNotFoundError:
+            return None
+    
+    def anos_fato(self, nome_fato='fato_desempenho'):
+        """
+        Lista os anos já gravados na versão atual da tabela fato.
+        
+        Returns:
+            set: Anos com partição registrada
+        """
+        diretorio_atual = self.diretorio_fato(nome_fato)
+        if diretorio_atual is None:
+            return set()
+        manifesto = carregar_manifesto(diretorio_atual)
+        return {int(particao['valores']['ano']) for particao in manifesto['particoes'].values()}
+    
+    def gravar_fato(self, fatos_anos, diretorio_fato, nome_fato='fato_desempenho', max_workers=4):
+        """
+        Grava uma nova versão da tabela fato, particionada por ano, com as
+        partições dos anos informados (novos ou reprocessados).
+        
+        A versão é gravada por um EscritorParticionado em um diretório novo. As
+        partições dos demais anos são reaproveitadas da versão atual por hard
+        link (os arquivos de uma versão publicada nunca são alterados), de modo
+        que o custo continua proporcional às linhas dos anos gravados. A nova
+        versão só passa a ser lida quando for registrada no catálogo.
+        
+        Args:
+            fatos_anos (dict): Linhas da tabela fato por ano
+            diretorio_fato (str): Diretório base da versão; a versão gravada é
+                publicada em '<diretorio_fato>.<versão>'
+            nome_fato (str): Nome da tabela fato
+            max_workers (int): Quantidade máxima de partições gravadas simultaneamente
+        
+        Returns:
+            str: Diretório da versão gravada da tabela fato
+        """
+        diretorio_atual = self.diretorio_fato(nome_fato)
+        with EscritorParticionado(diretorio_fato, ['ano'], formato=self.formato,
+                                  max_workers=max_workers) as escritor:
+            for ano, fato in fatos_anos.items():
+                fato = aplicar_esquema(fato, nome_fato)
+                escritor.escrever(fato, pd.DataFrame({'ano': np.full(len(fato), int(ano))}))
+            
+            if diretorio_atual is not None:
+                mantidas = {
+                    chave: particao
+                    for chave, particao in carregar_manifesto(diretorio_atual)['particoes'].items()
+                    if int(particao['valores']['ano']) not in {int(ano) for ano in fatos_anos}
+                }
+                for particao in mantidas.values():
+                    _vincular_arquivo(
+                        os.path.join(diretorio_atual, particao['arquivo']),
+                        os.path.join(escritor.diretorio_temporario, particao['arquivo'])
+                    )
+                escritor.incorporar(mantidas)
+        return escritor.diretorio_publicado
+
+def _vincular_arquivo(origem, destino):
+    """
+    Cria um hard link para um arquivo (ou uma cópia, se o sistema de arquivos não
+    suportar links).
+    """
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
@@ -0,0 +1,618 @@
+import os
+import json
+import shutil
+import hashlib
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pandas as pd
+from instrumentacao import registrar_bytes, submeter
+
+# Valor de partição usado para as linhas sem valor na coluna de partição
+VALOR_PARTICAO_AUSENTE = '__ausente__'
+# Formato padrão de armazenamento das camadas raw e processada.
+# O Parquet preserva os tipos das colunas, é comprimido e permite ler
+# apenas as colunas necessárias. O CSV continua disponível para exportação.
+FORMATO_PADRAO = 'parquet'
+COMPRESSAO_PADRAO = 'snappy'
+EXTENSOES = {
+    'parquet': '.parquet',
+    'csv': '.csv'
+}
+
+def identificar_formato(caminho_arquivo):
+    """
+    Identifica o formato de um arquivo pela sua extensão.
+    
+    Args:
+        caminho_arquivo (str): Caminho do arquivo
+    
+    Returns:
+        str: Formato do arquivo ('parquet' ou 'csv')
+    """
+    extensao = os.path.splitext(caminho_arquivo)[1].lower()
+    for formato, extensao_formato in EXTENSOES.items():
+        if extensao == extensao_formato:
+            return formato
+    raise ValueError(f"Formato de arquivo não suportado: {caminho_arquivo}")
+
+def nome_arquivo(diretorio, nome, timestamp=None, formato=FORMATO_PADRAO):
+    """
+    Monta o caminho de um arquivo de dados no formato escolhido.
+    
+    Args:
+        diretorio (str): Diretório do arquivo
+        nome (str): Nome do dataset (ex.: 'dim_tempo')
+        timestamp (str, opcional): Timestamp adicionado ao nome do arquivo
+        formato (str): Formato do arquivo ('parquet' ou 'csv')
+    
+    Returns:
+        str: Caminho completo do arquivo
+    """
+    if formato not in EXTENSOES:
+        raise ValueError(f"Formato de arquivo não suportado: {formato}")
+    base = f"{nome}_{timestamp}" if timestamp else nome
+    return os.path.join(diretorio, base + EXTENSOES[formato])
+
+def salvar_dataframe(df, caminho_arquivo, compressao=COMPRESSAO_PADRAO):
+    """
+    Salva um DataFrame no formato indicado pela extensão do arquivo.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame a ser salvo
+        caminho_arquivo (str): Caminho do arquivo (.parquet ou .csv)
+        compressao (str): Codec de compressão usado no Parquet
+    
+    Returns:
+        int: Tamanho do arquivo gravado em bytes
+    """
+    formato = identificar_formato(caminho_arquivo)
+    if formato == 'parquet':
+        df.to_parquet(caminho_arquivo, engine='pyarrow', compression=compressao, index=False)
+    else:
+        df.to_csv(caminho_arquivo, index=False)
+    tamanho = os.path.getsize(caminho_arquivo)
+    registrar_bytes(gravados=tamanho)
+    return tamanho
+
+def tamanho_leitura(caminho_arquivo, colunas=None):
+    """
+    Estima os bytes lidos do disco na leitura de um arquivo.
+    
+    No Parquet, considera apenas as colunas selecionadas (tamanho comprimido
+    dos seus blocos); no CSV, o arquivo inteiro é sempre lido.
+    
+    Args:
+        caminho_arquivo (str): Caminho do arquivo (.parquet ou .csv)
+        colunas (list, opcional): Colunas a serem carregadas
+    
+    Returns:
+        int: Quantidade de bytes
+    """
+    if colunas is None or identificar_formato(caminho_arquivo) != 'parquet':
+        return os.path.getsize(caminho_arquivo)
+    import pyarrow.parquet as pq
+    
+    metadados = pq.ParquetFile(caminho_arquivo).metadata
+    selecionadas = set(colunas)
+    return sum(
+        metadados.row_group(i).column(j).total_compressed_size
+        for i in range(metadados.num_row_groups)
+        for j in range(metadados.num_columns)
+        if metadados.row_group(i).column(j).path_in_schema in selecionadas
+    )
+
+def ler_dataframe(caminho_arquivo, colunas=None):
+    """
+    Lê um DataFrame no formato indicado pela extensão do arquivo.
+    
+    Args:
+        caminho_arquivo (str): Caminho do arquivo (.parquet ou .csv)
+        colunas (list, opcional): Colunas a serem carregadas. No Parquet apenas
+            essas colunas são lidas do disco
+    
+    Returns:
+        pandas.DataFrame: DataFrame com os dados lidos
+    """
+    formato = identificar_formato(caminho_arquivo)
+    registrar_bytes(lidos=tamanho_leitura(caminho_arquivo, colunas))
+    if formato == 'parquet':
+        return pd.read_parquet(caminho_arquivo, engine='pyarrow', columns=colunas)
+    return pd.read_csv(caminho_arquivo, usecols=colunas)
+
+def ler_dataframe_em_lotes(caminho_arquivo, tamanho_lote, colunas=None):
+    """
+    Lê um arquivo em lotes de linhas, sem carregá-lo inteiro em memória.
+    
+    Args:
+        caminho_arquivo (str): Caminho do arquivo (.parquet ou .csv)
+        tamanho_lote (int): Quantidade máxima de linhas por lote
+        colunas (list, opcional): Colunas a serem carregadas
+    
+    Returns:
+        iterator: Iterador de DataFrames, um por lote
+    """
+    formato = identificar_formato(caminho_arquivo)
+    registrar_bytes(lidos=tamanho_leitura(caminho_arquivo, colunas))
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+        
+        arquivo_parquet = pq.ParquetFile(caminho_arquivo)
+        for lote in arquivo_parquet.iter_batches(batch_size=tamanho_lote, columns=colunas):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(caminho_arquivo, usecols=colunas, chunksize=tamanho_lote)
+
+def encontrar_arquivo_mais_recente(diretorio, prefixo_arquivo):
+    """
+    Encontra o arquivo de dados mais recente com um determinado prefixo.
+    
+    Quando a mesma versão existe em mais de um formato, o Parquet tem prioridade.
+    
+    Args:
+        diretorio (str): Diretório onde os dados estão armazenados
+        prefixo_arquivo (str): Prefixo do nome do arquivo
+    
+    Returns:
+        str: Caminho do arquivo mais recente
+    """
+    prioridade = {extensao: i for i, extensao in enumerate(EXTENSOES.values())}
+    candidatos = []
+    for arquivo in os.listdir(diretorio):
+        base, extensao = os.path.splitext(arquivo)
+        if arquivo.startswith(prefixo_arquivo) and extensao.lower() in prioridade \
+                and os.path.isfile(os.path.join(diretorio, arquivo)):
+            candidatos.append((base, -prioridade[extensao.lower()], arquivo))
+    
+    if not candidatos:
+        raise FileNotFoundError(f"Nenhum arquivo encontrado com o prefixo {prefixo_arquivo}")
+    
+    return os.path.join(diretorio, max(candidatos)[2])
+
+def carregar_manifesto(diretorio_dataset):
+    """
+    Carrega o manifesto de partições de um dataset particionado.
+    
+    Args:
+        diretorio_dataset (str): Diretório do dataset particionado
+    
+    Returns:
+        dict: Manifesto com as partições já extraídas (vazio se não existir)
+    """
+    caminho_manifesto = os.path.join(diretorio_dataset, '_manifesto.json')
+    if not os.path.exists(caminho_manifesto):
+        return {'particoes': {}}
+    with open(caminho_manifesto, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def salvar_manifesto(manifesto, diretorio_dataset):
+    """
+    Salva o manifesto de partições de forma atômica.
+    
+    Args:
+        manifesto (dict): Manifesto a ser salvo
+        diretorio_dataset (str): Diretório do dataset particionado
+    """
+    caminho_manifesto = os.path.join(diretorio_dataset, '_manifesto.json')
+    caminho_temporario = caminho_manifesto + '.tmp'
+    with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=2, ensure_ascii=False, default=str)
+    os.replace(caminho_temporario, caminho_manifesto)
+
+class EscritorParquetIncremental:
+    """
+    Grava um arquivo Parquet em partes (row groups), uma por DataFrame recebido.
+    
+    O esquema é definido pelo primeiro DataFrame e as partes seguintes são
+    convertidas para ele, garantindo um arquivo com tipos consistentes. As
+    partes são gravadas em um arquivo temporário (caminho_temporario), que só
+    toma o lugar do arquivo final ao fechar; uma gravação interrompida
+    (descartar) não deixa um arquivo truncado.
+    """
+    
+    def __init__(self, caminho_arquivo, compressao=COMPRESSAO_PADRAO):
+        self.caminho_arquivo = caminho_arquivo
+        self.compressao = compressao
+        self._caminho_temporario = caminho_temporario(caminho_arquivo)
+        self._arquivo = open(self._caminho_temporario, 'wb')
+        self._escritor = None
+        self._esquema = None
+    
+    def escrever(self, df):
+        """
+        Grava um DataFrame como um novo row group.
+        
+        Args:
+            df (pandas.DataFrame): Parte dos dados a ser gravada
+        
+        Returns:
+            int: Quantidade de bytes gravados para esta parte
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        inicio = self._arquivo.tell()
+        if self._escritor is None:
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            self._esquema = tabela.schema
+            self._escritor = pq.ParquetWriter(self._arquivo, self._esquema, compression=self.compressao)
+        else:
+            tabela = pa.Table.from_pandas(df, schema=self._esquema, preserve_index=False)
+        self._escritor.write_table(tabela)
+        gravados = self._arquivo.tell() - inicio
+        registrar_bytes(gravados=gravados)
+        return gravados
+    
+    def fechar(self, df_vazio=None):
+        """
+        Finaliza o arquivo Parquet (grava o rodapé) e o publica no caminho final.
+        
+        Args:
+            df_vazio (pandas.DataFrame, opcional): Se nenhuma parte foi gravada, o
+                esquema deste DataFrame é gravado em uma tabela sem linhas (sem
+                ele, uma tabela sem colunas), de modo que o arquivo sempre pode ser lido
+        
+        Returns:
+            int: Tamanho final do arquivo em bytes
+        """
+        if self._escritor is None:
+            import pandas as pd
+            self.escrever(pd.DataFrame() if df_vazio is None else df_vazio.iloc[:0])
+        inicio = self._arquivo.tell()
+        self._escritor.close()
+        registrar_bytes(gravados=self._arquivo.tell() - inicio)
+        tamanho = self._arquivo.tell()
+        self._arquivo.close()
+        os.replace(self._caminho_temporario, self.caminho_arquivo)
+        return tamanho
+    
+    def descartar(self):
+        """
+        Interrompe a gravação e remove o arquivo temporário, sem publicar o arquivo.
+        """
+        if self._escritor is not None:
+            self._escritor.close()
+        self._arquivo.close()
+        os.remove(self._caminho_temporario)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, tipo_excecao, *args):
+        if tipo_excecao is None:
+            self.fechar()
+        else:
+            self.descartar()
+
+class EscritorCSVIncremental:
+    """
+    Grava um arquivo CSV em partes, escrevendo o cabeçalho apenas na primeira.
+    
+    Como no Parquet, as partes são gravadas em um arquivo temporário, publicado ao fechar.
+    """
+    
+    def __init__(self, caminho_arquivo):
+        self.caminho_arquivo = caminho_arquivo
+        self._caminho_temporario = caminho_temporario(caminho_arquivo)
+        self._arquivo = open(self._caminho_temporario, 'w', newline='', encoding='utf-8')
+        self._primeira_parte = True
+    
+    def escrever(self, df):
+        """
+        Grava um DataFrame ao final do arquivo.
+        
+        Args:
+            df (pandas.DataFrame): Parte dos dados a ser gravada
+        
+        Returns:
+            int: Quantidade de bytes gravados para esta parte
+        """
+        inicio = self._arquivo.tell()
+        df.to_csv(self._arquivo, index=False, header=self._primeira_parte)
+        self._primeira_parte = False
+        gravados = self._arquivo.tell() - inicio
+        registrar_bytes(gravados=gravados)
+        return gravados
+    
+    def fechar(self, df_vazio=None):
+        """
+        Fecha o arquivo e o publica no caminho final.
+        
+        Args:
+            df_vazio (pandas.DataFrame, opcional): Se nenhuma parte foi gravada, o
+                cabeçalho deste DataFrame é gravado
+        
+        Returns:
+            int: Tamanho final do arquivo em bytes
+        """
+        if self._primeira_parte and df_vazio is not None:
+            self.escrever(df_vazio.iloc[:0])
+        tamanho = self._arquivo.tell()
+        self._arquivo.close()
+        os.replace(self._caminho_temporario, self.caminho_arquivo)
+        return tamanho
+    
+    def descartar(self):
+        """
+        Interrompe a gravação e remove o arquivo temporário, sem publicar o arquivo.
+        """
+        self._arquivo.close()
+        os.remove(self._caminho_temporario)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, tipo_excecao, *args):
+        if tipo_excecao is None:
+            self.fechar()
+        else:
+            self.descartar()
+
+def abrir_escritor_incremental(caminho_arquivo, compressao=COMPRESSAO_PADRAO):
+    """
+    Cria um escritor incremental adequado ao formato do arquivo.
+    
+    Args:
+        caminho_arquivo (str): Caminho do arquivo (.parquet ou .csv)
+        compressao (str): Codec de compressão usado no Parquet
+    
+    Returns:
+        EscritorParquetIncremental ou EscritorCSVIncremental: Escritor do arquivo
+    """
+    if identificar_formato(caminho_arquivo) == 'parquet':
+        return EscritorParquetIncremental(caminho_arquivo, compressao=compressao)
+    return EscritorCSVIncremental(caminho_arquivo)
+
+def chave_particao(valores, colunas_particao):
+    """
+    Gera a chave textual de uma partição (ex.: 'ano=2019/sigla_uf=SP').
+    
+    Args:
+        valores (dict): Valores da partição por coluna
+        colunas_particao (list): Colunas que definem a partição
+    
+    Returns:
+        str: Chave da partição, usada também como caminho relativo
+    """
+    return '/'.join(f"{col}={valores[col]}" for col in colunas_particao)
+
+def grupos_particao(valores_particao, colunas_particao):
+    """
+    Agrupa as linhas de um DataFrame pelas suas partições.
+    
+    Args:
+        valores_particao (pandas.DataFrame): Valores das colunas de partição de cada
+            linha. Valores ausentes vão para a partição VALOR_PARTICAO_AUSENTE
+        colunas_particao (list): Colunas que definem a partição
+    
+    Returns:
+        iterator: Tuplas (chave da partição, valores por coluna, posições das linhas)
+    """
+    valores_particao = valores_particao[colunas_particao].reset_index(drop=True)
+    # Colunas categóricas são agrupadas pelos códigos (-1 para ausentes): com uma
+    # única chave categórica, o groupby descarta os ausentes mesmo com dropna=False
+    categorias = {}
+    for col in colunas_particao:
+        if isinstance(valores_particao[col].dtype, pd.CategoricalDtype):
+            categorias[col] = valores_particao[col].cat.categories
+            valores_particao[col] = valores_particao[col].cat.codes
+    grupos = valores_particao.groupby(colunas_particao, sort=True, dropna=False).indices
+    for valores_grupo, posicoes in grupos.items():
+        if len(colunas_particao) == 1:
+            valores_grupo = (valores_grupo,)
+        valores = {}
+        for col, valor in zip(colunas_particao, valores_grupo):
+            if col in categorias:
+                valor = categorias[col][valor] if valor >= 0 else None
+            if pd.isna(valor):
+                valor = VALOR_PARTICAO_AUSENTE
+            valores[col] = valor.item() if hasattr(valor, 'item') else valor
+        yield chave_particao(valores, colunas_particao), valores, posicoes
+
+def gravar_particoes(df, valores_particao, diretorio, colunas_particao, formato=FORMATO_PADRAO,
+                     compressao=COMPRESSAO_PADRAO):
+    """
+    Grava as linhas de um DataFrame nas suas partições dentro de um diretório,
+    sem manifesto.
+    
+    Usado por processos que gravam partições diretamente no diretório
+    temporário de um EscritorParticionado; as partições devolvidas são
+    acrescentadas ao manifesto com EscritorParticionado.incorporar.
+    
+    Args:
+        df (pandas.DataFrame): Dados a gravar (sem as colunas de partição)
+        valores_particao (pandas.DataFrame): Valores das colunas de partição de cada linha de df
+        diretorio (str): Diretório onde as partições são criadas
+        colunas_particao (list): Colunas que definem a partição
+        formato (str): Formato dos arquivos das partições ('parquet' ou 'csv')
+        compressao (str): Codec de compressão usado no Parquet
+    
+    Returns:
+        dict: Partições gravadas por chave, com 'valores', 'arquivo', 'linhas' e 'bytes'
+    """
+    particoes = {}
+    for chave, valores, posicoes in grupos_particao(valores_particao, list(colunas_particao)):
+        arquivo_relativo = os.path.join(chave, f"dados{EXTENSOES[formato]}")
+        caminho_arquivo = os.path.join(diretorio, arquivo_relativo)
+        os.makedirs(os.path.dirname(caminho_arquivo), exist_ok=True)
+        with abrir_escritor_incremental(caminho_arquivo, compressao=compressao) as escritor:
+            escritor.escrever(df.iloc[posicoes].reset_index(drop=True))
+        particoes[chave] = {
+            'valores': valores, 'arquivo': arquivo_relativo, 'linhas': len(posicoes),
+            'bytes': os.path.getsize(caminho_arquivo)
+        }
+    return particoes
+
+class EscritorParticionado:
+    """
+    Grava uma nova versão de um dataset particionado
+    ('<dataset>.<versão>/<col>=<valor>/.../dados.<formato>').
+    
+    Cada partição tem o seu escritor incremental e pode receber várias partes
+    (ex.: um lote por vez); as partes de partições diferentes são gravadas em
+    paralelo por um pool de threads. Tudo é gravado em um diretório temporário
+    ao lado do dataset. Ao confirmar, o manifesto é gravado e o diretório
+    temporário é renomeado para um diretório de versão novo, exclusivo desta
+    gravação (diretorio_publicado); nenhuma versão existente é alterada. Os
+    leitores só passam a ver a nova versão quando ela é registrada no catálogo
+    (ver CatalogoDatasets.registrar_particionado), e as versões substituídas
+    são removidas depois (ver CatalogoDatasets.remover_versoes_substituidas).
+    Se a gravação falhar, o diretório temporário é descartado.
+    
+    Outros processos podem gravar partições diretamente no diretório
+    temporário (gravar_particoes); o escritor apenas as incorpora ao manifesto.
+    """
+    
+    def __init__(self, diretorio_dataset, colunas_particao, formato=FORMATO_PADRAO,
+                 compressao=COMPRESSAO_PADRAO, max_workers=4):
+        """
+        Args:
+            diretorio_dataset (str): Diretório base do dataset; a versão gravada é
+                publicada em '<diretorio_dataset>.<versão>'
+            colunas_particao (list): Colunas que definem a partição (ex.: ['ano', 'sigla_uf'])
+            formato (str): Formato dos arquivos das partições ('parquet' ou 'csv')
+            compressao (str): Codec de compressão usado no Parquet
+            max_workers (int): Quantidade máxima de partições gravadas simultaneamente
+        """
+        if formato not in EXTENSOES:
+            raise ValueError(f"Formato de arquivo não suportado: {formato}")
+        self.diretorio_dataset = os.path.normpath(diretorio_dataset)
+        self.colunas_particao = list(colunas_particao)
+        self.formato = formato
+        self.compressao = compressao
+        self.versao = uuid.uuid4().hex[:12]
+        self.diretorio_publicado = f"{self.diretorio_dataset}.{self.versao}"
+        raiz, nome = os.path.split(self.diretorio_publicado)
+        self.diretorio_temporario = os.path.join(raiz, f".{nome}.tmp")
+        os.makedirs(self.diretorio_temporario)
+        self._escritores = {}
+        self._particoes = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+    
+    def _escrever_particao(self, chave, df):
+        escritor = self._escritores[chave]
+        gravados = escritor.escrever(df)
+        self._particoes[chave]['linhas'] += len(df)
+        return gravados
+    
+    def escrever(self, df, valores_particao):
+        """
+        Distribui as linhas de um DataFrame entre as partições e as grava.
+        
+        Args:
+            df (pandas.DataFrame): Dados a gravar (sem as colunas de partição)
+            valores_particao (pandas.DataFrame): Valores das colunas de partição de
+                cada linha de df, na mesma ordem. Valores ausentes vão para a
+                partição VALOR_PARTICAO_AUSENTE
+        
+        Returns:
+            int: Quantidade de bytes gravados
+        """
+        futuros = []
+        for chave, valores, posicoes in grupos_particao(valores_particao, self.colunas_particao):
+            if chave in self._particoes and chave not in self._escritores:
+                raise ValueError(f"A partição {chave} já foi gravada por outro processo")
+            if chave not in self._escritores:
+                arquivo_relativo = os.path.join(chave, f"dados{EXTENSOES[self.formato]}")
+                caminho_arquivo = os.path.join(self.diretorio_temporario, arquivo_relativo)
+                os.makedirs(os.path.dirname(caminho_arquivo), exist_ok=True)
+                self._escritores[chave] = abrir_escritor_incremental(caminho_arquivo, compressao=self.compressao)
+                self._particoes[chave] = {'valores': valores, 'arquivo': arquivo_relativo, 'linhas': 0}
+            parte = df.iloc[posicoes].reset_index(drop=True)
+            futuros.append(submeter(self._executor, self._escrever_particao, chave, parte))
+        # Uma partição recebe no máximo uma parte por chamada; as partes seguintes
+        # só são enviadas depois que as anteriores terminaram
+        return sum(futuro.result() for futuro in futuros)
+    
+    def incorporar(self, particoes):
+        """
+        Acrescenta ao manifesto partições gravadas no diretório temporário por
+        outro processo (ver gravar_particoes).
+        
+        Args:
+            particoes (dict): Partições por chave, como devolvidas por gravar_particoes
+        
+        Raises:
+            ValueError: Se alguma partição já tiver sido gravada
+        """
+        for chave, particao in particoes.items():
+            if chave in self._particoes:
+                raise ValueError(f"A partição {chave} já foi gravada")
+            self._particoes[chave] = particao
+    
+    def confirmar(self):
+        """
+        Finaliza as partições, grava o manifesto e publica a versão em
+        diretorio_publicado.
+        
+        Returns:
+            dict: Manifesto do dataset publicado
+        """
+        futuros = {chave: submeter(self._executor, escritor.fechar) for chave, escritor in self._escritores.items()}
+        tamanhos = {chave: futuro.result() for chave, futuro in futuros.items()}
+        self._executor.shutdown()
+        
+        gravado_em = datetime.now().isoformat(timespec='seconds')
+        manifesto = {
+            'colunas_particao': self.colunas_particao,
+            'particoes': {
+                chave: dict(particao, bytes=tamanhos.get(chave, particao.get('bytes')), gravado_em=gravado_em)
+                for chave, particao in sorted(self._particoes.items())
+            }
+        }
+        salvar_manifesto(manifesto, self.diretorio_temporario)
+        os.rename(self.diretorio_temporario, self.diretorio_publicado)
+        return manifesto
+    
+    def descartar(self):
+        """
+        Interrompe a gravação e remove as partições gravadas até aqui.
+        """
+        self._executor.shutdown()
+        for escritor in self._escritores.values():
+            escritor.descartar()
+        shutil.rmtree(self.diretorio_temporario, ignore_errors=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, tipo_excecao, *args):
+        if tipo_excecao is None:
+            self.confirmar()
+        else:
+            self.descartar()
+
+def caminho_temporario(caminho_arquivo):
+    """
+    Gera o caminho temporário usado para gravar um arquivo antes de publicá-lo.
+    
+    A extensão é mantida para que o formato continue sendo reconhecido.
+    
+    Args:
+        caminho_arquivo (str): Caminho final do arquivo
+    
+    Returns:
+        str: Caminho temporário (ex.: 'dados.tmp.parquet')
+    """
+    raiz, extensao = os.path.splitext(caminho_arquivo)
+    return f"{raiz}.tmp{extensao}"
+
+def calcular_checksum(caminho_arquivo, tamanho_bloco=1024 * 1024):
+    """
+    Calcula o checksum SHA-256 do conteúdo de um arquivo.
+    
+    Permite que as etapas seguintes identifiquem se um arquivo de entrada
+    realmente mudou, independentemente do nome ou da data do arquivo.
+    
+    Args:
+        caminho_arquivo (str): Caminho do arquivo
+        tamanho_bloco (int): Tamanho dos blocos lidos do disco
+    
+    Returns:
+        str: Checksum em hexadecimal
+    """
+    resumo = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            resumo.update(bloco)
+    return resumo.hexdigest()
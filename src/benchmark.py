@@ -0,0 +1,265 @@
+import io
+import os
+import sys
+import json
+import glob
+import time
+import inspect
+import platform
+from contextlib import redirect_stdout
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import analyze_data
+from analyze_data import COLUNAS_FATO_ANALISE
+from dados_sinteticos import ESCALAS, gerar_dados_sinteticos
+from esquemas import aplicar_esquema
+from pipeline import versao_codigo
+from transform_data import (
+    PERFIS_QUESTIONARIO, aplicar_dicionario, criar_dimensao_escola, criar_dimensao_geografia,
+    criar_dimensao_perfil, criar_dimensao_tempo, criar_fato_desempenho, limpar_dados_saeb
+)
+
+DIRETORIO_BENCHMARKS = 'benchmarks'
+# Módulos cujo código identifica a versão medida
+MODULOS_MEDIDOS = ['transform_data', 'analyze_data', 'contexto_analise', 'cubo', 'estatisticas', 'escolas', 'chaves', 'esquemas', 'armazenamento']
+
+def _medir(funcao, args, repeticoes):
+    """
+    Executa uma função repetidas vezes, sem as mensagens de progresso, e mede
+    o tempo de cada execução.
+    
+    Returns:
+        tuple: Resultado da última execução e lista de tempos (segundos)
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        with redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            resultado = funcao(*args)
+            tempos.append(time.perf_counter() - inicio)
+    return resultado, tempos
+
+def _linhas(valor):
+    """
+    Quantidade de linhas de um argumento ou resultado medido.
+    """
+    return len(valor) if isinstance(valor, pd.DataFrame) else None
+
+def funcoes_analise():
+    """
+    Lista as funções de análise (analisar_*) de analyze_data, na ordem do módulo.
+    
+    Returns:
+        list: Pares (nome, função)
+    """
+    funcoes = [
+        (nome, funcao) for nome, funcao in inspect.getmembers(analyze_data, inspect.isfunction)
+        if nome.startswith('analisar_') and funcao.__module__ == analyze_data.__name__
+    ]
+    return sorted(funcoes, key=lambda item: inspect.unwrap(item[1]).__code__.co_firstlineno)
+
+def medir_escala(n_alunos, repeticoes=3, semente=0):
+    """
+    Mede as etapas da transformação e as análises com dados sintéticos de uma escala.
+    
+    As etapas são executadas na ordem do pipeline, cada uma com o resultado das
+    anteriores. As análises recebem a tabela fato e as dimensões com os tipos do
+    registro de esquemas, como são lidas do disco pela análise.
+    
+    Args:
+        n_alunos (int): Quantidade de alunos gerados
+        repeticoes (int): Execuções de cada etapa; o menor tempo é o representativo
+        semente (int): Semente do gerador de dados sintéticos
+    
+    Returns:
+        list: Um dicionário por etapa, com os tempos e as linhas de entrada e de saída
+    """
+    inicio = time.perf_counter()
+    dados = gerar_dados_sinteticos(n_alunos, semente=semente)
+    print(f"Dados sintéticos gerados em {time.perf_counter() - inicio:.2f}s")
+    
+    medicoes = []
+    
+    def medir(nome, funcao, *args):
+        entradas = [_linhas(arg) for arg in args if _linhas(arg) is not None]
+        try:
+            resultado, tempos = _medir(funcao, args, repeticoes)
+        except Exception as e:
+            # A falha de uma etapa é registrada sem interromper as demais
+            medicoes.append({'etapa': nome, 'erro': repr(e)})
+            print(f"  {nome}: erro ({e})")
+            return None
+        medicoes.append({
+            'etapa': nome,
+            'tempo_min': min(tempos),
+            'tempo_mediana': float(np.median(tempos)),
+            'tempos': tempos,
+            'linhas_entrada': sum(entradas) if entradas else None,
+            'linhas_saida': _linhas(resultado)
+        })
+        print(f"  {nome}: {min(tempos):.3f}s")
+        return resultado
+    
+    df_traduzido = medir('aplicar_dicionario', aplicar_dicionario,
+                         dados['saeb_aluno_9ano'], dados['saeb_dicionario'])
+    df_limpo = medir('limpar_dados_saeb', limpar_dados_saeb, df_traduzido)
+    dimensoes = {
+        'dim_tempo': medir('criar_dimensao_tempo', criar_dimensao_tempo, df_limpo),
+        'dim_geografia': medir('criar_dimensao_geografia', criar_dimensao_geografia,
+                               df_limpo, dados['ibge_populacao']),
+        'dim_escola': medir('criar_dimensao_escola', criar_dimensao_escola, df_limpo),
+        **{
+            nome_dimensao: medir(
+                f"criar_dimensao_{nome_dimensao.removeprefix('dim_')}", criar_dimensao_perfil, df_limpo, nome_dimensao
+            )
+            for nome_dimensao in PERFIS_QUESTIONARIO
+        }
+    }
+    fato = medir('criar_fato_desempenho', criar_fato_desempenho, df_limpo, dimensoes['dim_tempo'],
+                 dimensoes['dim_geografia'], dimensoes['dim_escola'])
+    
+    # Tabelas como a análise as carrega, com os argumentos nomeados como nas funções
+    tabelas = {nome: aplicar_esquema(dimensao, nome) for nome, dimensao in dimensoes.items()}
+    tabelas['fato_desempenho'] = aplicar_esquema(fato, 'fato_desempenho')[COLUNAS_FATO_ANALISE]
+    for nome, funcao in funcoes_analise():
+        parametros = inspect.signature(funcao).parameters
+        medir(nome, funcao, *[tabelas[parametro] for parametro in parametros])
+    
+    return medicoes
+
+def executar_benchmark(escalas=('100k', '1M'), repeticoes=3, semente=0, diretorio=DIRETORIO_BENCHMARKS):
+    """
+    Executa o benchmark nas escalas escolhidas e grava os resultados.
+    
+    Os resultados de cada execução são gravados em um JSON próprio
+    ('benchmarks/benchmark_<data>.json'), com a versão do código e o ambiente,
+    para que execuções diferentes possam ser comparadas com comparar_benchmarks.
+    A escala de 10M exige memória para manter todas as tabelas intermediárias.
+    
+    Args:
+        escalas (iterable): Escalas nomeadas (ex.: '1M') ou quantidades de alunos
+        repeticoes (int): Execuções de cada etapa
+        semente (int): Semente do gerador de dados sintéticos
+        diretorio (str): Diretório dos resultados
+    
+    Returns:
+        str: Caminho do arquivo de resultados
+    """
+    identificador = f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    resultados = {
+        'identificador': identificador,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'versao_codigo': versao_codigo(MODULOS_MEDIDOS),
+        'ambiente': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'repeticoes': repeticoes,
+        'semente': semente,
+        'escalas': {}
+    }
+    
+    for escala in escalas:
+        n_alunos = ESCALAS[escala] if escala in ESCALAS else int(escala)
+        print(f"Escala {escala} ({n_alunos} alunos)...")
+        resultados['escalas'][str(escala)] = {
+            'alunos': n_alunos,
+            'etapas': medir_escala(n_alunos, repeticoes=repeticoes, semente=semente)
+        }
+    
+    os.makedirs(diretorio, exist_ok=True)
+    caminho_resultados = os.path.join(diretorio, f"{identificador}.json")
+    with open(caminho_resultados, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+    print(f"Resultados do benchmark salvos em: {caminho_resultados}")
+    return caminho_resultados
+
+def carregar_resultados(caminho_resultados):
+    """
+    Carrega os resultados de uma execução do benchmark em formato tabular.
+    
+    Args:
+        caminho_resultados (str): Arquivo JSON gravado por executar_benchmark
+    
+    Returns:
+        pandas.DataFrame: Uma linha por escala e etapa
+    """
+    with open(caminho_resultados, encoding='utf-8') as arquivo:
+        resultados = json.load(arquivo)
+    linhas = [
+        {'escala': escala, 'alunos': dados_escala['alunos'], **medicao}
+        for escala, dados_escala in resultados['escalas'].items()
+        for medicao in dados_escala['etapas']
+    ]
+    return pd.DataFrame(linhas).drop(columns='tempos', errors='ignore')
+
+def comparar_benchmarks(caminho_base, caminho_novo):
+    """
+    Compara duas execuções do benchmark, etapa a etapa.
+    
+    Args:
+        caminho_base (str): Resultados de referência
+        caminho_novo (str): Resultados comparados com a referência
+    
+    Returns:
+        pandas.DataFrame: Tempos das duas execuções e a razão novo/base por
+            escala e etapa (razão < 1 indica que a nova execução é mais rápida)
+    """
+    base = carregar_resultados(caminho_base)
+    novo = carregar_resultados(caminho_novo)
+    # Etapas na ordem de execução, incluindo as que existem em apenas uma das execuções
+    etapas = pd.concat([base[['escala', 'etapa']], novo[['escala', 'etapa']]]).drop_duplicates()
+    comparacao = etapas.merge(
+        base[['escala', 'etapa', 'tempo_min']], on=['escala', 'etapa'], how='left'
+    ).merge(
+        novo[['escala', 'etapa', 'tempo_min']], on=['escala', 'etapa'], how='left', suffixes=('_base', '_novo')
+    )
+    comparacao['razao'] = (comparacao['tempo_min_novo'] / comparacao['tempo_min_base']).round(3)
+    
+    print(f"Comparação: {os.path.basename(caminho_base)} -> {os.path.basename(caminho_novo)}")
+    print(comparacao.to_string(index=False))
+    return comparacao
+
+def main(argumentos=None):
+    """
+    Linha de comando do benchmark.
+    
+    Uso:
+        python benchmark.py [--escalas ESCALA ...] [--repeticoes N] [--semente N]
+        python benchmark.py comparar [BASE NOVO]
+    
+    Sem arquivos, 'comparar' compara as duas execuções mais recentes em 'benchmarks'.
+    """
+    argumentos = sys.argv[1:] if argumentos is None else argumentos
+    if argumentos and argumentos[0] == 'comparar':
+        caminhos = argumentos[1:3]
+        if not caminhos:
+            caminhos = sorted(glob.glob(os.path.join(DIRETORIO_BENCHMARKS, 'benchmark_*.json')))[-2:]
+        if len(caminhos) < 2:
+            print("São necessárias duas execuções do benchmark para comparar.")
+            return
+        comparar_benchmarks(*caminhos)
+        return
+    
+    escalas = []
+    repeticoes = 3
+    semente = 0
+    for posicao, argumento in enumerate(argumentos):
+        if argumento == '--escalas':
+            for valor in argumentos[posicao + 1:]:
+                if valor.startswith('--'):
+                    break
+                escalas.append(valor)
+        elif argumento == '--repeticoes':
+            repeticoes = int(argumentos[posicao + 1])
+        elif argumento == '--semente':
+            semente = int(argumentos[posicao + 1])
+    
+    executar_benchmark(escalas=escalas or ('100k', '1M'), repeticoes=repeticoes, semente=semente)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+from armazenamento import calcular_checksum
+
+# Literais e identificadores entre aspas (preservados) ou sequências de espaços e
+# comentários (trocadas por um único espaço)
+_PADRAO_NORMALIZACAO = re.compile(
+    r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`)|((?:\s|--[^\n]*|/\*.*?\*/)+)""", re.DOTALL
+)
+
+def normalizar_query(query):
+    """
+    Normaliza o texto de uma query para que diferenças de formatação
+    (comentários, quebras de linha e espaços) não gerem chaves diferentes.
+    
+    O conteúdo entre aspas não é alterado: um '--' ou espaços repetidos dentro
+    de um literal fazem parte da query.
+    
+    Args:
+        query (str): Query SQL
+    
+    Returns:
+        str: Query normalizada
+    """
+    normalizada = _PADRAO_NORMALIZACAO.sub(lambda m: m.group(1) or ' ', query)
+    return normalizada.strip()
+
+def chave_cache(query, parametros=None):
+    """
+    Gera a chave do cache a partir da query normalizada e dos parâmetros da fonte.
+    
+    Args:
+        query (str): Query SQL
+        parametros (dict, opcional): Parâmetros que identificam a fonte e o formato
+    
+    Returns:
+        str: Hash SHA-256 em hexadecimal
+    """
+    conteudo = json.dumps(
+        {'query': normalizar_query(query), 'parametros': parametros or {}},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+class CacheConsultas:
+    """
+    Cache em disco dos resultados das queries, endereçado pelo conteúdo da query.
+    
+    Cada resultado é guardado em '<diretorio>/<chave><extensão>' e registrado no
+    índice '_indice.json' com a data de criação, o último acesso, o tamanho e o
+    checksum do arquivo. Entradas mais antigas que o TTL são descartadas e, se o
+    tamanho total passar do limite, as menos usadas recentemente são removidas.
+    """
+    
+    def __init__(self, diretorio='cache_consultas', ttl_segundos=7 * 24 * 3600,
+                 tamanho_maximo_bytes=20 * 1024 ** 3):
+        """
+        Args:
+            diretorio (str): Diretório do cache
+            ttl_segundos (int): Tempo de validade de uma entrada
+            tamanho_maximo_bytes (int): Tamanho máximo ocupado pelo cache
+        """
+        self.diretorio = diretorio
+        self.ttl_segundos = ttl_segundos
+        self.tamanho_maximo_bytes = tamanho_maximo_bytes
+        self._caminho_indice = os.path.join(diretorio, '_indice.json')
+        # A extração concorrente acessa o cache a partir de várias threads
+        self._trava = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+    
+    def _carregar_indice(self):
+        if not os.path.exists(self._caminho_indice):
+            return {}
+        with open(self._caminho_indice, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    
+    def _salvar_indice(self, indice):
+        caminho_temporario = self._caminho_indice + '.tmp'
+        with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(indice, arquivo, indent=2, ensure_ascii=False)
+        os.replace(caminho_temporario, self._caminho_indice)
+    
+    def _remover_entrada(self, indice, chave):
+        entrada = indice.pop(chave, None)
+        if entrada:
+            caminho_arquivo = os.path.join(self.diretorio, entrada['arquivo'])
+            if os.path.exists(caminho_arquivo):
+                os.remove(caminho_arquivo)
+    
+    def _aplicar_limites(self, indice):
+        """
+        Remove as entradas expiradas e, se necessário, as menos usadas recentemente.
+        """
+        agora = time.time()
+        for chave, entrada in list(indice.items()):
+            if agora - entrada['criado_em'] > self.ttl_segundos:
+                self._remover_entrada(indice, chave)
+        
+        tamanho_total = sum(entrada['bytes'] for entrada in indice.values())
+        for chave, entrada in sorted(indice.items(), key=lambda item: item[1]['ultimo_acesso']):
+            if tamanho_total <= self.tamanho_maximo_bytes:
+                break
+            tamanho_total -= entrada['bytes']
+            self._remover_entrada(indice, chave)
+    
+    def obter(self, query, parametros=None):
+        """
+        Procura o resultado de uma query no cache.
+        
+        Args:
+            query (str): Query SQL
+            parametros (dict, opcional): Parâmetros que identificam a fonte e o formato
+        
+        Returns:
+            dict: Entrada do cache com o caminho do arquivo ('caminho') e o seu
+                checksum, ou None se a query não estiver no cache
+        """
+        chave = chave_cache(query, parametros)
+        with self._trava:
+            indice = self._carregar_indice()
+            entrada = indice.get(chave)
+            if entrada is None:
+                return None
+            
+            caminho_arquivo = os.path.join(self.diretorio, entrada['arquivo'])
+            expirada = time.time() - entrada['criado_em'] > self.ttl_segundos
+            if expirada or not os.path.exists(caminho_arquivo):
+                self._remover_entrada(indice, chave)
+                self._salvar_indice(indice)
+                return None
+            
+            entrada['ultimo_acesso'] = time.time()
+            self._salvar_indice(indice)
+            return dict(entrada, chave=chave, caminho=caminho_arquivo)
+    
+    def armazenar(self, query, caminho_arquivo, parametros=None, linhas=None):
+        """
+        Guarda no cache uma cópia do arquivo com o resultado de uma query.
+        
+        Args:
+            query (str): Query SQL
+            caminho_arquivo (str): Arquivo com o resultado da query
+            parametros (dict, opcional): Parâmetros que identificam a fonte e o formato
+            linhas (int, opcional): Quantidade de linhas do resultado
+        
+        Returns:
+            dict: Entrada registrada no cache, ou None se o arquivo sozinho passa
+                do tamanho máximo do cache (nesse caso ele não é guardado)
+        """
+        if os.path.getsize(caminho_arquivo) > self.tamanho_maximo_bytes:
+            print(f"Resultado maior que o limite do cache, não armazenado: {caminho_arquivo}")
+            return None
+        
+        chave = chave_cache(query, parametros)
+        extensao = os.path.splitext(caminho_arquivo)[1]
+        arquivo_cache = f"{chave}{extensao}"
+        caminho_cache = os.path.join(self.diretorio, arquivo_cache)
+        shutil.copyfile(caminho_arquivo, caminho_cache + '.tmp')
+        os.replace(caminho_cache + '.tmp', caminho_cache)
+        
+        agora = time.time()
+        entrada = {
+            'arquivo': arquivo_cache,
+            'query': normalizar_query(query),
+            'parametros': parametros or {},
+            'linhas': linhas,
+            'bytes': os.path.getsize(caminho_cache),
+            'checksum': calcular_checksum(caminho_cache),
+            'criado_em': agora,
+            'ultimo_acesso': agora
+        }
+        with self._trava:
+            indice = self._carregar_indice()
+            indice[chave] = entrada
+            self._aplicar_limites(indice)
+            self._salvar_indice(indice)
+        return dict(entrada, chave=chave, caminho=caminho_cache)
+    
+    def invalidar(self, query=None, parametros=None, chave=None):
+        """
+        Remove do cache o resultado de uma query (ou todas as entradas, se nada
+        for informado).
+        
+        Args:
+            query (str, opcional): Query SQL a invalidar
+            parametros (dict, opcional): Parâmetros usados junto com a query
+            chave (str, opcional): Chave (ou prefixo da chave) a invalidar
+        
+        Returns:
+            int: Quantidade de entradas removidas
+        """
+        if query is not None:
+            chave = chave_cache(query, parametros)
+        with self._trava:
+            indice = self._carregar_indice()
+            chaves = [c for c in indice if chave is None or c.startswith(chave)]
+            for c in chaves:
+                self._remover_entrada(indice, c)
+            self._salvar_indice(indice)
+        return len(chaves)
+    
+    def listar(self):
+        """
+        Lista as entradas do cache.
+        
+        Returns:
+            dict: Entradas do cache por chave
+        """
+        with self._trava:
+            return self._carregar_indice()
+
+def copiar_do_cache(entrada, caminho_destino):
+    """
+    Disponibiliza um resultado do cache no caminho esperado pela extração.
+    
+    É feita uma cópia (e não um link) para que gravações posteriores no
+    arquivo de saída não alterem a entrada do cache.
+    
+    Args:
+        entrada (dict): Entrada devolvida por CacheConsultas.obter
+        caminho_destino (str): Caminho do arquivo de saída da extração
+    """
+    shutil.copyfile(entrada['caminho'], caminho_destino)
+
+def main(argumentos=None):
+    """
+    Linha de comando do cache de consultas.
+    
+    Uso:
+        python cache_consultas.py listar [--diretorio DIRETORIO]
+        python cache_consultas.py invalidar [chave] [--diretorio DIRETORIO]
+    """
+    argumentos = sys.argv[1:] if argumentos is None else argumentos
+    diretorio = 'cache_consultas'
+    if '--diretorio' in argumentos:
+        posicao = argumentos.index('--diretorio')
+        diretorio = argumentos[posicao + 1]
+        argumentos = argumentos[:posicao] + argumentos[posicao + 2:]
+    
+    if not argumentos or argumentos[0] not in ('listar', 'invalidar'):
+        print(main.__doc__)
+        return
+    
+    cache = CacheConsultas(diretorio)
+    if argumentos[0] == 'listar':
+        for chave, entrada in cache.listar().items():
+            print(f"{chave[:12]}  {entrada['bytes']:>12} bytes  {entrada['query'][:80]}")
+    else:
+        chave = argumentos[1] if len(argumentos) > 1 else None
+        removidas = cache.invalidar(chave=chave)
+        print(f"{removidas} entradas removidas do cache")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+import os
+import sys
+import json
+import shutil
+import threading
+from datetime import datetime
+import pandas as pd
+from armazenamento import (
+    FORMATO_PADRAO, calcular_checksum, caminho_temporario, carregar_manifesto,
+    encontrar_arquivo_mais_recente, identificar_formato, nome_arquivo, salvar_dataframe
+)
+from esquemas import aplicar_esquema, tipo_declarado
+
+NOME_CATALOGO = '_catalogo.json'
+# Datasets particionados mantidos de forma incremental têm uma única versão, atualizada a cada partição gravada
+# (o histórico das partições fica no manifesto do dataset)
+VERSAO_PARTICIONADA = 'incremental'
+# Versões de um dataset particionado mantidas no disco: a atual e a que ela substituiu, que ainda pode
+# estar sendo lida por quem a resolveu antes da troca
+VERSOES_PARTICIONADAS_MANTIDAS = 2
+# Identificador da execução (processo) que grava os datasets
+EXECUCAO = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+# Registros concorrentes (ex.: gravação das tabelas em threads) não podem se sobrepor
+_trava_registro = threading.Lock()
+
+def descrever_esquema(df):
+    """
+    Descreve as colunas de um DataFrame e os seus tipos.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame descrito
+    
+    Returns:
+        dict: Tipo (texto) de cada coluna, na ordem das colunas
+    """
+    return {str(coluna): str(tipo) for coluna, tipo in df.dtypes.items()}
+
+def _metadados_arquivo(caminho_arquivo, nome_dataset, tamanho_lote=500000):
+    """
+    Quantidade de linhas e esquema de um arquivo gravado sem o DataFrame em mãos.
+    
+    No Parquet, ambos vêm do rodapé do arquivo, sem ler os dados. No CSV, as
+    linhas são contadas em lotes e os tipos são os do registro de esquemas
+    aplicados ao primeiro lote.
+    """
+    if identificar_formato(caminho_arquivo) == 'parquet':
+        import pyarrow.parquet as pq
+        
+        metadados = pq.read_metadata(caminho_arquivo)
+        esquema = metadados.schema.to_arrow_schema().empty_table().to_pandas()
+        return metadados.num_rows, descrever_esquema(esquema)
+    
+    linhas = 0
+    esquema = None
+    for lote in pd.read_csv(caminho_arquivo, chunksize=tamanho_lote):
+        if esquema is None:
+            esquema = descrever_esquema(aplicar_esquema(lote, nome_dataset))
+        linhas += len(lote)
+    if esquema is None:
+        esquema = descrever_esquema(pd.read_csv(caminho_arquivo, nrows=0))
+    return linhas, esquema
+
+def _versao_arquivo(nome_dataset, caminho_arquivo):
+    """
+    Versão de um arquivo a partir do nome '<dataset>_<versao>.<extensão>'; sem
+    versão no nome, a data e hora do registro.
+    """
+    base = os.path.splitext(os.path.basename(caminho_arquivo))[0]
+    if base.startswith(f"{nome_dataset}_"):
+        return base[len(nome_dataset) + 1:]
+    return datetime.now().strftime('%Y%m%d%H%M%S')
+
+class CatalogoDatasets:
+    """
+    Catálogo dos datasets de um diretório de dados ('<diretorio>/_catalogo.json').
+    
+    Cada dataset tem as suas versões registradas no momento da gravação, com o
+    caminho, o formato, a quantidade de linhas, o esquema, o tamanho, o checksum,
+    as partições (datasets particionados) e a execução que as produziu. A versão
+    atual é a última registrada, independentemente do nome dos arquivos. Os
+    carregadores resolvem um dataset por nome (e versão) com uma consulta ao
+    catálogo, sem listar o diretório, e podem verificar colunas e quantidade de
+    linhas sem ler os dados.
+    """
+    
+    # Catálogos já lidos, por caminho: (assinatura do arquivo, conteúdo). O
+    # catálogo só é relido do disco quando o arquivo muda
+    _lidos = {}
+    
+    def __init__(self, diretorio):
+        """
+        Args:
+            diretorio (str): Diretório de dados (ex.: 'dados_processados')
+        """
+        self.diretorio = diretorio
+        self._caminho_catalogo = os.path.join(diretorio, NOME_CATALOGO)
+    
+    def _carregar(self, usar_cache=True):
+        try:
+            informacoes = os.stat(self._caminho_catalogo)
+        except FileNotFoundError:
+            return {'datasets': {}}
+        assinatura = (informacoes.st_size, informacoes.st_mtime_ns)
+        chave = os.path.abspath(self._caminho_catalogo)
+        lido = self._lidos.get(chave)
+        if usar_cache and lido is not None and lido[0] == assinatura:
+            return lido[1]
+        with open(self._caminho_catalogo, encoding='utf-8') as arquivo:
+            catalogo = json.load(arquivo)
+        self._lidos[chave] = (assinatura, catalogo)
+        return catalogo
+    
+    def _salvar(self, catalogo):
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho_temporario = self._caminho_catalogo + '.tmp'
+        with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(catalogo, arquivo, indent=2, ensure_ascii=False, default=str)
+        os.replace(caminho_temporario, self._caminho_catalogo)
+    
+    def _publicar(self, nome_dataset, registro):
+        """
+        Inclui a versão no catálogo e a torna a versão atual do dataset.
+        
+        A troca de versão é a substituição do arquivo do catálogo (os.replace):
+        os leitores resolvem a versão anterior ou a nova, nunca uma mistura.
+        """
+        with _trava_registro:
+            catalogo = self._carregar(usar_cache=False)
+            dataset = catalogo['datasets'].setdefault(nome_dataset, {'atual': None, 'versoes': {}})
+            dataset['versoes'][registro['versao']] = registro
+            dataset['atual'] = registro['versao']
+            self._salvar(catalogo)
+        return dict(registro, nome=nome_dataset, caminho=os.path.join(self.diretorio, registro['caminho']))
+    
+    def registrar(self, nome_dataset, caminho_arquivo, versao=None, df=None, linhas=None, execucao=None):
+        """
+        Registra um arquivo gravado como a versão atual de um dataset.
+        
+        Args:
+            nome_dataset (str): Nome do dataset (ex.: 'dim_tempo')
+            caminho_arquivo (str): Arquivo gravado (.parquet ou .csv)
+            versao (str, opcional): Versão do dataset. Se não informada, é extraída do
+                nome do arquivo ('<dataset>_<versao>.<extensão>')
+            df (pandas.DataFrame, opcional): Dados gravados. Se informado, as linhas e o
+                esquema são obtidos dele, sem reler o arquivo
+            linhas (int, opcional): Quantidade de linhas gravadas, quando conhecida
+            execucao (str, opcional): Identificador da execução que gravou o arquivo
+        
+        Returns:
+            dict: Registro da versão, com o caminho completo do arquivo
+        """
+        if df is not None:
+            linhas, esquema = len(df), descrever_esquema(df)
+        else:
+            linhas_arquivo, esquema = _metadados_arquivo(caminho_arquivo, nome_dataset)
+            linhas = linhas_arquivo if linhas is None else linhas
+        
+        registro = {
+            'versao': versao or _versao_arquivo(nome_dataset, caminho_arquivo),
+            'tipo': 'arquivo',
+            'caminho': os.path.relpath(caminho_arquivo, self.diretorio),
+            'formato': identificar_formato(caminho_arquivo),
+            'linhas': int(linhas),
+            'esquema': esquema,
+            'bytes': os.path.getsize(caminho_arquivo),
+            'checksum': calcular_checksum(caminho_arquivo),
+            'particoes': None,
+            'execucao': execucao or EXECUCAO,
+            'programa': os.path.basename(sys.argv[0]) or 'python',
+            'registrado_em': datetime.now().isoformat(timespec='seconds')
+        }
+        return self._publicar(nome_dataset, registro)
+    
+    def registrar_particionado(self, nome_dataset, df=None, execucao=None, versao=VERSAO_PARTICIONADA,
+                               diretorio_dataset=None):
+        """
+        Registra o estado atual de um dataset particionado.
+        
+        As partições vêm do manifesto do dataset. O checksum é calculado apenas
+        para as partições novas ou regravadas desde o registro anterior.
+        
+        Args:
+            nome_dataset (str): Nome do dataset
+            df (pandas.DataFrame, opcional): Dados da partição gravada, de onde vem o
+                esquema. Se não informado, o esquema é lido da última partição
+            execucao (str, opcional): Identificador da execução que gravou as partições
+            versao (str): Versão registrada. Datasets mantidos de forma incremental têm
+                uma única versão (VERSAO_PARTICIONADA); datasets regravados a cada
+                execução têm uma versão por execução
+            diretorio_dataset (str, opcional): Diretório do dataset (padrão:
+                '<diretorio>/<nome_dataset>')
+        
+        Returns:
+            dict: Registro do dataset, com o caminho completo do diretório
+        """
+        diretorio_dataset = diretorio_dataset or os.path.join(self.diretorio, nome_dataset)
+        manifesto = carregar_manifesto(diretorio_dataset)
+        anterior = self._carregar().get('datasets', {}).get(nome_dataset, {}).get('versoes', {}) \
+            .get(versao, {})
+        particoes_anteriores = anterior.get('particoes') or {}
+        
+        particoes = {}
+        for chave in sorted(manifesto['particoes']):
+            particao = manifesto['particoes'][chave]
+            caminho_particao = os.path.join(diretorio_dataset, particao['arquivo'])
+            informacoes = os.stat(caminho_particao)
+            assinatura = [informacoes.st_size, informacoes.st_mtime_ns]
+            registrada = particoes_anteriores.get(chave)
+            particoes[chave] = {
+                'valores': particao['valores'],
+                'arquivo': particao['arquivo'],
+                'linhas': particao['linhas'],
+                'bytes': informacoes.st_size,
+                'assinatura': assinatura,
+                'checksum': registrada['checksum'] if registrada and registrada['assinatura'] == assinatura
+                else calcular_checksum(caminho_particao)
+            }
+        
+        if df is not None:
+            esquema = descrever_esquema(df)
+        elif particoes:
+            ultima = particoes[max(particoes)]
+            _, esquema = _metadados_arquivo(os.path.join(diretorio_dataset, ultima['arquivo']), nome_dataset)
+        else:
+            esquema = {}
+        
+        registro = {
+            'versao': versao,
+            'tipo': 'particionado',
+            'caminho': os.path.relpath(diretorio_dataset, self.diretorio),
+            'formato': identificar_formato(particoes[max(particoes)]['arquivo']) if particoes else None,
+            'linhas': sum(particao['linhas'] for particao in particoes.values()),
+            'esquema': esquema,
+            'bytes': sum(particao['bytes'] for particao in particoes.values()),
+            'checksum': None,
+            'colunas_particao': manifesto.get('colunas_particao', []),
+            'particoes': particoes,
+            'execucao': execucao or EXECUCAO,
+            'programa': os.path.basename(sys.argv[0]) or 'python',
+            'registrado_em': datetime.now().isoformat(timespec='seconds')
+        }
+        return self._publicar(nome_dataset, registro)
+    
+    def remover_versoes_substituidas(self, nome_dataset, manter=VERSOES_PARTICIONADAS_MANTIDAS):
+        """
+        Remove do disco os diretórios das versões particionadas de um dataset
+        que já foram substituídas há mais de uma publicação.
+        
+        A versão que acabou de ser substituída é mantida, pois pode estar sendo
+        lida por quem a resolveu antes da troca; ela só é removida em uma
+        publicação seguinte. Os registros das versões removidas continuam no
+        catálogo, marcados com 'removido_em'.
+        
+        Args:
+            nome_dataset (str): Nome do dataset
+            manter (int): Quantidade de versões mais recentes mantidas (a atual inclusive)
+        
+        Returns:
+            list: Versões removidas
+        """
+        with _trava_registro:
+            catalogo = self._carregar(usar_cache=False)
+            dataset = catalogo['datasets'].get(nome_dataset)
+            if dataset is None:
+                return []
+            versoes = sorted(dataset['versoes'].values(), key=lambda registro: registro['registrado_em'])
+            anteriores = [registro for registro in versoes if registro['versao'] != dataset['atual']]
+            mantidas = [dataset['versoes'][dataset['atual']]] + anteriores[::-1][:manter - 1]
+            caminhos_mantidos = {registro['caminho'] for registro in mantidas}
+            
+            removidas = []
+            for registro in versoes:
+                if registro['tipo'] != 'particionado' or registro['versao'] == VERSAO_PARTICIONADA \
+                        or registro.get('removido_em') or registro['caminho'] in caminhos_mantidos:
+                    continue
+                shutil.rmtree(os.path.join(self.diretorio, registro['caminho']), ignore_errors=True)
+                registro['removido_em'] = datetime.now().isoformat(timespec='seconds')
+                removidas.append(registro['versao'])
+            if removidas:
+                self._salvar(catalogo)
+        return removidas
+    
+    def resolver(self, nome_dataset, versao=None):
+        """
+        Localiza uma versão de um dataset pelo catálogo, sem listar o diretório.
+        
+        Args:
+            nome_dataset (str): Nome do dataset
+            versao (str, opcional): Versão desejada (a atual, se não informada)
+        
+        Returns:
+            dict: Registro da versão, com o caminho completo do arquivo ('caminho')
+        
+        Raises:
+            FileNotFoundError: Se o dataset ou a versão não estiverem no catálogo, ou
+                se o arquivo registrado não existir mais
+        """
+        dataset = self._carregar()['datasets'].get(nome_dataset)
+        if dataset is None:
+            raise FileNotFoundError(f"Dataset {nome_dataset} não registrado no catálogo de {self.diretorio}")
+        versao = versao or dataset['atual']
+        registro = dataset['versoes'].get(versao)
+        if registro is None:
+            raise FileNotFoundError(f"Versão {versao} do dataset {nome_dataset} não registrada no catálogo")
+        
+        caminho = os.path.join(self.diretorio, registro['caminho'])
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(f"Arquivo da versão {versao} de {nome_dataset} não encontrado: {caminho}")
+        return dict(registro, nome=nome_dataset, caminho=caminho)
+    
+    def contem(self, nome_dataset):
+        """
+        Indica se o dataset está registrado no catálogo.
+        """
+        return nome_dataset in self._carregar()['datasets']
+    
+    def versoes(self, nome_dataset):
+        """
+        Lista as versões registradas de um dataset, da mais antiga para a mais recente.
+        
+        Returns:
+            list: Registros das versões
+        """
+        dataset = self._carregar()['datasets'].get(nome_dataset, {'versoes': {}})
+        return sorted(dataset['versoes'].values(), key=lambda registro: registro['registrado_em'])
+    
+    def listar(self):
+        """
+        Lista a versão atual de cada dataset do catálogo.
+        
+        Returns:
+            dict: Registro da versão atual, por dataset
+        """
+        return {
+            nome: dataset['versoes'][dataset['atual']]
+            for nome, dataset in sorted(self._carregar()['datasets'].items())
+        }
+    
+    def verificar(self, nome_dataset, colunas=None, versao=None, verificar_checksum=False):
+        """
+        Verifica uma versão de um dataset a partir dos metadados do catálogo,
+        sem ler os dados.
+        
+        Args:
+            nome_dataset (str): Nome do dataset
+            colunas (list, opcional): Colunas que precisam existir
+            versao (str, opcional): Versão verificada (a atual, se não informada)
+            verificar_checksum (bool): Se True, recalcula também o checksum do arquivo
+                (lendo o arquivo inteiro) e o compara com o registrado
+        
+        Returns:
+            dict: Registro da versão, com as colunas cujo tipo registrado difere do
+                registro de esquemas em 'divergencias'
+        
+        Raises:
+            FileNotFoundError: Se a versão não existir (ver resolver)
+            ValueError: Se faltarem colunas ou o checksum não conferir
+        """
+        registro = self.resolver(nome_dataset, versao)
+        ausentes = [coluna for coluna in colunas or [] if coluna not in registro['esquema']]
+        if ausentes:
+            raise ValueError(f"Colunas ausentes em {nome_dataset} (versão {registro['versao']}): {ausentes}")
+        
+        if verificar_checksum:
+            arquivos = (
+                {chave: (os.path.join(registro['caminho'], particao['arquivo']), particao['checksum'])
+                 for chave, particao in registro['particoes'].items()}
+                if registro['tipo'] == 'particionado'
+                else {nome_dataset: (registro['caminho'], registro['checksum'])}
+            )
+            for rotulo, (caminho, checksum) in arquivos.items():
+                if calcular_checksum(caminho) != checksum:
+                    raise ValueError(f"Checksum de {rotulo} não confere com o catálogo: {caminho}")
+        
+        registro['divergencias'] = {
+            coluna: {'registrado': tipo, 'declarado': tipo_declarado(nome_dataset, coluna)}
+            for coluna, tipo in registro['esquema'].items()
+            if tipo_declarado(nome_dataset, coluna) not in (None, tipo)
+        }
+        return registro
+
+def salvar_dataset(df, diretorio, nome_dataset, versao, formato=FORMATO_PADRAO, execucao=None):
+    """
+    Grava uma versão de um dataset e a registra no catálogo do diretório.
+    
+    O arquivo é gravado com um nome temporário e renomeado ao final, de modo
+    que leitores nunca veem um arquivo incompleto.
+    
+    Args:
+        df (pandas.DataFrame): Dados do dataset
+        diretorio (str): Diretório de dados
+        nome_dataset (str): Nome do dataset
+        versao (str): Versão do dataset (usada no nome do arquivo)
+        formato (str): Formato do arquivo ('parquet' ou 'csv')
+        execucao (str, opcional): Identificador da execução que gravou o dataset
+    
+    Returns:
+        str: Caminho do arquivo gravado
+    """
+    caminho_arquivo = nome_arquivo(diretorio, nome_dataset, versao, formato)
+    salvar_dataframe(df, caminho_temporario(caminho_arquivo))
+    os.replace(caminho_temporario(caminho_arquivo), caminho_arquivo)
+    CatalogoDatasets(diretorio).registrar(nome_dataset, caminho_arquivo, versao=versao, df=df,
+                                          execucao=execucao)
+    return caminho_arquivo
+
+def resolver_dataset(diretorio, nome_dataset, versao=None, colunas=None):
+    """
+    Localiza um dataset pelo catálogo do diretório.
+    
+    Diretórios (ou datasets) gravados antes da existência do catálogo são
+    localizados como antes: o dataset particionado com esse nome ou, na sua
+    falta, o arquivo mais recente com o prefixo. Esses registros não têm os
+    metadados do catálogo.
+    
+    Args:
+        diretorio (str): Diretório de dados
+        nome_dataset (str): Nome do dataset
+        versao (str, opcional): Versão desejada (a atual, se não informada)
+        colunas (list, opcional): Colunas que precisam existir no dataset catalogado
+    
+    Returns:
+        dict: Registro do dataset com o tipo ('arquivo' ou 'particionado') e o caminho
+    """
+    catalogo = CatalogoDatasets(diretorio)
+    if versao is not None or catalogo.contem(nome_dataset):
+        return catalogo.verificar(nome_dataset, colunas=colunas, versao=versao)
+    
+    diretorio_particionado = os.path.join(diretorio, nome_dataset)
+    if os.path.exists(os.path.join(diretorio_particionado, '_manifesto.json')):
+        return {'nome': nome_dataset, 'tipo': 'particionado', 'caminho': diretorio_particionado}
+    return {
+        'nome': nome_dataset,
+        'tipo': 'arquivo',
+        'caminho': encontrar_arquivo_mais_recente(diretorio, nome_dataset)
+    }
+
+def main(argumentos=None):
+    """
+    Linha de comando do catálogo de datasets.
+    
+    Uso:
+        python catalogo.py listar [DIRETORIO]
+        python catalogo.py versoes DATASET [DIRETORIO]
+        python catalogo.py verificar [DIRETORIO] [--checksum]
+    """
+    argumentos = sys.argv[1:] if argumentos is None else argumentos
+    verificar_checksum = '--checksum' in argumentos
+    argumentos = [argumento for argumento in argumentos if argumento != '--checksum']
+    if not argumentos or argumentos[0] not in ('listar', 'versoes', 'verificar'):
+        print(main.__doc__)
+        return
+    
+    if argumentos[0] == 'versoes':
+        if len(argumentos) < 2:
+            print(main.__doc__)
+            return
+        catalogo = CatalogoDatasets(argumentos[2] if len(argumentos) > 2 else 'dados_processados')
+        for registro in catalogo.versoes(argumentos[1]):
+            print(f"{registro['versao']:<16} {registro['linhas']:>12} linhas  {registro['registrado_em']}  "
+                  f"{registro['caminho']}")
+        return
+    
+    catalogo = CatalogoDatasets(argumentos[1] if len(argumentos) > 1 else 'dados_processados')
+    for nome, registro in catalogo.listar().items():
+        if argumentos[0] == 'listar':
+            print(f"{nome:<20} {registro['versao']:<16} {registro['linhas']:>12} linhas "
+                  f"{len(registro['esquema']):>4} colunas  {registro['caminho']}")
+            continue
+        try:
+            divergencias = catalogo.verificar(nome, verificar_checksum=verificar_checksum)['divergencias']
+            situacao = f"tipos divergentes: {divergencias}" if divergencias else 'ok'
+        except (FileNotFoundError, ValueError) as e:
+            situacao = f"erro: {e}"
+        print(f"{nome}: {situacao}")
+
+if __name__ == "__main__":
+    main()
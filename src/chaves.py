@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+# Tamanho máximo da tabela de endereçamento direto em relação ao número de
+# membros da dimensão (acima disso, usa-se o índice de hash)
+FATOR_MAXIMO_ENDERECAMENTO = 8
+
+class IndiceChaves:
+    """
+    Índice que resolve chaves naturais em chaves substitutas (surrogate keys).
+    
+    Chaves inteiras simples com faixa de valores compacta usam uma tabela de
+    endereçamento direto (um vetor indexado pelo próprio valor da chave);
+    chaves compostas, não inteiras ou muito esparsas usam um índice de hash do
+    pandas. Chaves naturais repetidas na dimensão são rejeitadas, pois
+    fariam a tabela fato ser duplicada silenciosamente.
+    """
+    
+    def __init__(self, dimensao, colunas_chave, coluna_id, nome_dimensao='dimensão'):
+        """
+        Args:
+            dimensao (pandas.DataFrame): Tabela de dimensão
+            colunas_chave (list): Colunas que formam a chave natural
+            coluna_id (str): Coluna com a chave substituta
+            nome_dimensao (str): Nome da dimensão, usado nas mensagens de erro
+        
+        Raises:
+            ValueError: Se a chave natural se repetir na dimensão
+        """
+        self.colunas_chave = list(colunas_chave)
+        self.coluna_id = coluna_id
+        self.nome_dimensao = nome_dimensao
+        self._ids = dimensao[coluna_id].to_numpy()
+        
+        chaves = dimensao[self.colunas_chave]
+        serie_chave = chaves.iloc[:, 0]
+        self._direto = False
+        if len(self.colunas_chave) == 1 and len(serie_chave) \
+                and pd.api.types.is_integer_dtype(serie_chave.dtype) and not serie_chave.isna().any():
+            valores = serie_chave.to_numpy(dtype=np.int64)
+            self._minimo = int(valores.min())
+            faixa = int(valores.max()) - self._minimo + 1
+            self._direto = faixa <= FATOR_MAXIMO_ENDERECAMENTO * len(valores) + 1024
+        
+        if self._direto:
+            # Posição de cada chave na dimensão; -1 onde a chave não existe
+            self._tabela = np.full(faixa, -1, dtype=np.int64)
+            posicoes = np.arange(len(valores), dtype=np.int64)
+            self._tabela[valores - self._minimo] = posicoes
+            # Com chaves repetidas, a última ocorrência sobrescreve as anteriores
+            repetidas = valores[self._tabela[valores - self._minimo] != posicoes]
+        else:
+            if len(self.colunas_chave) == 1:
+                self._indice = pd.Index(serie_chave)
+            else:
+                self._indice = pd.MultiIndex.from_frame(chaves)
+            repetidas = self._indice[self._indice.duplicated()]
+        
+        if len(repetidas):
+            exemplos = ', '.join(str(chave) for chave in list(dict.fromkeys(repetidas))[:5])
+            raise ValueError(
+                f"Chave natural ({', '.join(self.colunas_chave)}) repetida em {nome_dimensao}: "
+                f"{len(repetidas)} repetições (ex.: {exemplos})"
+            )
+    
+    def posicoes(self, df):
+        """
+        Localiza, para cada linha, a posição do membro correspondente na dimensão.
+        
+        Args:
+            df (pandas.DataFrame): Dados com as colunas da chave natural
+        
+        Returns:
+            numpy.ndarray: Posição na dimensão (-1 quando a chave não existe)
+        """
+        if self._direto:
+            serie = df[self.colunas_chave[0]]
+            validos = serie.notna().to_numpy()
+            deslocamentos = serie.to_numpy(dtype=np.int64, na_value=self._minimo) - self._minimo
+            validos = validos & (deslocamentos >= 0) & (deslocamentos < len(self._tabela))
+            return np.where(validos, self._tabela[np.where(validos, deslocamentos, 0)], -1)
+        
+        if len(self.colunas_chave) == 1:
+            return self._indice.get_indexer(df[self.colunas_chave[0]])
+        return self._indice.get_indexer(pd.MultiIndex.from_frame(df[self.colunas_chave]))
+    
+    def resolver(self, df):
+        """
+        Resolve as chaves naturais de cada linha em chaves substitutas.
+        
+        Args:
+            df (pandas.DataFrame): Dados com as colunas da chave natural
+        
+        Returns:
+            numpy.ndarray ou pandas.arrays.IntegerArray: Chave substituta de cada
+                linha, com valores ausentes (tipo anulável) quando não há correspondência
+        """
+        posicoes = self.posicoes(df)
+        encontrado = posicoes >= 0
+        if not len(self._ids):
+            return pd.arrays.IntegerArray(np.zeros(len(posicoes), dtype=np.int64), ~encontrado)
+        ids = self._ids[np.where(encontrado, posicoes, 0)]
+        if encontrado.all():
+            return ids
+        return pd.arrays.IntegerArray(ids.astype(np.int64), ~encontrado)
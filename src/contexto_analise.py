@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from chaves import IndiceChaves
+
+# Chave de cada dimensão na tabela fato
+CHAVES_DIMENSOES = {
+    'dim_tempo': 'id_tempo',
+    'dim_geografia': 'id_geografia',
+    'dim_escola': 'id_dim_escola',
+    'dim_perfil_familiar': 'id_perfil_familiar',
+    'dim_perfil_pretensao': 'id_perfil_pretensao'
+}
+
+class ContextoAnalise:
+    """
+    Visão desnormalizada da tabela fato, compartilhada pelas análises.
+    
+    Em vez de cada análise juntar a tabela fato às dimensões, o contexto
+    resolve a chave de cada dimensão uma única vez (a posição de cada linha da
+    fato na dimensão, com IndiceChaves) e monta sob demanda apenas os atributos
+    pedidos, guardando-os para as análises seguintes. Atributos de texto são
+    guardados como categorias (códigos) e atributos numéricos como inteiros;
+    linhas cuja chave não existe na dimensão ficam com o atributo ausente, como
+    em um merge com how='left'.
+    """
+    
+    def __init__(self, fato, **dimensoes):
+        """
+        Args:
+            fato (pandas.DataFrame): Tabela fato
+            **dimensoes (pandas.DataFrame): Dimensões por nome (ex.: dim_tempo=...)
+        """
+        self.fato = fato
+        self.dimensoes = dimensoes
+        self._posicoes = {}
+        self._atributos = {}
+        self._resultados = {}
+    
+    @classmethod
+    def obter(cls, fato, **dimensoes):
+        """
+        Reutiliza o contexto recebido por uma análise ou cria um para a tabela fato.
+        
+        Args:
+            fato (pandas.DataFrame ou ContextoAnalise): Tabela fato ou contexto já criado
+            **dimensoes (pandas.DataFrame): Dimensões usadas pela análise
+        
+        Returns:
+            ContextoAnalise: Contexto da análise
+        """
+        if isinstance(fato, cls):
+            for nome, dimensao in dimensoes.items():
+                fato.dimensoes.setdefault(nome, dimensao)
+            return fato
+        return cls(fato, **dimensoes)
+    
+    def __len__(self):
+        return len(self.fato)
+    
+    def posicoes(self, nome_dimensao):
+        """
+        Posição de cada linha da tabela fato na dimensão (-1 quando a chave não existe).
+        """
+        if nome_dimensao not in self._posicoes:
+            chave = CHAVES_DIMENSOES[nome_dimensao]
+            indice = IndiceChaves(self.dimensoes[nome_dimensao], [chave], chave, nome_dimensao)
+            self._posicoes[nome_dimensao] = indice.posicoes(self.fato)
+        return self._posicoes[nome_dimensao]
+    
+    def _dimensao_do_atributo(self, coluna):
+        for nome_dimensao, dimensao in self.dimensoes.items():
+            if coluna in dimensao.columns:
+                return nome_dimensao
+        raise KeyError(f"Atributo {coluna} não encontrado na tabela fato nem nas dimensões do contexto")
+    
+    def atributo(self, coluna):
+        """
+        Valor de uma coluna da tabela fato ou de um atributo de dimensão para
+        cada linha da tabela fato.
+        
+        Args:
+            coluna (str): Nome da coluna
+        
+        Returns:
+            pandas.Series: Coluna alinhada à tabela fato
+        """
+        if coluna in self.fato.columns:
+            return self.fato[coluna]
+        if coluna not in self._atributos:
+            nome_dimensao = self._dimensao_do_atributo(coluna)
+            posicoes = self.posicoes(nome_dimensao)
+            encontrado = posicoes >= 0
+            serie = self.dimensoes[nome_dimensao][coluna]
+            if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_extension_array_dtype(serie.dtype):
+                valores = serie.to_numpy()[np.where(encontrado, posicoes, 0)] if len(serie) \
+                    else np.zeros(len(posicoes), dtype=serie.dtype)
+                if not encontrado.all():
+                    if pd.api.types.is_integer_dtype(valores.dtype):
+                        valores = pd.arrays.IntegerArray(valores, ~encontrado)
+                    else:
+                        valores = np.where(encontrado, valores, np.nan)
+            else:
+                # Atributos de texto viram categorias (códigos); a posição -1 vira ausente
+                if not pd.api.types.is_numeric_dtype(serie.dtype):
+                    serie = serie.astype('category')
+                valores = serie.array.take(posicoes, allow_fill=True)
+            self._atributos[coluna] = pd.Series(valores, index=self.fato.index, name=coluna, copy=False)
+        return self._atributos[coluna]
+    
+    def visao(self, colunas):
+        """
+        Monta um DataFrame com colunas da tabela fato e atributos das dimensões.
+        
+        Args:
+            colunas (list): Colunas da visão, na ordem desejada
+        
+        Returns:
+            pandas.DataFrame: Uma linha por linha da tabela fato
+        """
+        return pd.DataFrame({coluna: self.atributo(coluna) for coluna in colunas}, copy=False)
+    
+    def reutilizar(self, nome, calcular):
+        """
+        Resultado intermediário compartilhado entre análises, calculado uma única vez.
+        
+        Args:
+            nome (str): Identificador do resultado
+            calcular (callable): Função sem argumentos que calcula o resultado
+        
+        Returns:
+            object: Resultado calculado na primeira chamada
+        """
+        if nome not in self._resultados:
+            self._resultados[nome] = calcular()
+        return self._resultados[nome]
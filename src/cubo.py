@@ -0,0 +1,139 @@
+import pandas as pd
+from estatisticas import COLUNAS_ESTATISTICAS, EstatisticasAgregaveis
+
+# Grão do cubo: cada célula reúne os alunos de um ano, município, dependência
+# administrativa e localização
+GRAO_CUBO = ['ano', 'id_municipio', 'id_dependencia_adm', 'id_localizacao']
+# Atributos determinados pelo grão, guardados nas células para os roll-ups
+ATRIBUTOS_CUBO = [
+    'pre_pandemia', 'durante_pandemia', 'pos_pandemia',
+    'id_regiao', 'regiao_desc', 'sigla_uf',
+    'id_dependencia_adm_desc', 'id_localizacao_desc'
+]
+
+class CuboDesempenho:
+    """
+    Cubo de agregados das proficiências, no grão (ano, município, dependência
+    administrativa, localização).
+    
+    Cada célula guarda, para cada medida proficiencia_*, as estatísticas
+    agregáveis das notas (quantidade, média, M2, mínimo e máximo; ver
+    EstatisticasAgregaveis). Qualquer nível mais agregado (UF, região,
+    nacional, período da pandemia...) é obtido combinando as células, sem
+    voltar às linhas dos alunos.
+    
+    As linhas cujo atributo não existe na dimensão formam células com o
+    atributo ausente, de modo que os totais de um nível que não usa esse
+    atributo continuam iguais aos calculados sobre as linhas.
+    """
+    
+    def __init__(self, celulas, medidas, tipos):
+        """
+        Args:
+            celulas (pandas.DataFrame): Uma linha por célula, com as colunas do grão,
+                os atributos e as estatísticas ('<medida>_<estatistica>', com as
+                estatísticas de COLUNAS_ESTATISTICAS)
+            medidas (list): Medidas agregadas (ex.: ['proficiencia_media'])
+            tipos (dict): Tipo original de cada medida, usado nos resultados
+        """
+        self.celulas = celulas
+        self.medidas = list(medidas)
+        self.tipos = tipos
+    
+    @classmethod
+    def construir(cls, contexto, medidas=None):
+        """
+        Constrói o cubo a partir da tabela fato, em uma única passagem pelas linhas.
+        
+        As colunas do grão e os atributos das dimensões ausentes do contexto
+        são omitidos: o cubo fica mais agregado, mas continua correto para os
+        níveis que usam apenas as dimensões presentes.
+        
+        Args:
+            contexto (ContextoAnalise): Contexto com a tabela fato e as dimensões
+                (tempo, geografia e escola)
+            medidas (list, opcional): Medidas agregadas (padrão: todas as colunas
+                proficiencia_* da tabela fato)
+        
+        Returns:
+            CuboDesempenho: Cubo construído
+        """
+        if medidas is None:
+            medidas = [col for col in contexto.fato.columns if col.startswith('proficiencia_')]
+        chaves = [
+            chave for chave in GRAO_CUBO + ATRIBUTOS_CUBO
+            if any(chave in dimensao.columns for dimensao in contexto.dimensoes.values())
+        ]
+        
+        visao = contexto.visao(chaves + list(medidas))
+        tipos = {medida: visao[medida].dtype for medida in medidas}
+        # Linhas agrupadas uma única vez para todas as medidas
+        estatisticas = EstatisticasAgregaveis.calcular_colunas(visao, medidas, chaves, dropna=False)
+        
+        celulas = None
+        for medida, estatistica in estatisticas.items():
+            tabela = estatistica.tabela.rename(
+                columns={coluna: f"{medida}_{coluna}" for coluna in COLUNAS_ESTATISTICAS}
+            )
+            celulas = tabela if celulas is None else pd.concat(
+                [celulas, tabela.drop(columns=chaves)], axis=1
+            )
+        return cls(celulas, medidas, tipos)
+    
+    def __len__(self):
+        return len(self.celulas)
+    
+    def agregar(self, niveis, medida='proficiencia_media', atributos=None):
+        """
+        Agrega (roll-up) as células do cubo em um nível mais grosso.
+        
+        Args:
+            niveis (list): Colunas do nível (ex.: ['sigla_uf', 'ano']; [] para o total
+                nacional). Combinações com algum valor ausente são descartadas, como
+                em um groupby sobre as linhas
+            medida (str): Medida agregada
+            atributos (dict, opcional): Atributos derivados das células (nome ->
+                valores alinhados a self.celulas), disponíveis como níveis
+        
+        Returns:
+            EstatisticasAgregaveis: Estatísticas da medida em cada combinação do nível
+        """
+        colunas = [f"{medida}_{estatistica}" for estatistica in COLUNAS_ESTATISTICAS]
+        celulas = self.celulas[[nivel for nivel in niveis if nivel not in (atributos or {})] + colunas]
+        if atributos:
+            celulas = celulas.assign(**atributos)
+        celulas = celulas.rename(columns=dict(zip(colunas, COLUNAS_ESTATISTICAS)))
+        return EstatisticasAgregaveis(celulas, list(niveis)).rolar(niveis, dropna=True)
+    
+    def resumir(self, niveis, medida='proficiencia_media', atributos=None):
+        """
+        Média, desvio padrão, quantidade, mínimo e máximo da medida em um nível.
+        
+        Args:
+            niveis (list): Colunas do nível
+            medida (str): Medida resumida
+            atributos (dict, opcional): Atributos derivados das células (ver agregar)
+        
+        Returns:
+            pandas.DataFrame: Colunas do nível, 'media', 'desvio_padrao',
+                'quantidade', 'minimo' e 'maximo', com o tipo original da medida
+        """
+        resumo = self.agregar(niveis, medida=medida, atributos=atributos).resumo()
+        tipo = self.tipos[medida]
+        for coluna in ['media', 'desvio_padrao', 'minimo', 'maximo']:
+            resumo[coluna] = resumo[coluna].astype(tipo)
+        return resumo
+
+def cubo_do_contexto(contexto):
+    """
+    Cubo da tabela fato de um contexto de análise, construído uma única vez e
+    compartilhado pelas análises que o usam.
+    
+    Args:
+        contexto (ContextoAnalise): Contexto da análise
+    
+    Returns:
+        CuboDesempenho: Cubo com as dimensões presentes no contexto
+    """
+    chave = ('cubo', tuple(sorted(contexto.dimensoes)))
+    return contexto.reutilizar(chave, lambda: CuboDesempenho.construir(contexto))
@@ -0,0 +1,432 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from armazenamento import FORMATO_PADRAO, abrir_escritor_incremental, nome_arquivo, salvar_dataframe
+from catalogo import CatalogoDatasets
+from esquemas import COLUNAS_PRETENSAO_FUTURA, COLUNAS_QUESTIONARIO_SAEB, aplicar_esquema
+from fontes import FonteSQLite
+
+# Escalas nomeadas (quantidade de alunos, somando todas as edições)
+ESCALAS = {
+    '100k': 100_000,
+    '1M': 1_000_000,
+    '10M': 10_000_000
+}
+
+# Código IBGE e quantidade de municípios de cada UF. A região é o primeiro
+# dígito do código (1 = Norte, ..., 5 = Centro-Oeste).
+UFS = {
+    'RO': (11, 52), 'AC': (12, 22), 'AM': (13, 62), 'RR': (14, 15), 'PA': (15, 144),
+    'AP': (16, 16), 'TO': (17, 139), 'MA': (21, 217), 'PI': (22, 224), 'CE': (23, 184),
+    'RN': (24, 167), 'PB': (25, 223), 'PE': (26, 185), 'AL': (27, 102), 'SE': (28, 75),
+    'BA': (29, 417), 'MG': (31, 853), 'ES': (32, 78), 'RJ': (33, 92), 'SP': (35, 645),
+    'PR': (41, 399), 'SC': (42, 295), 'RS': (43, 497), 'MS': (50, 79), 'MT': (51, 141),
+    'GO': (52, 246), 'DF': (53, 1)
+}
+REGIOES = {1: 'Norte', 2: 'Nordeste', 3: 'Sudeste', 4: 'Sul', 5: 'Centro-Oeste'}
+DEPENDENCIAS_ADM = {1: ('Federal', 0.005), 2: ('Estadual', 0.45), 3: ('Municipal', 0.38), 4: ('Privada', 0.165)}
+LOCALIZACOES = {1: ('Urbana', 0.88), 2: ('Rural', 0.12)}
+
+# Edições do SAEB e efeito médio de cada uma na proficiência
+EFEITO_ANO = {2019: 0.0, 2021: -8.0, 2023: -3.0}
+# Efeito médio da dependência administrativa e da localização na proficiência
+EFEITO_DEPENDENCIA = {1: 45.0, 2: 0.0, 3: -5.0, 4: 35.0}
+EFEITO_LOCALIZACAO = {1: 0.0, 2: -10.0}
+
+# Alunos de 9º ano por escola em cada edição e alunos por turma
+ALUNOS_POR_ESCOLA = 60
+ALUNOS_POR_TURMA = 25
+# Fração de notas ausentes em cada disciplina e de questionários em branco
+FRACAO_NOTA_AUSENTE = 0.07
+FRACAO_RESPOSTA_BRANCO = 0.03
+
+# Tipo de escola e de ensino dos participantes do ENEM (tp_escola e tp_ensino)
+TIPOS_ESCOLA_ENEM = {1: ('Não respondeu', 0.6), 2: ('Pública', 0.32), 3: ('Privada', 0.08)}
+TIPOS_ENSINO_ENEM = {1: ('Ensino Regular', 0.97), 2: ('Educação Especial - Modalidade Substitutiva', 0.03)}
+NOTAS_ENEM = ['nu_nota_mt', 'nu_nota_lc', 'nu_nota_ch', 'nu_nota_cn', 'nu_nota_redacao']
+
+# Tabela da fonte de cada dataset, com o nome completo consultado pela extração
+TABELAS_FONTE = {
+    'saeb_aluno_9ano': 'basedosdados.br_inep_saeb.aluno_ef_9ano',
+    'saeb_dicionario': 'basedosdados.br_inep_saeb.dicionario',
+    'ibge_populacao': 'basedosdados.br_ibge_populacao.municipio',
+    'enem_microdados': 'basedosdados.br_inep_enem.microdados',
+    'enem_dicionario': 'basedosdados.br_inep_enem.dicionario'
+}
+
+def _itens_questionario():
+    """
+    Itens do questionário gerados e suas alternativas (4 ou 5 alternativas
+    mais '*', resposta em branco).
+    """
+    itens = {}
+    for posicao, item in enumerate(COLUNAS_QUESTIONARIO_SAEB + COLUNAS_PRETENSAO_FUTURA):
+        quantidade = 4 if posicao % 2 == 0 else 5
+        itens[item] = [chr(ord('A') + indice) for indice in range(quantidade)] + ['*']
+    return itens
+
+def _criar_universo(n_alunos, semente):
+    """
+    Cria os municípios e as escolas sorteados para uma escala.
+    
+    Os municípios têm população com distribuição log-normal e as escolas são
+    distribuídas entre eles proporcionalmente à população, de modo que poucos
+    municípios concentram muitas escolas, como nos dados reais.
+    
+    Args:
+        n_alunos (int): Quantidade total de alunos
+        semente (int): Semente do gerador aleatório
+    
+    Returns:
+        dict: DataFrames 'municipios' e 'escolas'
+    """
+    rng = np.random.default_rng([semente, 0])
+    siglas = list(UFS)
+    
+    # Municípios: código IBGE de 7 dígitos (UF + sequencial)
+    uf_municipio = np.repeat(np.arange(len(siglas)), [UFS[sigla][1] for sigla in siglas])
+    sequencial = np.concatenate([np.arange(UFS[sigla][1]) for sigla in siglas])
+    codigo_uf = np.array([UFS[sigla][0] for sigla in siglas])[uf_municipio]
+    municipios = pd.DataFrame({
+        'id_municipio': codigo_uf * 100000 + sequencial * 10 + 1,
+        'sigla_uf': pd.Categorical.from_codes(uf_municipio, categories=siglas),
+        'id_regiao': codigo_uf // 10,
+        'populacao': np.round(rng.lognormal(mean=9.3, sigma=1.2, size=len(uf_municipio))).astype(np.int64) + 800
+    })
+    
+    # Escolas: distribuídas pelos municípios proporcionalmente à população
+    n_escolas = max(1, int(np.ceil(n_alunos / len(EFEITO_ANO) / ALUNOS_POR_ESCOLA)))
+    peso_municipio = municipios['populacao'].to_numpy() / municipios['populacao'].sum()
+    municipio_escola = np.sort(rng.choice(len(municipios), size=n_escolas, p=peso_municipio))
+    dependencias = list(DEPENDENCIAS_ADM)
+    localizacoes = list(LOCALIZACOES)
+    escolas = pd.DataFrame({
+        # Código INEP de 8 dígitos (UF + sequencial)
+        'id_escola': codigo_uf[municipio_escola] * 1000000 + np.arange(n_escolas) % 1000000,
+        'municipio': municipio_escola,
+        'id_dependencia_adm': rng.choice(
+            dependencias, size=n_escolas, p=[DEPENDENCIAS_ADM[d][1] for d in dependencias]
+        ),
+        'id_localizacao': rng.choice(
+            localizacoes, size=n_escolas, p=[LOCALIZACOES[l][1] for l in localizacoes]
+        ),
+        'turmas': rng.integers(1, 2 * ALUNOS_POR_ESCOLA // ALUNOS_POR_TURMA + 1, size=n_escolas),
+        # Tamanho relativo da escola (quantos alunos recebe)
+        'peso': rng.lognormal(mean=0.0, sigma=0.6, size=n_escolas)
+    })
+    efeito_uf = rng.normal(0, 12, size=len(siglas))
+    escolas['efeito'] = (
+        rng.normal(0, 20, size=n_escolas)
+        + efeito_uf[uf_municipio[municipio_escola]]
+        + escolas['id_dependencia_adm'].map(EFEITO_DEPENDENCIA).to_numpy()
+        + escolas['id_localizacao'].map(EFEITO_LOCALIZACAO).to_numpy()
+    )
+    return {'municipios': municipios, 'escolas': escolas}
+
+def gerar_lotes_saeb(n_alunos, tamanho_lote=1_000_000, semente=0, universo=None):
+    """
+    Gera a tabela saeb_aluno_9ano sintética em lotes.
+    
+    Cada aluno pertence a uma escola (sorteada pelo tamanho da escola), a uma
+    turma dessa escola e a uma edição do SAEB. As proficiências combinam os
+    efeitos da UF, da escola, da dependência administrativa, da localização,
+    da edição e das respostas ao questionário, de modo que as análises
+    encontram diferenças entre os grupos.
+    
+    Args:
+        n_alunos (int): Quantidade total de alunos
+        tamanho_lote (int): Quantidade máxima de alunos por lote
+        semente (int): Semente do gerador aleatório
+        universo (dict, opcional): Municípios e escolas já criados com _criar_universo
+    
+    Returns:
+        iterator: Iterador de DataFrames com os tipos do esquema saeb_aluno_9ano
+    """
+    universo = universo or _criar_universo(n_alunos, semente)
+    municipios = universo['municipios']
+    escolas = universo['escolas']
+    peso_escola = escolas['peso'].to_numpy() / escolas['peso'].sum()
+    anos = np.array(list(EFEITO_ANO))
+    efeito_ano = np.array(list(EFEITO_ANO.values()))
+    itens = _itens_questionario()
+    
+    for numero_lote, inicio in enumerate(range(0, n_alunos, tamanho_lote), start=1):
+        rng = np.random.default_rng([semente, numero_lote])
+        n = min(tamanho_lote, n_alunos - inicio)
+        
+        escola = rng.choice(len(escolas), size=n, p=peso_escola)
+        municipio = escolas['municipio'].to_numpy()[escola]
+        indice_ano = rng.integers(0, len(anos), size=n)
+        turma = rng.integers(0, escolas['turmas'].to_numpy()[escola])
+        
+        colunas = {
+            'ano': anos[indice_ano],
+            'id_regiao': municipios['id_regiao'].to_numpy()[municipio],
+            'sigla_uf': pd.Categorical.from_codes(
+                municipios['sigla_uf'].cat.codes.to_numpy()[municipio], categories=list(UFS)
+            ),
+            'id_municipio': municipios['id_municipio'].to_numpy()[municipio],
+            'id_escola': escolas['id_escola'].to_numpy()[escola],
+            'id_dependencia_adm': escolas['id_dependencia_adm'].to_numpy()[escola],
+            'id_localizacao': escolas['id_localizacao'].to_numpy()[escola],
+            'id_turma': escola * 10 + turma + 1,
+            'id_aluno': np.arange(inicio, inicio + n, dtype=np.int64) + 1
+        }
+        
+        # Respostas do questionário: probabilidades fixas por item, com
+        # alternativas mais altas associadas a notas maiores
+        efeito_questionario = np.zeros(n)
+        for posicao, (item, alternativas) in enumerate(itens.items()):
+            rng_item = np.random.default_rng([semente, 1000 + posicao])
+            probabilidades = rng_item.dirichlet(np.full(len(alternativas) - 1, 3.0)) * (1 - FRACAO_RESPOSTA_BRANCO)
+            probabilidades = np.append(probabilidades, FRACAO_RESPOSTA_BRANCO)
+            codigos = rng.choice(len(alternativas), size=n, p=probabilidades)
+            respondidas = codigos < len(alternativas) - 1
+            efeito_questionario += np.where(respondidas, (codigos - (len(alternativas) - 2) / 2) * 3.0, 0.0)
+            colunas[item] = pd.Categorical.from_codes(codigos, categories=alternativas)
+        
+        # Proficiências correlacionadas entre as disciplinas
+        nivel = 250 + escolas['efeito'].to_numpy()[escola] + efeito_ano[indice_ano] + efeito_questionario \
+            + rng.normal(0, 35, size=n)
+        for disciplina in ['proficiencia_lp', 'proficiencia_mt']:
+            nota = nivel + rng.normal(0, 20, size=n)
+            colunas[disciplina] = np.where(rng.random(n) < FRACAO_NOTA_AUSENTE, np.nan, nota)
+        
+        yield aplicar_esquema(pd.DataFrame(colunas), 'saeb_aluno_9ano')
+
+def gerar_dicionario():
+    """
+    Gera a tabela saeb_dicionario sintética, com as traduções das colunas
+    codificadas usadas pela transformação.
+    
+    Returns:
+        pandas.DataFrame: Dicionário com as colunas variavel, chave e valor
+    """
+    linhas = [('id_regiao', str(codigo), nome) for codigo, nome in REGIOES.items()]
+    linhas += [('id_dependencia_adm', str(codigo), nome) for codigo, (nome, _) in DEPENDENCIAS_ADM.items()]
+    linhas += [('id_localizacao', str(codigo), nome) for codigo, (nome, _) in LOCALIZACOES.items()]
+    for item, alternativas in _itens_questionario().items():
+        numero = int(item[-3:])
+        linhas += [
+            (item, alternativa, f"Questão {numero} - " + ('Em branco' if alternativa == '*' else f"Alternativa {alternativa}"))
+            for alternativa in alternativas
+        ]
+    df_dicionario = pd.DataFrame(linhas, columns=['variavel', 'chave', 'valor'])
+    df_dicionario.insert(0, 'id_tabela', 'aluno_ef_9ano')
+    return aplicar_esquema(df_dicionario, 'saeb_dicionario')
+
+def gerar_populacao(universo, anos=None, semente=0):
+    """
+    Gera a tabela ibge_populacao sintética para os municípios do universo.
+    
+    Args:
+        universo (dict): Municípios e escolas criados com _criar_universo
+        anos (list, opcional): Anos das estimativas (padrão: de 2019 à última edição)
+        semente (int): Semente do gerador aleatório
+    
+    Returns:
+        pandas.DataFrame: População por ano e município
+    """
+    rng = np.random.default_rng([semente, 1])
+    anos = anos or list(range(min(EFEITO_ANO), max(EFEITO_ANO) + 1))
+    municipios = universo['municipios']
+    partes = []
+    for deslocamento, ano in enumerate(anos):
+        # Crescimento anual em torno de 0,5%
+        crescimento = (1 + rng.normal(0.005, 0.01, size=len(municipios))) ** deslocamento
+        partes.append(pd.DataFrame({
+            'ano': ano,
+            'sigla_uf': municipios['sigla_uf'],
+            'id_municipio': municipios['id_municipio'],
+            'populacao': np.round(municipios['populacao'].to_numpy() * crescimento).astype(np.int64)
+        }))
+    return aplicar_esquema(pd.concat(partes, ignore_index=True), 'ibge_populacao')
+
+def gerar_microdados_enem(universo, n_participantes, semente=0):
+    """
+    Gera a tabela enem_microdados sintética para os municípios do universo.
+    
+    Args:
+        universo (dict): Municípios e escolas criados com _criar_universo
+        n_participantes (int): Quantidade de participantes
+        semente (int): Semente do gerador aleatório
+    
+    Returns:
+        pandas.DataFrame: Participantes com as colunas consultadas pela extração
+    """
+    rng = np.random.default_rng([semente, 2])
+    municipios = universo['municipios']
+    peso_municipio = municipios['populacao'].to_numpy() / municipios['populacao'].sum()
+    municipio = rng.choice(len(municipios), size=n_participantes, p=peso_municipio)
+    tipos_escola = list(TIPOS_ESCOLA_ENEM)
+    tipos_ensino = list(TIPOS_ENSINO_ENEM)
+    
+    colunas = {
+        'ano': rng.choice(list(EFEITO_ANO), size=n_participantes),
+        'sigla_uf': municipios['sigla_uf'].to_numpy()[municipio],
+        'id_municipio_residencia': municipios['id_municipio'].to_numpy()[municipio],
+        'tp_escola': rng.choice(tipos_escola, size=n_participantes, p=[TIPOS_ESCOLA_ENEM[t][1] for t in tipos_escola]),
+        'tp_ensino': rng.choice(tipos_ensino, size=n_participantes, p=[TIPOS_ENSINO_ENEM[t][1] for t in tipos_ensino])
+    }
+    # Notas correlacionadas entre as provas, com a mesma fração de ausentes do SAEB
+    nivel = 500 + np.where(colunas['tp_escola'] == 3, 60.0, 0.0) + rng.normal(0, 70, size=n_participantes)
+    for nota in NOTAS_ENEM:
+        valores = np.clip(nivel + rng.normal(0, 40, size=n_participantes), 0, 1000)
+        colunas[nota] = np.where(rng.random(n_participantes) < FRACAO_NOTA_AUSENTE, np.nan, valores)
+    return aplicar_esquema(pd.DataFrame(colunas), 'enem_microdados')
+
+def gerar_dicionario_enem():
+    """
+    Gera a tabela enem_dicionario sintética, com as traduções de tp_escola e tp_ensino.
+    
+    Returns:
+        pandas.DataFrame: Dicionário com as colunas variavel, chave e valor
+    """
+    linhas = [('tp_escola', str(codigo), nome) for codigo, (nome, _) in TIPOS_ESCOLA_ENEM.items()]
+    linhas += [('tp_ensino', str(codigo), nome) for codigo, (nome, _) in TIPOS_ENSINO_ENEM.items()]
+    df_dicionario = pd.DataFrame(linhas, columns=['variavel', 'chave', 'valor'])
+    df_dicionario.insert(0, 'id_tabela', 'microdados')
+    return aplicar_esquema(df_dicionario, 'enem_dicionario')
+
+def gerar_dados_sinteticos(n_alunos, semente=0):
+    """
+    Gera em memória as três tabelas de entrada da transformação.
+    
+    Args:
+        n_alunos (int): Quantidade total de alunos
+        semente (int): Semente do gerador aleatório
+    
+    Returns:
+        dict: DataFrames 'saeb_aluno_9ano', 'saeb_dicionario' e 'ibge_populacao'
+    """
+    universo = _criar_universo(n_alunos, semente)
+    lotes = list(gerar_lotes_saeb(n_alunos, semente=semente, universo=universo))
+    return {
+        'saeb_aluno_9ano': pd.concat(lotes, ignore_index=True) if len(lotes) > 1 else lotes[0],
+        'saeb_dicionario': gerar_dicionario(),
+        'ibge_populacao': gerar_populacao(universo, semente=semente)
+    }
+
+def salvar_dados_sinteticos(diretorio, n_alunos, formato=FORMATO_PADRAO, semente=0, timestamp=None,
+                            tamanho_lote=1_000_000):
+    """
+    Gera as tabelas de entrada e as grava no diretório de dados brutos, com os
+    mesmos nomes usados pela extração, registrando-as no catálogo do diretório.
+    
+    O SAEB é gerado e gravado em lotes, de modo que escalas maiores que a
+    memória disponível podem ser geradas.
+    
+    Args:
+        diretorio (str): Diretório dos dados brutos (ex.: 'dados_raw')
+        n_alunos (int): Quantidade total de alunos
+        formato (str): Formato dos arquivos ('parquet' ou 'csv')
+        semente (int): Semente do gerador aleatório
+        timestamp (str, opcional): Timestamp dos arquivos (padrão: data atual)
+        tamanho_lote (int): Quantidade de alunos gerados por lote
+    
+    Returns:
+        dict: Caminho do arquivo gravado para cada tabela
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d')
+    universo = _criar_universo(n_alunos, semente)
+    caminhos = {
+        nome: nome_arquivo(diretorio, nome, timestamp, formato)
+        for nome in ['saeb_aluno_9ano', 'saeb_dicionario', 'ibge_populacao']
+    }
+    
+    with abrir_escritor_incremental(caminhos['saeb_aluno_9ano']) as escritor:
+        for numero_lote, lote in enumerate(
+                gerar_lotes_saeb(n_alunos, tamanho_lote=tamanho_lote, semente=semente, universo=universo), start=1):
+            escritor.escrever(lote)
+            print(f"Lote {numero_lote}: {len(lote)} alunos gerados")
+    catalogo = CatalogoDatasets(diretorio)
+    catalogo.registrar('saeb_aluno_9ano', caminhos['saeb_aluno_9ano'], versao=timestamp, linhas=n_alunos)
+    for nome, df in [('saeb_dicionario', gerar_dicionario()),
+                     ('ibge_populacao', gerar_populacao(universo, semente=semente))]:
+        salvar_dataframe(df, caminhos[nome])
+        catalogo.registrar(nome, caminhos[nome], versao=timestamp, df=df)
+    
+    print(f"Dados sintéticos ({n_alunos} alunos) salvos em: {diretorio}")
+    return caminhos
+
+def popular_fonte_sqlite(caminho_banco, n_alunos, semente=0, tamanho_lote=1_000_000, n_participantes_enem=None):
+    """
+    Grava em um banco SQLite todas as tabelas consultadas por extract_data.main,
+    com os nomes completos do BigQuery, para executar o pipeline inteiro offline
+    com uma FonteSQLite.
+    
+    Args:
+        caminho_banco (str): Caminho do arquivo SQLite (as tabelas existentes são substituídas)
+        n_alunos (int): Quantidade total de alunos do SAEB
+        semente (int): Semente do gerador aleatório
+        tamanho_lote (int): Quantidade de alunos gerados e gravados por lote
+        n_participantes_enem (int, opcional): Participantes do ENEM (padrão: metade
+            da quantidade de alunos)
+    
+    Returns:
+        FonteSQLite: Fonte com as tabelas gravadas
+    """
+    fonte = FonteSQLite(caminho_banco)
+    universo = _criar_universo(n_alunos, semente)
+    
+    for numero_lote, lote in enumerate(
+            gerar_lotes_saeb(n_alunos, tamanho_lote=tamanho_lote, semente=semente, universo=universo), start=1):
+        fonte.carregar_tabela(TABELAS_FONTE['saeb_aluno_9ano'], lote, substituir=numero_lote == 1)
+        print(f"Lote {numero_lote}: {len(lote)} alunos gravados")
+    if n_participantes_enem is None:
+        n_participantes_enem = max(1, n_alunos // 2)
+    tabelas = {
+        'saeb_dicionario': gerar_dicionario(),
+        'ibge_populacao': gerar_populacao(universo, semente=semente),
+        'enem_microdados': gerar_microdados_enem(universo, n_participantes_enem, semente=semente),
+        'enem_dicionario': gerar_dicionario_enem()
+    }
+    for nome, df in tabelas.items():
+        fonte.carregar_tabela(TABELAS_FONTE[nome], df)
+    
+    print(f"Fonte SQLite ({n_alunos} alunos) gravada em: {caminho_banco}")
+    return fonte
+
+def main(argumentos=None):
+    """
+    Linha de comando do gerador de dados sintéticos.
+    
+    Uso:
+        python dados_sinteticos.py ESCALA [--formato parquet|csv] [--diretorio DIRETORIO]
+                                   [--semente N] [--sqlite BANCO]
+    
+    ESCALA é uma das escalas nomeadas (100k, 1M, 10M) ou uma quantidade de alunos.
+    Com --sqlite, as tabelas consultadas pela extração são gravadas no banco
+    SQLite informado, em vez dos arquivos de dados brutos.
+    """
+    argumentos = sys.argv[1:] if argumentos is None else argumentos
+    if not argumentos or argumentos[0].startswith('--'):
+        print(main.__doc__)
+        return
+    
+    escala = argumentos[0]
+    n_alunos = ESCALAS[escala] if escala in ESCALAS else int(escala)
+    formato = FORMATO_PADRAO
+    diretorio = 'dados_raw'
+    semente = 0
+    caminho_banco = None
+    for posicao, argumento in enumerate(argumentos):
+        if argumento == '--formato':
+            formato = argumentos[posicao + 1]
+        elif argumento == '--diretorio':
+            diretorio = argumentos[posicao + 1]
+        elif argumento == '--semente':
+            semente = int(argumentos[posicao + 1])
+        elif argumento == '--sqlite':
+            caminho_banco = argumentos[posicao + 1]
+    
+    if caminho_banco:
+        popular_fonte_sqlite(caminho_banco, n_alunos, semente=semente)
+        return
+    salvar_dados_sinteticos(diretorio, n_alunos, formato=formato, semente=semente)
+
+if __name__ == "__main__":
+    main()
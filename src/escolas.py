@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+def _codificar_dimensao(dimensao, colunas):
+    """
+    Código de cada linha de uma dimensão nas combinações das colunas (-1 quando
+    alguma coluna é ausente) e as combinações, em ordem crescente.
+    """
+    agrupado = dimensao.groupby(list(colunas), observed=True, dropna=True, sort=True)
+    codigos = agrupado.ngroup().to_numpy(dtype=np.float64, na_value=np.nan)
+    codigos = np.where(np.isnan(codigos), -1, codigos).astype(np.int64)
+    return codigos, agrupado.size().index.to_frame(index=False)
+
+def _codigos_linhas(codigos_dimensao, posicoes):
+    """
+    Código de cada linha da tabela fato a partir da sua posição na dimensão (-1 para ausentes).
+    """
+    if not len(codigos_dimensao):
+        return np.full(len(posicoes), -1, dtype=np.int64)
+    return np.where(posicoes >= 0, codigos_dimensao[np.maximum(posicoes, 0)], -1)
+
+class DesempenhoEscolas:
+    """
+    Média de cada escola em cada ano, comparada à média nacional do ano.
+    
+    O grão é (ano, escola, município): as linhas dos alunos são reduzidas a
+    códigos inteiros (posições nas dimensões e chave da escola) e as somas e
+    quantidades de notas de cada escola são obtidas com np.bincount, sem
+    DataFrames temporários do tamanho da tabela fato. A média nacional de um ano é a
+    média das notas de todos os alunos do ano, e uma escola está abaixo da
+    média quando a média dos seus alunos é menor que a média nacional.
+    """
+    
+    def __init__(self, escolas, anos, dim_geografia):
+        """
+        Args:
+            escolas (pandas.DataFrame): Uma linha por escola, ano e município, com
+                'codigo_ano', 'posicao_geografia', 'id_dim_escola', 'quantidade_alunos',
+                'soma', 'media' e 'abaixo_media'
+            anos (pandas.DataFrame): Um ano por linha (na ordem de 'codigo_ano'), com
+                'ano' e 'media_nacional'
+            dim_geografia (pandas.DataFrame): Dimensão geografia, indexada por 'posicao_geografia'
+        """
+        self.escolas = escolas
+        self.anos = anos
+        self.dim_geografia = dim_geografia
+    
+    @classmethod
+    def construir(cls, contexto, medida='proficiencia_media'):
+        """
+        Calcula a média de cada escola em cada ano a partir da tabela fato.
+        
+        Args:
+            contexto (ContextoAnalise): Contexto com a tabela fato e as dimensões
+                tempo e geografia
+            medida (str): Nota usada nas médias
+        
+        Returns:
+            DesempenhoEscolas: Médias das escolas e médias nacionais
+        """
+        dim_tempo = contexto.dimensoes['dim_tempo']
+        dim_geografia = contexto.dimensoes['dim_geografia']
+        quantidade_geografia = len(dim_geografia)
+        
+        codigos_tempo, anos = _codificar_dimensao(dim_tempo, ['ano'])
+        codigo_ano = _codigos_linhas(codigos_tempo, contexto.posicoes('dim_tempo'))
+        notas = contexto.atributo(medida).to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        # Média nacional de cada ano: todos os alunos com nota e ano conhecido
+        validos = (codigo_ano >= 0) & ~np.isnan(notas)
+        alunos_ano = np.bincount(codigo_ano[validos], minlength=len(anos))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            anos['media_nacional'] = np.bincount(
+                codigo_ano[validos], weights=notas[validos], minlength=len(anos)
+            ) / alunos_ano
+        
+        # Código único de (ano, município, escola) de cada aluno, compactado com factorize
+        posicao_geografia = contexto.posicoes('dim_geografia')
+        id_escola = contexto.atributo('id_dim_escola').to_numpy(dtype=np.float64, na_value=np.nan)
+        validos &= (posicao_geografia >= 0) & (id_escola >= 0)
+        id_escola = id_escola[validos].astype(np.int64)
+        quantidade_escolas = int(id_escola.max()) + 1 if len(id_escola) else 1
+        chave = (codigo_ano[validos] * quantidade_geografia + posicao_geografia[validos]) \
+            * quantidade_escolas + id_escola
+        codigos, chaves_escolas = pd.factorize(chave, sort=True)
+        
+        quantidade = np.bincount(codigos, minlength=len(chaves_escolas))
+        soma = np.bincount(codigos, weights=notas[validos], minlength=len(chaves_escolas))
+        ano_escola, resto = np.divmod(chaves_escolas, quantidade_geografia * quantidade_escolas)
+        geografia_escola, escola = np.divmod(resto, quantidade_escolas)
+        media = soma / quantidade
+        
+        escolas = pd.DataFrame({
+            'codigo_ano': ano_escola,
+            'posicao_geografia': geografia_escola,
+            'id_dim_escola': escola,
+            'quantidade_alunos': quantidade,
+            'soma': soma,
+            'media': media,
+            'abaixo_media': media < anos['media_nacional'].to_numpy()[ano_escola]
+        })
+        return cls(escolas, anos, dim_geografia.reset_index(drop=True))
+    
+    def __len__(self):
+        return len(self.escolas)
+    
+    def abaixo_media(self, niveis):
+        """
+        Quantidade e percentual de escolas abaixo da média nacional em cada ano,
+        por atributos da dimensão geografia.
+        
+        Args:
+            niveis (list): Colunas da dimensão geografia (ex.: ['sigla_uf'] ou
+                ['sigla_uf', 'id_municipio']). Escolas com algum atributo ausente
+                são descartadas
+        
+        Returns:
+            pandas.DataFrame: Colunas do nível, 'ano', 'qtd_total' (escolas),
+                'qtd_abaixo_media', 'percentual_abaixo_media', 'proficiencia_media'
+                (média dos alunos do nível) e 'media_nacional'
+        """
+        codigos_nivel, chaves_nivel = _codificar_dimensao(self.dim_geografia, niveis)
+        quantidade_niveis = len(chaves_nivel)
+        quantidade_grupos = len(self.anos) * quantidade_niveis
+        
+        # Grupo (ano, nível) de cada escola
+        nivel = codigos_nivel[self.escolas['posicao_geografia'].to_numpy()] if len(codigos_nivel) \
+            else np.full(len(self.escolas), -1, dtype=np.int64)
+        validas = nivel >= 0
+        grupos = self.escolas['codigo_ano'].to_numpy()[validas] * quantidade_niveis + nivel[validas]
+        
+        qtd_total = np.bincount(grupos, minlength=quantidade_grupos)
+        qtd_abaixo = np.bincount(
+            grupos, weights=self.escolas['abaixo_media'].to_numpy()[validas], minlength=quantidade_grupos
+        )
+        alunos = np.bincount(
+            grupos, weights=self.escolas['quantidade_alunos'].to_numpy()[validas], minlength=quantidade_grupos
+        )
+        soma = np.bincount(grupos, weights=self.escolas['soma'].to_numpy()[validas], minlength=quantidade_grupos)
+        
+        presentes = np.flatnonzero(qtd_total)
+        codigo_ano, codigo_nivel = np.divmod(presentes, quantidade_niveis)
+        resultado = chaves_nivel.iloc[codigo_nivel].reset_index(drop=True)
+        resultado['ano'] = self.anos['ano'].iloc[codigo_ano].to_numpy()
+        resultado['qtd_total'] = qtd_total[presentes]
+        resultado['qtd_abaixo_media'] = qtd_abaixo[presentes].astype(np.int64)
+        resultado['percentual_abaixo_media'] = (
+            resultado['qtd_abaixo_media'] / resultado['qtd_total'] * 100
+        ).round(2)
+        resultado['proficiencia_media'] = soma[presentes] / alunos[presentes]
+        resultado['media_nacional'] = self.anos['media_nacional'].to_numpy()[codigo_ano]
+        return resultado
+
+def escolas_do_contexto(contexto, medida='proficiencia_media'):
+    """
+    Médias das escolas da tabela fato de um contexto de análise, calculadas uma
+    única vez e compartilhadas pelas análises que as usam.
+    
+    Args:
+        contexto (ContextoAnalise): Contexto com as dimensões tempo e geografia
+        medida (str): Nota usada nas médias
+    
+    Returns:
+        DesempenhoEscolas: Médias das escolas
+    """
+    return contexto.reutilizar(('escolas', medida), lambda: DesempenhoEscolas.construir(contexto, medida))
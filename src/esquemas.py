@@ -0,0 +1,244 @@
+from fnmatch import fnmatchcase
+import numpy as np
+import pandas as pd
+
+# Colunas do SAEB efetivamente utilizadas pela transformação. A extração usa
+# essas listas (colunas_utilizadas_saeb) para selecionar apenas as colunas
+# necessárias na origem, sem depender do módulo de transformação.
+COLUNAS_CHAVE_SAEB = [
+    'ano', 'id_regiao', 'sigla_uf', 'id_municipio', 'id_escola',
+    'id_dependencia_adm', 'id_localizacao', 'id_turma', 'id_aluno'
+]
+COLUNAS_QUESTIONARIO_SAEB = [
+    'tx_resp_q001', 'tx_resp_q002', 'tx_resp_q003', 'tx_resp_q004',
+    'tx_resp_q005', 'tx_resp_q006', 'tx_resp_q007', 'tx_resp_q008'
+]
+# Respostas sobre pretensão futura, usadas em analisar_desempenho_e_pretensao_futura
+COLUNAS_PRETENSAO_FUTURA = ['tx_resp_q024', 'tx_resp_q025', 'tx_resp_q026']
+PREFIXO_PROFICIENCIA = 'proficiencia_'
+
+# Registro de esquemas: tipo compacto declarado para cada coluna de cada dataset.
+# Nomes com '*' valem para todas as colunas que casam com o padrão. Colunas
+# inteiras com valores ausentes usam o tipo anulável equivalente (ex.: Int16).
+ESQUEMAS = {
+    # Camada raw
+    'saeb_aluno_9ano': {
+        'ano': 'int16',
+        'id_regiao': 'int8',
+        'sigla_uf': 'category',
+        'id_municipio': 'int32',
+        'id_escola': 'int32',
+        'id_dependencia_adm': 'int8',
+        'id_localizacao': 'int8',
+        'id_turma': 'int32',
+        'id_aluno': 'int64',
+        'proficiencia_*': 'float32',
+        'tx_resp_q*': 'category'
+    },
+    'saeb_dicionario': {
+        'variavel': 'category',
+        'chave': 'object',
+        'valor': 'object'
+    },
+    'ibge_populacao': {
+        'ano': 'int16',
+        'sigla_uf': 'category',
+        'id_municipio': 'int32',
+        'populacao': 'int32'
+    },
+    'enem_microdados': {
+        'ano': 'int16',
+        'sigla_uf': 'category',
+        'id_municipio_residencia': 'int32',
+        'tp_escola': 'int8',
+        'tp_ensino': 'int8',
+        'nu_nota_*': 'float32'
+    },
+    'enem_dicionario': {
+        'variavel': 'category',
+        'chave': 'object',
+        'valor': 'object'
+    },
+    # Camada processada (modelo dimensional)
+    'dim_tempo': {
+        'id_tempo': 'int16',
+        'ano': 'int16',
+        'descricao': 'category',
+        'pre_pandemia': 'int8',
+        'durante_pandemia': 'int8',
+        'pos_pandemia': 'int8'
+    },
+    'dim_geografia': {
+        'id_geografia': 'int32',
+        'id_regiao': 'int8',
+        'regiao_desc': 'category',
+        'sigla_uf': 'category',
+        'id_municipio': 'int32',
+        'populacao': 'int32'
+    },
+    'dim_escola': {
+        'id_dim_escola': 'int32',
+        'id_escola': 'int32',
+        'id_dependencia_adm': 'int8',
+        'id_dependencia_adm_desc': 'category',
+        'id_localizacao': 'int8',
+        'id_localizacao_desc': 'category'
+    },
+    'dim_perfil_familiar': {
+        'id_perfil_familiar': 'int64',
+        'tx_resp_q*': 'category'
+    },
+    'dim_perfil_pretensao': {
+        'id_perfil_pretensao': 'int64',
+        'tx_resp_q*': 'category'
+    },
+    'fato_desempenho': {
+        'id_tempo': 'int16',
+        'id_geografia': 'int32',
+        'id_dim_escola': 'int32',
+        'id_perfil_familiar': 'int64',
+        'id_perfil_pretensao': 'int64',
+        'id_aluno': 'int64',
+        'proficiencia_*': 'float32',
+        'nivel_desempenho': 'category'
+    }
+}
+
+def colunas_utilizadas_saeb(colunas_disponiveis):
+    """
+    Seleciona, entre as colunas da tabela de origem do SAEB, as que são usadas
+    pela transformação e pelas análises.
+    
+    Args:
+        colunas_disponiveis (list): Colunas existentes na tabela de origem
+    
+    Returns:
+        list: Colunas a extrair, na ordem da tabela de origem
+    """
+    colunas_necessarias = set(COLUNAS_CHAVE_SAEB + COLUNAS_QUESTIONARIO_SAEB + COLUNAS_PRETENSAO_FUTURA)
+    return [
+        col for col in colunas_disponiveis
+        if col in colunas_necessarias or col.startswith(PREFIXO_PROFICIENCIA)
+    ]
+
+def tipo_declarado(nome_esquema, coluna):
+    """
+    Obtém o tipo declarado para uma coluna de um dataset.
+    
+    Args:
+        nome_esquema (str): Nome do dataset no registro (ex.: 'fato_desempenho')
+        coluna (str): Nome da coluna
+    
+    Returns:
+        str: Tipo declarado, ou None se a coluna não estiver no esquema
+    """
+    esquema = ESQUEMAS.get(nome_esquema, {})
+    if coluna in esquema:
+        return esquema[coluna]
+    for padrao, tipo in esquema.items():
+        if '*' in padrao and fnmatchcase(coluna, padrao):
+            return tipo
+    return None
+
+def _converter_coluna(serie, tipo):
+    """
+    Converte uma coluna para o tipo declarado.
+    
+    Returns:
+        tuple: Coluna convertida (ou None) e a descrição da violação (ou None)
+    """
+    if tipo == 'category':
+        return serie.astype('category'), None
+    if tipo == 'object':
+        return serie.astype(object), None
+    
+    if not pd.api.types.is_numeric_dtype(serie.dtype):
+        numerica = pd.to_numeric(serie, errors='coerce')
+        invalidos = numerica.isna() & serie.notna()
+        if invalidos.any():
+            return None, f"{int(invalidos.sum())} valores não numéricos (ex.: {serie[invalidos].iloc[0]!r})"
+        serie = numerica
+    
+    if tipo.startswith('float'):
+        return serie.astype(tipo), None
+    
+    # Tipos inteiros: verifica valores fracionários e a faixa do tipo
+    limites = np.iinfo(tipo)
+    valores = serie.dropna()
+    if len(valores):
+        if pd.api.types.is_float_dtype(valores.dtype) and not np.all(np.mod(valores, 1) == 0):
+            return None, "valores fracionários em coluna inteira"
+        minimo, maximo = valores.min(), valores.max()
+        if minimo < limites.min or maximo > limites.max:
+            return None, f"valores fora da faixa de {tipo} ({minimo} a {maximo})"
+    if serie.isna().any():
+        # Tipo anulável equivalente (ex.: int16 -> Int16)
+        return serie.astype(tipo.capitalize()), None
+    return serie.astype(tipo), None
+
+def validar_esquema(df, nome_esquema):
+    """
+    Verifica se as colunas de um DataFrame respeitam o esquema do dataset,
+    sem alterar os dados.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame a ser verificado
+        nome_esquema (str): Nome do dataset no registro
+    
+    Returns:
+        dict: Violação encontrada em cada coluna (vazio se tudo estiver conforme)
+    """
+    violacoes = {}
+    for coluna in df.columns:
+        tipo = tipo_declarado(nome_esquema, coluna)
+        if tipo is None:
+            continue
+        _, violacao = _converter_coluna(df[coluna], tipo)
+        if violacao:
+            violacoes[coluna] = violacao
+    return violacoes
+
+def aplicar_esquema(df, nome_esquema, reduzir_nao_declaradas=True):
+    """
+    Converte as colunas de um DataFrame para os tipos compactos do esquema.
+    
+    Colunas que violam o esquema mantêm o tipo original e são reportadas.
+    Colunas inteiras não declaradas podem ser reduzidas automaticamente para o
+    menor tipo inteiro que comporta os seus valores.
+    
+    Args:
+        df (pandas.DataFrame): DataFrame a ser convertido
+        nome_esquema (str): Nome do dataset no registro
+        reduzir_nao_declaradas (bool): Se True, reduz as colunas inteiras não declaradas
+    
+    Returns:
+        pandas.DataFrame: DataFrame com os tipos do esquema. As violações ficam em
+            df.attrs['violacoes_esquema']
+    """
+    if nome_esquema not in ESQUEMAS:
+        return df
+    
+    # Cópia rasa: apenas as colunas convertidas são alocadas
+    df_convertido = df.copy(deep=False)
+    violacoes = {}
+    for coluna in df_convertido.columns:
+        serie = df_convertido[coluna]
+        tipo = tipo_declarado(nome_esquema, coluna)
+        if tipo is None:
+            if reduzir_nao_declaradas and pd.api.types.is_integer_dtype(serie.dtype) \
+                    and not pd.api.types.is_extension_array_dtype(serie.dtype):
+                df_convertido[coluna] = pd.to_numeric(serie, downcast='integer')
+            continue
+        if str(serie.dtype) == tipo:
+            continue
+        
+        serie_convertida, violacao = _converter_coluna(serie, tipo)
+        if violacao:
+            violacoes[coluna] = violacao
+        else:
+            df_convertido[coluna] = serie_convertida
+    
+    for coluna, violacao in violacoes.items():
+        print(f"Aviso: coluna {coluna} de {nome_esquema} viola o esquema: {violacao}")
+    df_convertido.attrs['violacoes_esquema'] = violacoes
+    return df_convertido
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+# Estatísticas guardadas para cada grupo
+COLUNAS_ESTATISTICAS = ['quantidade', 'media', 'm2', 'minimo', 'maximo']
+
+def _codificar_grupos(grupos, chaves, dropna):
+    """
+    Código do grupo de cada linha e as chaves de cada grupo, em ordem crescente.
+    
+    Returns:
+        tuple: Códigos (numpy.ndarray, -1 para linhas descartadas) e DataFrame com
+            as chaves de cada grupo, indexado pelo código
+    """
+    if not chaves:
+        return np.zeros(len(grupos), dtype=np.int64), pd.DataFrame(index=range(1))
+    agrupado = grupos.groupby(list(chaves), observed=True, dropna=dropna, sort=True)
+    codigos = agrupado.ngroup().to_numpy(dtype=np.float64, na_value=np.nan)
+    codigos = np.where(np.isnan(codigos), -1, codigos).astype(np.int64)
+    return codigos, agrupado.size().index.to_frame(index=False)
+
+def _tabela_estatisticas(chaves_grupos, quantidade, media, m2, minimo, maximo):
+    """
+    Monta a tabela de estatísticas por grupo (grupos vazios ficam sem mínimo e máximo).
+    """
+    vazios = quantidade == 0
+    tabela = chaves_grupos.reset_index(drop=True)
+    tabela['quantidade'] = quantidade.astype(np.int64)
+    tabela['media'] = media
+    tabela['m2'] = m2
+    tabela['minimo'] = np.where(vazios, np.nan, minimo)
+    tabela['maximo'] = np.where(vazios, np.nan, maximo)
+    return tabela
+
+class EstatisticasAgregaveis:
+    """
+    Estatísticas parciais por grupo que podem ser combinadas entre si.
+    
+    Cada grupo guarda a quantidade de valores, a média, a soma dos quadrados
+    dos desvios em relação à média (M2), o mínimo e o máximo. Parciais
+    calculadas em partes diferentes dos dados (partições, processos, anos
+    gravados em execuções anteriores) são combinadas com a fórmula de Chan et
+    al., sem voltar aos valores: para as partes i de um grupo,
+        
+        n = Σ n_i,  média = Σ n_i·média_i / n,  M2 = Σ [M2_i + n_i·(média_i - média)²]
+    
+    o que dá o mesmo resultado (a menos de arredondamento) que o cálculo sobre
+    todos os valores de uma vez, e é numericamente estável, ao contrário da
+    soma dos quadrados. A variância amostral é M2 / (n - 1).
+    
+    Tanto o cálculo por grupo quanto a combinação são vetorizados (np.bincount
+    sobre os códigos dos grupos), sem laços por grupo.
+    """
+    
+    def __init__(self, tabela, chaves):
+        """
+        Args:
+            tabela (pandas.DataFrame): Colunas das chaves seguidas de COLUNAS_ESTATISTICAS,
+                uma linha por grupo
+            chaves (list): Colunas que identificam o grupo ([] para um grupo único)
+        """
+        self.tabela = tabela
+        self.chaves = list(chaves)
+    
+    @classmethod
+    def _de_codigos(cls, valores, codigos, chaves_grupos, chaves):
+        """
+        Estatísticas dos valores já associados aos códigos dos grupos.
+        """
+        quantidade_grupos = len(chaves_grupos)
+        validos = (codigos >= 0) & ~np.isnan(valores)
+        codigos = codigos[validos]
+        valores = valores[validos]
+        
+        quantidade = np.bincount(codigos, minlength=quantidade_grupos)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.bincount(codigos, weights=valores, minlength=quantidade_grupos) / quantidade
+        # Segunda passagem: desvios em relação à média do próprio grupo
+        desvios = valores - media[codigos]
+        m2 = np.bincount(codigos, weights=desvios * desvios, minlength=quantidade_grupos)
+        minimo = np.full(quantidade_grupos, np.inf)
+        maximo = np.full(quantidade_grupos, -np.inf)
+        np.minimum.at(minimo, codigos, valores)
+        np.maximum.at(maximo, codigos, valores)
+        return cls(_tabela_estatisticas(chaves_grupos, quantidade, media, m2, minimo, maximo), chaves)
+    
+    @classmethod
+    def calcular(cls, valores, grupos=None, dropna=True):
+        """
+        Calcula as estatísticas de cada grupo a partir dos valores.
+        
+        Args:
+            valores (pandas.Series ou numpy.ndarray): Valores (ausentes são ignorados)
+            grupos (pandas.DataFrame, opcional): Chaves do grupo de cada valor, na
+                mesma ordem. Sem grupos, calcula as estatísticas de todos os valores
+            dropna (bool): Se True, valores com alguma chave ausente são descartados,
+                como em um groupby; se False, formam grupos com a chave ausente
+        
+        Returns:
+            EstatisticasAgregaveis: Estatísticas por grupo
+        """
+        valores = pd.Series(valores).to_numpy(dtype=np.float64, na_value=np.nan)
+        chaves = [] if grupos is None else list(grupos.columns)
+        codigos, chaves_grupos = _codificar_grupos(
+            pd.DataFrame(index=range(len(valores))) if grupos is None else grupos, chaves, dropna
+        )
+        return cls._de_codigos(valores, codigos, chaves_grupos, chaves)
+    
+    @classmethod
+    def calcular_colunas(cls, df, colunas_valores, chaves, dropna=True):
+        """
+        Calcula as estatísticas por grupo de várias colunas, agrupando as linhas
+        uma única vez.
+        
+        Args:
+            df (pandas.DataFrame): Dados com as chaves e as colunas de valores
+            colunas_valores (list): Colunas cujas estatísticas são calculadas
+            chaves (list): Colunas que identificam o grupo
+            dropna (bool): Se True, linhas com alguma chave ausente são descartadas
+        
+        Returns:
+            dict: EstatisticasAgregaveis de cada coluna de valores
+        """
+        codigos, chaves_grupos = _codificar_grupos(df, chaves, dropna)
+        return {
+            coluna: cls._de_codigos(
+                df[coluna].to_numpy(dtype=np.float64, na_value=np.nan), codigos, chaves_grupos, chaves
+            )
+            for coluna in colunas_valores
+        }
+    
+    @classmethod
+    def combinar(cls, parciais, chaves=None, dropna=False):
+        """
+        Combina estatísticas parciais, grupo a grupo.
+        
+        Args:
+            parciais (list): EstatisticasAgregaveis a combinar
+            chaves (list, opcional): Chaves do resultado (padrão: as da primeira
+                parcial). Chaves mais grossas que as das parciais fazem um roll-up
+            dropna (bool): Se True, grupos com alguma chave ausente são descartados
+        
+        Returns:
+            EstatisticasAgregaveis: Estatísticas combinadas
+        """
+        chaves = list(parciais[0].chaves if chaves is None else chaves)
+        tabela = pd.concat([parcial.tabela for parcial in parciais], ignore_index=True)
+        codigos, chaves_grupos = _codificar_grupos(tabela, chaves, dropna)
+        quantidade_grupos = len(chaves_grupos)
+        validos = (codigos >= 0) & (tabela['quantidade'].to_numpy() > 0)
+        codigos = codigos[validos]
+        n = tabela['quantidade'].to_numpy()[validos].astype(np.float64)
+        media_parte = tabela['media'].to_numpy()[validos]
+        
+        quantidade = np.bincount(codigos, weights=n, minlength=quantidade_grupos)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.bincount(codigos, weights=n * media_parte, minlength=quantidade_grupos) / quantidade
+        desvios = media_parte - media[codigos]
+        m2 = np.bincount(
+            codigos, weights=tabela['m2'].to_numpy()[validos] + n * desvios * desvios, minlength=quantidade_grupos
+        )
+        minimo = np.full(quantidade_grupos, np.inf)
+        maximo = np.full(quantidade_grupos, -np.inf)
+        np.minimum.at(minimo, codigos, tabela['minimo'].to_numpy()[validos])
+        np.maximum.at(maximo, codigos, tabela['maximo'].to_numpy()[validos])
+        return cls(_tabela_estatisticas(chaves_grupos, quantidade, media, m2, minimo, maximo), chaves)
+    
+    def atualizar(self, valores, grupos=None):
+        """
+        Incorpora novos valores às estatísticas (atualização de Welford em lote).
+        
+        Args:
+            valores (pandas.Series ou numpy.ndarray): Novos valores
+            grupos (pandas.DataFrame, opcional): Chaves do grupo de cada valor
+        
+        Returns:
+            EstatisticasAgregaveis: Estatísticas atualizadas
+        """
+        return self.combinar([self, self.calcular(valores, grupos)], chaves=self.chaves)
+    
+    def rolar(self, niveis, dropna=True):
+        """
+        Agrega (roll-up) as estatísticas em um nível mais grosso.
+        
+        Args:
+            niveis (list): Chaves do nível ([] para o total)
+            dropna (bool): Se True, grupos com alguma chave ausente são descartados
+        
+        Returns:
+            EstatisticasAgregaveis: Estatísticas do nível
+        """
+        return self.combinar([self], chaves=niveis, dropna=dropna)
+    
+    def resumo(self):
+        """
+        Média, desvio padrão amostral, quantidade, mínimo e máximo de cada grupo.
+        
+        Returns:
+            pandas.DataFrame: Chaves do grupo, 'media', 'desvio_padrao',
+                'quantidade', 'minimo' e 'maximo'
+        """
+        quantidade = self.tabela['quantidade'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            desvio_padrao = np.where(quantidade > 1, np.sqrt(self.tabela['m2'].to_numpy() / (quantidade - 1)), np.nan)
+        resumo = self.tabela[self.chaves].copy()
+        resumo['media'] = self.tabela['media'].to_numpy()
+        resumo['desvio_padrao'] = desvio_padrao
+        resumo['quantidade'] = quantidade
+        resumo['minimo'] = self.tabela['minimo'].to_numpy()
+        resumo['maximo'] = self.tabela['maximo'].to_numpy()
+        return resumo
@@ -1,7 +1,17 @@
 import os
+import time
 import pandas as pd
-from google.cloud import bigquery
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from fontes import FonteBigQuery
+from cache_consultas import copiar_do_cache
+from catalogo import CatalogoDatasets
+from esquemas import aplicar_esquema, colunas_utilizadas_saeb
+from instrumentacao import instrumentar, instrumentar_main, submeter
+from armazenamento import (
+    FORMATO_PADRAO, EXTENSOES, abrir_escritor_incremental, calcular_checksum, carregar_manifesto,
+    chave_particao, ler_dataframe, salvar_dataframe, salvar_manifesto
+)
 
 def criar_diretorio(nome_diretorio):
     """
@@ -17,40 +27,464 @@ def criar_diretorio(nome_diretorio):
         os.makedirs(nome_diretorio)
     return nome_diretorio
 
-def extrair_dados_bigquery(query, nome_arquivo):
+def _parametros_cache(fonte, nome_arquivo, esquema=None):
     """
-    Extrai dados do BigQuery e salva em um arquivo CSV.
+    Monta os parâmetros que, junto com a query, identificam um resultado no cache.
+    
+    Args:
+        fonte (FonteDados): Fonte dos dados
+        nome_arquivo (str): Arquivo de saída (a extensão define o formato)
+        esquema (str, opcional): Esquema aplicado ao resultado, que muda os tipos gravados
+    
+    Returns:
+        dict: Parâmetros da fonte, formato do arquivo e esquema aplicado
+    """
+    return {'fonte': fonte.descrever(), 'formato': os.path.splitext(nome_arquivo)[1], 'esquema': esquema}
+
+def _resultado_do_cache(entrada, nome_arquivo):
+    """
+    Copia um resultado do cache para o arquivo de destino, sem lê-lo.
+    
+    Args:
+        entrada (dict): Entrada do cache (ver CacheConsultas.obter)
+        nome_arquivo (str): Arquivo de destino
+    
+    Returns:
+        dict: Resumo da extração, com a quantidade de linhas e de bytes guardada
+            no cache, o checksum do arquivo e 'cache' = True
+    """
+    copiar_do_cache(entrada, nome_arquivo)
+    print(f"Dados obtidos do cache: {entrada['linhas']} linhas ({entrada['bytes']} bytes)")
+    return {
+        'arquivo': nome_arquivo,
+        'linhas': entrada['linhas'],
+        'bytes': entrada['bytes'],
+        'paginas': [],
+        'checksum': entrada['checksum'],
+        'cache': True
+    }
+
+@instrumentar
+def extrair_dados_bigquery(query, nome_arquivo, fonte=None, cache=None, esquema=None):
+    """
+    Extrai dados da fonte (BigQuery, por padrão) e salva em um arquivo Parquet ou CSV.
     
     Args:
         query (str): Query SQL para extrair os dados
-        nome_arquivo (str): Nome do arquivo para salvar os dados
+        nome_arquivo (str): Nome do arquivo para salvar os dados. O formato
+            é definido pela extensão (.parquet ou .csv)
+        fonte (FonteDados, opcional): Fonte a ser utilizada. Se não informada,
+            os dados são extraídos do BigQuery.
+        cache (CacheConsultas, opcional): Cache de resultados. Se a query já
+            estiver no cache, o resultado é copiado do disco sem consultar a fonte
+        esquema (str, opcional): Nome do dataset no registro de esquemas. Se
+            informado, os tipos declarados são aplicados antes da gravação
     
     Returns:
-        pandas.DataFrame: DataFrame com os dados extraídos
+        pandas.DataFrame: DataFrame com os dados extraídos. Com cache, df.attrs traz
+            o checksum do arquivo e se o resultado veio do cache; nesse caso o
+            DataFrame é lido da cópia gravada no arquivo de destino
     """
     print(f"Extraindo dados para: {nome_arquivo}")
-    cliente = bigquery.Client()
-    df = cliente.query(query).to_dataframe()
-    df.to_csv(nome_arquivo, index=False)
+    if fonte is None:
+        fonte = FonteBigQuery()
+    
+    if cache is not None:
+        entrada = cache.obter(query, _parametros_cache(fonte, nome_arquivo, esquema))
+        if entrada is not None:
+            resumo = _resultado_do_cache(entrada, nome_arquivo)
+            df = ler_dataframe(nome_arquivo)
+            if esquema is not None:
+                # O CSV não guarda os tipos: o esquema é aplicado novamente na leitura
+                df = aplicar_esquema(df, esquema)
+            df.attrs.update({'checksum': resumo['checksum'], 'cache': True})
+            return df
+    
+    df = fonte.consultar(query)
+    if esquema is not None:
+        df = aplicar_esquema(df, esquema)
+    salvar_dataframe(df, nome_arquivo)
+    if cache is not None:
+        entrada = cache.armazenar(query, nome_arquivo, _parametros_cache(fonte, nome_arquivo, esquema),
+                                  linhas=len(df))
+        checksum = entrada['checksum'] if entrada else calcular_checksum(nome_arquivo)
+        df.attrs.update({'checksum': checksum, 'cache': False})
     print(f"Dados salvos com sucesso: {df.shape[0]} linhas e {df.shape[1]} colunas")
     return df
 
-def main():
+@instrumentar
+def extrair_dados_bigquery_streaming(query, nome_arquivo, tamanho_pagina=50000, fonte=None, cache=None,
+                                     esquema=None):
+    """
+    Extrai dados da fonte (BigQuery, por padrão) página a página, gravando cada página no arquivo
+    assim que ela chega. O uso de memória fica limitado ao tamanho da página.
+    
+    Args:
+        query (str): Query SQL para extrair os dados
+        nome_arquivo (str): Nome do arquivo para salvar os dados. O formato
+            é definido pela extensão (.parquet ou .csv); no Parquet cada
+            página vira um row group
+        tamanho_pagina (int): Quantidade máxima de linhas por página
+        fonte (FonteDados, opcional): Fonte a ser utilizada. Qualquer objeto com
+            o método consultar_paginado pode ser usado, o que permite testar com
+            uma fonte falsa que devolve páginas.
+        cache (CacheConsultas, opcional): Cache de resultados. Se a query já
+            estiver no cache, o resultado é copiado do disco sem consultar a fonte
+        esquema (str, opcional): Nome do dataset no registro de esquemas. Se
+            informado, os tipos declarados são aplicados a cada página, o que
+            também garante tipos iguais em todas as páginas
+    
+    Returns:
+        dict: Resumo da extração com o total de linhas, bytes, as estatísticas
+            por página, o checksum do arquivo e se o resultado veio do cache
+    """
+    print(f"Extraindo dados (streaming) para: {nome_arquivo}")
+    if fonte is None:
+        fonte = FonteBigQuery()
+    
+    if cache is not None:
+        entrada = cache.obter(query, _parametros_cache(fonte, nome_arquivo, esquema))
+        if entrada is not None:
+            return _resultado_do_cache(entrada, nome_arquivo)
+    
+    paginas = []
+    total_linhas = 0
+    colunas = 0
+    escritor = abrir_escritor_incremental(nome_arquivo)
+    try:
+        for numero_pagina, df_pagina in enumerate(fonte.consultar_paginado(query, tamanho_pagina), start=1):
+            if esquema is not None:
+                df_pagina = aplicar_esquema(df_pagina, esquema)
+            bytes_pagina = escritor.escrever(df_pagina)
+            
+            total_linhas += len(df_pagina)
+            colunas = df_pagina.shape[1]
+            paginas.append({
+                'pagina': numero_pagina,
+                'linhas': len(df_pagina),
+                'bytes': bytes_pagina
+            })
+            print(f"Página {numero_pagina}: {len(df_pagina)} linhas, {bytes_pagina} bytes gravados")
+        
+        df_vazio = None
+        if not paginas:
+            # Sem páginas, o arquivo é gravado vazio com as colunas do resultado
+            df_vazio = fonte.consultar(f"SELECT * FROM ({query.strip().rstrip(';')}) AS consulta LIMIT 0")
+            if esquema is not None:
+                df_vazio = aplicar_esquema(df_vazio, esquema)
+            colunas = df_vazio.shape[1]
+    except BaseException:
+        # Uma extração interrompida não deixa um arquivo truncado no caminho final
+        escritor.descartar()
+        raise
+    total_bytes = escritor.fechar(df_vazio)
+    
+    print(f"Dados salvos com sucesso: {total_linhas} linhas e {colunas} colunas ({total_bytes} bytes)")
+    resumo = {
+        'arquivo': nome_arquivo,
+        'linhas': total_linhas,
+        'colunas': colunas,
+        'bytes': total_bytes,
+        'paginas': paginas
+    }
+    if cache is not None:
+        entrada = cache.armazenar(
+            query, nome_arquivo, _parametros_cache(fonte, nome_arquivo, esquema), linhas=total_linhas
+        )
+        checksum = entrada['checksum'] if entrada else calcular_checksum(nome_arquivo)
+        resumo.update({'checksum': checksum, 'cache': False})
+    return resumo
+
+def _registrar_extracao(nome_query, nome_arquivo, timestamp, resultado):
+    """
+    Registra no catálogo dos dados brutos o arquivo gravado por uma extração.
+    
+    Args:
+        nome_query (str): Nome do dataset extraído
+        nome_arquivo (str): Arquivo gravado
+        timestamp (str): Versão do dataset (timestamp da execução)
+        resultado (pandas.DataFrame ou dict): DataFrame extraído ou, no modo
+            streaming, o resumo da extração com a quantidade de linhas
+    """
+    catalogo = CatalogoDatasets(os.path.dirname(nome_arquivo))
+    if isinstance(resultado, pd.DataFrame):
+        catalogo.registrar(nome_query, nome_arquivo, versao=timestamp, df=resultado)
+    else:
+        catalogo.registrar(nome_query, nome_arquivo, versao=timestamp, linhas=resultado['linhas'])
+
+def _extrair_com_tempo(query, nome_arquivo, streaming, tamanho_pagina, fonte, cache, esquema):
+    """
+    Executa a extração de uma query medindo o tempo gasto.
+    
+    Returns:
+        tuple: Resultado da extração (ou None), tempo decorrido em segundos e
+            a exceção capturada (ou None)
+    """
+    inicio = time.perf_counter()
+    try:
+        if streaming:
+            resultado = extrair_dados_bigquery_streaming(
+                query, nome_arquivo, tamanho_pagina=tamanho_pagina, fonte=fonte, cache=cache,
+                esquema=esquema
+            )
+        else:
+            resultado = extrair_dados_bigquery(query, nome_arquivo, fonte=fonte, cache=cache, esquema=esquema)
+    except Exception as e:
+        return None, time.perf_counter() - inicio, e
+    return resultado, time.perf_counter() - inicio, None
+
+@instrumentar
+def extrair_dados_concorrente(queries, diretorio_dados, timestamp, max_workers=4,
+                              streaming=False, tamanho_pagina=50000, fonte=None,
+                              formato=FORMATO_PADRAO, cache=None):
+    """
+    Extrai várias queries em paralelo usando um pool de threads.
+    
+    A falha de uma query não interrompe as demais: o erro é registrado e a
+    extração continua. O tempo total tende ao tempo da query mais lenta. Os
+    arquivos das queries bem-sucedidas são registrados no catálogo dos dados brutos.
+    
+    Args:
+        queries (dict): Dicionário com o nome e o SQL de cada query
+        diretorio_dados (str): Diretório onde os arquivos serão salvos
+        timestamp (str): Timestamp usado no nome dos arquivos
+        max_workers (int): Quantidade máxima de extrações simultâneas
+        streaming (bool): Se True, usa a extração página a página
+        tamanho_pagina (int): Quantidade de linhas por página no modo streaming
+        fonte (FonteDados, opcional): Fonte compartilhada entre as threads. Se não
+            informada, cada extração cria a sua própria conexão com o BigQuery.
+        formato (str): Formato dos arquivos gerados ('parquet' ou 'csv')
+        cache (CacheConsultas, opcional): Cache de resultados das queries
+    
+    Returns:
+        dict: Resultados das queries bem-sucedidas ('sucessos'), mensagens de erro
+            das que falharam ('falhas'), tempo de cada query ('tempos') e tempo
+            total da extração ('tempo_total')
+    """
+    print(f"Extraindo {len(queries)} queries com até {max_workers} execuções simultâneas...")
+    inicio = time.perf_counter()
+    sucessos = {}
+    falhas = {}
+    tempos = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {}
+        nomes_arquivos = {}
+        for nome_query, query in queries.items():
+            nome_arquivo = f"{diretorio_dados}/{nome_query}_{timestamp}{EXTENSOES[formato]}"
+            nomes_arquivos[nome_query] = nome_arquivo
+            futuro = submeter(
+                executor, _extrair_com_tempo, query, nome_arquivo, streaming, tamanho_pagina, fonte, cache, nome_query
+            )
+            futuros[futuro] = nome_query
+        
+        for futuro in as_completed(futuros):
+            nome_query = futuros[futuro]
+            resultado, tempo, erro = futuro.result()
+            tempos[nome_query] = tempo
+            if erro is None:
+                sucessos[nome_query] = resultado
+                _registrar_extracao(nome_query, nomes_arquivos[nome_query], timestamp, resultado)
+                print(f"Query {nome_query} concluída em {tempo:.2f}s")
+            else:
+                falhas[nome_query] = str(erro)
+                print(f"Erro na query {nome_query} após {tempo:.2f}s: {erro}")
+    
+    tempo_total = time.perf_counter() - inicio
+    
+    # Resumo final da extração
+    print(f"Extração concorrente finalizada em {tempo_total:.2f}s "
+          f"(soma dos tempos individuais: {sum(tempos.values()):.2f}s)")
+    print(f"Sucesso ({len(sucessos)}): {', '.join(sorted(sucessos)) or '-'}")
+    print(f"Falha ({len(falhas)}): {', '.join(sorted(falhas)) or '-'}")
+    
+    return {
+        'sucessos': sucessos,
+        'falhas': falhas,
+        'tempos': tempos,
+        'tempo_total': tempo_total
+    }
+
+def _formatar_valor_sql(valor):
+    """
+    Formata um valor de partição para uso em uma cláusula WHERE.
+    
+    Args:
+        valor: Valor da partição
+    
+    Returns:
+        str: Valor formatado (strings entre aspas simples, com as aspas internas
+            duplicadas, forma aceita tanto pelo BigQuery quanto pelo SQLite)
+    """
+    if isinstance(valor, str):
+        return "'" + valor.replace("'", "''") + "'"
+    return str(valor)
+
+@instrumentar
+def listar_particoes(tabela, colunas_particao, filtro=None, fonte=None):
+    """
+    Lista as partições existentes na origem.
+    
+    Args:
+        tabela (str): Nome completo da tabela na origem
+        colunas_particao (list): Colunas que definem a partição (ex.: ['ano', 'sigla_uf'])
+        filtro (str, opcional): Condição SQL aplicada à tabela (ex.: 'ano >= 2019')
+        fonte (FonteDados, opcional): Fonte a ser utilizada (BigQuery, por padrão)
+    
+    Returns:
+        list: Lista de dicionários com os valores de cada partição
+    """
+    if fonte is None:
+        fonte = FonteBigQuery()
+    colunas = ', '.join(colunas_particao)
+    query = f"SELECT DISTINCT {colunas} FROM `{tabela}`"
+    if filtro:
+        query += f" WHERE {filtro}"
+    query += f" ORDER BY {colunas}"
+    
+    df_particoes = fonte.consultar(query)
+    return [
+        {col: (valor.item() if hasattr(valor, 'item') else valor) for col, valor in registro.items()}
+        for registro in df_particoes[colunas_particao].to_dict('records')
+    ]
+
+@instrumentar
+def extrair_dados_incremental(nome_dataset, tabela, diretorio_dados, colunas_particao,
+                              filtro=None, colunas='*', particoes=None, invalidar=None,
+                              tamanho_pagina=50000, fonte=None, formato=FORMATO_PADRAO):
+    """
+    Extrai um dataset particionado, buscando apenas as partições ausentes ou invalidadas.
+    
+    Cada partição é gravada em '<diretorio_dados>/<nome_dataset>/<col>=<valor>/.../dados.<formato>'
+    e registrada no manifesto '_manifesto.json' do dataset somente após a
+    gravação completa, de modo que uma execução interrompida é retomada a
+    partir das partições que faltam. Ao final, o dataset é registrado no
+    catálogo dos dados brutos.
+    
+    Args:
+        nome_dataset (str): Nome do dataset (ex.: 'saeb_aluno_9ano')
+        tabela (str): Nome completo da tabela na origem
+        diretorio_dados (str): Diretório raiz dos dados brutos
+        colunas_particao (list): Colunas que definem a partição (ex.: ['ano', 'sigla_uf'])
+        filtro (str, opcional): Condição SQL aplicada à tabela (ex.: 'ano >= 2019')
+        colunas (str): Colunas a selecionar na origem
+        particoes (list, opcional): Partições desejadas. Se não informado, são
+            listadas na origem com listar_particoes
+        invalidar (list, opcional): Partições a extrair novamente mesmo que já
+            estejam no manifesto. Cada item é um dicionário parcial; por exemplo,
+            {'ano': 2021} invalida todas as UFs de 2021
+        tamanho_pagina (int): Quantidade de linhas por página
+        fonte (FonteDados, opcional): Fonte a ser utilizada (BigQuery, por padrão).
+            Uma fonte local, como FonteSQLite, pode substituir a origem
+        formato (str): Formato dos arquivos das partições ('parquet' ou 'csv')
+    
+    Returns:
+        dict: Resumo com as partições extraídas ('extraidas') e as reaproveitadas ('ignoradas')
+    """
+    print(f"Extração incremental de {nome_dataset} por {', '.join(colunas_particao)}...")
+    if fonte is None:
+        fonte = FonteBigQuery()
+    diretorio_dataset = criar_diretorio(os.path.join(diretorio_dados, nome_dataset))
+    manifesto = carregar_manifesto(diretorio_dataset)
+    manifesto['colunas_particao'] = list(colunas_particao)
+    
+    if particoes is None:
+        particoes = listar_particoes(tabela, colunas_particao, filtro, fonte=fonte)
+    
+    # Remove do manifesto as partições invalidadas
+    for criterio in invalidar or []:
+        for chave, registro in list(manifesto['particoes'].items()):
+            if all(registro['valores'].get(col) == valor for col, valor in criterio.items()):
+                del manifesto['particoes'][chave]
+    
+    extraidas = []
+    ignoradas = []
+    for particao in particoes:
+        chave = chave_particao(particao, colunas_particao)
+        registro = manifesto['particoes'].get(chave)
+        if registro and os.path.exists(os.path.join(diretorio_dataset, registro['arquivo'])):
+            ignoradas.append(chave)
+            continue
+        
+        # Monta a query da partição
+        condicoes = [f"{col} = {_formatar_valor_sql(particao[col])}" for col in colunas_particao]
+        if filtro:
+            condicoes.insert(0, f"({filtro})")
+        query = f"SELECT {colunas} FROM `{tabela}` WHERE {' AND '.join(condicoes)}"
+        
+        # O escritor grava em arquivo temporário e só publica a partição completa
+        arquivo_relativo = os.path.join(chave, f"dados{EXTENSOES[formato]}")
+        caminho_arquivo = os.path.join(diretorio_dataset, arquivo_relativo)
+        criar_diretorio(os.path.dirname(caminho_arquivo))
+        resumo = extrair_dados_bigquery_streaming(
+            query, caminho_arquivo, tamanho_pagina=tamanho_pagina, fonte=fonte, esquema=nome_dataset
+        )
+        
+        manifesto['particoes'][chave] = {
+            'valores': particao,
+            'arquivo': arquivo_relativo,
+            'linhas': resumo['linhas'],
+            'bytes': resumo['bytes'],
+            'extraido_em': datetime.now().isoformat(timespec='seconds')
+        }
+        salvar_manifesto(manifesto, diretorio_dataset)
+        extraidas.append(chave)
+    
+    salvar_manifesto(manifesto, diretorio_dataset)
+    CatalogoDatasets(diretorio_dados).registrar_particionado(nome_dataset)
+    print(f"Extração incremental concluída: {len(extraidas)} partições extraídas, "
+          f"{len(ignoradas)} já estavam atualizadas")
+    return {'extraidas': extraidas, 'ignoradas': ignoradas}
+
+@instrumentar_main('extracao')
+def main(streaming=False, tamanho_pagina=50000, concorrente=False, max_workers=4,
+         incremental=False, invalidar=None, formato=FORMATO_PADRAO, fonte=None, cache=None):
     """
     Função principal para extrair todos os dados necessários.
+    
+    Args:
+        streaming (bool): Se True, extrai os dados página a página sem
+            carregar o resultado completo em memória
+        tamanho_pagina (int): Quantidade de linhas por página no modo streaming
+        concorrente (bool): Se True, extrai as queries em paralelo
+        max_workers (int): Quantidade máxima de extrações simultâneas
+        incremental (bool): Se True, as tabelas particionadas (SAEB e IBGE) são
+            extraídas por partição, buscando apenas as partições que faltam
+        invalidar (list, opcional): Partições a extrair novamente no modo
+            incremental (ex.: [{'ano': 2021}])
+        formato (str): Formato dos arquivos gerados ('parquet' ou 'csv')
+        fonte (FonteDados, opcional): Fonte dos dados. Se não informada, usa o
+            BigQuery; uma FonteSQLite permite executar o pipeline offline
+        cache (CacheConsultas, opcional): Cache de resultados das queries. Queries
+            já extraídas são servidas do disco sem consultar a fonte
+        instrumentar (bool): Se True, mede cada etapa e grava o relatório de
+            desempenho em JSON no diretório 'relatorios_execucao'
+        perfilar (list, opcional): Etapas (nome da função) com perfil cProfile gravado
+        medir_alocacoes (bool): Se True, mede também o pico de memória com tracemalloc
+    
+    Returns:
+        dict: DataFrames extraídos ou, no modo streaming e nos resultados do cache,
+            o resumo de cada extração
     """
     # Criação do diretório de dados
     diretorio_dados = criar_diretorio('dados_raw')
     
+    if fonte is None:
+        fonte = FonteBigQuery()
+    
+    # Seleciona na origem apenas as colunas do SAEB usadas na transformação
+    tabela_saeb = 'basedosdados.br_inep_saeb.aluno_ef_9ano'
+    colunas_saeb = ', '.join(colunas_utilizadas_saeb(fonte.listar_colunas(tabela_saeb)))
+    
     # Timestamp para identificar a execução
     timestamp = datetime.now().strftime('%Y%m%d')
     
     # Consultas SQL para extração dos dados
     queries = {
         # SAEB - Alunos 9º Ano
-        'saeb_aluno_9ano': """
-            SELECT *
-            FROM `basedosdados.br_inep_saeb.aluno_ef_9ano`
+        'saeb_aluno_9ano': f"""
+            SELECT {colunas_saeb}
+            FROM `{tabela_saeb}`
             WHERE ano >= 2019
             LIMIT 100000  -- Ajuste conforme necessidade (remova para todos os dados)
         """,
@@ -93,11 +527,59 @@ def main():
         """
     }
     
-    # Extração dos dados
+    # Tabelas extraídas por partição no modo incremental
+    tabelas_particionadas = {
+        'saeb_aluno_9ano': {
+            'tabela': tabela_saeb,
+            'filtro': 'ano >= 2019',
+            'colunas_particao': ['ano', 'sigla_uf'],
+            'colunas': colunas_saeb
+        },
+        'ibge_populacao': {
+            'tabela': 'basedosdados.br_ibge_populacao.municipio',
+            'filtro': 'ano >= 2019',
+            'colunas_particao': ['ano'],
+            'colunas': '*'
+        }
+    }
+    
     dados_extraidos = {}
+    if incremental:
+        for nome_dataset, config in tabelas_particionadas.items():
+            dados_extraidos[nome_dataset] = extrair_dados_incremental(
+                nome_dataset, config['tabela'], diretorio_dados, config['colunas_particao'],
+                filtro=config['filtro'], colunas=config['colunas'], invalidar=invalidar,
+                tamanho_pagina=tamanho_pagina, fonte=fonte, formato=formato
+            )
+            del queries[nome_dataset]
+    
+    # Extração concorrente: queries pequenas não esperam pelas grandes
+    if concorrente:
+        resultado = extrair_dados_concorrente(
+            queries, diretorio_dados, timestamp, max_workers=max_workers,
+            streaming=streaming, tamanho_pagina=tamanho_pagina, fonte=fonte, formato=formato,
+            cache=cache
+        )
+        if resultado['falhas']:
+            print("Extração concluída com falhas!")
+        else:
+            print("Extração concluída com sucesso!")
+        dados_extraidos.update(resultado['sucessos'])
+        return dados_extraidos
+    
+    # Extração dos dados
     for nome_query, query in queries.items():
-        nome_arquivo = f"{diretorio_dados}/{nome_query}_{timestamp}.csv"
-        dados_extraidos[nome_query] = extrair_dados_bigquery(query, nome_arquivo)
+        nome_arquivo = f"{diretorio_dados}/{nome_query}_{timestamp}{EXTENSOES[formato]}"
+        if streaming:
+            dados_extraidos[nome_query] = extrair_dados_bigquery_streaming(
+                query, nome_arquivo, tamanho_pagina=tamanho_pagina, fonte=fonte, cache=cache,
+                esquema=nome_query
+            )
+        else:
+            dados_extraidos[nome_query] = extrair_dados_bigquery(
+                query, nome_arquivo, fonte=fonte, cache=cache, esquema=nome_query
+            )
+        _registrar_extracao(nome_query, nome_arquivo, timestamp, dados_extraidos[nome_query])
     
     print("Extração concluída com sucesso!")
     return dados_extraidos
@@ -0,0 +1,149 @@
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import closing
+import pandas as pd
+
+class FonteDados(ABC):
+    """
+    Interface das fontes de dados usadas na extração.
+    
+    Uma fonte executa as mesmas queries SQL do projeto e devolve DataFrames,
+    seja de uma vez ou em páginas, o que permite trocar o BigQuery por uma
+    fonte local sem alterar o restante do pipeline. Uma fonte que não
+    implementa todos os métodos abstratos falha ao ser criada, e não no meio
+    da extração.
+    """
+    
+    @abstractmethod
+    def consultar(self, query):
+        """
+        Executa uma query e devolve o resultado completo.
+        
+        Args:
+            query (str): Query SQL
+        
+        Returns:
+            pandas.DataFrame: Resultado da query
+        """
+    
+    @abstractmethod
+    def consultar_paginado(self, query, tamanho_pagina):
+        """
+        Executa uma query e devolve o resultado em páginas.
+        
+        Args:
+            query (str): Query SQL
+            tamanho_pagina (int): Quantidade máxima de linhas por página
+        
+        Returns:
+            iterator: Iterador de DataFrames, um por página
+        """
+    
+    @abstractmethod
+    def listar_colunas(self, tabela):
+        """
+        Lista as colunas de uma tabela da fonte.
+        
+        Args:
+            tabela (str): Nome completo da tabela
+        
+        Returns:
+            list: Nomes das colunas na ordem da tabela
+        """
+    
+    def descrever(self):
+        """
+        Descreve a fonte, para identificar de onde vieram os dados (ex.: no cache).
+        
+        Returns:
+            dict: Parâmetros que identificam a fonte
+        """
+        return {'tipo': type(self).__name__}
+
+class FonteBigQuery(FonteDados):
+    """
+    Fonte de dados que executa as queries no Google BigQuery.
+    """
+    
+    def __init__(self, cliente=None):
+        """
+        Args:
+            cliente (bigquery.Client, opcional): Cliente a ser utilizado. Se não
+                informado, um novo cliente é criado.
+        """
+        if cliente is None:
+            # Importação tardia: permite usar as fontes locais sem a biblioteca do BigQuery
+            from google.cloud import bigquery
+            cliente = bigquery.Client()
+        self.cliente = cliente
+    
+    def consultar(self, query):
+        return self.cliente.query(query).to_dataframe()
+    
+    def consultar_paginado(self, query, tamanho_pagina):
+        resultado = self.cliente.query(query).result(page_size=tamanho_pagina)
+        return resultado.to_dataframe_iterable()
+    
+    def listar_colunas(self, tabela):
+        return [campo.name for campo in self.cliente.get_table(tabela).schema]
+    
+    def descrever(self):
+        return {'tipo': 'bigquery', 'projeto': getattr(self.cliente, 'project', None)}
+
+class FonteSQLite(FonteDados):
+    """
+    Fonte de dados local baseada em um arquivo SQLite.
+    
+    As tabelas são gravadas com o nome completo usado no BigQuery
+    (ex.: 'basedosdados.br_inep_saeb.aluno_ef_9ano'). Como o SQLite aceita
+    identificadores entre crases, as queries do projeto rodam sem alterações,
+    o que permite executar e medir o pipeline inteiro offline.
+    """
+    
+    def __init__(self, caminho_banco):
+        """
+        Args:
+            caminho_banco (str): Caminho do arquivo SQLite
+        """
+        self.caminho_banco = caminho_banco
+    
+    def _conectar(self):
+        # Uma conexão por chamada permite o uso a partir de várias threads
+        return sqlite3.connect(self.caminho_banco)
+    
+    def consultar(self, query):
+        with closing(self._conectar()) as conexao:
+            return pd.read_sql_query(query, conexao)
+    
+    def consultar_paginado(self, query, tamanho_pagina):
+        conexao = self._conectar()
+        try:
+            for df_pagina in pd.read_sql_query(query, conexao, chunksize=tamanho_pagina):
+                yield df_pagina
+        finally:
+            conexao.close()
+    
+    def listar_colunas(self, tabela):
+        with closing(self._conectar()) as conexao:
+            info = conexao.execute(f'PRAGMA table_info("{tabela}")').fetchall()
+        if not info:
+            raise ValueError(f"Tabela não encontrada na fonte local: {tabela}")
+        return [coluna[1] for coluna in info]
+    
+    def descrever(self):
+        return {'tipo': 'sqlite', 'caminho': os.path.abspath(self.caminho_banco)}
+    
+    def carregar_tabela(self, tabela, df, substituir=True):
+        """
+        Grava um DataFrame como tabela da fonte local.
+        
+        Args:
+            tabela (str): Nome completo da tabela (ex.: 'basedosdados.br_inep_saeb.dicionario')
+            df (pandas.DataFrame): Dados da tabela
+            substituir (bool): Se True, substitui a tabela existente; caso contrário
+                acrescenta as linhas
+        """
+        with closing(self._conectar()) as conexao:
+            df.to_sql(tabela, conexao, index=False, if_exists='replace' if substituir else 'append')
+            conexao.commit()
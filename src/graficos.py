@@ -0,0 +1,120 @@
+import os
+import json
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from instrumentacao import instrumentar
+
+# Registro, no diretório dos gráficos, da assinatura de cada gráfico gravado
+ARQUIVO_CACHE_GRAFICOS = '_cache_graficos.json'
+
+def assinatura_grafico(funcao, dados, parametros):
+    """
+    Assinatura de um gráfico: muda quando os dados, os parâmetros de
+    renderização ou o código da função que o desenha mudam.
+    
+    Args:
+        funcao (callable): Função que desenha o gráfico
+        dados (pandas.DataFrame): Dados do gráfico
+        parametros (dict): Parâmetros de renderização (ex.: {'dpi': 300})
+    
+    Returns:
+        str: Hash SHA-256 da assinatura
+    """
+    hash_dados = hashlib.sha256(pd.util.hash_pandas_object(dados, index=True).to_numpy().tobytes())
+    conteudo = {
+        'funcao': f"{funcao.__module__}.{funcao.__qualname__}",
+        'codigo': hashlib.sha256(inspect.getsource(inspect.unwrap(funcao)).encode('utf-8')).hexdigest(),
+        'colunas': [[str(coluna), str(tipo)] for coluna, tipo in dados.dtypes.items()],
+        'dados': hash_dados.hexdigest(),
+        'parametros': parametros
+    }
+    return hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _carregar_cache(diretorio_saida):
+    caminho_cache = os.path.join(diretorio_saida, ARQUIVO_CACHE_GRAFICOS)
+    if not os.path.exists(caminho_cache):
+        return {}
+    with open(caminho_cache, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def _salvar_cache(cache, diretorio_saida):
+    caminho_cache = os.path.join(diretorio_saida, ARQUIVO_CACHE_GRAFICOS)
+    caminho_temporario = caminho_cache + '.tmp'
+    with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(cache, arquivo, indent=2, ensure_ascii=False)
+    os.replace(caminho_temporario, caminho_cache)
+
+@instrumentar
+def renderizar_graficos(graficos, diretorio_saida, parametros=None, processos=None):
+    """
+    Desenha os gráficos em um pool de processos, ignorando os que não mudaram.
+    
+    Cada gráfico é desenhado por uma função que recebe os dados, o diretório
+    de saída e os parâmetros de renderização e retorna o caminho do arquivo
+    gravado. A assinatura de cada gráfico (ver assinatura_grafico) é guardada
+    em ARQUIVO_CACHE_GRAFICOS; gráficos com a mesma assinatura da última
+    renderização e cujo arquivo ainda existe não são desenhados de novo.
+    
+    As funções de desenho devem usar a API orientada a objetos do Matplotlib
+    (Figure com FigureCanvasAgg), sem o estado global do pyplot, para que
+    possam rodar em paralelo.
+    
+    Args:
+        graficos (dict): Nome do gráfico -> (função de desenho, DataFrame com os dados)
+        diretorio_saida (str): Diretório dos gráficos
+        parametros (dict, opcional): Parâmetros de renderização passados às funções
+        processos (int, opcional): Quantidade de processos (padrão: número de CPUs)
+    
+    Returns:
+        dict: Caminho do arquivo de cada gráfico
+    """
+    parametros = parametros or {}
+    cache = _carregar_cache(diretorio_saida)
+    
+    caminhos = {}
+    pendentes = {}
+    for nome, (funcao, dados) in graficos.items():
+        if dados is None:
+            continue
+        assinatura = assinatura_grafico(funcao, dados, parametros)
+        registro = cache.get(nome)
+        if registro and registro['assinatura'] == assinatura and os.path.exists(registro['arquivo']):
+            caminhos[nome] = registro['arquivo']
+        else:
+            pendentes[nome] = (funcao, dados, assinatura)
+    
+    print(f"{len(caminhos)} gráficos sem alterações, {len(pendentes)} a desenhar")
+    if not pendentes:
+        return caminhos
+    
+    def registrar(nome, caminho):
+        caminhos[nome] = caminho
+        cache[nome] = {'assinatura': pendentes[nome][2], 'arquivo': caminho}
+    
+    # Cada gráfico é registrado no cache assim que termina; se algum falhar, os
+    # que já foram gravados são preservados antes de a exceção ser propagada
+    processos = min(processos or os.cpu_count(), len(pendentes))
+    try:
+        if processos > 1:
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                futuros = {
+                    executor.submit(funcao, dados, diretorio_saida, **parametros): nome
+                    for nome, (funcao, dados, _) in pendentes.items()
+                }
+                erro = None
+                for futuro in as_completed(futuros):
+                    try:
+                        registrar(futuros[futuro], futuro.result())
+                    except Exception as excecao:
+                        erro = erro or excecao
+                if erro is not None:
+                    raise erro
+        else:
+            for nome, (funcao, dados, _) in pendentes.items():
+                registrar(nome, funcao(dados, diretorio_saida, **parametros))
+    finally:
+        _salvar_cache(cache, diretorio_saida)
+    
+    return caminhos
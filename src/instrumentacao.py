@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from datetime import datetime
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Indisponível no Windows: o pico de RSS não é registrado
+    resource = None
+
+DIRETORIO_RELATORIOS = 'relatorios_execucao'
+
+# Execução instrumentada ativa (None = instrumentação desligada) e pilha de
+# etapas em andamento no contexto atual
+_execucao_ativa = None
+_pilha_etapas = ContextVar('pilha_etapas', default=())
+# As etapas executadas em threads (ver submeter) somam bytes nos registros da etapa que as criou
+_trava_bytes = threading.Lock()
+
+class ExecucaoInstrumentada:
+    """
+    Coleta as métricas das etapas de uma execução e grava o relatório em JSON.
+    
+    Cada etapa registra o tempo de parede, o tempo de CPU da thread que a
+    executou, o pico de RSS do processo ao final da etapa, o pico de memória
+    alocada pelo Python (tracemalloc, se habilitado), as linhas de entrada e de
+    saída e os bytes lidos e gravados. Bytes e picos de memória das etapas
+    internas também são contabilizados nas etapas que as chamaram, inclusive
+    das submetidas a um pool de threads com submeter. O tempo de CPU de uma
+    etapa não inclui o das threads que ela criou, que aparece nas etapas
+    executadas nessas threads; o relatório traz também o tempo de CPU do
+    processo na execução inteira. Como o tracemalloc mede o processo, o pico
+    alocado de etapas simultâneas inclui as alocações das demais.
+    """
+    
+    def __init__(self, nome, diretorio=DIRETORIO_RELATORIOS, perfilar=None, medir_alocacoes=False):
+        """
+        Args:
+            nome (str): Nome da execução (ex.: 'transformacao')
+            diretorio (str): Diretório dos relatórios
+            perfilar (list, opcional): Etapas (nome da função) com perfil cProfile gravado
+            medir_alocacoes (bool): Se True, mede o pico de memória com tracemalloc
+                (aumenta o tempo de execução)
+        """
+        self.nome = nome
+        self.diretorio = diretorio
+        self.perfilar = set(perfilar or [])
+        self.medir_alocacoes = medir_alocacoes
+        self.identificador = f"{nome}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.etapas = []
+        self._trava = threading.Lock()
+        self._inicio = None
+        self._inicio_cpu = None
+        self._inicio_data = None
+    
+    def iniciar(self):
+        self._inicio = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+        self._inicio_data = datetime.now().isoformat(timespec='seconds')
+        if self.medir_alocacoes and not tracemalloc.is_tracing():
+            tracemalloc.start()
+    
+    def registrar(self, registro):
+        with self._trava:
+            self.etapas.append(registro)
+    
+    def finalizar(self):
+        """
+        Grava o relatório da execução.
+        
+        Returns:
+            str: Caminho do relatório gravado
+        """
+        if self.medir_alocacoes and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        
+        resumo = {}
+        for registro in self.etapas:
+            item = resumo.setdefault(registro['etapa'], {'chamadas': 0, 'tempo_parede': 0.0, 'tempo_cpu': 0.0})
+            item['chamadas'] += 1
+            item['tempo_parede'] += registro['tempo_parede']
+            item['tempo_cpu'] += registro['tempo_cpu']
+        
+        relatorio = {
+            'execucao': self.nome,
+            'identificador': self.identificador,
+            'inicio': self._inicio_data,
+            'duracao': time.perf_counter() - self._inicio,
+            'tempo_cpu': time.process_time() - self._inicio_cpu,
+            'rss_pico_mb': _rss_pico_mb(),
+            'etapas': sorted(self.etapas, key=lambda registro: registro['inicio']),
+            'resumo': resumo
+        }
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho_relatorio = os.path.join(self.diretorio, f"{self.identificador}.json")
+        with open(caminho_relatorio, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False, default=str)
+        print(f"Relatório de desempenho salvo em: {caminho_relatorio}")
+        return caminho_relatorio
+
+def _rss_pico_mb():
+    """
+    Pico de memória residente do processo até o momento, em MB.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss é informado em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _contar_linhas(valor):
+    """
+    Quantidade de linhas de um valor de entrada ou de saída de uma etapa.
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return len(valor)
+    if isinstance(valor, dict):
+        if isinstance(valor.get('linhas'), int):
+            return valor['linhas']
+        contagens = [_contar_linhas(item) for item in valor.values()]
+        contagens = [contagem for contagem in contagens if contagem is not None]
+        return sum(contagens) if contagens else None
+    if isinstance(valor, (list, tuple)):
+        contagens = [len(item) for item in valor if isinstance(item, pd.DataFrame)]
+        return sum(contagens) if contagens else None
+    return None
+
+def registrar_bytes(lidos=0, gravados=0):
+    """
+    Contabiliza bytes lidos ou gravados nas etapas em andamento.
+    
+    Chamado pelas funções de leitura e gravação de armazenamento; não faz nada
+    se a instrumentação estiver desligada.
+    
+    Args:
+        lidos (int): Bytes lidos
+        gravados (int): Bytes gravados
+    """
+    pilha = _pilha_etapas.get()
+    if not pilha:
+        return
+    with _trava_bytes:
+        for registro in pilha:
+            registro['bytes_lidos'] += lidos
+            registro['bytes_gravados'] += gravados
+
+def submeter(executor, funcao, *args, **kwargs):
+    """
+    Submete uma função a um pool de threads no contexto atual.
+    
+    As threads do pool não herdam as variáveis de contexto de quem submete a
+    tarefa; sem uma cópia do contexto, as etapas executadas nelas seriam
+    registradas como etapas raiz e os seus bytes não seriam somados às etapas
+    em andamento. Cada tarefa recebe a sua própria cópia, pois um contexto não
+    pode ser usado por duas threads ao mesmo tempo.
+    
+    Args:
+        executor (concurrent.futures.Executor): Pool de threads
+        funcao (callable): Função a executar
+        *args, **kwargs: Argumentos da função
+    
+    Returns:
+        concurrent.futures.Future: Futuro da tarefa
+    """
+    return executor.submit(copy_context().run, funcao, *args, **kwargs)
+
+def instrumentar(funcao):
+    """
+    Decorador que mede uma etapa do pipeline quando há uma execução instrumentada ativa.
+    
+    Sem execução ativa, a função é chamada diretamente.
+    """
+    nome_etapa = funcao.__name__
+    
+    @functools.wraps(funcao)
+    def funcao_instrumentada(*args, **kwargs):
+        execucao = _execucao_ativa
+        if execucao is None:
+            return funcao(*args, **kwargs)
+        
+        pilha = _pilha_etapas.get()
+        entradas = [_contar_linhas(valor) for valor in list(args) + list(kwargs.values())]
+        entradas = [contagem for contagem in entradas if contagem is not None]
+        registro = {
+            'etapa': nome_etapa,
+            'modulo': funcao.__module__,
+            'pai': pilha[-1]['etapa'] if pilha else None,
+            'nivel': len(pilha),
+            'inicio': time.perf_counter() - execucao._inicio,
+            'linhas_entrada': sum(entradas) if entradas else None,
+            'linhas_saida': None,
+            'bytes_lidos': 0,
+            'bytes_gravados': 0,
+            'erro': None
+        }
+        
+        medir_alocacoes = execucao.medir_alocacoes and tracemalloc.is_tracing()
+        if medir_alocacoes:
+            # Preserva o pico da etapa externa antes de reiniciar a medição
+            if pilha:
+                pilha[-1]['_pico_alocado'] = max(pilha[-1].get('_pico_alocado', 0),
+                                                 tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        
+        perfil = cProfile.Profile() if nome_etapa in execucao.perfilar else None
+        token = _pilha_etapas.set(pilha + (registro,))
+        inicio_parede = time.perf_counter()
+        inicio_cpu = time.thread_time()
+        try:
+            if perfil is not None:
+                perfil.enable()
+            resultado = funcao(*args, **kwargs)
+            registro['linhas_saida'] = _contar_linhas(resultado)
+            return resultado
+        except Exception as e:
+            registro['erro'] = repr(e)
+            raise
+        finally:
+            if perfil is not None:
+                perfil.disable()
+            registro['tempo_parede'] = time.perf_counter() - inicio_parede
+            registro['tempo_cpu'] = time.thread_time() - inicio_cpu
+            registro['rss_pico_mb'] = _rss_pico_mb()
+            _pilha_etapas.reset(token)
+            
+            if medir_alocacoes:
+                pico = max(registro.pop('_pico_alocado', 0), tracemalloc.get_traced_memory()[1])
+                registro['pico_alocado_mb'] = pico / 1024 ** 2
+                if pilha:
+                    pilha[-1]['_pico_alocado'] = max(pilha[-1].get('_pico_alocado', 0), pico)
+            if perfil is not None:
+                os.makedirs(execucao.diretorio, exist_ok=True)
+                caminho_perfil = os.path.join(
+                    execucao.diretorio, f"{execucao.identificador}_{nome_etapa}_{len(execucao.etapas)}.prof"
+                )
+                perfil.dump_stats(caminho_perfil)
+                registro['perfil'] = caminho_perfil
+            execucao.registrar(registro)
+    
+    return funcao_instrumentada
+
+@contextmanager
+def execucao_instrumentada(nome, perfilar=None, medir_alocacoes=False, diretorio=DIRETORIO_RELATORIOS):
+    """
+    Ativa a instrumentação durante um bloco e grava o relatório ao final.
+    
+    Args:
+        nome (str): Nome da execução (ex.: 'transformacao')
+        perfilar (list, opcional): Etapas com perfil cProfile gravado
+        medir_alocacoes (bool): Se True, mede o pico de memória com tracemalloc
+        diretorio (str): Diretório dos relatórios
+    
+    Returns:
+        ExecucaoInstrumentada: Execução ativa
+    """
+    global _execucao_ativa
+    execucao = ExecucaoInstrumentada(nome, diretorio=diretorio, perfilar=perfilar,
+                                     medir_alocacoes=medir_alocacoes)
+    anterior = _execucao_ativa
+    _execucao_ativa = execucao
+    execucao.iniciar()
+    try:
+        yield execucao
+    finally:
+        _execucao_ativa = anterior
+        execucao.finalizar()
+
+def instrumentar_main(nome):
+    """
+    Decorador para as funções main: quando chamadas com instrumentar=True, a
+    execução é instrumentada e o relatório é gravado ao final. Os argumentos
+    perfilar e medir_alocacoes são repassados a execucao_instrumentada.
+    """
+    def decorador(funcao):
+        # A própria main é registrada como etapa raiz, somando as gravações feitas nela
+        funcao_medida = instrumentar(funcao)
+        
+        @functools.wraps(funcao)
+        def main_instrumentada(*args, instrumentar=False, perfilar=None, medir_alocacoes=False, **kwargs):
+            if not instrumentar:
+                return funcao(*args, **kwargs)
+            with execucao_instrumentada(nome, perfilar=perfilar, medir_alocacoes=medir_alocacoes):
+                return funcao_medida(*args, **kwargs)
+        return main_instrumentada
+    return decorador
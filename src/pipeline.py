@@ -0,0 +1,481 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import importlib
+from datetime import datetime
+from graphlib import TopologicalSorter
+import pandas as pd
+from armazenamento import (
+    FORMATO_PADRAO, calcular_checksum, carregar_manifesto, ler_dataframe, salvar_dataframe
+)
+from catalogo import resolver_dataset, salvar_dataset
+from esquemas import aplicar_esquema
+from instrumentacao import execucao_instrumentada, instrumentar
+
+# Datasets brutos lidos pela transformação
+DATASETS_ENTRADA = ['saeb_aluno_9ano', 'saeb_dicionario', 'ibge_populacao']
+DIMENSOES = ['dim_tempo', 'dim_geografia', 'dim_escola', 'dim_perfil_familiar', 'dim_perfil_pretensao']
+
+class Etapa:
+    """
+    Nó do grafo de execução do pipeline.
+    
+    A função da etapa recebe a configuração da execução e os arquivos gerados
+    pelas etapas das quais depende, e devolve os arquivos que gerou. A
+    impressão digital da etapa combina o código dos módulos que ela utiliza,
+    os seus parâmetros, as entradas externas e o conteúdo dos arquivos das
+    dependências; se nada disso mudou desde a última execução bem-sucedida, a
+    etapa é ignorada.
+    """
+    
+    def __init__(self, nome, funcao, dependencias=(), modulos=(), parametros=None, entradas=None):
+        """
+        Args:
+            nome (str): Nome da etapa
+            funcao (callable): Função executada, com a assinatura
+                funcao(configuracao, saidas_dependencias) -> dict {rótulo: caminho}
+            dependencias (tuple): Nomes das etapas das quais esta depende
+            modulos (tuple): Módulos cujo código faz parte da impressão digital
+            parametros (dict, opcional): Parâmetros da etapa
+            entradas (callable, opcional): Função que recebe a configuração e devolve
+                os arquivos externos lidos pela etapa (ex.: dados brutos)
+        """
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = tuple(dependencias)
+        self.modulos = tuple(modulos)
+        self.parametros = parametros or {}
+        self.entradas = entradas
+
+def _descrever_parametro(valor):
+    """
+    Representação de um parâmetro não serializável na impressão digital.
+    Objetos como fontes de dados são identificados pela sua descrição.
+    """
+    if hasattr(valor, 'descrever'):
+        return valor.descrever()
+    return type(valor).__name__
+
+def versao_codigo(modulos):
+    """
+    Calcula a versão do código de um conjunto de módulos a partir dos seus fontes.
+    
+    Args:
+        modulos (iterable): Nomes dos módulos (ex.: 'transform_data')
+    
+    Returns:
+        str: Hash SHA-256 do código-fonte dos módulos
+    """
+    resumo = hashlib.sha256()
+    for nome_modulo in sorted(set(modulos)):
+        caminho_fonte = importlib.import_module(nome_modulo).__file__
+        resumo.update(nome_modulo.encode('utf-8'))
+        resumo.update(calcular_checksum(caminho_fonte).encode('utf-8'))
+    return resumo.hexdigest()
+
+def arquivos_dataset(diretorio, nome_dataset):
+    """
+    Lista os arquivos que compõem a versão atual de um dataset, segundo o
+    catálogo do diretório.
+    
+    Args:
+        diretorio (str): Diretório dos dados
+        nome_dataset (str): Nome do dataset
+    
+    Returns:
+        dict: Caminho de cada arquivo, por rótulo (a partição ou o próprio nome do dataset)
+    """
+    dataset = resolver_dataset(diretorio, nome_dataset)
+    if dataset['tipo'] == 'particionado':
+        manifesto = carregar_manifesto(dataset['caminho'])
+        return {
+            f"{nome_dataset}/{chave}": os.path.join(dataset['caminho'], particao['arquivo'])
+            for chave, particao in sorted(manifesto['particoes'].items())
+        }
+    return {nome_dataset: dataset['caminho']}
+
+def _ler_dataset(arquivos, nome_dataset, colunas=None):
+    """
+    Lê um dataset a partir dos arquivos registrados por uma etapa.
+    """
+    caminhos = [caminho for rotulo, caminho in sorted(arquivos.items())
+                if rotulo == nome_dataset or rotulo.startswith(f"{nome_dataset}/")]
+    df = pd.concat([ler_dataframe(caminho, colunas=colunas) for caminho in caminhos], ignore_index=True)
+    return aplicar_esquema(df, nome_dataset)
+
+# Etapas do pipeline
+
+def _entradas_brutas(configuracao, datasets=DATASETS_ENTRADA):
+    """
+    Arquivos atuais dos datasets brutos, por rótulo.
+    """
+    arquivos = {}
+    for nome_dataset in datasets:
+        arquivos.update(arquivos_dataset(configuracao['diretorio_entrada'], nome_dataset))
+    return arquivos
+
+def _entradas_dicionario(configuracao):
+    """
+    Dados brutos lidos pela etapa de dicionário.
+    """
+    return _entradas_brutas(configuracao, ['saeb_aluno_9ano', 'saeb_dicionario'])
+
+def _entradas_dimensoes(configuracao):
+    """
+    Dados brutos lidos pela etapa de dimensões, além dos dados limpos.
+    """
+    return _entradas_brutas(configuracao, ['ibge_populacao'])
+
+@instrumentar
+def etapa_extracao(configuracao, saidas):
+    """
+    Extrai os dados brutos com extract_data.main e devolve os arquivos gerados.
+    """
+    import extract_data
+    diretorio_atual = os.getcwd()
+    os.chdir(configuracao['diretorio_base'])
+    try:
+        extract_data.main(**configuracao['parametros_extracao'])
+    finally:
+        os.chdir(diretorio_atual)
+    return _entradas_brutas(configuracao)
+
+@instrumentar
+def etapa_dicionario(configuracao, saidas):
+    """
+    Aplica o dicionário aos dados do SAEB e grava o resultado intermediário.
+    """
+    from transform_data import aplicar_dicionario
+    brutos = saidas.get('extracao') or _entradas_brutas(configuracao)
+    df_traduzido = aplicar_dicionario(
+        _ler_dataset(brutos, 'saeb_aluno_9ano'), _ler_dataset(brutos, 'saeb_dicionario')
+    )
+    caminho_arquivo = os.path.join(configuracao['diretorio_intermediario'], 'saeb_traduzido.parquet')
+    salvar_dataframe(df_traduzido, caminho_arquivo)
+    return {'saeb_traduzido': caminho_arquivo}
+
+@instrumentar
+def etapa_limpeza(configuracao, saidas):
+    """
+    Limpa os dados traduzidos do SAEB e grava o resultado intermediário.
+    """
+    from transform_data import limpar_dados_saeb
+    df_limpo = limpar_dados_saeb(ler_dataframe(saidas['dicionario']['saeb_traduzido']))
+    caminho_arquivo = os.path.join(configuracao['diretorio_intermediario'], 'saeb_limpo.parquet')
+    # Ordem de colunas estável, para que a mesma entrada gere o mesmo arquivo
+    salvar_dataframe(df_limpo[sorted(df_limpo.columns)].reset_index(drop=True), caminho_arquivo)
+    return {'saeb_limpo': caminho_arquivo}
+
+@instrumentar
+def etapa_dimensoes(configuracao, saidas):
+    """
+    Cria e grava as dimensões a partir dos dados limpos.
+    """
+    import transform_data
+    df_saeb_limpo = ler_dataframe(saidas['limpeza']['saeb_limpo'])
+    brutos = saidas.get('extracao') or _entradas_brutas(configuracao)
+    df_populacao = _ler_dataset(brutos, 'ibge_populacao')
+    
+    dimensoes = {
+        'dim_tempo': transform_data.criar_dimensao_tempo(df_saeb_limpo),
+        'dim_geografia': transform_data.criar_dimensao_geografia(df_saeb_limpo, df_populacao),
+        'dim_escola': transform_data.criar_dimensao_escola(df_saeb_limpo),
+        **transform_data.criar_dimensoes_perfil(df_saeb_limpo)
+    }
+    return {
+        nome_dimensao: salvar_dataset(
+            aplicar_esquema(df_dimensao, nome_dimensao), configuracao['diretorio_saida'], nome_dimensao,
+            configuracao['timestamp'], configuracao['formato']
+        )
+        for nome_dimensao, df_dimensao in dimensoes.items()
+    }
+
+@instrumentar
+def etapa_fato(configuracao, saidas):
+    """
+    Cria e grava a tabela fato a partir dos dados limpos e das dimensões.
+    """
+    from transform_data import criar_fato_desempenho, gravar_fato_particionado
+    df_saeb_limpo = ler_dataframe(saidas['limpeza']['saeb_limpo'])
+    dimensoes = {nome: _ler_dataset(saidas['dimensoes'], nome) for nome in DIMENSOES}
+    fato_desempenho = criar_fato_desempenho(
+        df_saeb_limpo, dimensoes['dim_tempo'], dimensoes['dim_geografia'], dimensoes['dim_escola']
+    )
+    diretorio_fato = gravar_fato_particionado(
+        fato_desempenho, dimensoes, configuracao['diretorio_saida'], configuracao['timestamp'],
+        formato=configuracao['formato']
+    )
+    # Uma saída por partição, na mesma convenção de rótulos dos datasets particionados
+    manifesto = carregar_manifesto(diretorio_fato)
+    return {
+        f"fato_desempenho/{chave}": os.path.join(diretorio_fato, particao['arquivo'])
+        for chave, particao in sorted(manifesto['particoes'].items())
+    }
+
+@instrumentar
+def etapa_analises(configuracao, saidas):
+    """
+    Executa as análises e exporta os resultados para o Power BI.
+    """
+    import analyze_data
+    from contexto_analise import ContextoAnalise
+    dim_tempo = _ler_dataset(saidas['dimensoes'], 'dim_tempo')
+    dim_geografia = _ler_dataset(saidas['dimensoes'], 'dim_geografia')
+    dim_escola = _ler_dataset(saidas['dimensoes'], 'dim_escola')
+    dim_perfil_familiar = _ler_dataset(saidas['dimensoes'], 'dim_perfil_familiar')
+    dim_perfil_pretensao = _ler_dataset(saidas['dimensoes'], 'dim_perfil_pretensao')
+    fato = _ler_dataset(saidas['fato'], 'fato_desempenho', colunas=analyze_data.COLUNAS_FATO_ANALISE)
+    # Visão compartilhada: as dimensões são resolvidas uma única vez para todas as análises
+    fato = ContextoAnalise(
+        fato, dim_tempo=dim_tempo, dim_geografia=dim_geografia, dim_escola=dim_escola,
+        dim_perfil_familiar=dim_perfil_familiar, dim_perfil_pretensao=dim_perfil_pretensao
+    )
+    
+    resultados_analise = {
+        'desempenho_regiao': analyze_data.analisar_desempenho_por_regiao(fato, dim_geografia, dim_tempo),
+        'desempenho_escola': analyze_data.analisar_desempenho_por_tipo_escola(fato, dim_escola, dim_tempo),
+        'desempenho_apoio': analyze_data.analisar_desempenho_apoio_familiar(fato, dim_perfil_familiar, dim_tempo),
+        'evolucao_desempenho': analyze_data.analisar_evolucao_desempenho(fato, dim_tempo),
+        'desempenho_pretensao': analyze_data.analisar_desempenho_e_pretensao_futura(
+            fato, dim_perfil_pretensao, dim_tempo
+        ),
+        'estados_abaixo_media': analyze_data.analisar_desempenho_estados_abaixo_media(fato, dim_geografia, dim_tempo),
+        'municipios_abaixo_media': analyze_data.analisar_municipios_abaixo_media(fato, dim_geografia, dim_tempo),
+        'desempenho_pandemia': analyze_data.analisar_desempenho_pos_pandemia(fato, dim_tempo)
+    }
+    
+    # Os resultados exportados para o Power BI são também a entrada dos gráficos
+    analyze_data.salvar_dados_para_powerbi(resultados_analise, configuracao['diretorio_resultados'])
+    diretorio_powerbi = os.path.join(configuracao['diretorio_resultados'], 'dados_powerbi')
+    return {
+        nome: os.path.join(diretorio_powerbi, f"{nome}.csv")
+        for nome, df in resultados_analise.items() if df is not None
+    }
+
+@instrumentar
+def etapa_graficos(configuracao, saidas):
+    """
+    Gera os gráficos a partir dos resultados exportados pelas análises.
+    """
+    import analyze_data
+    from graficos import renderizar_graficos
+    # Desenhados em paralelo; gráficos cujos dados não mudaram são reaproveitados
+    caminhos = renderizar_graficos(
+        {nome: (visualizar, pd.read_csv(saidas['analises'][nome]))
+         for nome, visualizar in analyze_data.GRAFICOS.items()},
+        configuracao['diretorio_resultados'], parametros={'dpi': analyze_data.DPI_GRAFICOS}
+    )
+    return {os.path.basename(caminho): caminho for caminho in sorted(caminhos.values())}
+
+def criar_etapas(extrair=False, parametros_extracao=None):
+    """
+    Monta o grafo de etapas do pipeline:
+    extração -> dicionário -> limpeza -> dimensões -> fato -> análises -> gráficos.
+    
+    Args:
+        extrair (bool): Se True, inclui a extração; caso contrário, os dados brutos
+            já presentes são a entrada do pipeline
+        parametros_extracao (dict, opcional): Argumentos de extract_data.main
+    
+    Returns:
+        list: Etapas do pipeline
+    """
+    modulos_transformacao = ('transform_data', 'esquemas', 'armazenamento', 'catalogo', 'chaves')
+    etapas = []
+    dependencias_brutos = ()
+    entradas_dicionario = _entradas_dicionario
+    entradas_dimensoes = _entradas_dimensoes
+    if extrair:
+        etapas.append(Etapa(
+            'extracao', etapa_extracao, modulos=('extract_data', 'fontes', 'armazenamento', 'catalogo'),
+            parametros=parametros_extracao
+        ))
+        # Com a extração no grafo, os dados brutos são as saídas dessa etapa
+        dependencias_brutos = ('extracao',)
+        entradas_dicionario = entradas_dimensoes = None
+    
+    etapas += [
+        Etapa('dicionario', etapa_dicionario, dependencias_brutos, modulos_transformacao,
+              entradas=entradas_dicionario),
+        Etapa('limpeza', etapa_limpeza, ('dicionario',), modulos_transformacao),
+        Etapa('dimensoes', etapa_dimensoes, ('limpeza',) + dependencias_brutos, modulos_transformacao,
+              entradas=entradas_dimensoes),
+        Etapa('fato', etapa_fato, ('limpeza', 'dimensoes'), modulos_transformacao),
+        Etapa('analises', etapa_analises, ('dimensoes', 'fato'),
+              ('analyze_data', 'contexto_analise', 'cubo', 'estatisticas', 'escolas', 'chaves', 'esquemas', 'armazenamento', 'catalogo')),
+        Etapa('graficos', etapa_graficos, ('analises',), ('analyze_data', 'graficos'))
+    ]
+    return etapas
+
+class ExecutorPipeline:
+    """
+    Executa as etapas do pipeline em ordem topológica, ignorando as que não mudaram.
+    
+    O estado de cada etapa concluída (impressão digital, arquivos gerados e os
+    seus checksums) é gravado em '<diretorio_saida>/_pipeline/estado.json' logo
+    após a sua conclusão. Se a execução for interrompida, a próxima retoma a
+    partir da primeira etapa não concluída.
+    """
+    
+    def __init__(self, etapas, diretorio_base='.', formato=FORMATO_PADRAO, parametros_extracao=None):
+        """
+        Args:
+            etapas (list): Etapas do pipeline (ver criar_etapas)
+            diretorio_base (str): Diretório com 'dados_raw', 'dados_processados' e 'resultados_analise'
+            formato (str): Formato dos arquivos gerados ('parquet' ou 'csv')
+            parametros_extracao (dict, opcional): Argumentos de extract_data.main
+        """
+        self.etapas = {etapa.nome: etapa for etapa in etapas}
+        self.configuracao = {
+            'diretorio_base': diretorio_base,
+            'diretorio_entrada': os.path.join(diretorio_base, 'dados_raw'),
+            'diretorio_saida': os.path.join(diretorio_base, 'dados_processados'),
+            'diretorio_resultados': os.path.join(diretorio_base, 'resultados_analise'),
+            'diretorio_intermediario': os.path.join(diretorio_base, 'dados_processados', '_pipeline'),
+            'timestamp': datetime.now().strftime('%Y%m%d'),
+            'formato': formato,
+            'parametros_extracao': parametros_extracao or {}
+        }
+        for chave in ['diretorio_saida', 'diretorio_resultados', 'diretorio_intermediario']:
+            os.makedirs(self.configuracao[chave], exist_ok=True)
+        self._caminho_estado = os.path.join(self.configuracao['diretorio_intermediario'], 'estado.json')
+    
+    def _carregar_estado(self):
+        if not os.path.exists(self._caminho_estado):
+            return {'etapas': {}, 'checksums': {}}
+        with open(self._caminho_estado, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    
+    def _salvar_estado(self, estado):
+        caminho_temporario = self._caminho_estado + '.tmp'
+        with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo, indent=2, ensure_ascii=False)
+        os.replace(caminho_temporario, self._caminho_estado)
+    
+    def _checksum(self, estado, caminho_arquivo):
+        """
+        Checksum de um arquivo, reaproveitado enquanto o tamanho e a data de
+        modificação não mudarem.
+        """
+        informacoes = os.stat(caminho_arquivo)
+        assinatura = [informacoes.st_size, informacoes.st_mtime_ns]
+        registro = estado['checksums'].get(caminho_arquivo)
+        if registro and registro['assinatura'] == assinatura:
+            return registro['checksum']
+        checksum = calcular_checksum(caminho_arquivo)
+        estado['checksums'][caminho_arquivo] = {'assinatura': assinatura, 'checksum': checksum}
+        return checksum
+    
+    def _impressao_digital(self, etapa, estado):
+        conteudo = {
+            'codigo': versao_codigo(etapa.modulos),
+            'parametros': etapa.parametros,
+            'dependencias': {nome: estado['etapas'][nome]['impressao_saidas'] for nome in etapa.dependencias}
+        }
+        if etapa.entradas is not None:
+            conteudo['entradas'] = {
+                rotulo: self._checksum(estado, caminho)
+                for rotulo, caminho in sorted(etapa.entradas(self.configuracao).items())
+            }
+        texto = json.dumps(conteudo, sort_keys=True, default=_descrever_parametro)
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+    
+    def _impressao_saidas(self, estado, saidas):
+        conteudo = {rotulo: self._checksum(estado, caminho) for rotulo, caminho in sorted(saidas.items())}
+        return hashlib.sha256(json.dumps(conteudo, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def executar(self, forcar=None):
+        """
+        Executa o pipeline.
+        
+        Args:
+            forcar (list, opcional): Etapas a executar mesmo que não tenham mudado
+        
+        Returns:
+            dict: Situação de cada etapa ('executada' ou 'ignorada') e o tempo gasto
+        """
+        forcar = set(forcar or [])
+        estado = self._carregar_estado()
+        ordem = TopologicalSorter(
+            {nome: etapa.dependencias for nome, etapa in self.etapas.items()}
+        ).static_order()
+        
+        resumo = {}
+        inicio_total = time.perf_counter()
+        for nome in ordem:
+            etapa = self.etapas[nome]
+            inicio = time.perf_counter()
+            impressao = self._impressao_digital(etapa, estado)
+            registro = estado['etapas'].get(nome)
+            atualizada = (
+                nome not in forcar
+                and registro is not None
+                and registro['impressao_digital'] == impressao
+                and all(os.path.exists(caminho) for caminho in registro['saidas'].values())
+            )
+            if atualizada:
+                print(f"[{nome}] sem alterações, etapa ignorada")
+                resumo[nome] = {'situacao': 'ignorada', 'tempo': time.perf_counter() - inicio}
+                continue
+            
+            print(f"[{nome}] executando...")
+            saidas_dependencias = {dependencia: estado['etapas'][dependencia]['saidas']
+                                   for dependencia in etapa.dependencias}
+            saidas = etapa.funcao(self.configuracao, saidas_dependencias)
+            
+            # Registra a etapa assim que ela termina, para permitir a retomada
+            estado['etapas'][nome] = {
+                'impressao_digital': impressao,
+                'saidas': saidas,
+                'impressao_saidas': self._impressao_saidas(estado, saidas),
+                'concluida_em': datetime.now().isoformat(timespec='seconds')
+            }
+            self._salvar_estado(estado)
+            resumo[nome] = {'situacao': 'executada', 'tempo': time.perf_counter() - inicio}
+            print(f"[{nome}] concluída em {resumo[nome]['tempo']:.2f}s")
+        
+        self._salvar_estado(estado)
+        executadas = [nome for nome, item in resumo.items() if item['situacao'] == 'executada']
+        print(f"Pipeline concluído em {time.perf_counter() - inicio_total:.2f}s "
+              f"({len(executadas)} etapas executadas, {len(resumo) - len(executadas)} ignoradas)")
+        return resumo
+
+def main(argumentos=None):
+    """
+    Linha de comando do pipeline.
+    
+    Uso:
+        python pipeline.py [--extrair] [--formato parquet|csv] [--forcar ETAPA ...]
+                           [--instrumentar] [--perfilar ETAPA ...]
+    
+    Com --instrumentar, o relatório de desempenho de cada etapa é gravado em
+    'relatorios_execucao'; --perfilar grava também o perfil cProfile da etapa.
+    """
+    argumentos = sys.argv[1:] if argumentos is None else argumentos
+    extrair = '--extrair' in argumentos
+    formato = FORMATO_PADRAO
+    forcar = []
+    perfilar = []
+    for posicao, argumento in enumerate(argumentos):
+        if argumento == '--formato':
+            formato = argumentos[posicao + 1]
+        elif argumento == '--forcar':
+            forcar.append(argumentos[posicao + 1])
+        elif argumento == '--perfilar':
+            perfilar.append(argumentos[posicao + 1])
+    
+    parametros_extracao = {'formato': formato}
+    executor = ExecutorPipeline(
+        criar_etapas(extrair=extrair, parametros_extracao=parametros_extracao),
+        formato=formato, parametros_extracao=parametros_extracao
+    )
+    if '--instrumentar' in argumentos or perfilar:
+        with execucao_instrumentada('pipeline', perfilar=perfilar):
+            executor.executar(forcar=forcar)
+    else:
+        executor.executar(forcar=forcar)
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,166 @@
 import os
+import time
+import shutil
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
+from armazenamento import (
+    COMPRESSAO_PADRAO, FORMATO_PADRAO, EscritorParticionado, abrir_escritor_incremental, carregar_manifesto,
+    grupos_particao, gravar_particoes, ler_dataframe, ler_dataframe_em_lotes, salvar_dataframe
+)
+from catalogo import CatalogoDatasets, resolver_dataset, salvar_dataset
+from esquemas import (
+    COLUNAS_CHAVE_SAEB, COLUNAS_PRETENSAO_FUTURA, COLUNAS_QUESTIONARIO_SAEB, PREFIXO_PROFICIENCIA, aplicar_esquema
+)
+from chaves import IndiceChaves
+from armazem_colunar import ArmazemColunar
+from armazem_dimensional import ArmazemDimensional
+from instrumentacao import instrumentar, instrumentar_main, submeter
 
-def carregar_dados(diretorio, prefixo_arquivo):
+# Chave natural de cada dimensão usada na resolução das chaves da tabela fato
+CHAVES_NATURAIS_FATO = {
+    'id_tempo': ('dim_tempo', ['ano']),
+    'id_geografia': ('dim_geografia', ['id_municipio']),
+    # Uma escola pode aparecer com mais de uma dependência/localização; o membro
+    # da dimensão é identificado pela combinação completa
+    'id_dim_escola': ('dim_escola', ['id_escola', 'id_dependencia_adm', 'id_localizacao'])
+}
+# Colunas que identificam um membro de cada dimensão na acumulação de lotes
+# (None = todas as colunas). Os perfis não são acumulados em memória: os seus
+# membros são gravados em arquivos temporários (ver _dimensao_perfil_dos_membros)
+CHAVES_MEMBROS = {
+    'tempo': None,
+    'geografia': ['id_regiao', 'sigla_uf', 'id_municipio'],
+    'escola': None
+}
+# Minidimensões de perfil de questionário: cada grupo de itens tem a sua
+# dimensão e a sua chave na tabela fato (hash das respostas do grupo)
+PERFIS_QUESTIONARIO = {
+    'dim_perfil_familiar': ('id_perfil_familiar', COLUNAS_QUESTIONARIO_SAEB),
+    'dim_perfil_pretensao': ('id_perfil_pretensao', COLUNAS_PRETENSAO_FUTURA)
+}
+# Chave de hash (16 bytes) do hash de verificação gravado com os membros dos
+# perfis, independente do hash que forma a chave do perfil
+CHAVE_HASH_VERIFICACAO = 'verificacao_perf'
+# Posição da primeira ocorrência de um membro nos dados completos, gravada com os membros dos perfis de cada UF
+COLUNA_POSICAO = 'posicao'
+DIMENSOES = ['dim_tempo', 'dim_geografia', 'dim_escola'] + list(PERFIS_QUESTIONARIO)
+# Colunas de partição da tabela fato. Com 'sigla_uf', cada arquivo contém um
+# único ano e UF, e leitores podem carregar apenas as partições de que precisam
+COLUNAS_PARTICAO_FATO = ['ano']
+# Dimensão e chave substituta de onde vem cada coluna de partição da tabela fato
+ORIGEM_PARTICOES_FATO = {
+    'ano': ('dim_tempo', 'id_tempo'),
+    'sigla_uf': ('dim_geografia', 'id_geografia')
+}
+
+@instrumentar
+def carregar_dados(diretorio, prefixo_arquivo, colunas=None, filtro_particoes=None, versao=None):
     """
     Carrega os dados mais recentes de um determinado tipo.
     
+    O dataset é localizado pelo catálogo do diretório (ver catalogo.py), que
+    também permite verificar as colunas pedidas antes de ler os dados. Se o
+    dataset for particionado (extraído no modo incremental), todas as partições
+    registradas no manifesto são carregadas. Os tipos declarados no registro de
+    esquemas são aplicados na leitura.
+    
     Args:
         diretorio (str): Diretório onde os dados estão armazenados
-        prefixo_arquivo (str): Prefixo do nome do arquivo
+        prefixo_arquivo (str): Nome do dataset (prefixo do nome do arquivo)
+        colunas (list, opcional): Colunas a serem carregadas (todas, se não informado)
+        filtro_particoes (dict, opcional): Valores aceitos por coluna (ex.: {'ano': [2021]}).
+            Em datasets particionados, apenas as partições correspondentes são lidas;
+            em arquivos únicos, as linhas são filtradas após a leitura
+        versao (str, opcional): Versão registrada no catálogo (a atual, se não informada)
     
     Returns:
         pandas.DataFrame: DataFrame com os dados carregados
     """
-    # Encontra o arquivo mais recente com o prefixo especificado
-    arquivos = [f for f in os.listdir(diretorio) if f.startswith(prefixo_arquivo)]
-    if not arquivos:
-        raise FileNotFoundError(f"Nenhum arquivo encontrado com o prefixo {prefixo_arquivo}")
+    colunas_leitura = colunas
+    if colunas is not None and filtro_particoes:
+        colunas_leitura = list(colunas) + [col for col in filtro_particoes if col not in colunas]
+    dataset = resolver_dataset(diretorio, prefixo_arquivo, versao=versao, colunas=colunas_leitura)
+    
+    if dataset['tipo'] == 'particionado':
+        df = carregar_dados_particionados(dataset['caminho'], colunas=colunas,
+                                          filtro_particoes=filtro_particoes)
+    else:
+        caminho_arquivo = dataset['caminho']
+        linhas = f" ({dataset['linhas']} linhas)" if 'linhas' in dataset else ''
+        print(f"Carregando dados de: {caminho_arquivo}{linhas}")
+        df = ler_dataframe(caminho_arquivo, colunas=colunas_leitura)
+        if filtro_particoes:
+            mascara = np.ones(len(df), dtype=bool)
+            for coluna, valores in filtro_particoes.items():
+                mascara &= df[coluna].isin(valores).to_numpy()
+            df = df[mascara].reset_index(drop=True)
+            if colunas is not None:
+                df = df[list(colunas)]
+    
+    return aplicar_esquema(df, prefixo_arquivo)
+
+@instrumentar
+def carregar_dados_particionados(diretorio_dataset, colunas=None, filtro_particoes=None):
+    """
+    Carrega todas as partições de um dataset particionado a partir do seu manifesto.
+    
+    Args:
+        diretorio_dataset (str): Diretório do dataset particionado
+        colunas (list, opcional): Colunas a serem carregadas (todas, se não informado)
+        filtro_particoes (dict, opcional): Valores aceitos por coluna de partição
+            (ex.: {'ano': [2021]}); as demais partições não são lidas
     
-    arquivo_mais_recente = max(arquivos)
-    caminho_arquivo = os.path.join(diretorio, arquivo_mais_recente)
+    Returns:
+        pandas.DataFrame: DataFrame com os dados de todas as partições
+    """
+    manifesto = carregar_manifesto(diretorio_dataset)
+    
+    particoes = [manifesto['particoes'][chave] for chave in sorted(manifesto['particoes'])]
+    if filtro_particoes:
+        particoes = [
+            particao for particao in particoes
+            if all(particao['valores'].get(col) in valores for col, valores in filtro_particoes.items())
+        ]
+    if not particoes:
+        raise FileNotFoundError(f"Nenhuma partição registrada em {diretorio_dataset}")
+    
+    print(f"Carregando {len(particoes)} partições de: {diretorio_dataset}")
+    return pd.concat(
+        [ler_dataframe(os.path.join(diretorio_dataset, particao['arquivo']), colunas=colunas)
+         for particao in particoes],
+        ignore_index=True
+    )
+
+def iterar_lotes_dados(diretorio, prefixo_arquivo, tamanho_lote, colunas=None):
+    """
+    Percorre os dados mais recentes de um determinado tipo em lotes de linhas.
+    
+    Funciona tanto para um arquivo único quanto para um dataset particionado,
+    caso em que as partições são lidas uma após a outra.
+    
+    Args:
+        diretorio (str): Diretório onde os dados estão armazenados
+        prefixo_arquivo (str): Prefixo do nome do arquivo
+        tamanho_lote (int): Quantidade máxima de linhas por lote
+        colunas (list, opcional): Colunas a serem carregadas
     
-    print(f"Carregando dados de: {caminho_arquivo}")
-    return pd.read_csv(caminho_arquivo)
+    Returns:
+        iterator: Iterador de DataFrames, um por lote
+    """
+    dataset = resolver_dataset(diretorio, prefixo_arquivo, colunas=colunas)
+    if dataset['tipo'] == 'particionado':
+        manifesto = carregar_manifesto(dataset['caminho'])
+        caminhos = [os.path.join(dataset['caminho'], manifesto['particoes'][chave]['arquivo'])
+                    for chave in sorted(manifesto['particoes'])]
+    else:
+        caminhos = [dataset['caminho']]
+    
+    for caminho_arquivo in caminhos:
+        print(f"Lendo em lotes de {tamanho_lote} linhas: {caminho_arquivo}")
+        for lote in ler_dataframe_em_lotes(caminho_arquivo, tamanho_lote, colunas=colunas):
+            yield aplicar_esquema(lote, prefixo_arquivo)
 
 def criar_diretorio(nome_diretorio):
     """
@@ -39,10 +176,76 @@ def criar_diretorio(nome_diretorio):
         os.makedirs(nome_diretorio)
     return nome_diretorio
 
+def _posicoes_das_chaves(coluna, chaves):
+    """
+    Localiza, para cada linha da coluna, a posição do seu código na lista de chaves.
+    
+    Args:
+        coluna (pandas.Series): Coluna com os códigos
+        chaves (pandas.Index): Chaves do dicionário (sem repetições)
+    
+    Returns:
+        numpy.ndarray: Posição da chave de cada linha (-1 quando não há tradução)
+    """
+    if isinstance(coluna.dtype, pd.CategoricalDtype):
+        # Resolve apenas as categorias e propaga pelos códigos
+        posicoes_categorias = chaves.get_indexer(coluna.cat.categories)
+        codigos = coluna.cat.codes.to_numpy()
+        return np.where(codigos >= 0, posicoes_categorias[codigos], -1)
+    return chaves.get_indexer(coluna)
+
+def colunas_perfil(colunas_disponiveis, itens, apenas_chave=False):
+    """
+    Seleciona as colunas de respostas de um grupo de itens do questionário.
+    
+    Args:
+        colunas_disponiveis (iterable): Colunas existentes nos dados
+        itens (list): Itens do grupo (ex.: COLUNAS_QUESTIONARIO_SAEB)
+        apenas_chave (bool): Se True, devolve uma coluna por item: o código da
+            resposta ou, se apenas a tradução foi mantida, a descrição
+    
+    Returns:
+        list: Colunas do perfil (códigos seguidos das descrições)
+    """
+    colunas = [col for col in colunas_disponiveis if col.removesuffix('_desc') in itens]
+    codigos = sorted(col for col in colunas if not col.endswith('_desc'))
+    descricoes = sorted(col for col in colunas if col.endswith('_desc'))
+    if apenas_chave:
+        descricoes = [col for col in descricoes if col[:-len('_desc')] not in codigos]
+    return codigos + descricoes
+
+def calcular_chave_perfil(df_saeb, itens, chave_hash=None):
+    """
+    Calcula a chave do perfil de um grupo de itens do questionário em cada linha.
+    
+    A chave é um hash de 64 bits das respostas, que depende apenas dos valores
+    (não da ordem das categorias), de modo que o mesmo perfil recebe a mesma
+    chave em qualquer lote, fragmento ou execução, sem consulta à dimensão.
+    
+    Args:
+        df_saeb (pandas.DataFrame): DataFrame com as respostas ao questionário
+        itens (list): Itens do grupo (ex.: COLUNAS_QUESTIONARIO_SAEB)
+        chave_hash (str, opcional): Chave de hash de 16 bytes (a padrão do pandas,
+            se não informada); outra chave gera um hash independente das respostas
+    
+    Returns:
+        numpy.ndarray: Chave do perfil de cada linha (int64; 0 se não houver respostas)
+    """
+    colunas = colunas_perfil(df_saeb.columns, itens, apenas_chave=True)
+    if not colunas:
+        return np.zeros(len(df_saeb), dtype=np.int64)
+    argumentos = {'hash_key': chave_hash} if chave_hash else {}
+    return pd.util.hash_pandas_object(df_saeb[colunas], index=False, **argumentos).to_numpy().view(np.int64)
+
+@instrumentar
 def aplicar_dicionario(df_dados, df_dicionario):
     """
     Aplica as traduções do dicionário aos dados.
     
+    As colunas traduzidas (sufixo _desc) são criadas como pandas.Categorical:
+    cada rótulo é armazenado uma única vez e as linhas guardam apenas códigos
+    inteiros, em vez de repetir o mesmo texto em milhões de linhas.
+    
     Args:
         df_dados (pandas.DataFrame): DataFrame com os dados a serem traduzidos
         df_dicionario (pandas.DataFrame): DataFrame com o dicionário
@@ -51,33 +254,38 @@ def aplicar_dicionario(df_dados, df_dicionario):
         pandas.DataFrame: DataFrame com os dados traduzidos
     """
     print("Aplicando dicionário aos dados...")
-    df_transformado = df_dados.copy()
+    # Cópia rasa: as colunas originais são compartilhadas, apenas as novas são alocadas
+    df_transformado = df_dados.copy(deep=False)
     
     # Filtra apenas as entradas do dicionário relevantes para os dados atuais
     colunas_dados = set(df_dados.columns)
     df_dicionario_filtrado = df_dicionario[df_dicionario['variavel'].isin(colunas_dados)]
     
-    # Agrupa o dicionário por variável para facilitar a aplicação
-    dicionario_agrupado = df_dicionario_filtrado.groupby('variavel')
-    
-    # Para cada variável no dicionário
-    for variavel, grupo in dicionario_agrupado:
-        if variavel in df_transformado.columns:
-            # Cria um mapeamento de código para valor
-            mapeamento = dict(zip(grupo['chave'], grupo['valor']))
-            
-            # Verifica se a coluna é numérica para evitar erros de tipo
-            if pd.api.types.is_numeric_dtype(df_transformado[variavel]):
-                # Converte chaves para o mesmo tipo da coluna
-                mapeamento_tipado = {int(k) if pd.notna(k) else k: v for k, v in mapeamento.items()}
-                # Aplica o mapeamento e cria uma nova coluna com o sufixo _desc
-                df_transformado[f"{variavel}_desc"] = df_transformado[variavel].map(mapeamento_tipado)
-            else:
-                df_transformado[f"{variavel}_desc"] = df_transformado[variavel].map(mapeamento)
+    # Uma única passagem agrupada pelo dicionário
+    for variavel, grupo in df_dicionario_filtrado.groupby('variavel', sort=False, observed=True):
+        coluna = df_transformado[variavel]
+        chaves = grupo['chave']
+        
+        # Verifica se a coluna é numérica para evitar erros de tipo
+        if pd.api.types.is_numeric_dtype(coluna.dtype):
+            # Converte chaves para o mesmo tipo da coluna
+            chaves = pd.to_numeric(chaves, errors='coerce')
+        
+        # Em chaves repetidas prevalece a última tradução, como em um dict
+        grupo = grupo.assign(chave=chaves).dropna(subset=['chave'])
+        grupo = grupo.drop_duplicates(subset='chave', keep='last')
+        
+        # Rótulos únicos viram as categorias; cada chave aponta para o código do seu rótulo
+        codigos_rotulo, categorias = pd.factorize(grupo['valor'])
+        posicoes = _posicoes_das_chaves(coluna, pd.Index(grupo['chave']))
+        codigos = np.where(posicoes >= 0, codigos_rotulo[posicoes], -1)
+        
+        df_transformado[f"{variavel}_desc"] = pd.Categorical.from_codes(codigos, categories=categorias)
     
     print("Dicionário aplicado com sucesso!")
     return df_transformado
 
+@instrumentar
 def limpar_dados_saeb(df_saeb):
     """
     Limpa e prepara os dados do SAEB para análise.
@@ -89,10 +297,11 @@ def limpar_dados_saeb(df_saeb):
         pandas.DataFrame: DataFrame com os dados limpos
     """
     print("Limpando e preparando dados do SAEB...")
-    df_limpo = df_saeb.copy()
+    # Cópia rasa: as colunas substituídas abaixo não alteram o DataFrame original
+    df_limpo = df_saeb.copy(deep=False)
     
     # Converte as notas para numérico, lidando com valores ausentes
-    colunas_nota = [col for col in df_limpo.columns if col.startswith('proficiencia_')]
+    colunas_nota = [col for col in df_limpo.columns if col.startswith(PREFIXO_PROFICIENCIA)]
     for col in colunas_nota:
         df_limpo[col] = pd.to_numeric(df_limpo[col], errors='coerce')
     
@@ -104,32 +313,31 @@ def limpar_dados_saeb(df_saeb):
     
     # Remover colunas desnecessárias ou com muitos valores ausentes
     # Ajuste conforme necessidade após análise exploratória
-    colunas_a_manter = [
-        'ano', 'id_regiao', 'sigla_uf', 'id_municipio', 'id_escola', 
-        'id_dependencia_adm', 'id_localizacao', 'id_turma', 'id_aluno',
-        'proficiencia_media'
-    ] + colunas_nota + [col for col in df_limpo.columns if col.endswith('_desc')]
-    
-    # Incluir colunas importantes para análises específicas
-    colunas_relevantes = [
-        'tx_resp_q001', 'tx_resp_q002', 'tx_resp_q003', 'tx_resp_q004',
-        'tx_resp_q005', 'tx_resp_q006', 'tx_resp_q007', 'tx_resp_q008'
+    colunas_a_manter = COLUNAS_CHAVE_SAEB + ['proficiencia_media'] + colunas_nota + [
+        col for col in df_limpo.columns if col.endswith('_desc')
     ]
     
-    for col in colunas_relevantes:
+    # Incluir colunas importantes para análises específicas
+    for col in COLUNAS_QUESTIONARIO_SAEB:
         if col in df_limpo.columns:
             colunas_a_manter.append(col)
             # Adicionar também a coluna traduzida se existir
             if f"{col}_desc" in df_limpo.columns:
                 colunas_a_manter.append(f"{col}_desc")
     
-    # Manter apenas as colunas necessárias
-    colunas_a_manter = list(set(colunas_a_manter).intersection(df_limpo.columns))
+    # Manter apenas as colunas necessárias (sem repetições, em ordem estável)
+    colunas_a_manter = [col for col in dict.fromkeys(colunas_a_manter) if col in df_limpo.columns]
     df_limpo = df_limpo[colunas_a_manter]
     
+    # Chave de cada perfil de questionário, usada pela sua dimensão e pela tabela fato
+    posicao = df_limpo.columns.get_loc('id_aluno') + 1
+    for deslocamento, (coluna_chave, itens) in enumerate(PERFIS_QUESTIONARIO.values()):
+        df_limpo.insert(posicao + deslocamento, coluna_chave, calcular_chave_perfil(df_limpo, itens))
+    
     print("Limpeza concluída com sucesso!")
     return df_limpo
 
+@instrumentar
 def criar_dimensao_tempo(df_saeb):
     """
     Cria a dimensão tempo a partir dos dados do SAEB.
@@ -157,6 +365,7 @@ def criar_dimensao_tempo(df_saeb):
     print("Dimensão tempo criada com sucesso!")
     return dim_tempo
 
+@instrumentar
 def criar_dimensao_geografia(df_saeb, df_populacao):
     """
     Cria a dimensão geografia a partir dos dados do SAEB e IBGE.
@@ -204,6 +413,7 @@ def criar_dimensao_geografia(df_saeb, df_populacao):
     print("Dimensão geografia criada com sucesso!")
     return dim_geografia
 
+@instrumentar
 def criar_dimensao_escola(df_saeb):
     """
     Cria a dimensão escola a partir dos dados do SAEB.
@@ -243,105 +453,898 @@ def criar_dimensao_escola(df_saeb):
     print("Dimensão escola criada com sucesso!")
     return dim_escola
 
-def criar_dimensao_aluno(df_saeb):
+@instrumentar
+def criar_dimensao_perfil(df_saeb, nome_dimensao):
     """
-    Cria a dimensão aluno a partir dos dados do SAEB.
+    Cria uma minidimensão de perfil de questionário a partir dos dados do SAEB.
+    
+    Cada membro é uma combinação distinta de respostas aos itens do grupo
+    (ver PERFIS_QUESTIONARIO), identificada pela chave calculada na limpeza.
+    As respostas ficam uma única vez na dimensão, em vez de repetidas a cada
+    aluno, e a tabela fato guarda apenas a chave do perfil. Como a chave é um
+    hash, as respostas das linhas com a mesma chave são comparadas às da
+    primeira ocorrência, e uma colisão gera erro em vez de unir perfis distintos.
     
     Args:
-        df_saeb (pandas.DataFrame): DataFrame com os dados do SAEB
+        df_saeb (pandas.DataFrame): DataFrame com os dados limpos do SAEB (ou os
+            membros distintos de cada perfil)
+        nome_dimensao (str): Nome da dimensão (ex.: 'dim_perfil_familiar')
     
     Returns:
-        pandas.DataFrame: DataFrame com a dimensão aluno
-    """
-    print("Criando dimensão aluno...")
-    # Colunas de interesse para informações do aluno
-    # Ajuste conforme as colunas disponíveis no seu dataset
-    cols_aluno = ['id_aluno']
+        pandas.DataFrame: DataFrame com a dimensão perfil
     
-    # Identificar colunas com características do aluno
-    cols_caracteristicas = [col for col in df_saeb.columns if col.startswith('tx_resp_q')]
-    # Adicionar suas descrições
-    cols_desc = [f"{col}_desc" for col in cols_caracteristicas if f"{col}_desc" in df_saeb.columns]
-    
-    # Criar dimensão aluno
-    dim_aluno = df_saeb[cols_aluno + cols_caracteristicas + cols_desc].drop_duplicates()
-    
-    # Adicionar identificador único
-    dim_aluno['id_dim_aluno'] = range(1, len(dim_aluno) + 1)
-    
-    # Mover id_dim_aluno para a primeira coluna
-    colunas_ordenadas = ['id_dim_aluno'] + [col for col in dim_aluno.columns if col != 'id_dim_aluno']
-    dim_aluno = dim_aluno[colunas_ordenadas]
+    Raises:
+        ValueError: Se a mesma chave identificar respostas diferentes
+    """
+    print(f"Criando dimensão {nome_dimensao}...")
+    coluna_chave, itens = PERFIS_QUESTIONARIO[nome_dimensao]
+    chaves = df_saeb[coluna_chave].to_numpy()
+    
+    # Primeira ocorrência de cada perfil; os códigos de factorize seguem a mesma
+    # ordem, e cada linha é comparada à primeira ocorrência da sua chave
+    codigos, _ = pd.factorize(chaves)
+    primeiras = np.flatnonzero(~pd.Index(chaves).duplicated())
+    referencia = primeiras[codigos]
+    for coluna in colunas_perfil(df_saeb.columns, itens, apenas_chave=True):
+        respostas, _ = pd.factorize(df_saeb[coluna])
+        divergentes = np.flatnonzero(respostas != respostas[referencia])
+        if len(divergentes):
+            raise ValueError(
+                f"Colisão na chave {coluna_chave} de {nome_dimensao}: o valor {chaves[divergentes[0]]} "
+                f"identifica respostas diferentes em {coluna}"
+            )
+    
+    colunas = [coluna_chave] + colunas_perfil(df_saeb.columns, itens)
+    dim_perfil = df_saeb[colunas].iloc[primeiras].reset_index(drop=True)
+    
+    print(f"Dimensão {nome_dimensao} criada com sucesso! ({len(dim_perfil)} perfis distintos)")
+    return dim_perfil
+
+def criar_dimensoes_perfil(df_saeb):
+    """
+    Cria as minidimensões de todos os perfis de questionário (PERFIS_QUESTIONARIO).
     
-    print("Dimensão aluno criada com sucesso!")
-    return dim_aluno
+    Returns:
+        dict: Dimensão de cada perfil por nome
+    """
+    return {nome_dimensao: criar_dimensao_perfil(df_saeb, nome_dimensao) for nome_dimensao in PERFIS_QUESTIONARIO}
 
-def criar_fato_desempenho(df_saeb, dim_tempo, dim_geografia, dim_escola, dim_aluno):
+@instrumentar
+def criar_fato_desempenho(df_saeb, dim_tempo, dim_geografia, dim_escola):
     """
     Cria a tabela fato de desempenho a partir dos dados do SAEB e dimensões.
     
+    As chaves substitutas são resolvidas por busca em vetores (IndiceChaves),
+    sem merges: a tabela fato recebe apenas as colunas de chave inteiras e
+    referencia as colunas de notas do SAEB sem copiá-las. Chaves naturais
+    repetidas em uma dimensão geram erro, em vez de duplicar linhas da fato.
+    As chaves dos perfis de questionário já vêm calculadas da limpeza e o código
+    do aluno é mantido como dimensão degenerada.
+    
     Args:
-        df_saeb (pandas.DataFrame): DataFrame com os dados do SAEB
+        df_saeb (pandas.DataFrame): DataFrame com os dados limpos do SAEB
         dim_tempo (pandas.DataFrame): DataFrame com a dimensão tempo
         dim_geografia (pandas.DataFrame): DataFrame com a dimensão geografia
         dim_escola (pandas.DataFrame): DataFrame com a dimensão escola
-        dim_aluno (pandas.DataFrame): DataFrame com a dimensão aluno
     
     Returns:
         pandas.DataFrame: DataFrame com a tabela fato de desempenho
+    
+    Raises:
+        ValueError: Se a chave natural de alguma dimensão tiver valores repetidos
     """
     print("Criando tabela fato de desempenho...")
-    # Colunas de métricas
-    colunas_nota = [col for col in df_saeb.columns if col.startswith('proficiencia_')]
+    dimensoes = {
+        'dim_tempo': dim_tempo,
+        'dim_geografia': dim_geografia,
+        'dim_escola': dim_escola
+    }
     
-    # Criar tabela fato inicial com chaves naturais
-    fato_base = df_saeb[['ano', 'id_municipio', 'id_escola', 'id_aluno'] + colunas_nota + ['proficiencia_media']].copy()
+    # Colunas de métricas
+    colunas_nota = [col for col in df_saeb.columns
+                    if col.startswith('proficiencia_') and col != 'proficiencia_media']
+    
+    # Resolver as chaves substitutas de cada dimensão
+    colunas_fato = {}
+    for coluna_id, (nome_dimensao, colunas_chave) in CHAVES_NATURAIS_FATO.items():
+        indice = IndiceChaves(dimensoes[nome_dimensao], colunas_chave, coluna_id, nome_dimensao)
+        colunas_fato[coluna_id] = indice.resolver(df_saeb)
+    
+    # Chaves dos perfis, código do aluno e medidas referenciados sem cópia
+    for coluna_chave, _ in PERFIS_QUESTIONARIO.values():
+        colunas_fato[coluna_chave] = df_saeb[coluna_chave].to_numpy()
+    colunas_fato['id_aluno'] = df_saeb['id_aluno'].to_numpy()
+    for coluna in colunas_nota + ['proficiencia_media']:
+        colunas_fato[coluna] = df_saeb[coluna].to_numpy()
+    fato_desempenho = pd.DataFrame(colunas_fato, copy=False)
     
-    # Mesclar com dimensão tempo
-    fato_com_tempo = fato_base.merge(
-        dim_tempo[['id_tempo', 'ano']],
-        on='ano',
-        how='left'
+    # Adicionar medidas calculadas
+    fato_desempenho['nivel_desempenho'] = pd.cut(
+        fato_desempenho['proficiencia_media'],
+        bins=[0, 200, 250, 300, float('inf')],
+        labels=['Insatisfatório', 'Básico', 'Adequado', 'Avançado']
     )
     
-    # Mesclar com dimensão geografia
-    fato_com_geo = fato_com_tempo.merge(
-        dim_geografia[['id_geografia', 'id_municipio']],
-        on='id_municipio',
-        how='left'
+    print("Tabela fato de desempenho criada com sucesso!")
+    return fato_desempenho
+
+def particoes_fato(fato, dimensoes, colunas_particao=COLUNAS_PARTICAO_FATO):
+    """
+    Obtém das dimensões os valores das colunas de partição de cada linha da tabela fato.
+    
+    A tabela fato guarda apenas as chaves substitutas; o ano e a UF de cada
+    linha são buscados nas dimensões tempo e geografia (IndiceChaves).
+    
+    Args:
+        fato (pandas.DataFrame): DataFrame com a tabela fato (ou um lote dela)
+        dimensoes (dict): Dimensões por nome; bastam as usadas pelas colunas de partição
+        colunas_particao (list): Colunas de partição ('ano' e/ou 'sigla_uf')
+    
+    Returns:
+        pandas.DataFrame: Valores das colunas de partição, na ordem das linhas da
+            tabela fato (ausentes quando a chave não existe na dimensão)
+    """
+    valores = {}
+    for coluna in colunas_particao:
+        nome_dimensao, coluna_id = ORIGEM_PARTICOES_FATO[coluna]
+        dimensao = dimensoes[nome_dimensao]
+        posicoes = IndiceChaves(dimensao, [coluna_id], coluna_id, nome_dimensao).posicoes(fato)
+        valores_coluna = dimensao[coluna].to_numpy()[np.where(posicoes >= 0, posicoes, 0)]
+        if (posicoes < 0).any():
+            valores_coluna = np.where(posicoes >= 0, valores_coluna.astype(object), None)
+        valores[coluna] = valores_coluna
+    return pd.DataFrame(valores)
+
+@instrumentar
+def gravar_fato_particionado(fato, dimensoes, diretorio_saida, timestamp, formato=FORMATO_PADRAO,
+                             colunas_particao=COLUNAS_PARTICAO_FATO, compressao=COMPRESSAO_PADRAO,
+                             max_workers=4):
+    """
+    Grava a tabela fato particionada ('fato_desempenho_<timestamp>.<versão>/ano=.../dados.<formato>')
+    e a registra no catálogo dos dados processados.
+    
+    As partições são gravadas em paralelo em um diretório de versão novo (ver
+    EscritorParticionado), e os leitores passam para a nova versão quando ela é
+    registrada no catálogo (ver registrar_fato).
+    
+    Args:
+        fato (pandas.DataFrame): DataFrame com a tabela fato
+        dimensoes (dict): Dimensões por nome (ao menos as usadas pelas colunas de partição)
+        diretorio_saida (str): Diretório dos dados processados
+        timestamp (str): Timestamp (versão) da tabela fato
+        formato (str): Formato dos arquivos das partições ('parquet' ou 'csv')
+        colunas_particao (list): Colunas de partição ('ano' e, opcionalmente, 'sigla_uf')
+        compressao (str): Codec de compressão usado no Parquet
+        max_workers (int): Quantidade máxima de partições gravadas simultaneamente
+    
+    Returns:
+        str: Diretório da versão gravada da tabela fato
+    """
+    diretorio_fato = os.path.join(diretorio_saida, f"fato_desempenho_{timestamp}")
+    fato = aplicar_esquema(fato, 'fato_desempenho')
+    with EscritorParticionado(diretorio_fato, colunas_particao, formato=formato, compressao=compressao,
+                              max_workers=max_workers) as escritor:
+        escritor.escrever(fato, particoes_fato(fato, dimensoes, colunas_particao))
+    registro = registrar_fato(diretorio_saida, escritor.diretorio_publicado, df=fato)
+    print(f"Tabela fato gravada em {len(registro['particoes'])} partições ({', '.join(colunas_particao)})")
+    return escritor.diretorio_publicado
+
+def registrar_fato(diretorio_saida, diretorio_fato, df=None):
+    """
+    Registra uma versão gravada da tabela fato como a versão atual no catálogo
+    e remove do disco as versões substituídas há mais de uma publicação.
+    
+    Args:
+        diretorio_saida (str): Diretório dos dados processados
+        diretorio_fato (str): Diretório da versão ('fato_desempenho_<timestamp>.<versão>')
+        df (pandas.DataFrame, opcional): Dados gravados, de onde vem o esquema
+    
+    Returns:
+        dict: Registro da versão no catálogo
+    """
+    catalogo = CatalogoDatasets(diretorio_saida)
+    registro = catalogo.registrar_particionado(
+        'fato_desempenho', df=df, versao=os.path.basename(diretorio_fato).removeprefix('fato_desempenho_'),
+        diretorio_dataset=diretorio_fato
     )
+    catalogo.remover_versoes_substituidas('fato_desempenho')
+    return registro
+
+def _membros_dimensoes(df_saeb_limpo):
+    """
+    Extrai de um lote os membros distintos das dimensões tempo, geografia e
+    escola, com as mesmas colunas que os criadores de dimensão utilizam.
     
-    # Mesclar com dimensão escola
-    fato_com_escola = fato_com_geo.merge(
-        dim_escola[['id_dim_escola', 'id_escola']],
-        on='id_escola',
-        how='left'
+    Args:
+        df_saeb_limpo (pandas.DataFrame): Lote de dados limpos do SAEB
+    
+    Returns:
+        dict: DataFrames com os membros distintos de cada dimensão no lote
+    """
+    cols_geografia = ['id_regiao', 'sigla_uf', 'id_municipio']
+    cols_geografia_desc = [col for col in ['id_regiao_desc'] if col in df_saeb_limpo.columns]
+    cols_escola = ['id_escola', 'id_dependencia_adm', 'id_localizacao'] + [
+        f"{col}_desc" for col in ['id_dependencia_adm', 'id_localizacao']
+        if f"{col}_desc" in df_saeb_limpo.columns
+    ]
+    
+    return {
+        'tempo': df_saeb_limpo[['ano']].drop_duplicates(),
+        # A descrição da região vem da primeira ocorrência de cada município
+        'geografia': df_saeb_limpo[cols_geografia + cols_geografia_desc].drop_duplicates(subset=cols_geografia),
+        'escola': df_saeb_limpo[cols_escola].drop_duplicates()
+    }
+
+def _membros_perfil(df_saeb_limpo, nome_dimensao):
+    """
+    Extrai de um lote os membros distintos de um perfil de questionário.
+    
+    Cada membro leva, além da chave e das respostas, um hash de verificação das
+    respostas ('verificacao', calculado com CHAVE_HASH_VERIFICACAO): membros de
+    lotes diferentes podem então ser comparados apenas pelo par (chave,
+    verificacao), sem reler as respostas.
+    
+    Args:
+        df_saeb_limpo (pandas.DataFrame): Lote de dados limpos do SAEB
+        nome_dimensao (str): Nome da dimensão perfil (ex.: 'dim_perfil_familiar')
+    
+    Returns:
+        pandas.DataFrame: Membros distintos do perfil no lote, com o índice da
+            linha da primeira ocorrência de cada um
+    """
+    coluna_chave, itens = PERFIS_QUESTIONARIO[nome_dimensao]
+    membros = df_saeb_limpo[[coluna_chave] + colunas_perfil(df_saeb_limpo.columns, itens)].assign(
+        verificacao=calcular_chave_perfil(df_saeb_limpo, itens, chave_hash=CHAVE_HASH_VERIFICACAO)
     )
+    return membros.drop_duplicates(subset=[coluna_chave, 'verificacao'])
+
+def _identidades_membros(df_membros, colunas):
+    """
+    Identidade de cada membro: tupla dos valores das colunas, com os ausentes
+    como None (para que ausentes de lotes diferentes sejam iguais).
+    """
+    valores = df_membros[colunas].astype(object)
+    return valores.where(valores.notna(), None).itertuples(index=False, name=None)
+
+def _acumular_membros(membros, novos_membros):
+    """
+    Acrescenta ao acumulado os membros de um lote que ainda não foram vistos,
+    preservando a ordem da primeira ocorrência.
     
-    # Mesclar com dimensão aluno
-    fato_desempenho = fato_com_escola.merge(
-        dim_aluno[['id_dim_aluno', 'id_aluno']],
-        on='id_aluno',
-        how='left'
+    Cada dimensão guarda o conjunto das identidades já vistas (colunas de
+    CHAVES_MEMBROS) e as partes com os membros novos de cada lote; um lote é
+    comparado apenas ao conjunto, sem concatenar os membros acumulados.
+    
+    Args:
+        membros (dict): Identidades vistas e partes de cada dimensão (alterado no lugar)
+        novos_membros (dict): Membros do lote, como devolvidos por _membros_dimensoes
+    """
+    for nome, df_membros in novos_membros.items():
+        vistos, partes = membros.setdefault(nome, (set(), []))
+        novos = []
+        for posicao, identidade in enumerate(
+            _identidades_membros(df_membros, CHAVES_MEMBROS[nome] or list(df_membros.columns))
+        ):
+            if identidade not in vistos:
+                vistos.add(identidade)
+                novos.append(posicao)
+        if novos:
+            partes.append(df_membros.iloc[novos])
+
+def _membros_acumulados(membros, nome):
+    """
+    Membros distintos acumulados de uma dimensão, na ordem da primeira ocorrência.
+    """
+    return pd.concat(membros[nome][1], ignore_index=True)
+
+def _caminho_membros_perfil(caminho_limpo, nome_dimensao):
+    """
+    Arquivo temporário dos membros de um perfil, ao lado do arquivo de dados limpos.
+    """
+    raiz, extensao = os.path.splitext(caminho_limpo)
+    return f"{raiz}.{nome_dimensao}{extensao}"
+
+def _dimensao_perfil_dos_membros(arquivos_membros, nome_dimensao, tamanho_lote, coluna_posicao=None):
+    """
+    Cria uma minidimensão de perfil a partir dos membros gravados em arquivos
+    temporários (por _membros_perfil, na ordem das linhas dos dados).
+    
+    Apenas a chave e o hash de verificação de todos os membros são carregados
+    de uma vez; a primeira ocorrência de cada par é então lida dos arquivos em
+    lotes. Pares com a mesma chave e verificações diferentes chegam juntos a
+    criar_dimensao_perfil, que os rejeita como colisão.
+    
+    Args:
+        arquivos_membros (list): Arquivos Parquet com os membros, em ordem
+        nome_dimensao (str): Nome da dimensão perfil
+        tamanho_lote (int): Quantidade de linhas por lote na leitura dos membros
+        coluna_posicao (str, opcional): Coluna com a posição da primeira ocorrência
+            de cada membro nos dados. Se informada, os membros são considerados na
+            ordem dessa coluna, e não na ordem dos arquivos
+    
+    Returns:
+        pandas.DataFrame: DataFrame com a dimensão perfil
+    """
+    coluna_chave, _ = PERFIS_QUESTIONARIO[nome_dimensao]
+    colunas_pares = [coluna_chave, 'verificacao'] + ([coluna_posicao] if coluna_posicao else [])
+    pares = pd.concat(
+        [ler_dataframe(arquivo, colunas=colunas_pares) for arquivo in arquivos_membros], ignore_index=True
     )
+    ordem = np.argsort(pares[coluna_posicao].to_numpy(), kind='stable') if coluna_posicao \
+        else np.arange(len(pares))
+    primeiras = np.zeros(len(pares), dtype=bool)
+    primeiras[ordem] = ~pares[[coluna_chave, 'verificacao']].iloc[ordem].duplicated().to_numpy()
+    
+    partes = []
+    inicio = 0
+    for arquivo in arquivos_membros:
+        for lote in ler_dataframe_em_lotes(arquivo, tamanho_lote):
+            partes.append(lote[primeiras[inicio:inicio + len(lote)]].drop(columns='verificacao'))
+            inicio += len(lote)
+    membros = pd.concat(partes, ignore_index=True)
+    if coluna_posicao:
+        membros = membros.sort_values(coluna_posicao, kind='stable', ignore_index=True).drop(columns=coluna_posicao)
+    return criar_dimensao_perfil(membros, nome_dimensao)
+
+@instrumentar
+def transformar_saeb_em_lotes(lotes_saeb, df_dicionario, df_populacao, diretorio_fato,
+                              caminho_temporario_limpo, tamanho_lote=500000, formato=FORMATO_PADRAO,
+                              colunas_particao=COLUNAS_PARTICAO_FATO):
+    """
+    Transforma os dados do SAEB lote a lote, sem carregar a base inteira em memória.
+    
+    Primeira passada: cada lote é traduzido e limpo e o lote limpo é gravado em
+    um arquivo temporário. Os membros novos das dimensões pequenas (tempo,
+    geografia e escola) são acumulados em memória; os membros dos perfis, que
+    crescem com a quantidade de alunos, são gravados em arquivos temporários ao
+    lado do arquivo limpo e deduplicados ao final (_dimensao_perfil_dos_membros).
+    Segunda passada: o arquivo temporário é relido em lotes para gerar a tabela
+    fato, gravada de forma incremental nas suas partições. O resultado é idêntico
+    ao do processamento em memória, pois as dimensões preservam a ordem da
+    primeira ocorrência e a resolução das chaves da fato preserva a ordem das linhas.
     
-    # Selecionar apenas as colunas relevantes
-    cols_fato = ['id_tempo', 'id_geografia', 'id_dim_escola', 'id_dim_aluno'] + colunas_nota + ['proficiencia_media']
-    fato_desempenho = fato_desempenho[cols_fato]
+    Args:
+        lotes_saeb (iterator): Iterador de DataFrames com os dados brutos do SAEB
+        df_dicionario (pandas.DataFrame): DataFrame com o dicionário
+        df_populacao (pandas.DataFrame): DataFrame com os dados de população do IBGE
+        diretorio_fato (str): Diretório base da tabela fato particionada (ver EscritorParticionado)
+        caminho_temporario_limpo (str): Arquivo Parquet temporário para os dados limpos
+            (os membros dos perfis usam o mesmo nome, com o nome da dimensão)
+        tamanho_lote (int): Quantidade de linhas por lote na geração da tabela fato
+            e na leitura dos membros dos perfis
+        formato (str): Formato dos arquivos da tabela fato ('parquet' ou 'csv')
+        colunas_particao (list): Colunas de partição da tabela fato
     
-    # Adicionar medidas calculadas
-    fato_desempenho['nivel_desempenho'] = pd.cut(
-        fato_desempenho['proficiencia_media'],
-        bins=[0, 200, 250, 300, float('inf')],
-        labels=['Insatisfatório', 'Básico', 'Adequado', 'Avançado']
+    Returns:
+        dict: Dimensões criadas (DIMENSOES), quantidade de linhas da tabela fato
+            ('linhas_fato') e diretório da versão publicada ('diretorio_fato')
+    """
+    print("Transformando dados do SAEB em lotes...")
+    membros = {}
+    colunas_limpas = None
+    caminhos_perfis = {
+        nome_dimensao: _caminho_membros_perfil(caminho_temporario_limpo, nome_dimensao)
+        for nome_dimensao in PERFIS_QUESTIONARIO
+    }
+    
+    # Primeira passada: tradução, limpeza e membros das dimensões
+    escritores_perfis = {}
+    try:
+        with abrir_escritor_incremental(caminho_temporario_limpo) as escritor_limpo:
+            for numero_lote, lote in enumerate(lotes_saeb, start=1):
+                print(f"Processando lote {numero_lote} ({len(lote)} linhas)...")
+                lote_limpo = limpar_dados_saeb(aplicar_dicionario(lote, df_dicionario))
+                
+                # Mantém a mesma ordem de colunas em todos os lotes
+                if colunas_limpas is None:
+                    colunas_limpas = list(lote_limpo.columns)
+                    escritores_perfis = {
+                        nome_dimensao: abrir_escritor_incremental(caminho)
+                        for nome_dimensao, caminho in caminhos_perfis.items()
+                    }
+                lote_limpo = lote_limpo[colunas_limpas]
+                
+                _acumular_membros(membros, _membros_dimensoes(lote_limpo))
+                for nome_dimensao, escritor_perfil in escritores_perfis.items():
+                    escritor_perfil.escrever(_membros_perfil(lote_limpo, nome_dimensao))
+                escritor_limpo.escrever(lote_limpo.reset_index(drop=True))
+    finally:
+        for escritor_perfil in escritores_perfis.values():
+            escritor_perfil.fechar()
+    
+    if colunas_limpas is None:
+        raise ValueError("Nenhum dado do SAEB encontrado para transformar")
+    
+    dim_tempo = criar_dimensao_tempo(_membros_acumulados(membros, 'tempo'))
+    dim_geografia = criar_dimensao_geografia(_membros_acumulados(membros, 'geografia'), df_populacao)
+    dim_escola = criar_dimensao_escola(_membros_acumulados(membros, 'escola'))
+    dimensoes_perfil = {}
+    for nome_dimensao, caminho in caminhos_perfis.items():
+        dimensoes_perfil[nome_dimensao] = _dimensao_perfil_dos_membros([caminho], nome_dimensao, tamanho_lote)
+        os.remove(caminho)
+    
+    # Segunda passada: tabela fato gravada lote a lote
+    linhas_fato = 0
+    dimensoes_particao = {'dim_tempo': dim_tempo, 'dim_geografia': dim_geografia}
+    with EscritorParticionado(diretorio_fato, colunas_particao, formato=formato) as escritor_fato:
+        for lote_limpo in ler_dataframe_em_lotes(caminho_temporario_limpo, tamanho_lote):
+            fato_lote = criar_fato_desempenho(lote_limpo, dim_tempo, dim_geografia, dim_escola)
+            escritor_fato.escrever(
+                aplicar_esquema(fato_lote, 'fato_desempenho'),
+                particoes_fato(fato_lote, dimensoes_particao, colunas_particao)
+            )
+            linhas_fato += len(fato_lote)
+    os.remove(caminho_temporario_limpo)
+    
+    print(f"Transformação em lotes concluída: {linhas_fato} linhas na tabela fato")
+    return {
+        'dim_tempo': dim_tempo,
+        'dim_geografia': dim_geografia,
+        'dim_escola': dim_escola,
+        **dimensoes_perfil,
+        'linhas_fato': linhas_fato,
+        'diretorio_fato': escritor_fato.diretorio_publicado
+    }
+
+def _fragmentos_saeb(diretorio_entrada, diretorio_fragmentos, tamanho_lote):
+    """
+    Define os fragmentos por UF dos dados do SAEB.
+    
+    Se os dados brutos já estão particionados por sigla_uf, as UFs vêm do
+    manifesto e cada processo lê apenas as partições da sua UF. Caso contrário,
+    os dados são percorridos uma única vez, em lotes, e as linhas de cada UF são
+    gravadas em um arquivo próprio (com a posição de cada linha nos dados
+    completos em COLUNA_POSICAO), de modo que cada processo lê só a sua UF. As
+    linhas sem sigla_uf formam o fragmento VALOR_PARTICAO_AUSENTE.
+    
+    Args:
+        diretorio_entrada (str): Diretório dos dados brutos
+        diretorio_fragmentos (str): Diretório onde os arquivos por UF são gravados
+        tamanho_lote (int): Quantidade de linhas por lote na divisão dos dados
+    
+    Returns:
+        dict: Arquivo de cada fragmento, por UF em ordem alfabética (None se a
+            UF é lida das partições dos dados brutos)
+    """
+    manifesto = carregar_manifesto(os.path.join(diretorio_entrada, 'saeb_aluno_9ano'))
+    if manifesto['particoes'] and 'sigla_uf' in manifesto.get('colunas_particao', []):
+        return dict.fromkeys(sorted({particao['valores']['sigla_uf'] for particao in manifesto['particoes'].values()}))
+    
+    escritores = {}
+    inicio = 0
+    try:
+        for lote in iterar_lotes_dados(diretorio_entrada, 'saeb_aluno_9ano', tamanho_lote):
+            lote = lote.assign(**{COLUNA_POSICAO: np.arange(inicio, inicio + len(lote))})
+            for _, valores, posicoes in grupos_particao(lote, ['sigla_uf']):
+                uf = valores['sigla_uf']
+                if uf not in escritores:
+                    escritores[uf] = abrir_escritor_incremental(
+                        os.path.join(diretorio_fragmentos, f"bruto_{uf}.parquet")
+                    )
+                escritores[uf].escrever(lote.iloc[posicoes])
+            inicio += len(lote)
+    except BaseException:
+        for escritor in escritores.values():
+            escritor.descartar()
+        raise
+    for escritor in escritores.values():
+        escritor.fechar()
+    return {uf: escritores[uf].caminho_arquivo for uf in sorted(escritores)}
+
+def _ler_fragmento(diretorio_entrada, uf, arquivo_fragmento):
+    """
+    Lê as linhas de uma UF dos dados brutos do SAEB.
+    
+    Com os dados particionados por sigla_uf, apenas as partições da UF são
+    lidas; caso contrário, o arquivo da UF gravado por _fragmentos_saeb. O
+    índice de cada linha é a sua posição nos dados completos, na ordem em que
+    carregar_dados os lê.
+    """
+    if arquivo_fragmento is None:
+        df_uf = carregar_dados(diretorio_entrada, 'saeb_aluno_9ano', filtro_particoes={'sigla_uf': [uf]})
+        manifesto = carregar_manifesto(os.path.join(diretorio_entrada, 'saeb_aluno_9ano'))
+        posicoes = []
+        inicio = 0
+        for chave in sorted(manifesto['particoes']):
+            particao = manifesto['particoes'][chave]
+            if particao['valores'].get('sigla_uf') == uf:
+                posicoes.append(np.arange(inicio, inicio + particao['linhas']))
+            inicio += particao['linhas']
+        df_uf.index = np.concatenate(posicoes)
+        return df_uf
+    df_uf = ler_dataframe(arquivo_fragmento)
+    df_uf = df_uf.set_index(COLUNA_POSICAO).rename_axis(None)
+    return aplicar_esquema(df_uf, 'saeb_aluno_9ano')
+
+def _limpar_fragmento(diretorio_entrada, uf, arquivo_fragmento, df_dicionario, caminho_limpo):
+    """
+    Lê, traduz e limpa o fragmento de uma UF (executado em um processo do pool).
+    
+    Os membros dos perfis são gravados ao lado do arquivo limpo
+    (_caminho_membros_perfil), em vez de devolvidos ao processo principal.
+    Todos os membros levam a posição da sua primeira ocorrência nos dados
+    completos (índice dos membros devolvidos e COLUNA_POSICAO dos perfis).
+    
+    Returns:
+        dict: Membros distintos das dimensões tempo, geografia e escola no fragmento
+    """
+    df_uf = _ler_fragmento(diretorio_entrada, uf, arquivo_fragmento)
+    df_limpo = limpar_dados_saeb(aplicar_dicionario(df_uf, df_dicionario))
+    salvar_dataframe(df_limpo, caminho_limpo)
+    for nome_dimensao in PERFIS_QUESTIONARIO:
+        membros = _membros_perfil(df_limpo, nome_dimensao)
+        salvar_dataframe(
+            membros.assign(**{COLUNA_POSICAO: membros.index}), _caminho_membros_perfil(caminho_limpo, nome_dimensao)
+        )
+    return _membros_dimensoes(df_limpo)
+
+def _fato_fragmento(uf, caminho_limpo, fatias, diretorio_particoes, colunas_particao, formato):
+    """
+    Resolve as chaves da tabela fato de uma UF e grava as suas partições
+    diretamente no diretório temporário da tabela fato nacional (executado em
+    um processo do pool).
+    
+    Args:
+        uf (str): UF do fragmento, valor de sigla_uf de todas as partições gravadas
+        caminho_limpo (str): Arquivo com os dados limpos da UF
+        fatias (dict): Linhas das dimensões tempo, geografia e escola referenciadas pela UF
+        diretorio_particoes (str): Diretório temporário da tabela fato nacional
+        colunas_particao (list): Colunas de partição da tabela fato (incluindo sigla_uf)
+        formato (str): Formato dos arquivos da tabela fato
+    
+    Returns:
+        dict: Partições gravadas, como devolvidas por gravar_particoes
+    """
+    df_limpo = ler_dataframe(caminho_limpo)
+    fato = criar_fato_desempenho(df_limpo, fatias['dim_tempo'], fatias['dim_geografia'], fatias['dim_escola'])
+    fato = aplicar_esquema(fato, 'fato_desempenho')
+    valores_particao = particoes_fato(fato, fatias, [col for col in colunas_particao if col != 'sigla_uf'])
+    valores_particao['sigla_uf'] = uf
+    return gravar_particoes(fato, valores_particao, diretorio_particoes, colunas_particao, formato=formato)
+
+@instrumentar
+def transformar_saeb_fragmentado(diretorio_entrada, df_dicionario, df_populacao, diretorio_fato,
+                                 diretorio_fragmentos, processos=None, tamanho_lote=500000,
+                                 formato=FORMATO_PADRAO, colunas_particao=COLUNAS_PARTICAO_FATO):
+    """
+    Transforma os dados do SAEB em fragmentos por UF processados em paralelo.
+    
+    Dados brutos que não estão particionados por sigla_uf são antes divididos
+    em um arquivo por UF, em uma única leitura (ver _fragmentos_saeb); as linhas
+    sem sigla_uf formam um fragmento à parte.
+    
+    A leitura, a tradução, a limpeza e a resolução das chaves da tabela fato de
+    cada UF rodam em um pool de processos, e cada processo grava as partições
+    da sua UF diretamente no diretório temporário da tabela fato nacional; o
+    processo principal apenas incorpora as partições ao manifesto. Apenas a
+    criação das dimensões, que atribui as chaves substitutas nacionais, é feita
+    no processo principal, a partir dos membros distintos de tempo, geografia e
+    escola devolvidos por cada fragmento (os perfis são identificados pelo
+    próprio hash e os seus membros são lidos dos arquivos gravados pelos
+    processos). Cada fragmento recebe somente as linhas das dimensões que os
+    seus membros referenciam, o que mantém as chaves consistentes em todo o
+    país sem enviar as dimensões completas aos processos. Os membros levam a
+    posição da sua primeira ocorrência nos dados completos, de modo que as
+    dimensões e as chaves são as mesmas da transformação em memória.
+    
+    Args:
+        diretorio_entrada (str): Diretório dos dados brutos
+        df_dicionario (pandas.DataFrame): DataFrame com o dicionário
+        df_populacao (pandas.DataFrame): DataFrame com os dados de população do IBGE
+        diretorio_fato (str): Diretório base da tabela fato particionada (ver EscritorParticionado)
+        diretorio_fragmentos (str): Diretório dos arquivos temporários (removido ao final)
+        processos (int, opcional): Quantidade de processos (padrão: número de CPUs)
+        tamanho_lote (int): Quantidade de linhas por lote na divisão dos dados por UF e
+            na leitura dos membros dos perfis
+        formato (str): Formato dos arquivos da tabela fato ('parquet' ou 'csv')
+        colunas_particao (list): Colunas de partição da tabela fato; sigla_uf é sempre
+            incluída, para que cada partição seja gravada por um único processo
+    
+    Returns:
+        dict: Dimensões criadas (DIMENSOES), quantidade de linhas da tabela fato
+            ('linhas_fato') e diretório da versão publicada ('diretorio_fato')
+    """
+    processos = processos or os.cpu_count()
+    if 'sigla_uf' not in colunas_particao:
+        colunas_particao = list(colunas_particao) + ['sigla_uf']
+    os.makedirs(diretorio_fragmentos, exist_ok=True)
+    try:
+        fragmentos = _fragmentos_saeb(diretorio_entrada, diretorio_fragmentos, tamanho_lote)
+        if not fragmentos:
+            raise ValueError("Nenhum dado do SAEB encontrado para transformar")
+        print(f"Transformando {len(fragmentos)} UFs com até {processos} processos...")
+        caminhos_limpos = {uf: os.path.join(diretorio_fragmentos, f"limpo_{uf}.parquet") for uf in fragmentos}
+        
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            # Primeira fase: leitura, tradução e limpeza de cada UF
+            futuros = {
+                uf: executor.submit(
+                    _limpar_fragmento, diretorio_entrada, uf, fragmentos[uf], df_dicionario, caminhos_limpos[uf]
+                )
+                for uf in fragmentos
+            }
+            membros_por_uf = {uf: futuro.result() for uf, futuro in futuros.items()}
+            
+            # Dimensões nacionais, com os membros na ordem da primeira ocorrência nos
+            # dados completos: as chaves são as mesmas da transformação em memória
+            membros = {}
+            _acumular_membros(membros, {
+                nome: pd.concat([membros_por_uf[uf][nome] for uf in fragmentos]).sort_index(kind='stable')
+                for nome in CHAVES_MEMBROS
+            })
+            dimensoes = {
+                'dim_tempo': criar_dimensao_tempo(_membros_acumulados(membros, 'tempo')),
+                'dim_geografia': criar_dimensao_geografia(_membros_acumulados(membros, 'geografia'), df_populacao),
+                'dim_escola': criar_dimensao_escola(_membros_acumulados(membros, 'escola')),
+                **{
+                    nome_dimensao: _dimensao_perfil_dos_membros(
+                        [_caminho_membros_perfil(caminhos_limpos[uf], nome_dimensao) for uf in fragmentos],
+                        nome_dimensao, tamanho_lote, coluna_posicao=COLUNA_POSICAO
+                    )
+                    for nome_dimensao in PERFIS_QUESTIONARIO
+                }
+            }
+            indices = {
+                nome_dimensao: IndiceChaves(dimensoes[nome_dimensao], colunas_chave, coluna_id, nome_dimensao)
+                for coluna_id, (nome_dimensao, colunas_chave) in CHAVES_NATURAIS_FATO.items()
+            }
+            
+            # Segunda fase: tabela fato de cada UF, gravada pelos processos nas
+            # partições da tabela fato nacional
+            with EscritorParticionado(diretorio_fato, colunas_particao, formato=formato) as escritor_fato:
+                futuros = {}
+                for uf in fragmentos:
+                    fatias = {}
+                    for nome_dimensao, indice in indices.items():
+                        posicoes = indice.posicoes(membros_por_uf[uf][nome_dimensao.replace('dim_', '')])
+                        fatias[nome_dimensao] = dimensoes[nome_dimensao].iloc[np.unique(posicoes[posicoes >= 0])]
+                    futuros[uf] = executor.submit(
+                        _fato_fragmento, uf, caminhos_limpos[uf], fatias, escritor_fato.diretorio_temporario,
+                        colunas_particao, formato
+                    )
+                linhas_fato = 0
+                for futuro in futuros.values():
+                    particoes = futuro.result()
+                    escritor_fato.incorporar(particoes)
+                    linhas_fato += sum(particao['linhas'] for particao in particoes.values())
+    finally:
+        shutil.rmtree(diretorio_fragmentos, ignore_errors=True)
+    
+    print(f"Transformação por UF concluída: {linhas_fato} linhas na tabela fato")
+    return dict(dimensoes, linhas_fato=linhas_fato, diretorio_fato=escritor_fato.diretorio_publicado)
+
+def _executar_com_tempo(funcao, *args):
+    """
+    Executa uma função medindo o tempo gasto.
+    
+    Returns:
+        tuple: Resultado da função e tempo decorrido em segundos
+    """
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+def _gravar_tabela(df_tabela, nome_tabela, diretorio_saida, timestamp, formato):
+    """
+    Converte uma tabela para os tipos do registro de esquemas, a grava e a
+    registra no catálogo.
+    
+    Returns:
+        str: Caminho do arquivo gravado
+    """
+    return salvar_dataset(aplicar_esquema(df_tabela, nome_tabela), diretorio_saida, nome_tabela, timestamp, formato)
+
+@instrumentar
+def construir_modelo_paralelo(df_saeb_limpo, df_populacao, diretorio_saida, timestamp,
+                              formato=FORMATO_PADRAO, max_workers=4, colunas_particao=COLUNAS_PARTICAO_FATO):
+    """
+    Cria e grava as dimensões e a tabela fato usando um pool de threads.
+    
+    As dimensões são construídas simultaneamente a partir do mesmo
+    DataFrame limpo, compartilhado entre as threads sem cópia (as funções de
+    criação apenas leem o DataFrame). A gravação de cada dimensão começa assim
+    que ela fica pronta e se sobrepõe à construção das demais e da tabela fato,
+    cujas partições são gravadas em paralelo. A versão da tabela fato só é
+    publicada e registrada no catálogo depois que todas as dimensões foram
+    gravadas, para que nunca aponte para chaves ausentes nas dimensões.
+    
+    Args:
+        df_saeb_limpo (pandas.DataFrame): DataFrame com os dados limpos do SAEB
+        df_populacao (pandas.DataFrame): DataFrame com os dados de população do IBGE
+        diretorio_saida (str): Diretório dos dados processados
+        timestamp (str): Timestamp usado no nome dos arquivos
+        formato (str): Formato dos arquivos gerados ('parquet' ou 'csv')
+        max_workers (int): Quantidade máxima de threads
+        colunas_particao (list): Colunas de partição da tabela fato
+    
+    Returns:
+        dict: Tempos de construção ('construcao') e de gravação ('gravacao') de cada
+            tabela, em segundos, e tempo total ('tempo_total')
+    """
+    print(f"Construindo o modelo dimensional com até {max_workers} threads...")
+    inicio = time.perf_counter()
+    construtores = {
+        'dim_tempo': (criar_dimensao_tempo, df_saeb_limpo),
+        'dim_geografia': (criar_dimensao_geografia, df_saeb_limpo, df_populacao),
+        'dim_escola': (criar_dimensao_escola, df_saeb_limpo),
+        **{
+            nome_dimensao: (criar_dimensao_perfil, df_saeb_limpo, nome_dimensao)
+            for nome_dimensao in PERFIS_QUESTIONARIO
+        }
+    }
+    dimensoes = {}
+    tempos_construcao = {}
+    tempos_gravacao = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {
+            submeter(executor, _executar_com_tempo, *construtor): nome_tabela
+            for nome_tabela, construtor in construtores.items()
+        }
+        gravacoes = {}
+        
+        # Cada dimensão é gravada assim que fica pronta
+        for futuro in as_completed(futuros):
+            nome_tabela = futuros[futuro]
+            dimensoes[nome_tabela], tempos_construcao[nome_tabela] = futuro.result()
+            gravacoes[submeter(
+                executor, _executar_com_tempo, _gravar_tabela, dimensoes[nome_tabela], nome_tabela,
+                diretorio_saida, timestamp, formato
+            )] = nome_tabela
+        
+        # A tabela fato depende de todas as dimensões; é construída enquanto elas são gravadas
+        fato_desempenho, tempos_construcao['fato_desempenho'] = _executar_com_tempo(
+            criar_fato_desempenho, df_saeb_limpo, dimensoes['dim_tempo'], dimensoes['dim_geografia'],
+            dimensoes['dim_escola']
+        )
+        # As partições da tabela fato são gravadas junto com as dimensões, mas a
+        # versão só é publicada e registrada depois que todas as dimensões foram salvas
+        fato_desempenho = aplicar_esquema(fato_desempenho, 'fato_desempenho')
+        escritor_fato = EscritorParticionado(
+            os.path.join(diretorio_saida, f"fato_desempenho_{timestamp}"), colunas_particao, formato=formato,
+            max_workers=max_workers
+        )
+        gravacao_fato = submeter(
+            executor, _executar_com_tempo, escritor_fato.escrever, fato_desempenho,
+            particoes_fato(fato_desempenho, dimensoes, colunas_particao)
+        )
+        try:
+            for futuro in as_completed(gravacoes):
+                _, tempos_gravacao[gravacoes[futuro]] = futuro.result()
+            _, tempos_gravacao['fato_desempenho'] = gravacao_fato.result()
+        except BaseException:
+            gravacao_fato.exception()
+            escritor_fato.descartar()
+            raise
+    
+    inicio_publicacao = time.perf_counter()
+    escritor_fato.confirmar()
+    registro = registrar_fato(diretorio_saida, escritor_fato.diretorio_publicado, df=fato_desempenho)
+    tempos_gravacao['fato_desempenho'] += time.perf_counter() - inicio_publicacao
+    print(f"Tabela fato gravada em {len(registro['particoes'])} partições ({', '.join(colunas_particao)})")
+    
+    tempo_total = time.perf_counter() - inicio
+    
+    # Resumo dos tempos por tabela
+    for nome_tabela in list(construtores) + ['fato_desempenho']:
+        print(f"{nome_tabela}: construção {tempos_construcao[nome_tabela]:.2f}s, "
+              f"gravação {tempos_gravacao[nome_tabela]:.2f}s")
+    soma = sum(tempos_construcao.values()) + sum(tempos_gravacao.values())
+    print(f"Modelo dimensional construído em {tempo_total:.2f}s "
+          f"(soma dos tempos individuais: {soma:.2f}s)")
+    
+    return {
+        'construcao': tempos_construcao,
+        'gravacao': tempos_gravacao,
+        'tempo_total': tempo_total
+    }
+
+@instrumentar
+def transformar_saeb_incremental(diretorio_entrada, diretorio_saida, df_dicionario, df_populacao,
+                                 reprocessar_anos=None, formato=FORMATO_PADRAO, timestamp=None):
+    """
+    Atualiza o modelo dimensional apenas com os anos do SAEB ainda não processados.
+    
+    As dimensões ficam em um ArmazemDimensional: os membros já existentes mantêm
+    as suas chaves substitutas e apenas os membros novos são acrescentados. A
+    tabela fato é particionada por ano e somente as partições dos anos novos
+    (ou reprocessados) são gravadas, de modo que o custo de incluir um ano é
+    proporcional às linhas desse ano. Como nos demais modos, a tabela fato é
+    publicada em uma versão nova e registrada no catálogo (ver registrar_fato).
+    
+    Args:
+        diretorio_entrada (str): Diretório dos dados brutos
+        diretorio_saida (str): Diretório dos dados processados
+        df_dicionario (pandas.DataFrame): DataFrame com o dicionário
+        df_populacao (pandas.DataFrame): DataFrame com os dados de população do IBGE
+        reprocessar_anos (list, opcional): Anos a reprocessar mesmo que já estejam na
+            tabela fato (a partição do ano é substituída)
+        formato (str): Formato dos arquivos gravados ('parquet' ou 'csv')
+        timestamp (str, opcional): Timestamp da execução, usado no nome da versão
+            da tabela fato (padrão: data atual)
+    
+    Returns:
+        dict: Anos processados ('anos'), quantidade de membros novos por dimensão
+            ('membros_novos') e diretório da versão gravada da tabela fato ('diretorio_fato')
+    """
+    print("Transformando dados do SAEB de forma incremental...")
+    timestamp = timestamp or datetime.now().strftime('%Y%m%d')
+    armazem = ArmazemDimensional(diretorio_saida, formato=formato)
+    
+    anos_saeb = carregar_dados(diretorio_entrada, 'saeb_aluno_9ano', colunas=['ano'])['ano']
+    anos_origem = {int(ano) for ano in anos_saeb.unique()}
+    anos_processar = sorted((anos_origem - armazem.anos_fato()) | (anos_origem & set(reprocessar_anos or [])))
+    if not anos_processar:
+        print("Nenhum ano novo para processar")
+        return {'anos': [], 'membros_novos': {}, 'diretorio_fato': armazem.diretorio_fato()}
+    print(f"Anos a processar: {anos_processar}")
+    
+    # Carrega, traduz e limpa apenas os anos a processar
+    df_saeb = carregar_dados(diretorio_entrada, 'saeb_aluno_9ano', filtro_particoes={'ano': anos_processar})
+    df_saeb_limpo = limpar_dados_saeb(aplicar_dicionario(df_saeb, df_dicionario))
+    
+    # Dimensões do lote, integradas às já existentes
+    dimensoes_lote = {
+        'dim_tempo': criar_dimensao_tempo(df_saeb_limpo),
+        'dim_geografia': criar_dimensao_geografia(df_saeb_limpo, df_populacao),
+        'dim_escola': criar_dimensao_escola(df_saeb_limpo),
+        **criar_dimensoes_perfil(df_saeb_limpo)
+    }
+    mapas = {}
+    membros_novos = {}
+    for coluna_id, (nome_dimensao, colunas_chave) in CHAVES_NATURAIS_FATO.items():
+        mapas[nome_dimensao], membros_novos[nome_dimensao] = armazem.integrar_dimensao(
+            nome_dimensao, dimensoes_lote[nome_dimensao], colunas_chave, coluna_id
+        )
+    # Cada perfil é identificado pelo próprio hash: apenas os perfis novos são acrescentados
+    for nome_dimensao, (coluna_chave, _) in PERFIS_QUESTIONARIO.items():
+        _, membros_novos[nome_dimensao] = armazem.integrar_dimensao(
+            nome_dimensao, dimensoes_lote[nome_dimensao], [coluna_chave], coluna_chave
+        )
+    
+    # Tabela fato dos anos processados, gravada uma partição por ano
+    fato_desempenho = criar_fato_desempenho(
+        df_saeb_limpo, mapas['dim_tempo'], mapas['dim_geografia'], mapas['dim_escola']
+    )
+    anos_linhas = df_saeb_limpo['ano'].to_numpy()
+    fatos_anos = {ano: fato_desempenho[anos_linhas == ano].reset_index(drop=True) for ano in anos_processar}
+    diretorio_fato = armazem.gravar_fato(
+        fatos_anos, os.path.join(diretorio_saida, f"fato_desempenho_{timestamp}")
     )
+    for ano, fato_ano in fatos_anos.items():
+        print(f"Partição ano={ano} da tabela fato gravada ({len(fato_ano)} linhas)")
+    # As dimensões já foram integradas: a nova versão da tabela fato é registrada por último
+    registrar_fato(diretorio_saida, diretorio_fato)
     
-    print("Tabela fato de desempenho criada com sucesso!")
-    return fato_desempenho
+    return {'anos': anos_processar, 'membros_novos': membros_novos, 'diretorio_fato': diretorio_fato}
 
-def main():
+@instrumentar_main('transformacao')
+def main(formato=FORMATO_PADRAO, em_lotes=False, tamanho_lote=500000, incremental=False,
+         reprocessar_anos=None, paralelo=False, max_workers=4, fragmentado=False, processos=None,
+         particionar_por_uf=False):
     """
     Função principal para transformar os dados e criar o modelo dimensional.
+    
+    Args:
+        formato (str): Formato dos arquivos gerados ('parquet' ou 'csv')
+        em_lotes (bool): Se True, os dados do SAEB são processados em lotes, com
+            uso de memória limitado pelo tamanho do lote
+        tamanho_lote (int): Quantidade de linhas por lote no modo em lotes
+        incremental (bool): Se True, mantém as dimensões e a tabela fato particionada
+            entre execuções, processando apenas os anos novos
+        reprocessar_anos (list, opcional): No modo incremental, anos a reprocessar
+        paralelo (bool): Se True, constrói e grava as tabelas simultaneamente em threads
+        max_workers (int): Quantidade máxima de threads no modo paralelo
+        fragmentado (bool): Se True, transforma as UFs do SAEB em um pool de processos
+            (a tabela fato é particionada também por sigla_uf)
+        processos (int, opcional): Quantidade de processos no modo fragmentado
+            (padrão: número de CPUs)
+        particionar_por_uf (bool): Se True, a tabela fato é particionada por ano e
+            sigla_uf; caso contrário, apenas por ano
+        instrumentar (bool): Se True, mede cada etapa e grava o relatório de
+            desempenho em JSON no diretório 'relatorios_execucao'
+        perfilar (list, opcional): Etapas (nome da função) com perfil cProfile gravado
+        medir_alocacoes (bool): Se True, mede também o pico de memória com tracemalloc
     """
     # Diretórios para dados
     diretorio_entrada = 'dados_raw'
@@ -349,6 +1352,64 @@ def main():
     
     # Timestamp para identificar a execução
     timestamp = datetime.now().strftime('%Y%m%d')
+    colunas_particao = COLUNAS_PARTICAO_FATO + (['sigla_uf'] if particionar_por_uf else [])
+    
+    # Modo incremental: apenas os anos novos são transformados
+    if incremental:
+        try:
+            df_dicionario = carregar_dados(diretorio_entrada, 'saeb_dicionario')
+            df_populacao = carregar_dados(diretorio_entrada, 'ibge_populacao')
+            transformar_saeb_incremental(
+                diretorio_entrada, diretorio_saida, df_dicionario, df_populacao,
+                reprocessar_anos=reprocessar_anos, formato=formato, timestamp=timestamp
+            )
+        except FileNotFoundError as e:
+            print(f"Erro ao carregar dados: {e}")
+            return
+        
+        ArmazemColunar(diretorio_saida).materializar('fato_desempenho')
+        print("Transformação concluída com sucesso!")
+        print(f"Dimensões e fatos salvos no diretório: {diretorio_saida}")
+        return
+    
+    # Modos em lotes (o SAEB nunca é carregado inteiro em memória) e por UF
+    if em_lotes or fragmentado:
+        try:
+            df_dicionario = carregar_dados(diretorio_entrada, 'saeb_dicionario')
+            df_populacao = carregar_dados(diretorio_entrada, 'ibge_populacao')
+            diretorio_fato = os.path.join(diretorio_saida, f"fato_desempenho_{timestamp}")
+            if fragmentado:
+                resultado = transformar_saeb_fragmentado(
+                    diretorio_entrada, df_dicionario, df_populacao, diretorio_fato,
+                    os.path.join(diretorio_saida, f"_fragmentos_{timestamp}"),
+                    processos=processos, tamanho_lote=tamanho_lote, formato=formato,
+                    colunas_particao=colunas_particao
+                )
+            else:
+                lotes_saeb = iterar_lotes_dados(diretorio_entrada, 'saeb_aluno_9ano', tamanho_lote)
+                resultado = transformar_saeb_em_lotes(
+                    lotes_saeb, df_dicionario, df_populacao, diretorio_fato,
+                    os.path.join(diretorio_saida, f"_saeb_limpo_{timestamp}.tmp.parquet"),
+                    tamanho_lote=tamanho_lote, formato=formato, colunas_particao=colunas_particao
+                )
+        except FileNotFoundError as e:
+            print(f"Erro ao carregar dados: {e}")
+            return
+        
+        # As dimensões são publicadas antes da tabela fato, para que a versão
+        # registrada da fato nunca aponte para chaves ainda ausentes nas dimensões
+        for nome_dimensao in DIMENSOES:
+            salvar_dataset(
+                aplicar_esquema(resultado[nome_dimensao], nome_dimensao),
+                diretorio_saida, nome_dimensao, timestamp, formato
+            )
+        # A tabela fato foi gravada em partes; o esquema vem dos arquivos das partições
+        registrar_fato(diretorio_saida, resultado['diretorio_fato'])
+        
+        ArmazemColunar(diretorio_saida).materializar('fato_desempenho')
+        print("Transformação concluída com sucesso!")
+        print(f"Dimensões e fatos salvos no diretório: {diretorio_saida}")
+        return
     
     # Carregar dados
     try:
@@ -365,22 +1426,43 @@ def main():
     # Limpar dados
     df_saeb_limpo = limpar_dados_saeb(df_saeb_traduzido)
     
+    # Modo paralelo: dimensões construídas e gravadas simultaneamente
+    if paralelo:
+        construir_modelo_paralelo(
+            df_saeb_limpo, df_populacao, diretorio_saida, timestamp, formato=formato, max_workers=max_workers,
+            colunas_particao=colunas_particao
+        )
+        ArmazemColunar(diretorio_saida).materializar('fato_desempenho')
+        print("Transformação concluída com sucesso!")
+        print(f"Dimensões e fatos salvos no diretório: {diretorio_saida}")
+        return
+    
     # Criar dimensões
     dim_tempo = criar_dimensao_tempo(df_saeb_limpo)
     dim_geografia = criar_dimensao_geografia(df_saeb_limpo, df_populacao)
     dim_escola = criar_dimensao_escola(df_saeb_limpo)
-    dim_aluno = criar_dimensao_aluno(df_saeb_limpo)
+    dimensoes_perfil = criar_dimensoes_perfil(df_saeb_limpo)
     
     # Criar tabela fato
-    fato_desempenho = criar_fato_desempenho(df_saeb_limpo, dim_tempo, dim_geografia, dim_escola, dim_aluno)
-    
-    # Salvar dimensões e fatos
-    dim_tempo.to_csv(f"{diretorio_saida}/dim_tempo_{timestamp}.csv", index=False)
-    dim_geografia.to_csv(f"{diretorio_saida}/dim_geografia_{timestamp}.csv", index=False)
-    dim_escola.to_csv(f"{diretorio_saida}/dim_escola_{timestamp}.csv", index=False)
-    dim_aluno.to_csv(f"{diretorio_saida}/dim_aluno_{timestamp}.csv", index=False)
-    fato_desempenho.to_csv(f"{diretorio_saida}/fato_desempenho_{timestamp}.csv", index=False)
+    fato_desempenho = criar_fato_desempenho(df_saeb_limpo, dim_tempo, dim_geografia, dim_escola)
+    
+    # Salvar dimensões e fatos com os tipos compactos do registro de esquemas,
+    # registrando cada tabela no catálogo dos dados processados
+    dimensoes = {
+        'dim_tempo': dim_tempo,
+        'dim_geografia': dim_geografia,
+        'dim_escola': dim_escola,
+        **dimensoes_perfil
+    }
+    for nome_tabela, df_tabela in dimensoes.items():
+        salvar_dataset(aplicar_esquema(df_tabela, nome_tabela), diretorio_saida, nome_tabela, timestamp, formato)
+    gravar_fato_particionado(
+        fato_desempenho, dimensoes, diretorio_saida, timestamp, formato=formato,
+        colunas_particao=colunas_particao, max_workers=max_workers
+    )
     
+    # Cópia binária da tabela fato, aberta sem cópia pela análise
+    ArmazemColunar(diretorio_saida).materializar('fato_desempenho')
     print("Transformação concluída com sucesso!")
     print(f"Dimensões e fatos salvos no diretório: {diretorio_saida}")
 
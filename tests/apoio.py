@@ -0,0 +1,104 @@
+"""
+Fontes falsas e utilitários compartilhados pelos testes.
+"""
+import os
+import shutil
+from contextlib import contextmanager
+import pandas as pd
+
+import transform_data
+from analyze_data import carregar_dados_processados
+from fontes import FonteDados
+
+class FontePaginada(FonteDados):
+    """
+    Fonte falsa que devolve um DataFrame em memória, página a página.
+    """
+    
+    def __init__(self, df):
+        self.df = df
+    
+    def consultar(self, query):
+        return self.df.copy()
+    
+    def consultar_paginado(self, query, tamanho_pagina):
+        for inicio in range(0, len(self.df), tamanho_pagina):
+            yield self.df.iloc[inicio:inicio + tamanho_pagina].reset_index(drop=True)
+    
+    def listar_colunas(self, tabela):
+        return list(self.df.columns)
+
+class ClienteBigQueryFalso:
+    """
+    Cliente falso com a parte da API do BigQuery usada por FonteBigQuery.
+    """
+    
+    def __init__(self, df):
+        self.fonte = FontePaginada(df)
+    
+    def query(self, query):
+        return self
+    
+    def to_dataframe(self):
+        return self.fonte.consultar(None)
+    
+    def result(self, page_size):
+        self._tamanho_pagina = page_size
+        return self
+    
+    def to_dataframe_iterable(self):
+        return self.fonte.consultar_paginado(None, self._tamanho_pagina)
+
+@contextmanager
+def no_diretorio(diretorio):
+    anterior = os.getcwd()
+    os.chdir(diretorio)
+    try:
+        yield
+    finally:
+        os.chdir(anterior)
+
+def transformar(dados_brutos, nome, **opcoes):
+    """
+    Executa a transformação em um diretório próprio e devolve o diretório dos dados processados.
+    """
+    diretorio = dados_brutos.parent / nome
+    shutil.copytree(dados_brutos, diretorio / 'dados_raw')
+    with no_diretorio(diretorio):
+        transform_data.main(**opcoes)
+    return str(diretorio / 'dados_processados')
+
+def carregar_tabelas(diretorio):
+    """
+    Carrega as dimensões e a tabela fato de um diretório de dados processados.
+    """
+    return {
+        nome: carregar_dados_processados(diretorio, nome)
+        for nome in transform_data.DIMENSOES + ['fato_desempenho']
+    }
+
+def comparar_tabelas(tabelas, esperadas):
+    """
+    Compara as tabelas com as da transformação completa.
+    """
+    for nome_dimensao in transform_data.DIMENSOES:
+        esperada = esperadas[nome_dimensao]
+        pd.testing.assert_frame_equal(tabelas[nome_dimensao][esperada.columns], esperada, obj=nome_dimensao)
+    
+    # As partições podem ter outra ordem (ex.: por UF no modo fragmentado)
+    esperado = esperadas['fato_desempenho']
+    fato = tabelas['fato_desempenho'][esperado.columns]
+    assert len(fato) == len(esperado)
+    pd.testing.assert_frame_equal(
+        fato.sort_values('id_aluno', ignore_index=True), esperado.sort_values('id_aluno', ignore_index=True)
+    )
+
+def linhas_alunos(tabelas):
+    """
+    Tabela fato unida aos atributos das dimensões usados nos níveis do cubo.
+    """
+    return tabelas['fato_desempenho'] \
+        .merge(tabelas['dim_tempo'][['id_tempo', 'ano']], on='id_tempo', how='left') \
+        .merge(tabelas['dim_geografia'][['id_geografia', 'id_regiao', 'sigla_uf']], on='id_geografia', how='left') \
+        .merge(tabelas['dim_escola'][['id_dim_escola', 'id_dependencia_adm', 'id_localizacao']],
+               on='id_dim_escola', how='left')
@@ -0,0 +1,31 @@
+import os
+import sys
+
+# Os módulos do projeto ficam em src/ e importam uns aos outros pelo nome
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import pytest
+
+from dados_sinteticos import salvar_dados_sinteticos
+
+from apoio import carregar_tabelas, transformar
+
+# Alunos dos dados sintéticos usados pelos testes de transformação e análise
+N_ALUNOS = 6000
+
+@pytest.fixture(scope='session')
+def dados_brutos(tmp_path_factory):
+    """
+    Dados brutos sintéticos, gravados uma vez e copiados por cada transformação.
+    """
+    diretorio = tmp_path_factory.mktemp('brutos')
+    salvar_dados_sinteticos(str(diretorio / 'dados_raw'), N_ALUNOS, timestamp='20260101', tamanho_lote=N_ALUNOS // 3)
+    return diretorio / 'dados_raw'
+
+@pytest.fixture(scope='session')
+def saida_completa(dados_brutos):
+    return transformar(dados_brutos, 'completo')
+
+@pytest.fixture(scope='session')
+def tabelas_completas(saida_completa):
+    return carregar_tabelas(saida_completa)
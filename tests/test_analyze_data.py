@@ -0,0 +1,78 @@
+"""
+Testes das funções de análise: argumentos nomeados, contexto compartilhado e agrupamento das linhas.
+"""
+import inspect
+import pandas as pd
+import pytest
+
+import transform_data
+from analyze_data import (
+    COLUNAS_FATO_ANALISE, analisar_desempenho_apoio_familiar, analisar_desempenho_e_pretensao_futura,
+    analisar_desempenho_por_regiao
+)
+from benchmark import funcoes_analise
+from contexto_analise import ContextoAnalise
+
+from apoio import linhas_alunos
+
+@pytest.fixture(scope='module')
+def tabelas_analise(tabelas_completas):
+    return dict(tabelas_completas, fato_desempenho=tabelas_completas['fato_desempenho'][COLUNAS_FATO_ANALISE])
+
+@pytest.mark.parametrize('nome', [nome for nome, _ in funcoes_analise()])
+def test_analise_nomeada_igual_ao_contexto_compartilhado(tabelas_analise, nome):
+    funcao = dict(funcoes_analise())[nome]
+    parametros = list(inspect.signature(funcao).parameters)
+    assert parametros[0] == 'fato_desempenho'
+    
+    # Chamada com a tabela fato e as dimensões pelo nome, como fazem os chamadores externos
+    resultado = funcao(**{parametro: tabelas_analise[parametro] for parametro in parametros})
+    
+    # Chamada com o contexto compartilhado pelas análises de analyze_data.main
+    dimensoes = {nome_tabela: tabela for nome_tabela, tabela in tabelas_analise.items()
+                 if nome_tabela != 'fato_desempenho'}
+    contexto = ContextoAnalise(tabelas_analise['fato_desempenho'], **dimensoes)
+    compartilhado = funcao(contexto, *[tabelas_analise[parametro] for parametro in parametros[1:]])
+    
+    if resultado is None:
+        assert compartilhado is None
+    else:
+        pd.testing.assert_frame_equal(resultado, compartilhado)
+
+def test_analise_por_regiao_igual_ao_agrupamento_das_linhas(tabelas_completas):
+    resultado = analisar_desempenho_por_regiao(
+        tabelas_completas['fato_desempenho'], tabelas_completas['dim_geografia'], tabelas_completas['dim_tempo']
+    )
+    
+    esperado = linhas_alunos(tabelas_completas).groupby(['id_regiao', 'ano'])['proficiencia_media'].agg(
+        proficiencia_media='mean', quantidade_alunos='count'
+    ).reset_index()
+    pd.testing.assert_frame_equal(
+        resultado[esperado.columns].reset_index(drop=True), esperado, check_dtype=False, rtol=1e-5
+    )
+
+@pytest.mark.parametrize('funcao, nome_dimensao, coluna_resposta', [
+    (analisar_desempenho_apoio_familiar, 'dim_perfil_familiar', 'tx_resp_q003_desc'),
+    (analisar_desempenho_e_pretensao_futura, 'dim_perfil_pretensao', 'tx_resp_q024_desc')
+])
+def test_analise_por_perfil_igual_ao_agrupamento_dos_alunos(tabelas_completas, funcao, nome_dimensao,
+                                                           coluna_resposta):
+    resultado = funcao(tabelas_completas['fato_desempenho'], tabelas_completas[nome_dimensao],
+                       tabelas_completas['dim_tempo'])
+    if 'tipo_apoio' in resultado:
+        resultado = resultado[resultado['tipo_apoio'] == coluna_resposta]
+    
+    # Médias por perfil ponderadas pela quantidade de alunos = médias calculadas aluno a aluno
+    coluna_chave = transform_data.PERFIS_QUESTIONARIO[nome_dimensao][0]
+    alunos = tabelas_completas['fato_desempenho'] \
+        .merge(tabelas_completas[nome_dimensao], on=coluna_chave, how='left') \
+        .merge(tabelas_completas['dim_tempo'][['id_tempo', 'ano']], on='id_tempo', how='left')
+    esperado = alunos.groupby([coluna_resposta, 'ano'], observed=True)['proficiencia_media'].agg(
+        proficiencia_media='mean', quantidade_alunos='count'
+    ).reset_index()
+    esperado = esperado[esperado['quantidade_alunos'] > 0].reset_index(drop=True)
+    colunas = [coluna_resposta, 'ano', 'proficiencia_media', 'quantidade_alunos']
+    pd.testing.assert_frame_equal(
+        resultado[colunas].reset_index(drop=True), esperado[colunas], check_dtype=False, check_categorical=False,
+        rtol=1e-5
+    )
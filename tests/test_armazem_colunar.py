@@ -0,0 +1,68 @@
+"""
+Testes do armazém colunar: leitura igual à do dataset, intervalos por partição e atualização.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+import transform_data
+from analyze_data import carregar_dados_processados, evolucao_desempenho_particionada
+from armazem_colunar import ArmazemColunar
+from armazem_dimensional import ArmazemDimensional
+
+def _fato(primeiro_aluno, niveis, quantidade=5):
+    return pd.DataFrame({
+        'id_tempo': [1] * quantidade,
+        # Alunos sem identificador: coluna inteira anulável, gravada com máscara
+        'id_aluno': pd.array([primeiro_aluno + i if i != 2 else None for i in range(quantidade)], dtype='Int64'),
+        'proficiencia_media': np.linspace(200, 300, quantidade),
+        # Categorias diferentes em cada partição, reunidas no armazém
+        'nivel_desempenho': pd.Categorical([niveis[i % len(niveis)] for i in range(quantidade)])
+    })
+
+def _publicar_fato(diretorio, fatos_anos, timestamp):
+    armazem = ArmazemDimensional(str(diretorio))
+    diretorio_fato = armazem.gravar_fato(fatos_anos, str(diretorio / f"fato_desempenho_{timestamp}"))
+    transform_data.registrar_fato(str(diretorio), diretorio_fato)
+    return diretorio_fato
+
+def test_armazem_igual_ao_dataset(tmp_path):
+    diretorio_fato = _publicar_fato(tmp_path, {2019: _fato(0, ['b', 'a']), 2021: _fato(10, ['c'])}, '20260101')
+    armazem = ArmazemColunar(str(tmp_path))
+    armazem.materializar('fato_desempenho')
+    
+    esperado = carregar_dados_processados(str(tmp_path), 'fato_desempenho')
+    df = armazem.abrir('fato_desempenho')
+    pd.testing.assert_frame_equal(df, esperado, check_categorical=False)
+    assert df['id_aluno'].isna().sum() == 2
+    
+    # Cada partição corresponde a um intervalo de linhas do armazém
+    intervalos = armazem.intervalos('fato_desempenho')
+    inicio, fim = intervalos[os.path.abspath(os.path.join(diretorio_fato, 'ano=2021', 'dados.parquet'))]
+    particao = armazem.abrir('fato_desempenho', colunas=['id_aluno', 'nivel_desempenho'], linhas=(inicio, fim))
+    assert (inicio, fim) == (5, 10)
+    assert particao['id_aluno'].tolist() == [10, 11, pd.NA, 13, 14]
+    assert set(particao['nivel_desempenho']) == {'c'}
+
+def test_armazem_regravado_com_nova_versao(tmp_path):
+    _publicar_fato(tmp_path, {2019: _fato(0, ['a'])}, '20260101')
+    armazem = ArmazemColunar(str(tmp_path))
+    assert not armazem.atualizado('fato_desempenho')
+    assert len(armazem.carregar('fato_desempenho')) == 5
+    assert armazem.atualizado('fato_desempenho')
+    
+    # Uma nova versão da tabela fato torna o armazém desatualizado até ser regravado
+    _publicar_fato(tmp_path, {2021: _fato(10, ['b'])}, '20260102')
+    assert not armazem.atualizado('fato_desempenho')
+    assert len(armazem.carregar('fato_desempenho')) == 10
+    assert armazem.atualizado('fato_desempenho')
+
+def test_evolucao_particionada_lida_do_armazem(tmp_path):
+    _publicar_fato(tmp_path, {2019: _fato(0, ['a']), 2021: _fato(10, ['b'])}, '20260101')
+    dim_tempo = pd.DataFrame({'id_tempo': [1], 'ano': [2019]})
+    
+    # Sem armazém gravado, a evolução o grava antes de ler as partições
+    evolucao = evolucao_desempenho_particionada(str(tmp_path), dim_tempo, processos=1)
+    assert ArmazemColunar(str(tmp_path)).atualizado('fato_desempenho')
+    assert evolucao['quantidade_alunos'].tolist() == [10]
+    assert evolucao['proficiencia_media'].tolist() == [250.0]
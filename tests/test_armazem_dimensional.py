@@ -0,0 +1,70 @@
+"""
+Testes do armazém incremental: chaves estáveis entre execuções e versões da tabela fato.
+"""
+import os
+import pandas as pd
+
+import transform_data
+from armazem_dimensional import ArmazemDimensional
+from catalogo import CatalogoDatasets
+
+from apoio import carregar_tabelas, comparar_tabelas, no_diretorio, transformar
+
+def _dim_escola(ids_escola):
+    return pd.DataFrame({
+        'id_dim_escola': range(1, len(ids_escola) + 1),
+        'id_escola': ids_escola,
+        'id_municipio': [100] * len(ids_escola),
+        'id_dependencia_adm': [2] * len(ids_escola),
+        'id_localizacao': [1] * len(ids_escola)
+    })
+
+def test_chaves_estaveis_entre_anos(tmp_path):
+    armazem = ArmazemDimensional(str(tmp_path))
+    colunas_chave = ['id_escola', 'id_municipio', 'id_dependencia_adm', 'id_localizacao']
+    
+    # Primeiro ano: as chaves seguem a ordem do lote
+    mapa, novos = armazem.integrar_dimensao('dim_escola', _dim_escola([30, 10, 20]), colunas_chave,
+                                            'id_dim_escola')
+    assert novos == 3
+    assert dict(zip(mapa['id_escola'], mapa['id_dim_escola'])) == {30: 1, 10: 2, 20: 3}
+    
+    # Segundo ano, com escolas repetidas em outra ordem e duas escolas novas
+    mapa, novos = armazem.integrar_dimensao('dim_escola', _dim_escola([40, 20, 30, 50]), colunas_chave,
+                                            'id_dim_escola')
+    assert novos == 2
+    assert dict(zip(mapa['id_escola'], mapa['id_dim_escola'])) == {30: 1, 10: 2, 20: 3, 40: 4, 50: 5}
+    assert armazem.carregar('dim_escola')['id_dim_escola'].tolist() == [1, 2, 3, 4, 5]
+
+def test_fato_incremental_publicada_em_versoes(tmp_path):
+    armazem = ArmazemDimensional(str(tmp_path))
+    fato = pd.DataFrame({'id_aluno': [1, 2, 3], 'proficiencia_media': [250.0, 260.0, 270.0]})
+    
+    primeira = armazem.gravar_fato({2019: fato, 2021: fato}, str(tmp_path / 'fato_desempenho_20260101'))
+    transform_data.registrar_fato(str(tmp_path), primeira)
+    segunda = armazem.gravar_fato({2023: fato}, str(tmp_path / 'fato_desempenho_20260102'))
+    
+    # A versão nova só é lida depois de registrada; a anterior não é alterada
+    assert armazem.diretorio_fato() == primeira
+    assert armazem.anos_fato() == {2019, 2021}
+    transform_data.registrar_fato(str(tmp_path), segunda)
+    assert armazem.diretorio_fato() == segunda
+    assert armazem.anos_fato() == {2019, 2021, 2023}
+    assert sorted(os.listdir(primeira)) == ['_manifesto.json', 'ano=2019', 'ano=2021']
+    
+    # As partições mantidas são os mesmos arquivos da versão anterior
+    for particao in ['ano=2019', 'ano=2021']:
+        assert os.path.samefile(os.path.join(primeira, particao, 'dados.parquet'),
+                                os.path.join(segunda, particao, 'dados.parquet'))
+    assert CatalogoDatasets(str(tmp_path)).resolver('fato_desempenho')['linhas'] == 9
+
+def test_transformacao_incremental_igual_a_completa(dados_brutos, tabelas_completas):
+    saida = transformar(dados_brutos, 'incremental', incremental=True)
+    comparar_tabelas(carregar_tabelas(saida), tabelas_completas)
+    diretorio_fato = CatalogoDatasets(saida).resolver('fato_desempenho')['caminho']
+    
+    # Reprocessar um ano publica uma versão nova com as mesmas chaves
+    with no_diretorio(os.path.dirname(saida)):
+        transform_data.main(incremental=True, reprocessar_anos=[2021])
+    assert CatalogoDatasets(saida).resolver('fato_desempenho')['caminho'] != diretorio_fato
+    comparar_tabelas(carregar_tabelas(saida), tabelas_completas)
@@ -0,0 +1,99 @@
+"""
+Testes das camadas em Parquet e CSV: tipos preservados, projeção de colunas e leitura em lotes.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from armazenamento import (
+    EscritorParticionado, carregar_manifesto, encontrar_arquivo_mais_recente, identificar_formato, ler_dataframe,
+    ler_dataframe_em_lotes, nome_arquivo, salvar_dataframe, tamanho_leitura
+)
+
+@pytest.fixture
+def df():
+    quantidade = 1000
+    return pd.DataFrame({
+        'id_aluno': np.arange(quantidade, dtype='int64'),
+        'id_tempo': np.ones(quantidade, dtype='int16'),
+        'proficiencia_media': np.linspace(100, 400, quantidade, dtype='float32'),
+        'sigla_uf': pd.Categorical(np.resize(['BA', 'MG', 'SP'], quantidade)),
+        'id_escola': pd.array(np.where(np.arange(quantidade) % 7 == 0, None, np.arange(quantidade)), dtype='Int64')
+    })
+
+def test_parquet_preserva_os_tipos(tmp_path, df):
+    caminho = nome_arquivo(str(tmp_path), 'fato', '20260101')
+    assert caminho.endswith('fato_20260101.parquet')
+    assert salvar_dataframe(df, caminho) == os.path.getsize(caminho)
+    pd.testing.assert_frame_equal(ler_dataframe(caminho), df)
+
+def test_csv_continua_disponivel_para_exportacao(tmp_path, df):
+    caminho = nome_arquivo(str(tmp_path), 'fato', formato='csv')
+    salvar_dataframe(df, caminho)
+    
+    # O CSV não guarda os tipos: os valores voltam com os tipos inferidos na leitura
+    lido = ler_dataframe(caminho)
+    assert list(lido.columns) == list(df.columns)
+    assert lido['sigla_uf'].tolist() == df['sigla_uf'].tolist()
+    assert lido['id_escola'].isna().sum() == df['id_escola'].isna().sum()
+
+def test_projecao_de_colunas_na_leitura(tmp_path, df):
+    caminho = nome_arquivo(str(tmp_path), 'fato')
+    salvar_dataframe(df, caminho)
+    
+    lido = ler_dataframe(caminho, colunas=['id_tempo', 'proficiencia_media'])
+    pd.testing.assert_frame_equal(lido, df[['id_tempo', 'proficiencia_media']])
+    # Apenas os blocos das colunas pedidas são lidos do Parquet
+    assert 0 < tamanho_leitura(caminho, ['id_tempo']) < tamanho_leitura(caminho)
+
+@pytest.mark.parametrize('formato', ['parquet', 'csv'])
+def test_leitura_em_lotes(tmp_path, df, formato):
+    caminho = nome_arquivo(str(tmp_path), 'fato', formato=formato)
+    salvar_dataframe(df, caminho)
+    
+    lotes = list(ler_dataframe_em_lotes(caminho, 300, colunas=['id_aluno', 'sigla_uf']))
+    assert [len(lote) for lote in lotes] == [300, 300, 300, 100]
+    lido = pd.concat(lotes, ignore_index=True)
+    assert lido['id_aluno'].tolist() == df['id_aluno'].tolist()
+    assert lido['sigla_uf'].astype(str).tolist() == df['sigla_uf'].astype(str).tolist()
+
+def test_arquivo_mais_recente_prefere_parquet(tmp_path, df):
+    for timestamp, formato in [('20260101', 'parquet'), ('20260102', 'csv'), ('20260102', 'parquet')]:
+        salvar_dataframe(df, nome_arquivo(str(tmp_path), 'fato', timestamp, formato))
+    assert encontrar_arquivo_mais_recente(str(tmp_path), 'fato') == str(tmp_path / 'fato_20260102.parquet')
+    
+    with pytest.raises(FileNotFoundError):
+        encontrar_arquivo_mais_recente(str(tmp_path), 'dim_tempo')
+    with pytest.raises(ValueError):
+        identificar_formato('fato.txt')
+
+def test_dataset_particionado_publicado_em_diretorio_novo(tmp_path, df):
+    diretorio_dataset = str(tmp_path / 'fato')
+    valores = pd.DataFrame({'ano': np.resize([2019, 2021], len(df))})
+    with EscritorParticionado(diretorio_dataset, ['ano']) as escritor:
+        escritor.escrever(df.iloc[:500], valores.iloc[:500])
+        escritor.escrever(df.iloc[500:].reset_index(drop=True), valores.iloc[500:].reset_index(drop=True))
+        # Nada é visível fora do diretório temporário antes da confirmação
+        assert os.listdir(tmp_path) == [os.path.basename(escritor.diretorio_temporario)]
+    
+    assert os.listdir(tmp_path) == [os.path.basename(escritor.diretorio_publicado)]
+    assert escritor.diretorio_publicado == f"{diretorio_dataset}.{escritor.versao}"
+    manifesto = carregar_manifesto(escritor.diretorio_publicado)
+    assert {chave: particao['linhas'] for chave, particao in manifesto['particoes'].items()} == \
+        {'ano=2019': 500, 'ano=2021': 500}
+    lido = ler_dataframe(os.path.join(escritor.diretorio_publicado, 'ano=2021', 'dados.parquet'))
+    pd.testing.assert_frame_equal(lido, df.iloc[1::2].reset_index(drop=True))
+    
+    # Uma nova gravação do mesmo dataset não altera a versão publicada
+    with EscritorParticionado(diretorio_dataset, ['ano']) as outro:
+        outro.escrever(df.iloc[:10], valores.iloc[:10])
+    assert outro.diretorio_publicado != escritor.diretorio_publicado
+    assert carregar_manifesto(escritor.diretorio_publicado) == manifesto
+
+def test_gravacao_particionada_descartada_apos_falha(tmp_path, df):
+    with pytest.raises(RuntimeError):
+        with EscritorParticionado(str(tmp_path / 'fato'), ['ano']) as escritor:
+            escritor.escrever(df, pd.DataFrame({'ano': np.full(len(df), 2019)}))
+            raise RuntimeError('Falha na gravação')
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,88 @@
+"""
+Testes do cache de consultas e do seu uso pela extração.
+"""
+import os
+import pandas as pd
+import pytest
+
+from cache_consultas import CacheConsultas, chave_cache, normalizar_query
+from extract_data import extrair_dados_bigquery
+
+from apoio import FontePaginada
+
+def _gravar_resultado(diretorio, nome, tamanho):
+    caminho = os.path.join(diretorio, nome)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(b'x' * tamanho)
+    return caminho
+
+def test_normalizacao_ignora_formatacao_mas_nao_os_literais():
+    assert normalizar_query("SELECT  a -- comentário\n  FROM t /* bloco */ ") == "SELECT a FROM t"
+    assert chave_cache("SELECT a\nFROM t") == chave_cache("SELECT a FROM t -- outro comentário")
+    # '--' e espaços dentro de aspas fazem parte da query
+    assert normalizar_query("SELECT * FROM t WHERE b = 'x -- y'") == "SELECT * FROM t WHERE b = 'x -- y'"
+    assert chave_cache("SELECT * FROM t WHERE b = 'x -- y'") != chave_cache("SELECT * FROM t WHERE b = 'x'")
+    assert chave_cache("SELECT 'a  b'") != chave_cache("SELECT 'a b'")
+
+def test_cache_acerto_falha_e_invalidacao(tmp_path):
+    cache = CacheConsultas(str(tmp_path / 'cache'))
+    resultado = _gravar_resultado(str(tmp_path), 'resultado.parquet', 100)
+    
+    assert cache.obter('SELECT 1', {'fonte': 'a'}) is None
+    entrada = cache.armazenar('SELECT 1', resultado, {'fonte': 'a'}, linhas=1)
+    assert cache.obter('SELECT  1 -- mesma query', {'fonte': 'a'})['checksum'] == entrada['checksum']
+    # Parâmetros diferentes (ex.: outra fonte) são outra entrada
+    assert cache.obter('SELECT 1', {'fonte': 'b'}) is None
+    
+    assert cache.invalidar('SELECT 1', {'fonte': 'a'}) == 1
+    assert cache.obter('SELECT 1', {'fonte': 'a'}) is None
+    assert not os.path.exists(entrada['caminho'])
+
+def test_cache_remove_entradas_expiradas(tmp_path):
+    cache = CacheConsultas(str(tmp_path / 'cache'), ttl_segundos=-1)
+    cache.armazenar('SELECT 1', _gravar_resultado(str(tmp_path), 'resultado.parquet', 100))
+    assert cache.obter('SELECT 1') is None
+    assert cache.listar() == {}
+
+def test_cache_remove_as_entradas_menos_usadas(tmp_path):
+    cache = CacheConsultas(str(tmp_path / 'cache'), tamanho_maximo_bytes=250)
+    for query in ['SELECT 1', 'SELECT 2']:
+        cache.armazenar(query, _gravar_resultado(str(tmp_path), 'resultado.parquet', 100))
+    # O acesso a 'SELECT 1' torna 'SELECT 2' a entrada menos usada recentemente
+    assert cache.obter('SELECT 1') is not None
+    cache.armazenar('SELECT 3', _gravar_resultado(str(tmp_path), 'resultado.parquet', 100))
+    
+    assert cache.obter('SELECT 2') is None
+    assert cache.obter('SELECT 1') is not None
+    assert cache.obter('SELECT 3') is not None
+
+def test_cache_nao_guarda_resultado_maior_que_o_limite(tmp_path):
+    cache = CacheConsultas(str(tmp_path / 'cache'), tamanho_maximo_bytes=250)
+    cache.armazenar('SELECT 1', _gravar_resultado(str(tmp_path), 'resultado.parquet', 100))
+    assert cache.armazenar('SELECT 2', _gravar_resultado(str(tmp_path), 'grande.parquet', 300)) is None
+    
+    # A entrada existente é mantida e nenhuma cópia do arquivo grande fica no cache
+    assert cache.obter('SELECT 1') is not None
+    assert sorted(os.listdir(tmp_path / 'cache')) == sorted(['_indice.json', cache.obter('SELECT 1')['arquivo']])
+
+@pytest.mark.parametrize('formato', ['parquet', 'csv'])
+def test_extracao_devolve_dataframe_com_e_sem_cache(tmp_path, formato):
+    df = pd.DataFrame({'ano': [2019, 2021, 2023], 'sigla_uf': ['SP', 'RJ', 'MG']})
+    cache = CacheConsultas(str(tmp_path / 'cache'))
+    arquivo = str(tmp_path / f"dados.{formato}")
+    
+    primeira = extrair_dados_bigquery('SELECT * FROM t', arquivo, fonte=FontePaginada(df), cache=cache)
+    os.remove(arquivo)
+    segunda = extrair_dados_bigquery('SELECT * FROM t', arquivo, fonte=FontePaginada(df.iloc[:0]), cache=cache)
+    
+    assert primeira.attrs['cache'] is False
+    assert segunda.attrs['cache'] is True
+    assert segunda.attrs['checksum'] == primeira.attrs['checksum']
+    pd.testing.assert_frame_equal(segunda, primeira)
+    
+    # O esquema aplicado faz parte da chave: o resultado sem esquema não é reaproveitado
+    com_esquema = extrair_dados_bigquery('SELECT * FROM t', arquivo, fonte=FontePaginada(df), cache=cache,
+                                         esquema='saeb_aluno_9ano')
+    assert com_esquema.attrs['cache'] is False
+    assert str(com_esquema['ano'].dtype) == 'int16'
+    assert len(cache.listar()) == 2
@@ -0,0 +1,103 @@
+"""
+Testes do catálogo de datasets: versão atual, resolução por nome e verificação sem ler os dados.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import transform_data
+from armazenamento import EscritorParticionado, nome_arquivo, salvar_dataframe
+from catalogo import VERSAO_PARTICIONADA, CatalogoDatasets, resolver_dataset, salvar_dataset
+
+def _dim_tempo(anos):
+    return pd.DataFrame({'id_tempo': range(1, len(anos) + 1), 'ano': anos})
+
+def test_versao_atual_e_a_ultima_registrada(tmp_path):
+    diretorio = str(tmp_path)
+    salvar_dataset(_dim_tempo([2019, 2021]), diretorio, 'dim_tempo', '20260102')
+    # Versão registrada depois, mesmo com um nome que seria ordenado antes
+    salvar_dataset(_dim_tempo([2019, 2021, 2023]), diretorio, 'dim_tempo', '20260101')
+    catalogo = CatalogoDatasets(diretorio)
+    
+    atual = catalogo.resolver('dim_tempo')
+    assert atual['versao'] == '20260101' and atual['linhas'] == 3
+    assert atual['caminho'] == nome_arquivo(diretorio, 'dim_tempo', '20260101')
+    assert catalogo.resolver('dim_tempo', versao='20260102')['linhas'] == 2
+    assert [registro['versao'] for registro in catalogo.versoes('dim_tempo')] == ['20260102', '20260101']
+    assert catalogo.listar()['dim_tempo']['versao'] == '20260101'
+    
+    # Outra instância (ou processo) vê a versão publicada depois da sua primeira leitura
+    salvar_dataset(_dim_tempo([2019]), diretorio, 'dim_tempo', '20260103')
+    assert catalogo.resolver('dim_tempo')['versao'] == '20260103'
+
+def test_resolucao_verifica_colunas_versoes_e_arquivos(tmp_path):
+    diretorio = str(tmp_path)
+    caminho = salvar_dataset(_dim_tempo([2019, 2021]), diretorio, 'dim_tempo', '20260101')
+    
+    registro = resolver_dataset(diretorio, 'dim_tempo', colunas=['ano'])
+    assert registro['tipo'] == 'arquivo' and registro['caminho'] == caminho
+    assert registro['esquema'] == {'id_tempo': 'int64', 'ano': 'int64'}
+    # Tipos gravados diferentes dos declarados no registro de esquemas
+    assert registro['divergencias']['ano'] == {'registrado': 'int64', 'declarado': 'int16'}
+    
+    with pytest.raises(ValueError, match='Colunas ausentes'):
+        resolver_dataset(diretorio, 'dim_tempo', colunas=['descricao'])
+    with pytest.raises(FileNotFoundError):
+        resolver_dataset(diretorio, 'dim_tempo', versao='20250101')
+    with pytest.raises(FileNotFoundError):
+        resolver_dataset(diretorio, 'dim_geografia')
+    
+    # Arquivo alterado fora do catálogo: o checksum não confere
+    salvar_dataframe(_dim_tempo([2023, 2021]), caminho)
+    CatalogoDatasets(diretorio).verificar('dim_tempo')
+    with pytest.raises(ValueError, match='Checksum'):
+        CatalogoDatasets(diretorio).verificar('dim_tempo', verificar_checksum=True)
+    
+    # Arquivo removido: a versão registrada não é mais resolvida
+    os.remove(caminho)
+    with pytest.raises(FileNotFoundError, match='não encontrado'):
+        resolver_dataset(diretorio, 'dim_tempo')
+
+def _publicar_fato(diretorio, timestamp, anos):
+    fato = pd.DataFrame({'id_aluno': np.arange(len(anos)), 'proficiencia_media': np.full(len(anos), 250.0)})
+    with EscritorParticionado(os.path.join(diretorio, f"fato_desempenho_{timestamp}"), ['ano']) as escritor:
+        escritor.escrever(fato, pd.DataFrame({'ano': anos}))
+    transform_data.registrar_fato(diretorio, escritor.diretorio_publicado)
+    return escritor.diretorio_publicado
+
+def test_versoes_substituidas_removidas_uma_publicacao_depois(tmp_path):
+    diretorio = str(tmp_path)
+    catalogo = CatalogoDatasets(diretorio)
+    # Versão mantida de forma incremental, anterior às versões publicadas por execução
+    with EscritorParticionado(str(tmp_path / 'fato_incremental'), ['ano']) as escritor:
+        escritor.escrever(pd.DataFrame({'id_aluno': [1]}), pd.DataFrame({'ano': [2019]}))
+    catalogo.registrar_particionado('fato_desempenho', diretorio_dataset=escritor.diretorio_publicado)
+    incremental = escritor.diretorio_publicado
+    
+    primeira = _publicar_fato(diretorio, '20260101', [2019, 2021])
+    segunda = _publicar_fato(diretorio, '20260102', [2019, 2021, 2023])
+    # A versão recém-substituída continua no disco para quem já a resolveu
+    assert os.path.isdir(primeira) and os.path.isdir(segunda)
+    registro = resolver_dataset(diretorio, 'fato_desempenho', colunas=['id_aluno'])
+    assert registro['caminho'] == segunda and registro['linhas'] == 3
+    
+    terceira = _publicar_fato(diretorio, '20260103', [2023])
+    assert not os.path.exists(primeira)
+    assert os.path.isdir(segunda) and os.path.isdir(terceira) and os.path.isdir(incremental)
+    versoes = {registro['versao']: registro for registro in catalogo.versoes('fato_desempenho')}
+    assert versoes[os.path.basename(primeira).removeprefix('fato_desempenho_')].get('removido_em')
+    assert not versoes[VERSAO_PARTICIONADA].get('removido_em')
+    assert catalogo.resolver('fato_desempenho')['caminho'] == terceira
+    # Uma remoção repetida não altera nada
+    assert catalogo.remover_versoes_substituidas('fato_desempenho') == []
+
+def test_diretorio_sem_catalogo_resolvido_pelo_nome_dos_arquivos(tmp_path):
+    diretorio = str(tmp_path)
+    for versao in ['20260101', '20260102']:
+        salvar_dataframe(_dim_tempo([2019]), nome_arquivo(diretorio, 'dim_tempo', versao))
+    
+    registro = resolver_dataset(diretorio, 'dim_tempo')
+    assert registro == {'nome': 'dim_tempo', 'tipo': 'arquivo',
+                        'caminho': nome_arquivo(diretorio, 'dim_tempo', '20260102')}
+    assert not os.path.exists(tmp_path / '_catalogo.json')
@@ -0,0 +1,76 @@
+"""
+Testes do índice de chaves substitutas, comparado com o merge do pandas.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from chaves import IndiceChaves
+
+def _ids_por_merge(dados, dimensao, colunas_chave, coluna_id):
+    """
+    Chave substituta de cada linha obtida com um merge à esquerda, como na versão anterior.
+    """
+    return dados[colunas_chave].merge(dimensao[colunas_chave + [coluna_id]], on=colunas_chave, how='left')[coluna_id]
+
+@pytest.mark.parametrize('municipios', [
+    np.array([3550308, 3550309, 3550311, 3550310]),
+    # Chaves esparsas: índice de hash em vez do endereçamento direto
+    np.array([10, 5_000_000, 2_927_408, 999_999_999])
+], ids=['compactas', 'esparsas'])
+def test_chave_simples_igual_ao_merge(municipios):
+    dimensao = pd.DataFrame({'id_geografia': np.arange(1, 5, dtype='int32'), 'id_municipio': municipios})
+    gerador = np.random.default_rng(0)
+    # Linhas com chaves existentes, uma chave inexistente e um valor ausente
+    dados = pd.DataFrame({'id_municipio': pd.array(
+        list(gerador.choice(municipios, 50)) + [municipios.max() + 1, None], dtype='Int64'
+    )})
+    
+    indice = IndiceChaves(dimensao, ['id_municipio'], 'id_geografia', 'dim_geografia')
+    resolvidas = pd.Series(indice.resolver(dados), dtype='Int64')
+    esperadas = _ids_por_merge(dados.astype('float64'), dimensao.astype({'id_municipio': 'float64'}),
+                               ['id_municipio'], 'id_geografia')
+    assert resolvidas.tolist() == esperadas.astype('Int64').tolist()
+    assert resolvidas.isna().sum() == 2
+
+def test_chave_composta_igual_ao_merge():
+    dimensao = pd.DataFrame({
+        'id_dim_escola': [1, 2, 3],
+        'id_escola': [100, 100, 200],
+        'id_dependencia_adm': [2, 3, 2],
+        'id_localizacao': [1, 1, 2]
+    })
+    dados = pd.DataFrame({
+        'id_escola': [200, 100, 100, 100, 300],
+        'id_dependencia_adm': [2, 3, 2, 4, 2],
+        'id_localizacao': [2, 1, 1, 1, 1],
+        'proficiencia_media': [250.0, 260.0, 270.0, 280.0, 290.0]
+    })
+    colunas_chave = ['id_escola', 'id_dependencia_adm', 'id_localizacao']
+    
+    resolvidas = pd.Series(IndiceChaves(dimensao, colunas_chave, 'id_dim_escola').resolver(dados), dtype='Int64')
+    assert resolvidas.tolist() == _ids_por_merge(dados, dimensao, colunas_chave, 'id_dim_escola') \
+        .astype('Int64').tolist()
+    assert resolvidas.tolist() == [3, 2, 1, pd.NA, pd.NA]
+
+def test_todas_as_chaves_encontradas_sem_tipo_anulavel():
+    dimensao = pd.DataFrame({'id_tempo': [1, 2, 3], 'ano': [2019, 2021, 2023]})
+    resolvidas = IndiceChaves(dimensao, ['ano'], 'id_tempo').resolver(pd.DataFrame({'ano': [2023, 2019, 2023]}))
+    assert isinstance(resolvidas, np.ndarray)
+    assert resolvidas.tolist() == [3, 1, 3]
+
+@pytest.mark.parametrize('dimensao, colunas_chave', [
+    (pd.DataFrame({'id': [1, 2, 3], 'chave': [10, 20, 10]}), ['chave']),
+    (pd.DataFrame({'id': [1, 2, 3], 'chave': [10, 20, 10 ** 12]}).iloc[[0, 1, 2, 0]], ['chave']),
+    (pd.DataFrame({'id': [1, 2, 3], 'chave': ['a', 'b', 'a']}), ['chave']),
+    (pd.DataFrame({'id': [1, 2, 3], 'chave': [1, 1, 1], 'outra': [1, 2, 1]}), ['chave', 'outra'])
+], ids=['direto', 'hash', 'texto', 'composta'])
+def test_chave_natural_repetida_rejeitada(dimensao, colunas_chave):
+    # Uma chave repetida duplicaria as linhas da tabela fato em um merge
+    with pytest.raises(ValueError, match='repetida em dim_escola'):
+        IndiceChaves(dimensao, colunas_chave, 'id', 'dim_escola')
+
+def test_dimensao_vazia():
+    dimensao = pd.DataFrame({'id': pd.Series([], dtype='int64'), 'chave': pd.Series([], dtype='int64')})
+    resolvidas = IndiceChaves(dimensao, ['chave'], 'id').resolver(pd.DataFrame({'chave': [1, 2]}))
+    assert pd.Series(resolvidas).isna().all()
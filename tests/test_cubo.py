@@ -0,0 +1,23 @@
+"""
+Testes do cubo de agregados, comparado com o agrupamento das linhas dos dados sintéticos.
+"""
+import pandas as pd
+import pytest
+
+from contexto_analise import ContextoAnalise
+from cubo import CuboDesempenho
+
+from apoio import linhas_alunos
+
+@pytest.mark.parametrize('niveis', [
+    ['ano'], ['id_regiao', 'ano'], ['sigla_uf', 'ano'], ['id_dependencia_adm', 'id_localizacao', 'ano']
+])
+def test_cubo_igual_ao_agrupamento_das_linhas(tabelas_completas, niveis):
+    dimensoes = {nome: tabelas_completas[nome] for nome in ['dim_tempo', 'dim_geografia', 'dim_escola']}
+    cubo = CuboDesempenho.construir(ContextoAnalise(tabelas_completas['fato_desempenho'], **dimensoes))
+    resumo = cubo.resumir(niveis)
+    
+    esperado = linhas_alunos(tabelas_completas).groupby(niveis)['proficiencia_media'].agg(
+        media='mean', desvio_padrao='std', quantidade='count', minimo='min', maximo='max'
+    ).reset_index()
+    pd.testing.assert_frame_equal(resumo, esperado, check_dtype=False, rtol=1e-5)
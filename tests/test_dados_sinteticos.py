@@ -0,0 +1,69 @@
+"""
+Testes do gerador de dados sintéticos e do benchmark por escala.
+"""
+import pandas as pd
+
+from benchmark import carregar_resultados, comparar_benchmarks, executar_benchmark, funcoes_analise
+from dados_sinteticos import (
+    ALUNOS_POR_ESCOLA, EFEITO_ANO, UFS, gerar_dados_sinteticos, gerar_lotes_saeb, salvar_dados_sinteticos
+)
+from esquemas import validar_esquema
+from transform_data import carregar_dados
+
+N_ALUNOS = 12000
+
+def test_dados_reprodutiveis_e_com_cardinalidades_realistas():
+    dados = gerar_dados_sinteticos(N_ALUNOS)
+    saeb = dados['saeb_aluno_9ano']
+    for nome, df in gerar_dados_sinteticos(N_ALUNOS).items():
+        pd.testing.assert_frame_equal(df, dados[nome])
+    assert not gerar_dados_sinteticos(N_ALUNOS, semente=1)['saeb_aluno_9ano'].equals(saeb)
+    
+    assert len(saeb) == N_ALUNOS and saeb['id_aluno'].is_unique
+    assert set(saeb['ano']) == set(EFEITO_ANO)
+    # Escolas com cerca de ALUNOS_POR_ESCOLA alunos por edição, em vários municípios e UFs
+    escolas = saeb['id_escola'].nunique()
+    assert abs(escolas - N_ALUNOS / len(EFEITO_ANO) / ALUNOS_POR_ESCOLA) <= 2
+    assert saeb['id_municipio'].nunique() <= escolas
+    assert saeb['sigla_uf'].nunique() > 10
+    assert set(saeb['sigla_uf'].dropna()) <= set(UFS)
+    
+    # Todos os municípios do SAEB têm população em todos os anos
+    populacao = dados['ibge_populacao']
+    assert populacao['id_municipio'].nunique() == sum(quantidade for _, quantidade in UFS.values())
+    pares = saeb[['ano', 'id_municipio']].drop_duplicates().merge(populacao, on=['ano', 'id_municipio'], how='left')
+    assert pares['populacao'].notna().all()
+    
+    # Todas as respostas do questionário têm tradução no dicionário
+    dicionario = dados['saeb_dicionario']
+    for coluna in [coluna for coluna in saeb.columns if coluna.startswith('tx_resp_q')]:
+        chaves = set(dicionario.loc[dicionario['variavel'] == coluna, 'chave'])
+        assert set(saeb[coluna].dropna().astype(str)) <= chaves, coluna
+    
+    for nome, df in dados.items():
+        assert validar_esquema(df, nome) == {}, nome
+
+def test_dados_gravados_em_lotes_iguais_aos_gerados(tmp_path):
+    salvar_dados_sinteticos(str(tmp_path), N_ALUNOS, timestamp='20260101', tamanho_lote=5000)
+    lotes = list(gerar_lotes_saeb(N_ALUNOS, tamanho_lote=5000))
+    assert [len(lote) for lote in lotes] == [5000, 5000, 2000]
+    pd.testing.assert_frame_equal(carregar_dados(str(tmp_path), 'saeb_aluno_9ano'),
+                                  pd.concat(lotes, ignore_index=True), check_categorical=False)
+    pd.testing.assert_frame_equal(carregar_dados(str(tmp_path), 'ibge_populacao'),
+                                  gerar_dados_sinteticos(N_ALUNOS)['ibge_populacao'], check_categorical=False)
+
+def test_benchmark_grava_e_compara_execucoes(tmp_path):
+    caminhos = [executar_benchmark(escalas=[2000], repeticoes=1, diretorio=str(tmp_path / f"execucao_{i}"))
+                for i in range(2)]
+    resultados = carregar_resultados(caminhos[0])
+    
+    # Todas as etapas da transformação e todas as análises são medidas, sem erros
+    etapas = set(resultados['etapa'])
+    assert {'aplicar_dicionario', 'limpar_dados_saeb', 'criar_dimensao_tempo', 'criar_fato_desempenho'} <= etapas
+    assert {nome for nome, _ in funcoes_analise()} <= etapas
+    assert 'erro' not in resultados.columns or resultados['erro'].isna().all()
+    assert (resultados['tempo_min'] > 0).all()
+    
+    comparacao = comparar_benchmarks(*caminhos)
+    assert len(comparacao) == len(resultados)
+    assert comparacao['razao'].notna().all()
@@ -0,0 +1,56 @@
+"""
+Testes das médias das escolas, comparadas com o agrupamento das linhas dos dados sintéticos.
+"""
+import pandas as pd
+import pytest
+
+from contexto_analise import ContextoAnalise
+from escolas import DesempenhoEscolas, escolas_do_contexto
+
+@pytest.fixture(scope='module')
+def contexto(tabelas_completas):
+    dimensoes = {nome: tabelas_completas[nome] for nome in ['dim_tempo', 'dim_geografia', 'dim_escola']}
+    return ContextoAnalise(tabelas_completas['fato_desempenho'], **dimensoes)
+
+def _escolas_abaixo_media(tabelas, niveis):
+    """
+    Escolas abaixo da média nacional calculadas com groupby, no grão (ano, município, escola).
+    """
+    alunos = tabelas['fato_desempenho'] \
+        .merge(tabelas['dim_tempo'][['id_tempo', 'ano']], on='id_tempo', how='left') \
+        .merge(tabelas['dim_geografia'][['id_geografia', 'sigla_uf', 'id_municipio']], on='id_geografia',
+               how='left') \
+        .dropna(subset=['ano', 'proficiencia_media'])
+    media_nacional = alunos.groupby('ano')['proficiencia_media'].mean()
+    
+    escolas = alunos.dropna(subset=['id_geografia', 'id_dim_escola']) \
+        .groupby(['ano', 'id_geografia', 'id_dim_escola'], observed=True) \
+        .agg(**{nivel: (nivel, 'first') for nivel in niveis}, media=('proficiencia_media', 'mean'),
+             soma=('proficiencia_media', 'sum'), quantidade_alunos=('proficiencia_media', 'count')) \
+        .reset_index()
+    escolas['abaixo_media'] = escolas['media'] < escolas['ano'].map(media_nacional)
+    
+    esperado = escolas.dropna(subset=niveis).groupby(['ano'] + niveis, observed=True).agg(
+        qtd_total=('id_dim_escola', 'size'), qtd_abaixo_media=('abaixo_media', 'sum'),
+        soma=('soma', 'sum'), quantidade_alunos=('quantidade_alunos', 'sum')
+    ).reset_index()
+    esperado['percentual_abaixo_media'] = (esperado['qtd_abaixo_media'] / esperado['qtd_total'] * 100).round(2)
+    esperado['proficiencia_media'] = esperado['soma'] / esperado['quantidade_alunos']
+    esperado['media_nacional'] = esperado['ano'].map(media_nacional)
+    return esperado[niveis + ['ano', 'qtd_total', 'qtd_abaixo_media', 'percentual_abaixo_media',
+                              'proficiencia_media', 'media_nacional']]
+
+@pytest.mark.parametrize('niveis', [['sigla_uf'], ['sigla_uf', 'id_municipio']])
+def test_escolas_abaixo_media_iguais_ao_agrupamento(tabelas_completas, contexto, niveis):
+    resultado = DesempenhoEscolas.construir(contexto).abaixo_media(niveis)
+    esperado = _escolas_abaixo_media(tabelas_completas, niveis)
+    # Há escolas abaixo e acima da média nacional
+    assert 0 < esperado['qtd_abaixo_media'].sum() < esperado['qtd_total'].sum()
+    pd.testing.assert_frame_equal(resultado, esperado, check_dtype=False, check_categorical=False, rtol=1e-5)
+
+def test_escolas_calculadas_uma_vez_por_contexto(contexto):
+    escolas = escolas_do_contexto(contexto)
+    assert escolas_do_contexto(contexto) is escolas
+    assert escolas_do_contexto(contexto, 'proficiencia_mt') is not escolas
+    # Cada escola de cada ano aparece uma única vez
+    assert not escolas.escolas.duplicated(['codigo_ano', 'posicao_geografia', 'id_dim_escola']).any()
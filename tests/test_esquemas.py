@@ -0,0 +1,58 @@
+"""
+Testes do registro de esquemas: tipos compactos, tipos anuláveis e violações reportadas.
+"""
+import numpy as np
+import pandas as pd
+
+from esquemas import aplicar_esquema, tipo_declarado, validar_esquema
+
+def test_tipos_declarados_e_padroes():
+    assert tipo_declarado('dim_geografia', 'id_regiao') == 'int8'
+    assert tipo_declarado('fato_desempenho', 'proficiencia_mt') == 'float32'
+    assert tipo_declarado('saeb_aluno_9ano', 'tx_resp_q024') == 'category'
+    assert tipo_declarado('dim_geografia', 'outra') is None
+    assert tipo_declarado('inexistente', 'id_regiao') is None
+
+def test_esquema_aplicado_com_tipos_compactos():
+    df = pd.DataFrame({
+        'id_regiao': np.array([1, 2, 5], dtype='int64'),
+        'sigla_uf': ['BA', 'SP', 'SP'],
+        'id_municipio': ['2927408', '3550308', None],
+        'populacao': np.array([2900000, 12300000, 12300000], dtype='int64'),
+        'coluna_extra': np.array([1, 2, 3], dtype='int64')
+    })
+    convertido = aplicar_esquema(df, 'dim_geografia')
+    
+    assert convertido['id_regiao'].dtype == 'int8'
+    assert isinstance(convertido['sigla_uf'].dtype, pd.CategoricalDtype)
+    # Texto numérico com valor ausente: tipo inteiro anulável equivalente
+    assert convertido['id_municipio'].dtype == 'Int32'
+    assert convertido['id_municipio'].tolist() == [2927408, 3550308, pd.NA]
+    assert convertido['populacao'].dtype == 'int32'
+    # Colunas inteiras não declaradas são reduzidas ao menor tipo que comporta os valores
+    assert convertido['coluna_extra'].dtype == 'int8'
+    assert convertido.attrs['violacoes_esquema'] == {}
+    assert convertido.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+    # O DataFrame original não é alterado
+    assert df['id_regiao'].dtype == 'int64'
+
+def test_violacoes_reportadas_sem_converter():
+    df = pd.DataFrame({
+        'id_regiao': [1, 2, 300],
+        'id_municipio': ['2927408', 'desconhecido', '3550308'],
+        'populacao': [1.5, 2.0, 3.0]
+    })
+    convertido = aplicar_esquema(df, 'dim_geografia')
+    
+    violacoes = convertido.attrs['violacoes_esquema']
+    assert set(violacoes) == {'id_regiao', 'id_municipio', 'populacao'}
+    assert 'fora da faixa' in violacoes['id_regiao']
+    assert 'não numéricos' in violacoes['id_municipio']
+    assert 'fracionários' in violacoes['populacao']
+    # As colunas que violam o esquema mantêm o tipo original
+    pd.testing.assert_frame_equal(convertido, df)
+    assert validar_esquema(df, 'dim_geografia') == violacoes
+
+def test_dataset_sem_esquema_nao_e_alterado():
+    df = pd.DataFrame({'valor': np.array([1, 2], dtype='int64')})
+    assert aplicar_esquema(df, 'inexistente') is df
@@ -0,0 +1,43 @@
+"""
+Testes das estatísticas combináveis e da evolução calculada a partir das partições.
+"""
+import numpy as np
+import pandas as pd
+
+from analyze_data import analisar_evolucao_desempenho, evolucao_desempenho_particionada
+from estatisticas import EstatisticasAgregaveis
+
+def test_estatisticas_combinadas_iguais_ao_calculo_unico():
+    gerador = np.random.default_rng(0)
+    quantidade = 20000
+    valores = pd.Series(gerador.normal(250, 50, quantidade))
+    valores[gerador.random(quantidade) < 0.05] = np.nan
+    grupos = pd.DataFrame({'ano': gerador.choice([2019, 2021, 2023], quantidade),
+                           'sigla_uf': gerador.choice(['BA', 'MG', 'SP'], quantidade)})
+    unico = EstatisticasAgregaveis.calcular(valores, grupos)
+    
+    # Partes de tamanhos diferentes, como partições ou processos
+    partes = np.array_split(gerador.permutation(quantidade), [1000, 7000, 15000])
+    parciais = [EstatisticasAgregaveis.calcular(valores.iloc[parte], grupos.iloc[parte]) for parte in partes]
+    pd.testing.assert_frame_equal(EstatisticasAgregaveis.combinar(parciais).tabela, unico.tabela, rtol=1e-9)
+    
+    # Atualização incremental, parte a parte
+    atualizado = parciais[0]
+    for parte in partes[1:]:
+        atualizado = atualizado.atualizar(valores.iloc[parte], grupos.iloc[parte])
+    pd.testing.assert_frame_equal(atualizado.tabela, unico.tabela, rtol=1e-9)
+    
+    # Roll-up para um nível mais grosso e comparação com o pandas
+    resumo = unico.rolar(['ano']).resumo()
+    esperado = valores.groupby(grupos['ano']).agg(
+        media='mean', desvio_padrao='std', quantidade='count', minimo='min', maximo='max'
+    ).reset_index()
+    pd.testing.assert_frame_equal(resumo, esperado, check_dtype=False, rtol=1e-9)
+
+def test_evolucao_particionada_igual_a_analise_completa(saida_completa, tabelas_completas):
+    esperado = analisar_evolucao_desempenho(tabelas_completas['fato_desempenho'], tabelas_completas['dim_tempo'])
+    
+    # A segunda execução reaproveita as estatísticas parciais gravadas na primeira
+    for _ in range(2):
+        evolucao = evolucao_desempenho_particionada(saida_completa, tabelas_completas['dim_tempo'], processos=2)
+        pd.testing.assert_frame_equal(evolucao, esperado, check_dtype=False, rtol=1e-5)
@@ -0,0 +1,163 @@
+"""
+Testes da extração: gravação página a página e publicação do arquivo final.
+"""
+import os
+import subprocess
+import sys
+import time
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from armazenamento import carregar_manifesto
+from catalogo import CatalogoDatasets
+from dados_sinteticos import TABELAS_FONTE, gerar_dados_sinteticos, popular_fonte_sqlite
+from esquemas import aplicar_esquema
+import extract_data
+from extract_data import extrair_dados_bigquery_streaming, extrair_dados_concorrente, extrair_dados_incremental
+from fontes import FonteBigQuery, FonteSQLite
+
+from apoio import ClienteBigQueryFalso, FontePaginada
+
+N_ALUNOS = 3000
+TAMANHO_PAGINA = 1000
+
+class FonteInterrompida(FontePaginada):
+    """
+    Fonte que falha depois de devolver a primeira página.
+    """
+    
+    def consultar_paginado(self, query, tamanho_pagina):
+        yield self.df.iloc[:tamanho_pagina].reset_index(drop=True)
+        raise ConnectionError("Conexão perdida")
+
+class FonteLenta(FontePaginada):
+    """
+    Fonte em que cada consulta demora; as consultas a uma tabela inexistente falham.
+    """
+    
+    def consultar(self, query):
+        time.sleep(0.3)
+        if 'inexistente' in query:
+            raise ValueError("Tabela inexistente")
+        return super().consultar(query)
+
+@pytest.fixture(scope='module')
+def saeb():
+    return gerar_dados_sinteticos(N_ALUNOS)['saeb_aluno_9ano']
+
+@pytest.mark.parametrize('formato', ['parquet', 'csv'])
+@pytest.mark.parametrize('criar_fonte', [FontePaginada, lambda df: FonteBigQuery(cliente=ClienteBigQueryFalso(df))],
+                         ids=['fonte', 'cliente'])
+def test_extracao_streaming_grava_pagina_a_pagina(tmp_path, saeb, formato, criar_fonte):
+    arquivo = str(tmp_path / f"saeb_aluno_9ano.{formato}")
+    resumo = extrair_dados_bigquery_streaming(
+        'SELECT * FROM saeb', arquivo, tamanho_pagina=TAMANHO_PAGINA, fonte=criar_fonte(saeb),
+        esquema='saeb_aluno_9ano'
+    )
+    
+    linhas_paginas = [TAMANHO_PAGINA] * (len(saeb) // TAMANHO_PAGINA)
+    if len(saeb) % TAMANHO_PAGINA:
+        linhas_paginas.append(len(saeb) % TAMANHO_PAGINA)
+    assert resumo['linhas'] == len(saeb)
+    assert resumo['colunas'] == saeb.shape[1]
+    assert [pagina['pagina'] for pagina in resumo['paginas']] == list(range(1, len(linhas_paginas) + 1))
+    assert [pagina['linhas'] for pagina in resumo['paginas']] == linhas_paginas
+    assert all(pagina['bytes'] > 0 for pagina in resumo['paginas'])
+    assert resumo['bytes'] == os.path.getsize(arquivo)
+    
+    if formato == 'parquet':
+        # Cada página é um row group; o rodapé fica fora das páginas
+        metadados = pq.ParquetFile(arquivo).metadata
+        assert [metadados.row_group(i).num_rows for i in range(metadados.num_row_groups)] == linhas_paginas
+        assert sum(pagina['bytes'] for pagina in resumo['paginas']) < resumo['bytes']
+        pd.testing.assert_frame_equal(pd.read_parquet(arquivo), aplicar_esquema(saeb, 'saeb_aluno_9ano'))
+    else:
+        assert sum(pagina['bytes'] for pagina in resumo['paginas']) == resumo['bytes']
+        assert len(pd.read_csv(arquivo)) == len(saeb)
+
+@pytest.mark.parametrize('formato', ['parquet', 'csv'])
+@pytest.mark.parametrize('local', [True, False], ids=['sqlite', 'sem_paginas'])
+def test_extracao_streaming_sem_linhas_grava_as_colunas(tmp_path, saeb, formato, local):
+    if local:
+        fonte = FonteSQLite(str(tmp_path / 'fonte.db'))
+        fonte.carregar_tabela('saeb', saeb)
+    else:
+        # Fonte que não devolve nenhuma página: as colunas vêm de uma consulta sem linhas
+        fonte = FontePaginada(saeb.iloc[:0])
+    arquivo = str(tmp_path / f"saeb_aluno_9ano.{formato}")
+    resumo = extrair_dados_bigquery_streaming(
+        'SELECT * FROM saeb WHERE 1 = 0', arquivo, tamanho_pagina=TAMANHO_PAGINA, fonte=fonte
+    )
+    
+    assert resumo['linhas'] == 0
+    assert resumo['colunas'] == saeb.shape[1]
+    assert resumo['bytes'] == os.path.getsize(arquivo) > 0
+    df = pd.read_parquet(arquivo) if formato == 'parquet' else pd.read_csv(arquivo)
+    assert df.empty
+    assert list(df.columns) == list(saeb.columns)
+
+@pytest.mark.parametrize('formato', ['parquet', 'csv'])
+def test_extracao_streaming_interrompida_nao_publica_o_arquivo(tmp_path, saeb, formato):
+    arquivo = tmp_path / f"saeb_aluno_9ano.{formato}"
+    arquivo.write_text('versão anterior')
+    with pytest.raises(ConnectionError):
+        extrair_dados_bigquery_streaming(
+            'SELECT * FROM saeb', str(arquivo), tamanho_pagina=TAMANHO_PAGINA, fonte=FonteInterrompida(saeb)
+        )
+    
+    # O arquivo anterior continua intacto e o temporário é removido
+    assert arquivo.read_text() == 'versão anterior'
+    assert os.listdir(tmp_path) == [arquivo.name]
+
+def test_extracao_incremental_reaproveita_e_invalida_particoes(tmp_path):
+    fonte = popular_fonte_sqlite(str(tmp_path / 'fonte.db'), N_ALUNOS)
+    diretorio_dados = str(tmp_path / 'dados_raw')
+    tabela = TABELAS_FONTE['saeb_aluno_9ano']
+    
+    primeira = extrair_dados_incremental('saeb_aluno_9ano', tabela, diretorio_dados, ['ano'], fonte=fonte)
+    assert primeira['ignoradas'] == []
+    manifesto = carregar_manifesto(os.path.join(diretorio_dados, 'saeb_aluno_9ano'))
+    assert sorted(manifesto['particoes']) == sorted(primeira['extraidas'])
+    assert sum(registro['linhas'] for registro in manifesto['particoes'].values()) == \
+        len(fonte.consultar(f"SELECT id_aluno FROM `{tabela}`"))
+    
+    # Uma nova execução só extrai as partições invalidadas
+    ano = manifesto['particoes'][primeira['extraidas'][0]]['valores']['ano']
+    segunda = extrair_dados_incremental(
+        'saeb_aluno_9ano', tabela, diretorio_dados, ['ano'], fonte=fonte, invalidar=[{'ano': ano}]
+    )
+    assert segunda['extraidas'] == [f"ano={ano}"]
+    assert sorted(segunda['ignoradas']) == sorted(primeira['extraidas'][1:])
+
+def test_extracao_nao_importa_a_transformacao():
+    # A seleção das colunas do SAEB vem de esquemas.py, sem carregar transform_data
+    assert extract_data.colunas_utilizadas_saeb(['ano', 'id_aluno', 'proficiencia_mt', 'outra']) == \
+        ['ano', 'id_aluno', 'proficiencia_mt']
+    codigo = "import sys, extract_data; print('transform_data' in sys.modules)"
+    resultado = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(extract_data.__file__))
+    assert resultado.stdout.strip() == 'False'
+
+def test_extracao_concorrente_continua_apos_falha(tmp_path, saeb):
+    queries = {f"consulta_{i}": f"SELECT * FROM tabela_{i}" for i in range(3)}
+    queries['consulta_falha'] = "SELECT * FROM tabela_inexistente"
+    resultado = extrair_dados_concorrente(
+        queries, str(tmp_path), '20260101', max_workers=4, fonte=FonteLenta(saeb.iloc[:100])
+    )
+    
+    assert sorted(resultado['sucessos']) == ['consulta_0', 'consulta_1', 'consulta_2']
+    assert list(resultado['falhas']) == ['consulta_falha']
+    assert 'inexistente' in resultado['falhas']['consulta_falha']
+    assert sorted(resultado['tempos']) == sorted(queries)
+    
+    # As consultas são simultâneas: o tempo total fica perto do da consulta mais lenta
+    assert resultado['tempo_total'] < sum(resultado['tempos'].values()) / 2
+    
+    # Apenas as consultas bem-sucedidas são gravadas e registradas no catálogo
+    catalogo = CatalogoDatasets(str(tmp_path))
+    for nome_query in resultado['sucessos']:
+        assert catalogo.resolver(nome_query)['linhas'] == 100
+        assert os.path.exists(tmp_path / f"{nome_query}_20260101.parquet")
+    assert not catalogo.contem('consulta_falha')
+    assert not os.path.exists(tmp_path / 'consulta_falha_20260101.parquet')
@@ -0,0 +1,58 @@
+"""
+Testes da renderização dos gráficos: gráficos sem alterações ignorados e redesenhados quando mudam.
+"""
+import os
+import pandas as pd
+import pytest
+
+from graficos import renderizar_graficos
+
+def desenhar(dados, diretorio_saida, dpi=100):
+    """
+    Grava os dados em um arquivo de texto e anota o gráfico desenhado.
+    """
+    nome = dados['nome'].iloc[0]
+    with open(os.path.join(diretorio_saida, 'desenhados.txt'), 'a') as arquivo:
+        arquivo.write(f"{nome}\n")
+    caminho = os.path.join(diretorio_saida, f"{nome}.txt")
+    dados.assign(dpi=dpi).to_csv(caminho, index=False)
+    return caminho
+
+def desenhar_com_falha(dados, diretorio_saida, dpi=100):
+    raise RuntimeError('Falha ao desenhar')
+
+def _graficos(**valores):
+    return {nome: (desenhar, pd.DataFrame({'nome': [nome], 'valor': [valor]})) for nome, valor in valores.items()}
+
+def _renderizar(diretorio, graficos, processos=1, **parametros):
+    """
+    Renderiza os gráficos e devolve os nomes dos que foram desenhados.
+    """
+    desenhados = diretorio / 'desenhados.txt'
+    desenhados.unlink(missing_ok=True)
+    caminhos = renderizar_graficos(graficos, str(diretorio), parametros, processos=processos)
+    assert set(caminhos) == {nome for nome, (_, dados) in graficos.items() if dados is not None}
+    return sorted(desenhados.read_text().split()) if desenhados.exists() else []
+
+@pytest.mark.parametrize('processos', [1, 2])
+def test_graficos_sem_alteracoes_ignorados(tmp_path, processos):
+    assert _renderizar(tmp_path, _graficos(a=1, b=2), processos) == ['a', 'b']
+    assert _renderizar(tmp_path, _graficos(a=1, b=2), processos) == []
+    
+    # Dados alterados: apenas o gráfico correspondente é redesenhado
+    assert _renderizar(tmp_path, _graficos(a=1, b=3), processos) == ['b']
+    # Parâmetros de renderização alterados: todos são redesenhados
+    assert _renderizar(tmp_path, _graficos(a=1, b=3), processos, dpi=300) == ['a', 'b']
+    assert pd.read_csv(tmp_path / 'a.txt')['dpi'].tolist() == [300]
+    # Arquivo removido: o gráfico é desenhado de novo
+    os.remove(tmp_path / 'a.txt')
+    assert _renderizar(tmp_path, _graficos(a=1, b=3), processos, dpi=300) == ['a']
+
+def test_graficos_sem_dados_e_falhas(tmp_path):
+    graficos = dict(_graficos(a=1), b=(desenhar, None), c=(desenhar_com_falha, pd.DataFrame({'nome': ['c']})))
+    with pytest.raises(RuntimeError):
+        _renderizar(tmp_path, graficos)
+    
+    # Os gráficos gravados antes da falha continuam no cache
+    del graficos['c']
+    assert _renderizar(tmp_path, graficos) == []
@@ -0,0 +1,73 @@
+"""
+Testes da instrumentação: relatório das etapas, etapas em threads e tempo de CPU.
+"""
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentacao import execucao_instrumentada, instrumentar, registrar_bytes, submeter
+
+from apoio import transformar
+
+@instrumentar
+def _gravar(quantidade):
+    registrar_bytes(gravados=quantidade)
+    return {'linhas': quantidade}
+
+@instrumentar
+def _esperar(segundos):
+    time.sleep(segundos)
+
+@instrumentar
+def _ocupar(segundos):
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        pass
+
+@instrumentar
+def _etapa_externa():
+    _gravar(10)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futuros = [submeter(executor, _gravar, 100), submeter(executor, _esperar, 0.3)]
+        _ocupar(0.3)
+        for futuro in futuros:
+            futuro.result()
+
+def _carregar_relatorio(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def test_relatorio_com_etapas_em_threads(tmp_path):
+    with execucao_instrumentada('teste', diretorio=str(tmp_path)):
+        _etapa_externa()
+    relatorio = _carregar_relatorio(glob.glob(str(tmp_path / 'teste_*.json'))[0])
+    etapas = {registro['etapa']: registro for registro in relatorio['etapas'] if registro['etapa'] != '_gravar'}
+    
+    # As etapas submetidas ao pool continuam filhas da etapa que as submeteu
+    assert all(registro['pai'] == '_etapa_externa' for registro in relatorio['etapas']
+               if registro['etapa'] != '_etapa_externa')
+    assert etapas['_etapa_externa']['nivel'] == 0 and etapas['_esperar']['nivel'] == 1
+    assert etapas['_etapa_externa']['bytes_gravados'] == 110
+    assert relatorio['resumo']['_gravar']['chamadas'] == 2
+    assert sorted(registro['linhas_saida'] for registro in relatorio['etapas']
+                  if registro['etapa'] == '_gravar') == [10, 100]
+    
+    # O tempo de CPU é o da thread da etapa: a espera não conta a CPU gasta em paralelo
+    assert etapas['_esperar']['tempo_parede'] >= 0.3
+    assert etapas['_esperar']['tempo_cpu'] < 0.1
+    assert etapas['_ocupar']['tempo_cpu'] > 0.2
+    assert relatorio['tempo_cpu'] >= etapas['_ocupar']['tempo_cpu']
+
+def test_transformacao_paralela_instrumentada(dados_brutos):
+    saida = transformar(dados_brutos, 'paralelo_instrumentado', paralelo=True, instrumentar=True)
+    caminhos = glob.glob(os.path.join(os.path.dirname(saida), 'relatorios_execucao', 'transformacao_*.json'))
+    relatorio = _carregar_relatorio(caminhos[0])
+    
+    pais = {registro['etapa']: registro['pai'] for registro in relatorio['etapas']}
+    for etapa in ['criar_dimensao_tempo', 'criar_dimensao_geografia', 'criar_dimensao_escola']:
+        assert pais[etapa] == 'construir_modelo_paralelo'
+    assert pais['construir_modelo_paralelo'] == 'main'
+    raiz = next(registro for registro in relatorio['etapas'] if registro['pai'] is None)
+    assert raiz['etapa'] == 'main' and raiz['bytes_gravados'] > 0
@@ -0,0 +1,96 @@
+"""
+Testes do executor do pipeline: etapas ignoradas sem alterações e retomada após uma falha.
+"""
+import os
+import shutil
+import pytest
+
+from pipeline import Etapa, ExecutorPipeline, criar_etapas
+
+class EtapasTeste:
+    """
+    Grafo origem -> dobro -> soma, com os valores gravados em arquivos de texto.
+    """
+    
+    def __init__(self, diretorio):
+        self.entrada = diretorio / 'entrada.txt'
+        self.entrada.write_text('3')
+        self.executadas = []
+        self.falhar = set()
+    
+    def _etapa(self, nome, calcular):
+        def funcao(configuracao, saidas_dependencias):
+            self.executadas.append(nome)
+            if nome in self.falhar:
+                raise RuntimeError(f"Falha em {nome}")
+            valores = {dependencia: int(open(saidas['valor']).read())
+                       for dependencia, saidas in saidas_dependencias.items()}
+            caminho = os.path.join(configuracao['diretorio_intermediario'], f"{nome}.txt")
+            with open(caminho, 'w') as arquivo:
+                arquivo.write(str(calcular(valores)))
+            return {'valor': caminho}
+        return funcao
+    
+    def criar(self, parametros_soma=None):
+        return [
+            Etapa('origem', self._etapa('origem', lambda valores: int(self.entrada.read_text()) % 2),
+                  modulos=('armazenamento',), entradas=lambda configuracao: {'entrada': str(self.entrada)}),
+            Etapa('dobro', self._etapa('dobro', lambda valores: valores['origem'] * 2), ('origem',)),
+            Etapa('soma', self._etapa('soma', lambda valores: valores['origem'] + valores['dobro']),
+                  ('origem', 'dobro'), parametros=parametros_soma)
+        ]
+    
+    def executar(self, diretorio, forcar=None, parametros_soma=None):
+        self.executadas = []
+        resumo = ExecutorPipeline(self.criar(parametros_soma), diretorio_base=str(diretorio)).executar(forcar=forcar)
+        return {nome: item['situacao'] for nome, item in resumo.items()}
+
+def test_etapas_sem_alteracoes_ignoradas(tmp_path):
+    etapas = EtapasTeste(tmp_path)
+    assert set(etapas.executar(tmp_path).values()) == {'executada'}
+    assert etapas.executadas == ['origem', 'dobro', 'soma']
+    assert set(etapas.executar(tmp_path).values()) == {'ignorada'}
+    
+    # Entrada alterada, mas com a mesma saída: as etapas seguintes continuam ignoradas
+    etapas.entrada.write_text('5')
+    assert etapas.executar(tmp_path) == {'origem': 'executada', 'dobro': 'ignorada', 'soma': 'ignorada'}
+    
+    # Saída alterada: as etapas que dependem dela são executadas novamente
+    etapas.entrada.write_text('4')
+    assert set(etapas.executar(tmp_path).values()) == {'executada'}
+    assert (tmp_path / 'dados_processados' / '_pipeline' / 'soma.txt').read_text() == '0'
+    
+    # Parâmetros alterados, saída removida e etapa forçada
+    assert etapas.executar(tmp_path, parametros_soma={'versao': 2})['soma'] == 'executada'
+    os.remove(tmp_path / 'dados_processados' / '_pipeline' / 'dobro.txt')
+    assert etapas.executar(tmp_path, parametros_soma={'versao': 2})['dobro'] == 'executada'
+    assert etapas.executar(tmp_path, forcar=['dobro'], parametros_soma={'versao': 2}) == \
+        {'origem': 'ignorada', 'dobro': 'executada', 'soma': 'ignorada'}
+
+def test_retomada_a_partir_da_etapa_que_falhou(tmp_path):
+    etapas = EtapasTeste(tmp_path)
+    etapas.falhar = {'soma'}
+    with pytest.raises(RuntimeError):
+        etapas.executar(tmp_path)
+    assert etapas.executadas == ['origem', 'dobro', 'soma']
+    
+    # As etapas concluídas antes da falha não são executadas novamente
+    etapas.falhar = set()
+    assert etapas.executar(tmp_path) == {'origem': 'ignorada', 'dobro': 'ignorada', 'soma': 'executada'}
+
+def test_pipeline_completo_ignorado_sem_alteracoes(dados_brutos, tmp_path):
+    shutil.copytree(dados_brutos, tmp_path / 'dados_raw')
+    
+    def executar(forcar=None):
+        resumo = ExecutorPipeline(criar_etapas(), diretorio_base=str(tmp_path)).executar(forcar=forcar)
+        return {nome: item['situacao'] for nome, item in resumo.items()}
+    
+    assert executar() == {nome: 'executada' for nome in
+                          ['dicionario', 'limpeza', 'dimensoes', 'fato', 'analises', 'graficos']}
+    assert os.listdir(tmp_path / 'resultados_analise')
+    assert set(executar().values()) == {'ignorada'}
+    
+    # O dicionário é regravado com o mesmo conteúdo: nada depois dele é executado
+    situacoes = executar(forcar=['dicionario'])
+    assert situacoes.pop('dicionario') == 'executada'
+    assert set(situacoes.values()) == {'ignorada'}
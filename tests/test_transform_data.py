@@ -0,0 +1,170 @@
+"""
+Testes dos modos de transformação, comparados com a transformação completa.
+"""
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import pytest
+
+import transform_data
+from catalogo import CatalogoDatasets, salvar_dataset
+from dados_sinteticos import TABELAS_FONTE, gerar_dados_sinteticos, popular_fonte_sqlite
+from extract_data import extrair_dados_incremental
+
+from apoio import carregar_tabelas, comparar_tabelas, transformar
+
+MODOS = {
+    'em_lotes': {'em_lotes': True, 'tamanho_lote': 700},
+    'paralelo': {'paralelo': True},
+    'fragmentado': {'fragmentado': True, 'processos': 2, 'tamanho_lote': 700},
+}
+
+@pytest.mark.parametrize('nome', list(MODOS))
+def test_modos_de_transformacao_iguais_ao_completo(dados_brutos, tabelas_completas, nome):
+    comparar_tabelas(carregar_tabelas(transformar(dados_brutos, nome, **MODOS[nome])), tabelas_completas)
+
+@pytest.mark.parametrize('nome', list(MODOS))
+def test_fato_registrada_depois_das_dimensoes(dados_brutos, monkeypatch, nome):
+    registrar_fato = transform_data.registrar_fato
+    salvar_dataset = transform_data.salvar_dataset
+    registros = []
+    
+    def salvar_dataset_lento(*args, **kwargs):
+        # Dimensões lentas: a tabela fato termina antes e precisa esperar por elas
+        time.sleep(0.2)
+        return salvar_dataset(*args, **kwargs)
+    
+    def registrar_fato_verificando(diretorio_saida, diretorio_fato, df=None):
+        catalogo = CatalogoDatasets(diretorio_saida)
+        assert all(catalogo.contem(nome_dimensao) for nome_dimensao in transform_data.DIMENSOES)
+        registros.append(diretorio_fato)
+        return registrar_fato(diretorio_saida, diretorio_fato, df)
+    
+    monkeypatch.setattr(transform_data, 'registrar_fato', registrar_fato_verificando)
+    monkeypatch.setattr(transform_data, 'salvar_dataset', salvar_dataset_lento)
+    transformar(dados_brutos, f"ordem_{nome}", **MODOS[nome])
+    assert len(registros) == 1
+
+def test_fragmentado_com_entrada_particionada_por_uf(tmp_path):
+    # SAEB extraído por (ano, sigla_uf) de uma fonte SQLite: cada processo lê só as partições da sua UF
+    fonte = popular_fonte_sqlite(str(tmp_path / 'fonte.db'), 6000, tamanho_lote=2000)
+    dados_brutos = tmp_path / 'dados_raw'
+    extrair_dados_incremental(
+        'saeb_aluno_9ano', TABELAS_FONTE['saeb_aluno_9ano'], str(dados_brutos), ['ano', 'sigla_uf'], fonte=fonte
+    )
+    for nome in ['saeb_dicionario', 'ibge_populacao']:
+        df = fonte.consultar(f"SELECT * FROM `{TABELAS_FONTE[nome]}`")
+        salvar_dataset(df, str(dados_brutos), nome, '20260101')
+    
+    esperadas = carregar_tabelas(transformar(dados_brutos, 'completo'))
+    tabelas = carregar_tabelas(transformar(dados_brutos, 'fragmentado', **MODOS['fragmentado']))
+    comparar_tabelas(tabelas, esperadas)
+
+def test_fragmentado_mantem_linhas_sem_uf(dados_brutos, tmp_path):
+    shutil.copytree(dados_brutos, tmp_path / 'dados_raw')
+    dados_brutos = tmp_path / 'dados_raw'
+    saeb = transform_data.carregar_dados(str(dados_brutos), 'saeb_aluno_9ano')
+    # Municípios sem UF informada: as suas linhas formam um fragmento à parte
+    municipios = saeb['id_municipio'].drop_duplicates().iloc[[3, 11]]
+    saeb.loc[saeb['id_municipio'].isin(municipios), 'sigla_uf'] = None
+    salvar_dataset(saeb, str(dados_brutos), 'saeb_aluno_9ano', '20260102')
+    
+    esperadas = carregar_tabelas(transformar(dados_brutos, 'completo', particionar_por_uf=True))
+    saida = transformar(dados_brutos, 'fragmentado', **MODOS['fragmentado'])
+    comparar_tabelas(carregar_tabelas(saida), esperadas)
+    particoes = CatalogoDatasets(saida).resolver('fato_desempenho')['particoes']
+    assert any(chave.endswith('sigla_uf=__ausente__') for chave in particoes)
+
+def _traducao_por_mapeamento(coluna, entradas):
+    """
+    Tradução de referência de uma coluna: um dict chave -> rótulo aplicado com map.
+    """
+    chaves = entradas['chave']
+    if pd.api.types.is_numeric_dtype(coluna.dtype):
+        chaves = pd.to_numeric(chaves, errors='coerce')
+    return coluna.map(dict(zip(chaves, entradas['valor'])))
+
+def test_dicionario_aplicado_como_categorias():
+    dados = gerar_dados_sinteticos(2000)
+    saeb = dados['saeb_aluno_9ano']
+    dicionario = pd.concat([
+        dados['saeb_dicionario'],
+        # Chave repetida (prevalece a última tradução) e chave que não é número
+        pd.DataFrame({'id_tabela': 'aluno_ef_9ano', 'variavel': 'id_localizacao',
+                      'chave': ['2', 'x'], 'valor': ['Rural (revisada)', 'Inválida']})
+    ], ignore_index=True)
+    traduzido = transform_data.aplicar_dicionario(saeb, dicionario)
+    
+    variaveis = dicionario.loc[dicionario['variavel'].isin(saeb.columns), 'variavel'].unique()
+    assert set(traduzido.columns) == set(saeb.columns) | {f"{variavel}_desc" for variavel in variaveis}
+    for variavel in variaveis:
+        descricao = traduzido[f"{variavel}_desc"]
+        assert isinstance(descricao.dtype, pd.CategoricalDtype)
+        esperado = _traducao_por_mapeamento(saeb[variavel], dicionario[dicionario['variavel'] == variavel])
+        assert descricao.astype(object).tolist() == esperado.astype(object).tolist(), variavel
+    assert 'Rural (revisada)' in set(traduzido['id_localizacao_desc'])
+    
+    # Os rótulos são guardados uma única vez: bem menos memória que colunas de texto
+    colunas_desc = [coluna for coluna in traduzido.columns if coluna.startswith('tx_resp_q')
+                    and coluna.endswith('_desc')]
+    assert colunas_desc
+    memoria_categorias = traduzido[colunas_desc].memory_usage(deep=True, index=False).sum()
+    memoria_texto = traduzido[colunas_desc].astype(object).memory_usage(deep=True, index=False).sum()
+    assert memoria_categorias * 10 < memoria_texto
+    
+    # As colunas traduzidas continuam categóricas depois da limpeza
+    limpo = transform_data.limpar_dados_saeb(traduzido)
+    assert all(isinstance(limpo[coluna].dtype, pd.CategoricalDtype) for coluna in colunas_desc)
+
+def test_fato_referencia_as_notas_sem_copia():
+    dados = gerar_dados_sinteticos(2000)
+    saeb = transform_data.limpar_dados_saeb(
+        transform_data.aplicar_dicionario(dados['saeb_aluno_9ano'], dados['saeb_dicionario'])
+    )
+    dim_tempo = transform_data.criar_dimensao_tempo(saeb)
+    dim_geografia = transform_data.criar_dimensao_geografia(saeb, dados['ibge_populacao'])
+    dim_escola = transform_data.criar_dimensao_escola(saeb)
+    fato = transform_data.criar_fato_desempenho(saeb, dim_tempo, dim_geografia, dim_escola)
+    
+    # Uma linha por aluno e as notas compartilhadas com o SAEB limpo
+    assert len(fato) == len(saeb)
+    for coluna in ['proficiencia_lp', 'proficiencia_mt', 'proficiencia_media']:
+        assert np.shares_memory(fato[coluna].to_numpy(), saeb[coluna].to_numpy())
+    
+    # Uma escola repetida na dimensão seria uma junção que duplica as linhas da fato
+    dim_escola_repetida = pd.concat([dim_escola, dim_escola.iloc[:1]], ignore_index=True)
+    with pytest.raises(ValueError, match='repetida em dim_escola'):
+        transform_data.criar_fato_desempenho(saeb, dim_tempo, dim_geografia, dim_escola_repetida)
+
+def test_perfis_com_uma_linha_por_combinacao_de_respostas(tabelas_completas):
+    dados = gerar_dados_sinteticos(2000)
+    saeb = transform_data.limpar_dados_saeb(
+        transform_data.aplicar_dicionario(dados['saeb_aluno_9ano'], dados['saeb_dicionario'])
+    )
+    for nome_dimensao, (coluna_chave, itens) in transform_data.PERFIS_QUESTIONARIO.items():
+        dimensao = transform_data.criar_dimensao_perfil(saeb, nome_dimensao)
+        colunas = transform_data.colunas_perfil(saeb.columns, itens, apenas_chave=True)
+        assert len(dimensao) == len(saeb[colunas].drop_duplicates()) < len(saeb)
+        assert dimensao[coluna_chave].is_unique
+        assert set(saeb[coluna_chave]) == set(dimensao[coluna_chave])
+        
+        # A chave depende apenas das respostas, não da ordem das categorias
+        invertido = saeb[colunas].apply(lambda coluna: coluna.cat.reorder_categories(coluna.cat.categories[::-1]))
+        assert (transform_data.calcular_chave_perfil(invertido, itens) == saeb[coluna_chave].to_numpy()).all()
+    
+    # A tabela fato completa referencia apenas perfis existentes
+    for nome_dimensao, (coluna_chave, _) in transform_data.PERFIS_QUESTIONARIO.items():
+        fato = tabelas_completas['fato_desempenho']
+        assert fato[coluna_chave].isin(tabelas_completas[nome_dimensao][coluna_chave]).all()
+
+def test_colisao_na_chave_do_perfil_rejeitada():
+    coluna_chave, itens = transform_data.PERFIS_QUESTIONARIO['dim_perfil_pretensao']
+    respostas = pd.DataFrame({item: pd.Categorical(['A', 'B', 'A']) for item in itens})
+    respostas[coluna_chave] = transform_data.calcular_chave_perfil(respostas, itens)
+    assert respostas[coluna_chave].nunique() == 2
+    
+    # Duas combinações diferentes com a mesma chave não podem formar um único perfil
+    respostas.loc[1, coluna_chave] = respostas.loc[0, coluna_chave]
+    with pytest.raises(ValueError, match='Colisão na chave id_perfil_pretensao'):
+        transform_data.criar_dimensao_perfil(respostas, 'dim_perfil_pretensao')